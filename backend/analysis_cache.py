@@ -0,0 +1,115 @@
+# analysis_cache.py
+import copy
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from text_utils import normalize_text
+
+def cache_key(text):
+    """Normalize edilmiş metnin SHA-256 özetini anahtar olarak döndürür"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+class AnalysisCache:
+    """
+    Metin analizi sonuçları için iki katmanlı önbellek.
+
+    Birinci katman süreç içi LRU'dur, ikinci katman MongoDB koleksiyonudur.
+    Kayıtlar ttl_seconds sonra geçersiz olur; hata içeren sonuçlar asla
+    önbelleğe yazılmaz.
+    """
+
+    def __init__(self, collection=None, max_size=10000, ttl_seconds=86400):
+        self.collection = collection
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._lru = OrderedDict()  # key -> (kayıt zamanı, analiz)
+        self.stats = {
+            "memory_hits": 0,
+            "mongo_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "mongo_errors": 0,
+        }
+
+    async def ensure_indexes(self):
+        """Mongo katmanı için TTL index'ini oluşturur"""
+        if self.collection is not None:
+            await self.collection.create_index(
+                "created_at", expireAfterSeconds=self.ttl_seconds
+            )
+
+    def _remember(self, key, analysis, stored_at):
+        self._lru[key] = (stored_at, analysis)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_size:
+            self._lru.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def get(self, text):
+        """Önbellekteki analizi döndürür, yoksa None"""
+        key = cache_key(text)
+        now = time.time()
+
+        cached = self._lru.get(key)
+        if cached is not None:
+            stored_at, analysis = cached
+            if now - stored_at < self.ttl_seconds:
+                self._lru.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return copy.deepcopy(analysis)
+            del self._lru[key]
+
+        if self.collection is not None:
+            try:
+                doc = await self.collection.find_one({"_id": key})
+            except Exception:
+                self.stats["mongo_errors"] += 1
+                doc = None
+            # TTL monitörü dakikada bir çalıştığı için süreyi burada da kontrol et
+            if doc and doc["created_at"] > datetime.now() - timedelta(seconds=self.ttl_seconds):
+                self._remember(key, doc["analysis"], doc["created_at"].timestamp())
+                self.stats["mongo_hits"] += 1
+                return copy.deepcopy(doc["analysis"])
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, text, analysis):
+        """Başarılı analiz sonucunu iki katmana da yazar"""
+        if not isinstance(analysis, dict) or "error" in analysis:
+            return
+
+        key = cache_key(text)
+        analysis = copy.deepcopy(analysis)
+        now = datetime.now()
+        self._remember(key, analysis, now.timestamp())
+        self.stats["stores"] += 1
+
+        if self.collection is not None:
+            try:
+                await self.collection.replace_one(
+                    {"_id": key},
+                    {"_id": key, "analysis": analysis, "created_at": now},
+                    upsert=True
+                )
+            except Exception:
+                self.stats["mongo_errors"] += 1
+
+    def clear(self):
+        """Süreç içi katmanı boşaltır"""
+        self._lru.clear()
+
+    def get_stats(self):
+        """İsabet/ıskalama sayaçlarını ve doluluk bilgisini döndürür"""
+        hits = self.stats["memory_hits"] + self.stats["mongo_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._lru),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
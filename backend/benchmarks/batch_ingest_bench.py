@@ -0,0 +1,69 @@
+"""
+/submit-entry ile /submit-entries/batch yollarının kayıt/saniye karşılaştırması.
+
+Aynı N metni önce tek tek (eşzamanlılık sınırıyla), sonra toplu endpoint'e
+gönderir. Metinlere sıra numarası eklenir ki analiz önbelleği sonucu
+etkilemesin.
+
+Kullanım:
+    python benchmarks/batch_ingest_bench.py --url http://localhost:8000 --count 100
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+TEMPLATES = [
+    "Su: {n} adet, Battaniye: 20 adet malzemelerini bağışlayabilirim. Konumum: İzmir",
+    "Bebek maması ve {n} şişe su lazım. Konum: Hatay. Aciliyet: acil",
+    "Lojistik firması olarak {n} tır sunabilirim. Konum: Ankara",
+    "Market olarak Konserve, Çadır malzemeleri sağlayabilirim. Konum: Bursa ({n})",
+]
+
+def make_texts(count):
+    run = uuid.uuid4().hex[:6]
+    return [
+        TEMPLATES[i % len(TEMPLATES)].format(n=i + 1) + f" #{run}"
+        for i in range(count)
+    ]
+
+async def per_entry(client, texts, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def submit(text):
+        async with semaphore:
+            response = await client.post("/submit-entry", json={"text": text, "name": "bench"})
+            return response.status_code == 200
+
+    started = time.perf_counter()
+    ok = sum(await asyncio.gather(*(submit(t) for t in texts)))
+    return ok, time.perf_counter() - started
+
+async def batched(client, texts, chunk):
+    started = time.perf_counter()
+    ok = 0
+    for i in range(0, len(texts), chunk):
+        payload = {"entries": [{"text": t, "name": "bench"} for t in texts[i:i + chunk]]}
+        response = await client.post("/submit-entries/batch", json=payload)
+        response.raise_for_status()
+        ok += len(response.json()["ids"])
+    return ok, time.perf_counter() - started
+
+async def run(url, count, concurrency, chunk):
+    async with httpx.AsyncClient(base_url=url, timeout=300) as client:
+        single_ok, single_time = await per_entry(client, make_texts(count), concurrency)
+        batch_ok, batch_time = await batched(client, make_texts(count), chunk)
+
+    print(f"Tek tek : {single_ok}/{count} kayıt, {single_time:.2f} sn, {single_ok / single_time:.2f} kayıt/sn")
+    print(f"Toplu   : {batch_ok}/{count} kayıt, {batch_time:.2f} sn, {batch_ok / batch_time:.2f} kayıt/sn")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--chunk", type=int, default=100, help="Bir toplu istekteki kayıt sayısı")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.count, args.concurrency, args.chunk))
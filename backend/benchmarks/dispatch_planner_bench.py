@@ -0,0 +1,119 @@
+"""
+Sevkiyat planlayıcısının hızını ve plan kalitesini ölçer.
+
+İki senaryo çalıştırılır:
+  * mevcut mock veri (MOCK_TRUCKS + MOCK_MARKETS) ile eski açgözlü davranış
+    (en yakın 3 şehirden yalnızca ilk acil ihtiyaç için tır) karşılaştırması
+  * 81 il × --products ürünlük sentetik senaryoda, normal ve dar filo
+    kapasitesiyle planlama süresi
+
+Dar kapasiteli senaryonun planlama süresi --max-seconds'ı (varsayılan 1 sn)
+aşarsa betik hata koduyla çıkar.
+
+Kullanım:
+    python benchmarks/dispatch_planner_bench.py --products 300
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dispatch_planner import PRIORITY_WEIGHTS, plan_dispatch  # noqa: E402
+from gazetteer import PROVINCES  # noqa: E402
+from mock_trucks import MOCK_TRUCKS, calculate_route  # noqa: E402
+from road_graph import get_road_graph  # noqa: E402
+
+PRIORITIES = list(PRIORITY_WEIGHTS)
+
+def greedy_baseline(konum, needs):
+    """Eski simulate_earthquake davranışı: en yakın 3 şehir, yalnızca ilk acil ihtiyaç"""
+    urgent = [n for n in needs if n["öncelik"] in ("acil", "yüksek")]
+    served = 0
+    weighted = 0
+    for city, _ in get_road_graph().nearest(konum, 3):
+        route = calculate_route(city, konum)
+        if MOCK_TRUCKS.get(city) and urgent and route is not None:
+            need = urgent[0]
+            minutes = round(route["travel_time"] * 60)
+            served += need["miktar"]
+            weighted += PRIORITY_WEIGHTS[need["öncelik"]] * minutes * need["miktar"]
+    return served, weighted
+
+def mock_scenario(seed=1):
+    rng = random.Random(seed)
+    products = ["Su", "Battaniye", "Çadır", "Konserve", "İlk yardım"]
+    return [
+        {"id": str(i), "urun": rng.choice(products), "miktar": rng.randint(10, 2000),
+         "öncelik": rng.choice(PRIORITIES)}
+        for i in range(60)
+    ]
+
+def synthetic_scenario(product_count, tight=False, seed=2):
+    """
+    81 ilin her birinde filo ve product_count üründen rastgele stok.
+
+    Varsayılan profil MOCK_TRUCKS/MOCK_MARKETS ölçeğindedir (şehir başına 1-3 firma,
+    ihtiyaç başına 10-2000 birim). tight=True'da her şehirde tek firma vardır ve
+    ihtiyaçlar 100-5000 birimdir; yakın şehirlerin kapasitesi hemen dolar.
+    """
+    rng = random.Random(seed)
+    products = [f"Ürün {i}" for i in range(product_count)]
+    fleets = {
+        city: [
+            {"company": f"{city} Lojistik {j}", "trucks": rng.randint(5, 20),
+             "capacity_per_truck": rng.choice([4500, 5000, 6000, 7000])}
+            for j in range(1 if tight else rng.randint(1, 3))
+        ]
+        for city in PROVINCES
+    }
+    stocks = {
+        city: {p.lower(): (p, rng.randint(0, 3000)) for p in products if rng.random() < 0.3}
+        for city in PROVINCES
+    }
+    minutes = {city: rng.randint(60, 1200) for city in PROVINCES}
+    low, high = (100, 5000) if tight else (10, 2000)
+    needs = [
+        {"id": str(i), "urun": products[i % product_count], "miktar": rng.randint(low, high),
+         "öncelik": rng.choice(PRIORITIES)}
+        for i in range(product_count * 2)
+    ]
+    return (
+        needs, fleets,
+        lambda city: stocks[city],
+        lambda a, b: {"distance": minutes[a] * 80 / 60, "travel_time": minutes[a] / 60}
+    )
+
+def run(product_count, max_seconds):
+    needs = mock_scenario()
+    plan = plan_dispatch("Hatay", needs)
+    greedy_served, greedy_weighted = greedy_baseline("Hatay", needs)
+    requested = sum(n["miktar"] for n in needs)
+    print("Mock veri, Hatay, 60 ihtiyaç:")
+    print(f"  talep edilen:       {requested}")
+    print(f"  açgözlü (eski):     {greedy_served} birim, birim başına ağırlıklı süre "
+          f"{greedy_weighted / max(greedy_served, 1):.0f} dk")
+    print(f"  planlayıcı:         {plan['served']} birim, birim başına ağırlıklı süre "
+          f"{plan['weighted_delivery_minutes'] / max(plan['served'], 1):.0f} dk, "
+          f"{len(plan['fleet_usage'])} filo")
+
+    for tight in (False, True):
+        needs, fleets, stock_for, route_for = synthetic_scenario(product_count, tight)
+        started = time.perf_counter()
+        plan = plan_dispatch("Hatay", needs, fleets=fleets, stock_for=stock_for, route_for=route_for)
+        elapsed = time.perf_counter() - started
+        print(f"Sentetik ({'dar' if tight else 'normal'} kapasite): 81 il × {product_count} ürün, "
+              f"{len(needs)} ihtiyaç")
+        print(f"  süre: {elapsed * 1000:.0f} ms, karşılanan {plan['served']}/{plan['requested']}, "
+              f"{len(plan['allocations'])} atama")
+    if elapsed > max_seconds:
+        sys.exit(f"Dar kapasiteli planlama {elapsed:.2f} sn sürdü; hedef {max_seconds} sn")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=300)
+    parser.add_argument("--max-seconds", type=float, default=1.0, help="dar kapasiteli senaryo için süre hedefi")
+    args = parser.parse_args()
+    run(args.products, args.max_seconds)
@@ -0,0 +1,124 @@
+"""
+/match ve deprem simülasyonu sorgularının sentetik veriyle karşılaştırması.
+
+Yerel bir mongod üzerindeki geçici veritabanına N sentetik kayıt yazar,
+ENTRY_MATCH_INDEX'i oluşturur ve:
+  * eski yöntemi (şehirdeki tüm aktif kayıtları çekip Python'da filtrelemek)
+  * yeni aggregation pipeline'larını
+aynı sorgular için ölçer. İki yolun aynı sonucu verdiği ve pipeline'ların
+bileşik index'i kullandığı (IXSCAN, COLLSCAN yok) tests/test_entry_queries.py'de
+kontrol edilir.
+
+Kullanım:
+    python benchmarks/entry_queries_bench.py --url mongodb://localhost:27017 --count 1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from entry_queries import (  # noqa: E402
+    ENTRY_MATCH_INDEX, earthquake_resources_pipeline, match_pipeline
+)
+from gazetteer import PROVINCES  # noqa: E402
+from product_catalog import annotate_products  # noqa: E402
+
+PRODUCTS = ["Su", "Battaniye", "Çadır", "Konserve", "İlk yardım", "Bebek maması", "İlaç", "Mont"]
+PRIORITIES = ["düşük", "orta", "yüksek", "acil"]
+
+def synthetic_entry(rng, now):
+    urunler = [
+        {"urun_adi": name, "miktar": rng.randint(1, 500), "birim": "adet"}
+        for name in rng.sample(PRODUCTS, rng.randint(1, 3))
+    ]
+    return {
+        "name": f"kullanici-{rng.randint(1, 10**6)}",
+        "original_text": "sentetik kayıt",
+        "analysis": annotate_products({
+            "ihtiyac_var": rng.random() < 0.5,
+            "konum": rng.choice(PROVINCES),
+            "urunler": urunler,
+            "öncelik": rng.choice(PRIORITIES)
+        }),
+        "timestamp": now - timedelta(seconds=rng.randint(0, 86400)),
+        "status": "aktif"
+    }
+
+async def seed(collection, count, batch=10000):
+    rng = random.Random(42)
+    now = datetime.now()
+    for start in range(0, count, batch):
+        await collection.insert_many(
+            [synthetic_entry(rng, now) for _ in range(min(batch, count - start))], ordered=False
+        )
+    await collection.create_index(ENTRY_MATCH_INDEX)
+
+async def legacy_match(collection, konum, urun_adi):
+    supply, demand = [], []
+    async for entry in collection.find({"analysis.konum": konum, "status": "aktif"}):
+        for urun in entry["analysis"]["urunler"]:
+            if urun["urun_adi"].lower() == urun_adi.lower():
+                (supply if entry["analysis"]["ihtiyac_var"] is False else demand).append(urun["miktar"])
+    return len(supply), len(demand)
+
+async def pipeline_match(collection, konum, urun_adi):
+    async for doc in collection.aggregate(match_pipeline(konum, urun_adi)):
+        return len(doc["arz"]), len(doc["talep"])
+    return 0, 0
+
+async def legacy_resources(collection, konum):
+    totals = {}
+    async for entry in collection.find({"analysis.konum": konum, "status": "aktif"}):
+        if not entry["analysis"]["ihtiyac_var"]:
+            for urun in entry["analysis"]["urunler"]:
+                totals[urun["urun_adi"]] = totals.get(urun["urun_adi"], 0) + urun["miktar"]
+    return totals
+
+async def pipeline_resources(collection, konum):
+    async for doc in collection.aggregate(earthquake_resources_pipeline(konum)):
+        return {r["urun_adi"]: r["miktar"] for r in doc["resources"]}
+    return {}
+
+async def timed(label, func, *args, repeat=5):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = await func(*args)
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+    print(f"  {label:28s} {elapsed:9.1f} ms")
+    return result
+
+async def run(url, count, keep):
+    client = AsyncIOMotorClient(url)
+    db = client["deprem_yardim_bench"]
+    collection = db.entries
+    if not keep or await collection.estimated_document_count() != count:
+        await collection.drop()
+        print(f"{count} sentetik kayıt yazılıyor...")
+        await seed(collection, count)
+
+    print("/match (Hatay, su):")
+    await timed("eski (Python filtre)", legacy_match, collection, "Hatay", "su")
+    await timed("aggregation pipeline", pipeline_match, collection, "Hatay", "su")
+
+    print("deprem kaynak toplama (Hatay):")
+    await timed("eski (Python gruplama)", legacy_resources, collection, "Hatay")
+    await timed("aggregation pipeline", pipeline_resources, collection, "Hatay")
+
+    if not keep:
+        await collection.drop()
+    client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="mongodb://localhost:27017")
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--keep", action="store_true", help="Veriyi sonraki çalıştırmalar için sakla")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.count, args.keep))
@@ -0,0 +1,95 @@
+"""
+Canlı güncelleme merkezinin (EventHub) dağıtım gecikmesi ve polling ile karşılaştırması.
+
+--subscribers adet abone görevi açılır (bir kısmı tek şehre, bir kısmı tüm
+şehirlere abone). Saniyede --rate olay yayınlanır; her olayın yayından
+abonenin eline geçene kadar geçen süresi ölçülür (p50/p99). --slow
+oranındaki aboneler yavaş okur; bunlar için birleştirilen ve atılan
+olay sayıları raporlanır. Son olarak aynı sayıda istemcinin --poll-interval
+saniyede bir /stock-summary çağırması durumunda veritabanına gidecek
+sorgu sayısı, push ile gereken sorgu sayısıyla (sıfır) karşılaştırılır.
+
+Kullanım:
+    python benchmarks/event_hub_bench.py --subscribers 5000 --events 1000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from event_hub import ENTRY, STOCK, EventHub  # noqa: E402
+from gazetteer import PROVINCE_COORDINATES  # noqa: E402
+
+CITIES = list(PROVINCE_COORDINATES)
+
+async def consume(subscription, latencies, stop, delay):
+    while not stop.is_set():
+        events = await subscription.get(timeout=0.2)
+        now = time.perf_counter()
+        for event in events:
+            sent = event["data"].get("sent")
+            if sent is not None:
+                latencies.append(now - sent)
+        if delay:
+            await asyncio.sleep(delay)
+
+async def run(subscriber_count, event_count, rate, slow_ratio, max_pending, poll_interval):
+    rng = random.Random(11)
+    hub = EventHub(max_pending=max_pending)
+    latencies = []
+    stop = asyncio.Event()
+    tasks = []
+    for n in range(subscriber_count):
+        cities = None if n % 10 == 0 else [rng.choice(CITIES)]
+        delay = 0.5 if rng.random() < slow_ratio else 0
+        tasks.append(asyncio.create_task(consume(hub.subscribe(cities), latencies, stop, delay)))
+    await asyncio.sleep(0.1)
+
+    started = time.perf_counter()
+    publish_time = 0.0
+    for n in range(event_count):
+        city = rng.choice(CITIES)
+        t0 = time.perf_counter()
+        if n % 2:
+            hub.publish(STOCK, city, {"supplies": {"su": 12}, "trucks": 0, "entry_count": 1,
+                                      "sent": t0})
+        else:
+            hub.publish(ENTRY, city, {"name": "Anonim", "text": "10 koli su", "sent": t0})
+        publish_time += time.perf_counter() - t0
+        await asyncio.sleep(1 / rate)
+    await asyncio.sleep(0.6)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*tasks)
+
+    metrics = hub.get_metrics()
+    print(f"{subscriber_count} abone, {event_count} olay, {elapsed:.1f} sn")
+    print(f"publish: ortalama {publish_time / event_count * 1e6:.0f} µs/olay")
+    if latencies:
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        print(f"Dağıtım gecikmesi: p50 {statistics.median(latencies) * 1000:.2f} ms, "
+              f"p99 {p99 * 1000:.2f} ms ({len(latencies)} teslim)")
+    print(f"Teslim: {metrics['delivered']}, birleştirilen: {metrics['coalesced']}, "
+          f"atılan: {metrics['dropped']}")
+
+    polls = subscriber_count * elapsed / poll_interval
+    print(f"Polling ({poll_interval:.0f} sn'de bir /stock-summary): {polls:.0f} özet sorgusu "
+          f"(her biri city_stock taraması); push ile: 0")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=500, help="saniyedeki olay")
+    parser.add_argument("--slow", type=float, default=0.05, help="yavaş abone oranı")
+    parser.add_argument("--max-pending", type=int, default=16)
+    parser.add_argument("--poll-interval", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.subscribers, args.events, args.rate, args.slow,
+                    args.max_pending, args.poll_interval))
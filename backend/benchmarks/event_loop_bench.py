@@ -0,0 +1,128 @@
+"""
+Yavaş Gemini analizleri sürerken okuma endpoint'lerinin hızını ölçer.
+
+Önce tek başına /truck-status ve /stock-summary okumalarını, sonra aynı
+okumaları N adet /analyze isteği havadayken ölçer. Event loop bloklanmıyorsa
+iki ölçüm birbirine yakın çıkmalıdır.
+
+Analiz edilen metinler kural tabanlı çıkarıcının çözemediği serbest
+metinlerdir ve her biri tekil bir ek taşır; böylece hızlı yol ve analiz
+önbelleği atlanır, her istek gerçekten Gemini'ye gider.
+
+--url verilmezse uygulama süreç içinde (mongomock ve --latency saniye sabit
+gecikmeli sahte Gemini modeliyle) çalıştırılır ve okumalar ölçülürken tüm
+analizlerin modelde beklediği doğrulanır. --url ile çalışan bir sunucu
+(gerçek Gemini) ölçülür.
+
+Kullanım:
+    python benchmarks/event_loop_bench.py --slow 20 --latency 8
+    uvicorn main:app --port 8000
+    python benchmarks/event_loop_bench.py --url http://localhost:8000 --slow 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from rule_extractor import extract_if_confident  # noqa: E402
+
+READ_PATHS = ["/truck-status/İstanbul", "/stock-summary"]
+# Kural tabanlı çıkarıcının güvenle çözemediği serbest metinler
+SLOW_TEXTS = [
+    "Annemle birlikte çadırda kalıyoruz, geceler çok soğuk geçiyor, yardım edebilecek biri varsa ulaşsın",
+    "Komşularımız günlerdir dışarıda, çocuklar için bir şeyler lazım ama ne bulabiliriz bilmiyorum",
+    "Bağış yapmak istiyorum ama elimdekilerin işe yarayıp yaramayacağından emin değilim",
+]
+
+def slow_texts(count):
+    """Önbellekte bulunmayacak, Gemini'ye gidecek count adet metin"""
+    texts = [f"{SLOW_TEXTS[i % len(SLOW_TEXTS)]} (ref {uuid.uuid4().hex[:8]})" for i in range(count)]
+    if any(extract_if_confident(text) is not None for text in texts):
+        sys.exit("Hızlı yol metinlerden birini çözdü; SLOW_TEXTS güncellenmeli")
+    return texts
+
+async def measure_reads(client, duration):
+    """duration saniye boyunca okuma endpoint'lerini çağırıp istek/saniye döndürür"""
+    done = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        for path in READ_PATHS:
+            response = await client.get(path)
+            response.raise_for_status()
+            done += 1
+    return done / duration
+
+@asynccontextmanager
+async def in_process(args):
+    """Uygulamayı mongomock ve sabit gecikmeli sahte Gemini ile süreç içinde açar"""
+    from mongomock_motor import AsyncMongoMockClient
+
+    import gemini_analyzer
+    import main
+    from fake_gemini import FakeGeminiModel
+    from gemini_client import GeminiClient
+
+    model = FakeGeminiModel(latency=args.latency, jitter=0)
+    gemini_analyzer.set_model(model)
+    # Tüm analizler aynı anda modelde beklesin (kota/kuyruk sınırı ölçümü bozmasın)
+    gemini_analyzer.gemini_client = GeminiClient(
+        rate_per_minute=60 * args.slow, burst=args.slow, max_concurrency=args.slow,
+        max_queue=args.slow, queue_timeout=args.latency * 2
+    )
+    gemini_analyzer.GEMINI_TIMEOUT = args.latency * 2
+    main.bind_database(AsyncMongoMockClient()["event_loop_bench"])
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            yield client, model
+
+@asynccontextmanager
+async def remote(args):
+    async with httpx.AsyncClient(base_url=args.url, timeout=120) as client:
+        yield client, None
+
+async def run(args):
+    if args.url is None and args.latency <= args.duration + 1:
+        sys.exit("--latency, analizler ölçüm boyunca havada kalsın diye --duration + 1'den büyük olmalı")
+    texts = slow_texts(args.slow)
+    async with (remote(args) if args.url else in_process(args)) as (client, model):
+        baseline = await measure_reads(client, args.duration)
+
+        started = time.perf_counter()
+        slow_tasks = [asyncio.create_task(client.post("/analyze", json={"text": text})) for text in texts]
+        # Analizlerin gerçekten havada olduğundan emin ol
+        await asyncio.sleep(0.2)
+        under_load = await measure_reads(client, args.duration)
+        finished_early = sum(task.done() for task in slow_tasks)
+        responses = await asyncio.gather(*slow_tasks, return_exceptions=True)
+        analysis_time = time.perf_counter() - started
+
+    ok = sum(1 for r in responses if isinstance(r, httpx.Response) and r.status_code == 200)
+    print(f"Okuma hızı (yalnız):            {baseline:8.1f} istek/sn")
+    print(f"Okuma hızı ({args.slow} analiz havada): {under_load:8.1f} istek/sn")
+    print(f"Oran: {under_load / baseline:.2f}")
+    print(f"Analizler: {ok}/{args.slow} başarılı, {analysis_time:.1f} sn; "
+          f"okumalar bitmeden tamamlanan {finished_early}")
+    if model is not None:
+        print(f"Sahte Gemini çağrısı: {model.stats['calls']}")
+        # Analizler hızlı yola/önbelleğe düşseydi ölçüm boyunca havada olmazlardı
+        if finished_early or model.stats["calls"] != args.slow or ok != args.slow:
+            sys.exit("Analizler ölçüm boyunca Gemini'de beklemedi; ölçüm geçersiz")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=None, help="verilmezse uygulama süreç içinde sahte Gemini ile çalışır")
+    parser.add_argument("--slow", type=int, default=20, help="Havadaki /analyze sayısı")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--latency", type=float, default=8.0, help="sahte Gemini gecikmesi (sn)")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,162 @@
+"""
+Ağsız yük testleri için Gemini yerine geçen sahte model.
+
+gemini_analyzer.set_model(FakeGeminiModel(...)) ile kullanılır. Yanıtlar
+prompt'taki metin(ler)den kural tabanlı çıkarıcıyla üretilir (veya canned
+ile sabitlenir). Her çağrı latency ± jitter saniye sürer ve error_rate
+olasılıkla 429 hatası verir, spike_rate olasılıkla da spike_latency
+saniye sürer; böylece yavaş, kotası dolmuş veya hata veren bir Gemini
+altında servisin davranışı ölçülebilir. Ayarlar çalışırken değiştirilebilir
+(örn. error_rate = 1.0 ile kesinti).
+
+generation_config'te JSON modu (response_mime_type) istenirse yanıt
+çıplak JSON'dur ve max_output_tokens'ta kesilir. İstenmezse gerçek modelin
+serbest metin alışkanlıkları taklit edilir: JSON ```json bloğuna sarılır ve
+chatter_rate olasılıkla önüne/arkasına açıklama cümlesi eklenir. Token
+sayıları (4 karakter ≈ 1 token) usage_metadata'da döner.
+"""
+import asyncio
+import json
+import random
+import re
+import time
+from types import SimpleNamespace
+
+from rule_extractor import extract
+
+_SINGLE_TEXT = re.compile(r'Metin: "(.*)"\s*(?:\n\s*İstenilen JSON|\Z)', re.S)
+_BATCH_LINE = re.compile(r'^\s*(\d+)\. (".*")\s*$', re.M)
+_CANDIDATE_LINE = re.compile(r'^\s*- ([^:,\n]+): (\S+) adet, (\S+) km', re.M)
+_RISK_LINE = re.compile(r'^\s*- ([^:\n]+): (\d+) kayıt', re.M)
+
+# Serbest metin yanıtlarında JSON'un çevresine eklenen açıklamalar
+_CHATTER = [
+    "İşte analiz sonucu:\n```json\n{}\n```",
+    "```json\n{}\n```\nNot: Miktarlar metindeki ifadelerden tahmin edilmiştir.",
+    "Metni inceledim. Sonuç aşağıda:\n\n{}",
+]
+
+def estimate_tokens(text):
+    """Kaba token tahmini (Gemini'de Türkçe metin için ~4 karakter/token)"""
+    return max(1, len(text) // 4)
+
+class FakeResponse:
+    def __init__(self, text, prompt_tokens=0):
+        self.text = text
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=estimate_tokens(text),
+            total_token_count=prompt_tokens + estimate_tokens(text)
+        )
+
+class FakeGeminiError(Exception):
+    """google.api_core hataları gibi HTTP durum kodunu code'da taşır"""
+
+    def __init__(self, message, code=429):
+        super().__init__(message)
+        self.code = code
+
+class FakeGeminiModel:
+    """
+    Args:
+        latency (float): Ortalama yanıt süresi (saniye)
+        jitter (float): Süreye eklenen ± rastgele sapma (saniye)
+        error_rate (float): Hata veren çağrı oranı (0-1)
+        canned (dict veya str): Verilirse tüm analiz prompt'larına bu yanıt döner
+        seed (int): Tekrarlanabilir süre/hata dizisi için
+        chatter_rate (float): JSON modu dışında yanıta açıklama eklenme oranı (0-1)
+        spike_rate (float): Gecikme sıçraması olan çağrı oranı (0-1)
+        spike_latency (float): Sıçramalı çağrıların süresi (saniye)
+    """
+
+    def __init__(self, latency=0.5, jitter=0.2, error_rate=0.0, canned=None, seed=0, chatter_rate=0.0,
+                 spike_rate=0.0, spike_latency=10.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.spike_rate = spike_rate
+        self.spike_latency = spike_latency
+        self.canned = canned
+        self.chatter_rate = chatter_rate
+        self._rng = random.Random(seed)
+        self.stats = {"calls": 0, "errors": 0, "batch_calls": 0, "prompt_tokens": 0, "output_tokens": 0}
+
+    def _delay(self):
+        if self.spike_rate and self._rng.random() < self.spike_rate:
+            return self.spike_latency
+        return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def _payload(self, prompt, schema):
+        """Prompt'a (ve varsa yanıt şemasına) uygun yanıt nesnesi"""
+        if self.canned is not None:
+            return self.canned
+
+        lines = _BATCH_LINE.findall(prompt)
+        if lines and "numaralı metinlerin" in prompt:
+            self.stats["batch_calls"] += 1
+            return [{"index": int(i), **extract(json.loads(text))[0]} for i, text in lines]
+
+        single = _SINGLE_TEXT.search(prompt)
+        if single:
+            return extract(single.group(1))[0]
+
+        properties = (schema or {}).get("properties", {})
+        if "recommended_city" in properties or "recommended_city" in prompt:
+            candidates = _CANDIDATE_LINE.findall(prompt)
+            allowed = properties.get("recommended_city", {}).get("enum")
+            if candidates:
+                city, amount, distance = candidates[0]
+            else:
+                city, amount, distance = (allowed or ["Ankara"])[0], "0", ""
+            return {"recommended_city": city.strip(), "reason": "En yakın ve stoğu yeterli aday",
+                    "distance": distance, "available_amount": amount}
+
+        if "high_risk" in properties or "high_risk" in prompt:
+            busiest = [city.strip() for city, _ in _RISK_LINE.findall(prompt)]
+            return {"high_risk": busiest[:3] or ["Hatay", "Kahramanmaraş"],
+                    "low_supply": busiest[3:5] or ["Adıyaman"],
+                    "recommendation": "Sahte model yanıtı: en çok kayıt alan şehirlere sevkiyat artırılmalı"}
+
+        return {
+            "high_risk": ["Hatay", "Kahramanmaraş"],
+            "low_supply": ["Adıyaman"],
+            "recommendation": "Sahte model yanıtı",
+            "best_match": None,
+            "reason": "Sahte model yanıtı"
+        }
+
+    def _answer(self, prompt, generation_config=None):
+        self.stats["calls"] += 1
+        prompt_tokens = estimate_tokens(prompt)
+        self.stats["prompt_tokens"] += prompt_tokens
+        if self._rng.random() < self.error_rate:
+            self.stats["errors"] += 1
+            raise FakeGeminiError("429 Resource has been exhausted (sahte)")
+
+        config = generation_config or {}
+        schema = config.get("response_schema") or {}
+        if schema.get("type") == "array":
+            schema = schema.get("items", {})
+        payload = self._payload(prompt, schema)
+        body = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+
+        if config.get("response_mime_type") == "application/json":
+            limit = config.get("max_output_tokens")
+            if limit and estimate_tokens(body) > limit:
+                body = body[:limit * 4]
+        elif self._rng.random() < self.chatter_rate:
+            body = self._rng.choice(_CHATTER).format(body)
+        else:
+            body = "```json\n" + body + "\n```"
+
+        response = FakeResponse(body, prompt_tokens)
+        self.stats["output_tokens"] += response.usage_metadata.candidates_token_count
+        return response
+
+    async def generate_content_async(self, prompt, generation_config=None, **kwargs):
+        await asyncio.sleep(self._delay())
+        return self._answer(prompt, generation_config)
+
+    def generate_content(self, prompt, generation_config=None, **kwargs):
+        time.sleep(self._delay())
+        return self._answer(prompt, generation_config)
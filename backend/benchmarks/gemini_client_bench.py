@@ -0,0 +1,174 @@
+"""
+Gemini kabul katmanının (GeminiClient) hata senaryolarındaki davranışı.
+
+analyze_help_text_async, sahte modelle (FakeGeminiModel) sabit hızda
+(açık döngü) çağrılır. Senaryolar:
+  * sağlıklı: normal gecikme
+  * kesinti (429): sürenin ilk yarısında tüm çağrılar 429 döner, sonra düzelir
+  * kesinti (zaman aşımı): ilk yarıda tüm çağrılar GEMINI_TIMEOUT'u aşar
+  * gecikme sıçraması: çağrıların --spike-rate kadarı GEMINI_TIMEOUT'u aşar
+  * kota aşımı: istek hızı kotanın (GEMINI_RPM) üç katı
+
+Her senaryo devre kesici açıkken ve kapalıyken (eşik sonsuz) çalıştırılır;
+yanıt verimi, gecikme, Gemini'ye giden çağrı sayısı ve sonuçlar (analiz
+edildi / ertelendi / hata) raporlanır. Sonda beklenen davranışlar (devrenin
+açılıp kesinti bitince kapanması, kesintide Gemini'ye giden çağrının
+sınırlı kalması, kuyruğun sınırı aşmaması) yük altında karşılaştırılır;
+aynı davranışların birim testleri tests/test_gemini_client.py'dedir.
+
+Kullanım:
+    python benchmarks/gemini_client_bench.py --rate 50 --duration 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import gemini_analyzer  # noqa: E402
+from fake_gemini import FakeGeminiModel  # noqa: E402
+from gemini_client import CLOSED, GeminiClient  # noqa: E402
+from rule_extractor import extract_if_confident  # noqa: E402
+from traffic import TrafficGenerator  # noqa: E402
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))] if values else 0.0
+
+def llm_texts(count, seed):
+    """Kural tabanlı çıkarıcının çözemediği (Gemini'ye gidecek) metinler"""
+    traffic = TrafficGenerator(seed=seed)
+    texts = []
+    while len(texts) < count:
+        text = traffic.entry()["text"]
+        if extract_if_confident(text) is None:
+            texts.append(text)
+    return texts
+
+async def run(args, scenario, breaker):
+    model = FakeGeminiModel(latency=args.latency, jitter=args.latency / 3, seed=args.seed)
+    quota_rpm = args.rate * 60 / 3 if scenario == "kota aşımı" else args.rate * 60 * 2
+    if scenario == "gecikme sıçraması":
+        model.spike_rate, model.spike_latency = args.spike_rate, args.timeout * 5
+    outage = scenario.startswith("kesinti")
+    if scenario == "kesinti (429)":
+        model.error_rate = 1.0
+    elif scenario == "kesinti (zaman aşımı)":
+        model.spike_rate, model.spike_latency = 1.0, args.timeout * 5
+    client = GeminiClient(
+        rate_per_minute=quota_rpm, burst=args.rate, max_concurrency=args.concurrency,
+        max_queue=args.max_queue, queue_timeout=args.timeout,
+        failure_threshold=5 if breaker else 10 ** 9, reset_timeout=args.reset
+    )
+    gemini_analyzer.set_model(model)
+    gemini_analyzer.gemini_client = client
+    gemini_analyzer.GEMINI_TIMEOUT = args.timeout
+
+    texts = llm_texts(int(args.rate * args.duration), args.seed)
+    outcomes = {"analiz": 0, "ertelendi": 0, "hata": 0}
+    latencies = []
+    max_waiting = 0
+    outage_upstream = None
+
+    async def request(text):
+        nonlocal max_waiting
+        started = time.perf_counter()
+        result = await gemini_analyzer.analyze_help_text_async(text)
+        latencies.append(time.perf_counter() - started)
+        max_waiting = max(max_waiting, client._waiting)
+        if "error" not in result:
+            outcomes["analiz"] += 1
+        elif result.get("unavailable"):
+            outcomes["ertelendi"] += 1
+        else:
+            outcomes["hata"] += 1
+
+    started = time.perf_counter()
+    tasks = []
+    for i, text in enumerate(texts):
+        if outage and i == len(texts) // 2:
+            model.error_rate = model.spike_rate = 0.0
+            outage_upstream = client.stats["admitted"]
+        tasks.append(asyncio.create_task(request(text)))
+        await asyncio.sleep(1 / args.rate)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "scenario": scenario,
+        "breaker": breaker,
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "upstream": client.stats["admitted"],
+        "outage_upstream": outage_upstream,
+        "outcomes": outcomes,
+        "state": client.breaker.state,
+        "opened": client.breaker.stats["opened"],
+        "max_waiting": max_waiting,
+        "shed": {k: client.stats[k] for k in ("circuit_open", "queue_full", "queue_timeout", "rate_limited")},
+    }
+
+def report(row):
+    label = f"{row['scenario']} ({'kesici açık' if row['breaker'] else 'kesici yok'})"
+    outcomes = row["outcomes"]
+    print(f"{label:<36}{row['rps']:>7.1f}{row['p50'] * 1000:>9.0f}{row['p99'] * 1000:>9.0f}"
+          f"{row['upstream']:>9}{outcomes['analiz']:>8}{outcomes['ertelendi']:>10}{outcomes['hata']:>6}")
+    shed = ", ".join(f"{k}={v}" for k, v in row["shed"].items() if v)
+    if shed:
+        print(f"    reddedilen: {shed}")
+
+def check(name, ok):
+    print(f"  [{'OK' if ok else 'HATA'}] {name}")
+    return ok
+
+async def main(args):
+    print(f"{'':<36}{'yanıt/sn':>7}{'p50 ms':>9}{'p99 ms':>9}{'Gemini':>9}{'analiz':>8}{'ertelendi':>10}{'hata':>6}")
+    rows = {}
+    for scenario in ("sağlıklı", "kesinti (429)", "kesinti (zaman aşımı)", "gecikme sıçraması", "kota aşımı"):
+        for breaker in (True, False):
+            row = await run(args, scenario, breaker)
+            rows[(scenario, breaker)] = row
+            report(row)
+
+    print("\nKontroller:")
+    outages = [(rows[(name, True)], rows[(name, False)]) for name in ("kesinti (429)", "kesinti (zaman aşımı)")]
+    for on, off in outages:
+        print(f"  {on['scenario']}: kesinti boyunca Gemini çağrısı {on['outage_upstream']} "
+              f"(kesicisiz {off['outage_upstream']})")
+    results = [
+        check("sağlıklı durumda devre kapalı ve tüm istekler analiz edildi",
+              rows[("sağlıklı", True)]["opened"] == 0
+              and rows[("sağlıklı", True)]["outcomes"]["analiz"] == int(args.rate * args.duration)),
+        check("kesintide devre açıldı ve kesinti bitince kapandı",
+              all(on["opened"] >= 1 and on["state"] == CLOSED for on, _ in outages)),
+        check("kesinti boyunca Gemini'ye giden çağrı kesicisiz duruma göre en az 3 kat az",
+              all(on["outage_upstream"] * 3 <= off["outage_upstream"] for on, off in outages)),
+        check("kesinti bitince istekler yeniden analiz edildi",
+              all(on["outcomes"]["analiz"] > 0 for on, _ in outages)),
+        check("bekleme kuyruğu sınırı hiç aşılmadı",
+              all(row["max_waiting"] <= args.max_queue for row in rows.values())),
+        check("kota aşımında fazla istekler bekletilmeden ertelendi",
+              rows[("kota aşımı", True)]["outcomes"]["ertelendi"] > 0
+              and rows[("kota aşımı", True)]["p99"] <= args.timeout * 1.5),
+    ]
+    if not all(results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=50, help="istek/sn")
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--latency", type=float, default=0.3, help="sahte Gemini gecikmesi (sn)")
+    parser.add_argument("--timeout", type=float, default=1.0, help="GEMINI_TIMEOUT (sn)")
+    parser.add_argument("--spike-rate", type=float, default=0.3)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-queue", type=int, default=100)
+    parser.add_argument("--reset", type=float, default=2.0, help="devre kesici bekleme süresi (sn)")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,77 @@
+"""
+GeoIndex (KD-tree) en yakın komşu ve yarıçap sorgularının ölçümü.
+
+Türkiye sınırları içinde rastgele --points adet nokta üretir. --queries adet
+rastgele konum için k-en yakın ve yarıçap sorgularının ortalama ve p99
+gecikmesini ölçer. Sonuçlar tüm noktaları tek tek tarayan haversine
+hesabıyla karşılaştırılır.
+
+Kullanım:
+    python benchmarks/geo_index_bench.py --points 50000 --queries 2000
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from geo_index import EARTH_RADIUS_KM, GeoIndex  # noqa: E402
+
+# Türkiye'yi kapsayan yaklaşık kutu (enlem, boylam)
+LAT_RANGE = (36.0, 42.1)
+LON_RANGE = (26.0, 44.8)
+
+def haversine_km(a, b):
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+def random_point(rng):
+    return rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)
+
+def latency(label, fn, queries):
+    samples = []
+    for q in queries:
+        started = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    mean = sum(samples) / len(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"{label:<28} ort {mean:.3f} ms  p99 {p99:.3f} ms")
+
+def run(point_count, query_count, k, radius_km):
+    rng = random.Random(11)
+    points = [random_point(rng) for _ in range(point_count)]
+    started = time.perf_counter()
+    index = GeoIndex((p, i) for i, p in enumerate(points))
+    print(f"{point_count} nokta; KD-tree kurulumu {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    queries = [random_point(rng) for _ in range(query_count)]
+    latency(f"nearest(k={k})", lambda q: index.nearest(*q, k=k), queries)
+    latency(f"within({radius_km:g} km)", lambda q: index.within(*q, radius_km), queries)
+    latency(f"nearest(k={k}, çift id)", lambda q: index.nearest(*q, k=k, where=lambda i: i % 2 == 0), queries)
+
+    # Doğruluk: tam tarama ile karşılaştır
+    errors = 0
+    for q in queries[:50]:
+        brute = sorted((haversine_km(q, p), i) for i, p in enumerate(points))
+        got = index.nearest(*q, k=k)
+        if [i for _, i in got] != [i for _, i in brute[:k]] or abs(got[-1][0] - brute[k - 1][0]) > 1e-6:
+            errors += 1
+        inside = {i for d, i in brute if d < radius_km}
+        if {i for _, i in index.within(*q, radius_km)} != inside:
+            errors += 1
+    print(f"Tam tarama ile karşılaştırma (50 sorgu): {errors} fark")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--radius-km", type=float, default=25.0)
+    args = parser.parse_args()
+    run(args.points, args.queries, args.k, args.radius_km)
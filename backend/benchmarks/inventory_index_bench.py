@@ -0,0 +1,90 @@
+"""
+Envanter dizini ile eski market taramasının karşılaştırması.
+
+Eski yol her stok sorgusunda şehrin marketlerini kopyalayıp çarpanları
+yeniden uygular (get_product_availability). InventoryIndex toplamları bir
+kez hesaplar. --cities adet sentetik şehirle ikisi karşılaştırılır ve
+"en az N adet ürünü olan şehirler, en yakın önce" sorgusu ölçülür. Stok
+düşme inventory koleksiyonunda yapıldığından burada ölçülmez; worker'lar
+arası tutarlılığı tests/test_inventory_index.py'de kontrol edilir.
+
+Kullanım:
+    python benchmarks/inventory_index_bench.py --cities 81 --lookups 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import mock_market  # noqa: E402
+from inventory_index import InventoryIndex, mock_market_stock  # noqa: E402
+from road_graph import get_road_graph  # noqa: E402
+
+PRODUCTS = ["Su", "Battaniye", "Çadır", "Konserve", "İlk yardım", "Bebek maması", "Jeneratör", "Isıtıcı"]
+
+def synthetic_markets(city_count, rng):
+    """Yol grafındaki ilk city_count şehir için 1-4 marketlik sentetik veri"""
+    cities = sorted(get_road_graph().cities)[:city_count]
+    markets, variations = {}, {}
+    for city in cities:
+        markets[city], variations[city] = [], {}
+        for i in range(rng.randint(1, 4)):
+            name = f"{city} Market {i + 1}"
+            markets[city].append({
+                "name": name,
+                "location": city,
+                "distance": rng.randint(1, 30),
+                "capacity": rng.randint(200, 1500),
+                "products": {p: rng.randint(0, 5000) for p in rng.sample(PRODUCTS, rng.randint(3, len(PRODUCTS)))}
+            })
+            variations[city][name] = rng.choice([0.5, 0.7, 0.8, 1.0])
+    return markets, variations
+
+def timed(label, count, fn):
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<40} {elapsed * 1000:9.1f} ms  ({count / elapsed:,.0f}/sn)")
+    return elapsed
+
+def run(city_count, lookups):
+    rng = random.Random(3)
+    markets, variations = synthetic_markets(city_count, rng)
+    # Eski fonksiyonlar modül sabitlerini okur
+    mock_market.MOCK_MARKETS.clear()
+    mock_market.MOCK_MARKETS.update(markets)
+    mock_market.MARKET_STOCK_VARIATIONS.clear()
+    mock_market.MARKET_STOCK_VARIATIONS.update(variations)
+
+    cities = list(markets)
+    queries = [(rng.choice(PRODUCTS), rng.choice(cities)) for _ in range(lookups)]
+
+    started = time.perf_counter()
+    index = InventoryIndex(mock_market_stock(markets, variations))
+    print(f"{len(cities)} şehir, {sum(len(m) for m in markets.values())} market; "
+          f"dizin kurulumu {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    old = timed("get_product_availability", lookups,
+                lambda: [mock_market.get_product_availability(c, p) for p, c in queries])
+    new = timed("InventoryIndex.available", lookups,
+                lambda: [index.available(p, c) for p, c in queries])
+    print(f"Hızlanma: {old / new:.0f}x")
+
+    mismatches = sum(mock_market.get_product_availability(c, p) != index.available(p, c) for p, c in queries[:1000])
+    print(f"Tutarlılık (ilk 1000 sorgu): {mismatches} fark")
+
+    get_road_graph()
+    nearest_count = max(1, lookups // 100)
+    timed("cities_with(min=1000, origin)", nearest_count,
+          lambda: [index.cities_with(rng.choice(PRODUCTS), 1000, origin=rng.choice(cities))
+                   for _ in range(nearest_count)])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, default=81)
+    parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+    run(args.cities, args.lookups)
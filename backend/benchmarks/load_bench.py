@@ -0,0 +1,270 @@
+"""
+Ağ gerektirmeyen, tekrarlanabilir uçtan uca yük testi.
+
+Uygulama süreç içinde (httpx ASGI transport ile) çalıştırılır. Veritabanı
+olarak mongomock-motor (--mongo mongomock) veya yerel bir mongod (--mongo
+mongodb://...) kullanılır, Gemini yerine yapılandırılabilir gecikme ve hata
+oranlı FakeGeminiModel konur. Trafik traffic.py'deki üreticiden gelir:
+--burst-at saniyesinde deprem olur, istek hızı --peak-rate'e çıkar ve
+--decay saniyede sönümlenir, aynı anda deprem simülasyonu işi başlatılır.
+
+İstekler açık döngüyle (zamanı gelince, önceki yanıtları beklemeden)
+gönderilir ve gecikme planlanan gönderim anından ölçülür; böylece sunucu
+yavaşladığında biriken kuyruk da sonuçlara yansır. Her endpoint için
+p50/p95/p99 gecikme, hata sayısı ve verim raporlanır ve --output dosyasına
+JSON olarak yazılır; --compare ile önceki bir çalıştırmayla karşılaştırılır.
+
+mongomock $geoNear ve bazı aggregation operatörlerini desteklemez; bu
+endpoint'ler hatalı sayılır. Tam kapsam için yerel mongod kullanın.
+
+Kullanım:
+    python benchmarks/load_bench.py --mongo mongomock --duration 60 --output sonuc.json
+    python benchmarks/load_bench.py --mongo mongodb://localhost:27017 --compare sonuc.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_gemini import FakeGeminiModel  # noqa: E402
+from traffic import TrafficGenerator, arrivals  # noqa: E402
+
+# İstek karışımı (ağırlıklar); deprem simülasyonu ayrıca burst anında bir kez tetiklenir
+MIX = {
+    "POST /submit-entry": 55,
+    "POST /submit-entry?async_ingest": 10,
+    "GET /stock-summary": 12,
+    "POST /match": 8,
+    "GET /entries": 6,
+    "GET /nearby": 5,
+    "GET /notifications": 4,
+}
+
+def percentile(sorted_values, p):
+    """Sıralı listede en yakın sıralı (nearest-rank) yüzdelik"""
+    if not sorted_values:
+        return None
+    rank = math.ceil(p / 100 * len(sorted_values))
+    return sorted_values[min(len(sorted_values), max(rank, 1)) - 1]
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = {}
+
+    def record(self, name, seconds, error=None):
+        self.latencies[name].append(seconds)
+        if error is not None:
+            self.errors[name] += 1
+            self.error_samples.setdefault(name, error[:200])
+
+    def summary(self, duration):
+        results = {}
+        for name in sorted(self.latencies):
+            values = sorted(self.latencies[name])
+            results[name] = {
+                "count": len(values),
+                "errors": self.errors[name],
+                "throughput_rps": round(len(values) / duration, 2),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+            }
+            if name in self.error_samples:
+                results[name]["error_sample"] = self.error_samples[name]
+        return results
+
+def request_for(name, traffic, epicenter):
+    """İstek adından (method, path, params, json) üretir"""
+    if name == "POST /submit-entry":
+        return "POST", "/submit-entry", None, traffic.entry()
+    if name == "POST /submit-entry?async_ingest":
+        return "POST", "/submit-entry", {"async_ingest": "true"}, traffic.entry()
+    if name == "GET /stock-summary":
+        return "GET", "/stock-summary", {"entries_limit": 5}, None
+    if name == "POST /match":
+        body = {"konum": traffic.quake_city(), "urun_adi": traffic.product(), "miktar": 10}
+        return "POST", "/match", None, body
+    if name == "GET /entries":
+        return "GET", "/entries", {"limit": 50, "konum": traffic.quake_city()}, None
+    if name == "GET /nearby":
+        return "GET", "/nearby", {"konum": traffic.quake_city(), "urun_adi": traffic.product()}, None
+    if name == "GET /notifications":
+        return "GET", "/notifications", {"konum": epicenter, "limit": 20}, None
+    raise ValueError(name)
+
+async def send(client, recorder, name, scheduled, method, path, params, body):
+    error = None
+    try:
+        response = await client.request(method, path, params=params, json=body)
+        if response.status_code >= 400:
+            error = f"{response.status_code}: {response.text}"
+        result = response.json() if error is None else None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        result = None
+    recorder.record(name, time.perf_counter() - scheduled, error)
+    return result
+
+async def simulate(client, recorder, epicenter, scheduled):
+    """Deprem simülasyonunu başlatır ve iş bitene kadar izler; iş süresi ayrıca kaydedilir"""
+    accepted = await send(client, recorder, "POST /simulate-earthquake", scheduled,
+                          "POST", "/simulate-earthquake", {"konum": epicenter}, None)
+    if not accepted:
+        return
+    while True:
+        response = await client.get(f"/jobs/{accepted['job_id']}")
+        job = response.json()
+        if job.get("status") in ("done", "failed", "cancelled"):
+            error = None if job["status"] == "done" else f"{job['status']}: {job.get('error')}"
+            recorder.record("simulate-earthquake (iş)", time.perf_counter() - scheduled, error)
+            return
+        await asyncio.sleep(0.1)
+
+async def open_database(mongo):
+    if mongo == "mongomock":
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(mongo)
+    await client.drop_database("load_test")
+    return client, client["load_test"]
+
+async def prepare(main):
+    """Uygulamanın açılış adımları; mongomock'un desteklemediği index'ler atlanır"""
+    try:
+        await main.startup_event()
+    except Exception as e:
+        print(f"Uyarı: açılış tamamlanamadı ({type(e).__name__}: {e}); index'ler olmadan devam ediliyor")
+        await main.truck_ledger.seed(main.MOCK_TRUCKS)
+        main.ingest_pool.start()
+        main.truck_ledger.start()
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=os.path.dirname(__file__)).stdout.strip() or None
+    except OSError:
+        return None
+
+async def run(args):
+    import gemini_analyzer
+    import main
+
+    model = FakeGeminiModel(latency=args.gemini_latency, jitter=args.gemini_jitter,
+                            error_rate=args.gemini_error_rate, seed=args.seed)
+    gemini_analyzer.set_model(model)
+    mongo_client, database = await open_database(args.mongo)
+    main.bind_database(database)
+    await prepare(main)
+
+    traffic = TrafficGenerator(seed=args.seed)
+    rng = random.Random(args.seed)
+    epicenter = traffic.quake_city()
+    recorder = Recorder()
+    limit = asyncio.Semaphore(args.max_in_flight)
+    transport = httpx.ASGITransport(app=main.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=120) as client:
+        # Önceden kayıtlı bağış/ihtiyaçlar (ölçüme dahil değil)
+        for start in range(0, args.seed_entries, 100):
+            batch = [traffic.entry() for _ in range(min(100, args.seed_entries - start))]
+            await client.post("/submit-entries/batch", json={"entries": batch})
+
+        schedule = arrivals(args.duration, args.base_rate, args.peak_rate, args.burst_at, args.decay, rng)
+        names, weights = zip(*MIX.items())
+        tasks = []
+        started = time.perf_counter()
+
+        async def fire(name, at):
+            delay = started + at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            scheduled = started + at
+            async with limit:
+                if name == "simulate":
+                    await simulate(client, recorder, epicenter, scheduled)
+                else:
+                    await send(client, recorder, name, scheduled, *request_for(name, traffic, epicenter))
+
+        for at in schedule:
+            tasks.append(asyncio.create_task(fire(rng.choices(names, weights)[0], at)))
+        tasks.append(asyncio.create_task(fire("simulate", args.burst_at)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    await main.job_runner.stop()
+    await main.ingest_pool.stop()
+    await main.truck_ledger.stop()
+    await mongo_client.drop_database("load_test")
+
+    return {
+        "config": vars(args),
+        "started_at": datetime.now().isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "duration_seconds": round(elapsed, 2),
+        "requests": len(schedule) + 1,
+        "epicenter": epicenter,
+        "gemini": model.stats,
+        "endpoints": recorder.summary(elapsed),
+    }
+
+def print_report(report, previous=None):
+    print(f"{report['requests']} istek, {report['duration_seconds']} sn, deprem: {report['epicenter']}, "
+          f"Gemini çağrısı: {report['gemini']['calls']} (hata {report['gemini']['errors']})")
+    header = f"{'endpoint':<34}{'adet':>7}{'hata':>6}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}"
+    print(header + ("   p99 değişim" if previous else ""))
+    for name, stats in report["endpoints"].items():
+        line = (f"{name:<34}{stats['count']:>7}{stats['errors']:>6}{stats['throughput_rps']:>8}"
+                f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}")
+        old = (previous or {}).get("endpoints", {}).get(name)
+        if old and old["p99_ms"]:
+            line += f"   {(stats['p99_ms'] - old['p99_ms']) / old['p99_ms'] * 100:+.0f}%"
+        print(line)
+        if "error_sample" in stats:
+            print(f"    örnek hata: {stats['error_sample']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongo", default="mongomock", help="mongomock veya mongodb:// adresi")
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--base-rate", type=float, default=5, help="deprem öncesi istek/sn")
+    parser.add_argument("--peak-rate", type=float, default=80, help="deprem anındaki istek/sn")
+    parser.add_argument("--burst-at", type=float, default=10, help="depremin olduğu saniye")
+    parser.add_argument("--decay", type=float, default=15, help="burst sönümlenme süresi (sn)")
+    parser.add_argument("--max-in-flight", type=int, default=200)
+    parser.add_argument("--seed-entries", type=int, default=2000)
+    parser.add_argument("--gemini-latency", type=float, default=0.8)
+    parser.add_argument("--gemini-jitter", type=float, default=0.4)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="sonuçların yazılacağı JSON dosyası")
+    parser.add_argument("--compare", help="karşılaştırılacak önceki sonuç dosyası")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+    print_report(report, previous)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
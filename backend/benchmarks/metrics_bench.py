@@ -0,0 +1,97 @@
+"""
+Metrik kaydının maliyeti ve iş parçacıkları altında doğruluğu.
+
+Ölçülenler:
+  * Counter.inc ve Histogram.observe başına süre
+  * MetricsMiddleware'in istek başına ek maliyeti (boş bir ASGI
+    uygulaması middleware'li ve middleware'siz çağrılarak)
+  * --threads iş parçacığı aynı histograma yazarken (motor'un komut
+    dinleyicisi gibi) kayıp ölçüm olmadığı
+  * /metrics çıktısının üretim süresi
+
+Kullanım:
+    python benchmarks/metrics_bench.py --ops 1000000 --threads 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from metrics import MetricsMiddleware, Registry  # noqa: E402
+
+async def empty_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+async def send(message):
+    pass
+
+class Route:
+    path = "/stock-summary"
+
+async def per_request(app, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        scope = {"type": "http", "method": "GET", "path": "/stock-summary", "route": Route}
+        await app(scope, receive, send)
+    return (time.perf_counter() - started) / requests
+
+def run(ops, thread_count, requests):
+    registry = Registry()
+    counter = registry.counter("bench_total", "bench", ["route"])
+    histogram = registry.histogram("bench_seconds", "bench", ["route"])
+
+    started = time.perf_counter()
+    for _ in range(ops):
+        counter.inc("/a")
+    inc_ns = (time.perf_counter() - started) / ops * 1e9
+    started = time.perf_counter()
+    for i in range(ops):
+        histogram.observe((i % 1000) / 1000, "/a")
+    observe_ns = (time.perf_counter() - started) / ops * 1e9
+    print(f"Counter.inc: {inc_ns:.0f} ns, Histogram.observe: {observe_ns:.0f} ns")
+
+    bare = asyncio.run(per_request(empty_app, requests))
+    wrapped = asyncio.run(per_request(MetricsMiddleware(empty_app), requests))
+    print(f"İstek başına middleware maliyeti: {(wrapped - bare) * 1e6:.1f} µs "
+          f"(middleware'siz {bare * 1e6:.1f} µs, middleware'li {wrapped * 1e6:.1f} µs)")
+
+    shared = registry.histogram("bench_threads_seconds", "bench", ["command"])
+    per_thread = ops // thread_count
+
+    def work():
+        for i in range(per_thread):
+            shared.observe(0.001, "find" if i % 2 else "getMore")
+
+    threads = [threading.Thread(target=work) for _ in range(thread_count)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    counts = [line for line in shared.collect() if line.startswith("bench_threads_seconds_count")]
+    total = sum(int(line.rsplit(" ", 1)[1]) for line in counts)
+    print(f"{thread_count} iş parçacığı: {total}/{per_thread * thread_count} ölçüm kaydedildi, "
+          f"{elapsed / (per_thread * thread_count) * 1e9:.0f} ns/ölçüm")
+
+    for i in range(200):
+        histogram.observe(0.01, f"/route-{i}")
+    started = time.perf_counter()
+    text = registry.render()
+    print(f"/metrics çıktısı: {len(text.splitlines())} satır, {(time.perf_counter() - started) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ops", type=int, default=1000000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100000)
+    args = parser.parse_args()
+    run(args.ops, args.threads, args.requests)
@@ -0,0 +1,140 @@
+"""
+Deprem modu bildirim dağıtımının 100k alıcıda verimi.
+
+Yerel bir mongod üzerindeki geçici veritabanına --recipients adet bağışçı
+kaydı yazar (kayıtların bir kısmı aynı kişiye ait, böylece alıcı başına
+tekilleştirme de sınanır) ve:
+  * ilk dağıtımın süresini ve alıcı/saniye verimini,
+  * aynı depremin tekrar tetiklenmesinde yeni bildirim oluşmadığını,
+  * tüm bildirimlerin imleçli sayfalarla okunduğunda her alıcının bir kez
+    ve sıra bozulmadan geldiğini,
+  * sayfa başına okuma süresini ve eski yöntemin (her çağrıda tüm kayıtları
+    tarayıp mesaj üretmek) süresini
+raporlar.
+
+Kullanım:
+    python benchmarks/notifications_bench.py --url mongodb://localhost:27017 --recipients 100000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gazetteer import PROVINCE_COORDINATES  # noqa: E402
+from geo_index import geo_point  # noqa: E402
+from notifications import NotificationFanout  # noqa: E402
+from product_catalog import annotate_products, resolve  # noqa: E402
+
+EPICENTER = "Hatay"
+PRODUCTS = ["Su", "Battaniye", "Çadır", "Konserve", "İlk yardım", "Bebek maması", "İlaç", "Mont"]
+
+def donor_entry(rng, person):
+    city = rng.choice(list(PROVINCE_COORDINATES))
+    lat, lon = PROVINCE_COORDINATES[city]
+    return {
+        "name": f"bagisci-{person}",
+        "original_text": "sentetik bağış",
+        "analysis": annotate_products({
+            "ihtiyac_var": False,
+            "konum": city,
+            "urunler": [{"urun_adi": name, "miktar": rng.randint(1, 100), "birim": "adet"}
+                        for name in rng.sample(PRODUCTS, rng.randint(1, 3))],
+            "öncelik": "orta"
+        }),
+        "geo": {"type": "Point", "coordinates": [lon + rng.uniform(-0.3, 0.3), lat + rng.uniform(-0.3, 0.3)]},
+        "status": "aktif"
+    }
+
+async def seed(entries, recipient_count, rng):
+    await entries.create_index([("geo", "2dsphere")])
+    batch = []
+    # Her kişinin bir kaydı, ayrıca %10'unun ikinci bir bağışı
+    people = list(range(recipient_count)) + [rng.randrange(recipient_count) for _ in range(recipient_count // 10)]
+    for person in people:
+        batch.append(donor_entry(rng, person))
+        if len(batch) == 10000:
+            await entries.insert_many(batch)
+            batch = []
+    if batch:
+        await entries.insert_many(batch)
+
+async def old_notifications(entries):
+    started = time.perf_counter()
+    notifications = []
+    async for entry in entries.find({"status": "aktif"}):
+        if entry.get("analysis", {}).get("konum") != EPICENTER:
+            notifications.append({
+                "to": entry.get("name", "Anonim"),
+                "city": entry.get("analysis", {}).get("konum", "Bilinmiyor"),
+                "message": f"ACİL! {EPICENTER} deprem bölgesine yardım için malzemelerinizi "
+                           f"en yakın toplama merkezine ulaştırın."
+            })
+    return time.perf_counter() - started, notifications[:10]
+
+async def run(url, recipient_count, batch_size, page_size):
+    client = AsyncIOMotorClient(url)
+    db = client["notifications_bench"]
+    await client.drop_database(db.name)
+    rng = random.Random(3)
+    try:
+        await seed(db.entries, recipient_count, rng)
+        fanout = NotificationFanout(db.notifications, db.entries, batch_size=batch_size)
+        await fanout.ensure_indexes()
+        point = geo_point(EPICENTER)
+        needed = {resolve(name) for name in ("Su", "Çadır", "Battaniye")}
+
+        started = time.perf_counter()
+        first = await fanout.fan_out(EPICENTER, point, needed)
+        elapsed = time.perf_counter() - started
+        print(f"İlk dağıtım: {first['recipients']} alıcı, {elapsed:.2f} sn "
+              f"({first['recipients'] / elapsed:.0f} alıcı/sn)")
+
+        started = time.perf_counter()
+        again = await fanout.fan_out(EPICENTER, point, needed)
+        print(f"Tekrar tetikleme: {time.perf_counter() - started:.2f} sn, "
+              f"yeni bildirim {again['inserted']} (beklenen 0)")
+
+        seen = set()
+        last_rank = -1
+        page_times = []
+        after = None
+        errors = 0
+        while True:
+            started = time.perf_counter()
+            page = await fanout.page(EPICENTER, after=after, limit=page_size)
+            page_times.append(time.perf_counter() - started)
+            for notification in page["notifications"]:
+                if notification["recipient"] in seen or notification["rank"] <= last_rank:
+                    errors += 1
+                seen.add(notification["recipient"])
+                last_rank = notification["rank"]
+            after = page["next_after"]
+            if after is None:
+                break
+        total = await db.notifications.count_documents({"konum": EPICENTER})
+        print(f"Sayfalı okuma: {len(page_times)} sayfa, {len(seen)} alıcı (koleksiyonda {total}), "
+              f"tekrar/sıra hatası {errors}")
+        print(f"Sayfa süresi: p50 {statistics.median(page_times) * 1000:.2f} ms, "
+              f"en kötü {max(page_times) * 1000:.2f} ms")
+
+        old_elapsed, _ = await old_notifications(db.entries)
+        print(f"Eski yöntem (her çağrıda tam tarama, ilk 10 döner): {old_elapsed * 1000:.0f} ms/çağrı")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="mongodb://localhost:27017")
+    parser.add_argument("--recipients", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.recipients, args.batch_size, args.page_size))
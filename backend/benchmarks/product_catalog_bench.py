@@ -0,0 +1,61 @@
+"""
+Ürün kataloğu çözümlemesinin hızı ve yazım farklarını birleştirme oranı.
+
+Gemini'nin döndürdüğüne benzer --items adet serbest yazılmış ürün adı
+üretir ("Su", "şişe su", "İÇME SUYU", "battaniyeler"...). Bunlar
+önbelleksiz (ilk çağrı) ve önbellekli olarak çözümlenir. Yalnızca
+normalizasyon yapan eski product_key ile kaç farklı anahtar oluştuğu
+karşılaştırılır.
+
+Kullanım:
+    python benchmarks/product_catalog_bench.py --items 200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from product_catalog import PRODUCTS, resolve  # noqa: E402
+from text_utils import product_key  # noqa: E402
+
+PREFIXES = ["", "", "", "şişe ", "5 koli ", "10 adet ", "paket "]
+
+def spellings(rng):
+    names = []
+    for name, spec in PRODUCTS.items():
+        for base in [name] + spec["synonyms"]:
+            for variant in (base, base.upper(), base.capitalize(), base + "lar", " " + base + "  "):
+                names.append(rng.choice(PREFIXES) + variant)
+    return names
+
+def run(item_count):
+    rng = random.Random(5)
+    names = spellings(rng)
+    items = [rng.choice(names) for _ in range(item_count)]
+
+    resolve.cache_clear()
+    started = time.perf_counter()
+    for name in names:
+        resolve(name)
+    cold = (time.perf_counter() - started) / len(names)
+
+    started = time.perf_counter()
+    keys = [resolve(name) for name in items]
+    warm = (time.perf_counter() - started) / item_count
+
+    print(f"{len(names)} farklı yazım, {item_count} ürün satırı")
+    print(f"İlk çözümleme (fuzzy dahil): {cold * 1e6:.1f} µs/yazım")
+    print(f"Önbellekli çözümleme:        {warm * 1e6:.2f} µs/ürün")
+    print(f"product_key ile farklı anahtar: {len({product_key(n) for n in items})}")
+    print(f"Katalog ile farklı anahtar:     {len(set(keys))} (katalogda {len(PRODUCTS)} ürün)")
+    info = resolve.cache_info()
+    print(f"Önbellek: {info.hits} isabet, {info.misses} ıskalama")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=200000)
+    args = parser.parse_args()
+    run(args.items)
@@ -0,0 +1,46 @@
+"""
+Rota sorgularının saniyedeki sayısını ölçer. Doğrudan bağlantısı olmayan
+şehir çiftlerinin doğru çözüldüğü tests/test_road_graph.py'de kontrol edilir.
+
+Kullanım:
+    python benchmarks/road_graph_bench.py --lookups 200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mock_trucks import calculate_route  # noqa: E402
+from road_graph import ROAD_EDGES, RoadGraph, get_road_graph  # noqa: E402
+
+def bench(lookups):
+    started = time.perf_counter()
+    RoadGraph(ROAD_EDGES)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    graph = get_road_graph()
+    rng = random.Random(7)
+    pairs = [(rng.choice(graph.cities), rng.choice(graph.cities)) for _ in range(lookups)]
+
+    started = time.perf_counter()
+    for a, b in pairs:
+        graph.distance(a, b)
+    distance_rate = lookups / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for a, b in pairs:
+        calculate_route(a, b)
+    route_rate = lookups / (time.perf_counter() - started)
+
+    print(f"Grafik: {graph.size} şehir, kurulum {build_ms:.2f} ms")
+    print(f"graph.distance:   {distance_rate:12,.0f} sorgu/sn")
+    print(f"calculate_route:  {route_rate:12,.0f} sorgu/sn (yol + süre dahil)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lookups", type=int, default=200_000)
+    args = parser.parse_args()
+    bench(args.lookups)
@@ -0,0 +1,86 @@
+"""
+Kural tabanlı çıkarıcının doğruluğunu ve kazandırdığı süreyi ölçer.
+
+Etiketli derlemdeki (rule_extractor_corpus.jsonl) her metin için çıkarıcı
+çalıştırılır. Güven eşiğini geçen metinler Gemini'ya hiç gitmez; bunların
+ne kadarının doğru çıktığı ve atlanan Gemini çağrılarının toplam süresi
+raporlanır. Ağ ya da API anahtarı gerekmez.
+
+Kullanım:
+    python benchmarks/rule_extractor_bench.py --gemini-latency 1.5
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rule_extractor import RULE_CONFIDENCE_THRESHOLD, extract  # noqa: E402
+from text_utils import turkish_casefold  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(__file__), "rule_extractor_corpus.jsonl")
+
+def _products(analysis):
+    return sorted(
+        (turkish_casefold(u["urun_adi"]), u["miktar"], u["birim"]) for u in analysis["urunler"]
+    )
+
+def fields_match(actual, expected):
+    """Alan bazında karşılaştırma sonucunu döndürür"""
+    return {
+        "ihtiyac_var": actual["ihtiyac_var"] == expected["ihtiyac_var"],
+        "konum": actual["konum"] == expected["konum"],
+        "urunler": _products(actual) == _products(expected),
+        "öncelik": actual["öncelik"] == expected["öncelik"],
+    }
+
+def run(threshold, gemini_latency, repeat):
+    with open(CORPUS, encoding="utf-8") as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+
+    accepted = 0
+    accepted_correct = 0
+    field_hits = {"ihtiyac_var": 0, "konum": 0, "urunler": 0, "öncelik": 0}
+    wrong = []
+
+    for item in corpus:
+        analysis, confidence = extract(item["text"])
+        matches = fields_match(analysis, item["expected"])
+        for field, ok in matches.items():
+            field_hits[field] += ok
+        if confidence >= threshold:
+            accepted += 1
+            if all(matches.values()):
+                accepted_correct += 1
+            else:
+                wrong.append((item["text"], confidence, matches))
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in corpus:
+            extract(item["text"])
+    per_call_ms = (time.perf_counter() - started) / (repeat * len(corpus)) * 1000
+
+    total = len(corpus)
+    print(f"Derlem: {total} metin, güven eşiği {threshold}")
+    print(f"Hızlı yoldan çözülen: {accepted}/{total} ({accepted / total:.0%})")
+    if accepted:
+        print(f"Hızlı yol doğruluğu: {accepted_correct}/{accepted} ({accepted_correct / accepted:.0%})")
+    for field, hits in field_hits.items():
+        print(f"  {field:12s} alan doğruluğu (tüm derlem): {hits / total:.0%}")
+    print(f"Çıkarım süresi: {per_call_ms:.3f} ms/metin")
+    saved = accepted * (gemini_latency - per_call_ms / 1000)
+    print(f"Kazanılan süre: {saved:.1f} sn / {total} metin "
+          f"(Gemini çağrısı başına {gemini_latency} sn varsayımıyla)")
+    for text, confidence, matches in wrong:
+        print(f"  HATALI ({confidence}): {text} -> {matches}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threshold", type=float, default=RULE_CONFIDENCE_THRESHOLD)
+    parser.add_argument("--gemini-latency", type=float, default=1.5, help="Saniye")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    run(args.threshold, args.gemini_latency, args.repeat)
@@ -0,0 +1,161 @@
+"""
+Büyük yanıtların JSON'a çevrilme süresi ve boyutu: eski yol (tam doküman,
+str(_id) döngüsü, FastAPI'nin jsonable_encoder'ı + json) ile yeni yol (Mongo
+projection'ı, yanıt modeli, orjson'lu FastJSONResponse).
+
+Sentetik trafikten --entries kadar kayıt üretilir (build_entry ile, gerçek
+kayıtların biçiminde). Projection'lar mongomock ile uygulanır; ölçülen süre
+yalnızca Mongo'dan dönen dokümanların yanıt baytlarına çevrilmesidir:
+  * /entries: tek sayfada tüm kayıtlar
+  * /stock-summary: tüm kayıtlar şehirlerinin altında
+  * /entries?format=ndjson: kayıt başına bir satır
+"/entries (tüm alanlar)" satırı projection olmadan yalnızca orjson'un
+etkisini gösterir.
+
+Kullanım:
+    python benchmarks/serialization_bench.py --entries 10000 --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import mongomock
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import main  # noqa: E402
+from rule_extractor import extract  # noqa: E402
+from serialization import FastJSONResponse, dumps  # noqa: E402
+from stock_aggregates import to_summary  # noqa: E402
+from traffic import TrafficGenerator  # noqa: E402
+
+def legacy_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} JSON'a çevrilemez")
+
+def make_entries(count, seed):
+    traffic = TrafficGenerator(seed=seed)
+    entries = []
+    for _ in range(count):
+        item = traffic.entry()
+        entry = main.build_entry(item["name"], item["text"], extract(item["text"])[0])
+        entry["_id"] = ObjectId()
+        entries.append(entry)
+    return entries
+
+def city_stock(entries):
+    totals = {}
+    for entry in entries:
+        city = entry["analysis"].get("konum") or "Bilinmiyor"
+        doc = totals.setdefault(city, {"_id": city, "supplies": {}, "trucks": 0, "entry_count": 0})
+        doc["entry_count"] += 1
+        doc["trucks"] += entry["truck_count"]
+        for urun in entry["analysis"]["urunler"]:
+            key = urun.get("urun_key") or urun["urun_adi"]
+            doc["supplies"][key] = doc["supplies"].get(key, 0) + urun.get("miktar_adet", 0)
+    return list(totals.values())
+
+# Eski yollar (projection'sız dokümanlar, jsonable_encoder + json)
+
+def legacy_entries(docs):
+    entries = []
+    for entry in docs:
+        entry = dict(entry)
+        entry["_id"] = str(entry["_id"])
+        entries.append(entry)
+    return JSONResponse(jsonable_encoder({"entries": entries, "next_after": entries[-1]["_id"]})).body
+
+def legacy_stock_summary(stock_docs, docs):
+    stock_data = {doc["_id"]: to_summary(doc) for doc in stock_docs}
+    for entry in docs:
+        city = stock_data[entry["analysis"].get("konum") or "Bilinmiyor"]
+        city.setdefault("entries", []).append({
+            "name": entry.get("name", "Anonim"),
+            "text": entry.get("original_text", ""),
+            "timestamp": entry.get("timestamp", "")
+        })
+    return JSONResponse(jsonable_encoder({"stock_summary": stock_data})).body
+
+def legacy_ndjson(docs):
+    return b"".join((json.dumps(entry, default=legacy_default, ensure_ascii=False) + "\n").encode() for entry in docs)
+
+# Yeni yollar
+
+def fast_entries(docs):
+    return FastJSONResponse({"entries": docs, "next_after": str(docs[-1]["_id"])}).body
+
+_STOCK_SUMMARY = TypeAdapter(main.StockSummaryResponse)
+
+def fast_stock_summary(stock_docs, preview_docs):
+    stock_data = {doc["_id"]: to_summary(doc) for doc in stock_docs}
+    for entry in preview_docs:
+        analysis = entry.get("analysis") or {}
+        city = stock_data[analysis.get("konum") or "Bilinmiyor"]
+        city.setdefault("entries", []).append({
+            "id": str(entry["_id"]),
+            "name": entry.get("name") or "Anonim",
+            "text": entry.get("original_text", "")[:main.ENTRY_PREVIEW_CHARS],
+            "ihtiyac_var": analysis.get("ihtiyac_var"),
+            "timestamp": entry.get("timestamp")
+        })
+    # FastAPI'nin response_model ile yaptığı doğrulama ve çevirme
+    content = _STOCK_SUMMARY.dump_python(_STOCK_SUMMARY.validate_python({"stock_summary": stock_data}),
+                                         mode="json", exclude_unset=True)
+    return FastJSONResponse(content).body
+
+def fast_ndjson(docs):
+    return b"".join(dumps(entry) + b"\n" for entry in docs)
+
+def measure(function, runs):
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        body = function()
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations), len(body)
+
+def main_(args):
+    docs = make_entries(args.entries, args.seed)
+    collection = mongomock.MongoClient().bench.entries
+    collection.insert_many([dict(doc) for doc in docs])
+    list_docs = list(collection.find({}, projection=main.parse_fields(main.ENTRY_LIST_FIELDS)))
+    preview_docs = list(collection.find({}, projection={
+        "name": 1, "original_text": 1, "timestamp": 1, "analysis.ihtiyac_var": 1, "analysis.konum": 1
+    }))
+    stock_docs = city_stock(docs)
+
+    cases = [
+        ("/entries", lambda: legacy_entries(docs), lambda: fast_entries(list_docs)),
+        ("/entries (tüm alanlar)", lambda: legacy_entries(docs), lambda: fast_entries(docs)),
+        ("/stock-summary", lambda: legacy_stock_summary(stock_docs, docs),
+         lambda: fast_stock_summary(stock_docs, preview_docs)),
+        ("/entries?format=ndjson", lambda: legacy_ndjson(docs), lambda: fast_ndjson(list_docs)),
+    ]
+    print(f"{args.entries} kayıt, {args.runs} ölçümün medyanı")
+    print(f"{'':<26}{'eski ms':>9}{'yeni ms':>9}{'hız':>7}{'eski KB':>10}{'yeni KB':>10}")
+    for name, legacy, fast in cases:
+        legacy_time, legacy_size = measure(legacy, args.runs)
+        fast_time, fast_size = measure(fast, args.runs)
+        print(f"{name:<26}{legacy_time * 1000:>9.1f}{fast_time * 1000:>9.1f}{legacy_time / fast_time:>6.1f}x"
+              f"{legacy_size / 1024:>10.0f}{fast_size / 1024:>10.0f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    main_(parser.parse_args())
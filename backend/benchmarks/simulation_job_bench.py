@@ -0,0 +1,124 @@
+"""
+Arka plan deprem simülasyonu işinin 100k etkilenen kayıtta uçtan uca süresi.
+
+Yerel bir mongod üzerindeki geçici veritabanına deprem bölgesinde --entries
+adet kayıt (yarısı ihtiyaç, yarısı bağış) ve bölge dışında bildirim
+alacak bağışçılar yazar. Ardından main.py'deki simülasyon işi başlatılır ve
+GET /jobs/{id}'nin okuduğu doküman izlenerek:
+  * POST'un iş kimliğini döndürme süresi,
+  * işin uçtan uca süresi ve aşama süreleri (aynı anda çalışan aşamaların
+    toplamı uçtan uca süreden büyüktür),
+  * aynı pencerede tekrar tetiklemenin yeni iş başlatmadığı,
+  * başka bir bölgede başlatılan işin iptal süresi
+raporlanır.
+
+Kullanım:
+    python benchmarks/simulation_job_bench.py --url mongodb://localhost:27017 --entries 100000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gazetteer import PROVINCE_COORDINATES  # noqa: E402
+from geo_index import geo_point  # noqa: E402
+from product_catalog import annotate_products  # noqa: E402
+
+EPICENTER = "Hatay"
+PRODUCTS = ["Su", "Battaniye", "Çadır", "Konserve", "İlk yardım", "Bebek maması", "İlaç", "Mont"]
+PRIORITIES = ["düşük", "orta", "yüksek", "acil"]
+
+def synthetic_entry(rng, konum, ihtiyac_var):
+    return {
+        "name": f"kullanici-{rng.randint(1, 10**7)}",
+        "original_text": "sentetik kayıt",
+        "analysis": annotate_products({
+            "ihtiyac_var": ihtiyac_var,
+            "konum": konum,
+            "urunler": [{"urun_adi": name, "miktar": rng.randint(1, 50), "birim": "adet"}
+                        for name in rng.sample(PRODUCTS, rng.randint(1, 2))],
+            "öncelik": rng.choice(PRIORITIES)
+        }),
+        "geo": geo_point(konum),
+        "status": "aktif"
+    }
+
+async def seed(entries, count, rng):
+    cities = [city for city in PROVINCE_COORDINATES if city != EPICENTER]
+    batch = []
+    for n in range(count + count // 5):
+        if n < count:
+            batch.append(synthetic_entry(rng, EPICENTER, n % 2 == 0))
+        else:
+            batch.append(synthetic_entry(rng, rng.choice(cities), False))
+        if len(batch) == 10000:
+            await entries.insert_many(batch)
+            batch = []
+    if batch:
+        await entries.insert_many(batch)
+
+async def wait_for(main, job_id):
+    while True:
+        job = await main.job_runner.get(job_id)
+        if job["status"] in main.FINISHED:
+            return job
+        await asyncio.sleep(0.05)
+
+async def run(url, count):
+    os.environ["MONGODB_URL"] = url
+    os.environ["DATABASE_NAME"] = "simulation_job_bench"
+    import main  # noqa: E402  (bağlantı ayarları ortam değişkenlerinden okunur)
+
+    main.connect_database()
+    await main.mongodb_client.drop_database(main.db.name)
+    rng = random.Random(9)
+    try:
+        await main.entries_collection.create_index(main.ENTRY_MATCH_INDEX)
+        await main.entries_collection.create_index([("geo", "2dsphere")])
+        await main.truck_ledger.ensure_indexes()
+        await main.truck_ledger.seed(main.MOCK_TRUCKS)
+        await main.notification_fanout.ensure_indexes()
+        await main.job_runner.ensure_indexes()
+        await seed(main.entries_collection, count, rng)
+
+        started = time.perf_counter()
+        accepted = await main.simulate_earthquake(EPICENTER, idempotency_key=None)
+        accept_ms = (time.perf_counter() - started) * 1000
+        repeat = await main.simulate_earthquake(EPICENTER, idempotency_key=None)
+        job = await wait_for(main, accepted["job_id"])
+        elapsed = time.perf_counter() - started
+
+        print(f"{count} etkilenen kayıt, durum: {job['status']}")
+        print(f"POST yanıtı: {accept_ms:.1f} ms, uçtan uca: {elapsed:.2f} sn")
+        phase_total = 0
+        for name in main.SIMULATION_PHASES:
+            duration = job["phases"].get(name, {}).get("duration_ms", 0)
+            phase_total += duration
+            print(f"  {name:<9} {duration:>9.1f} ms")
+        print(f"  aşamaların toplamı {phase_total / 1000:.2f} sn (paralel çalışanlar örtüşür)")
+        print(f"Tekrar tetikleme: aynı iş {repeat['job_id'] == accepted['job_id']}, "
+              f"yeni iş {repeat['created']}")
+        result = job["result"]
+        print(f"Deprem moduna alınan: {result.get('activated_entries')}, "
+              f"sevkiyat: {len(result.get('logistics_support', []))}, "
+              f"bildirim: {result.get('notifications')}")
+
+        other = await main.simulate_earthquake("Adana", idempotency_key=None)
+        started = time.perf_counter()
+        response = await main.cancel_job(other["job_id"])
+        print(f"İptal: {(time.perf_counter() - started) * 1000:.1f} ms, durum {response['status']}")
+        await main.job_runner.stop()
+    finally:
+        await main.mongodb_client.drop_database(main.db.name)
+        main.mongodb_client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="mongodb://localhost:27017")
+    parser.add_argument("--entries", type=int, default=100000)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.entries))
@@ -0,0 +1,141 @@
+"""
+Süreç açılış (cold start) süresi ve içe aktarma maliyeti.
+
+Her ölçüm yeni bir Python sürecinde yapılır (bir uvicorn/gunicorn
+worker'ının açılışı gibi):
+  * main'in içe aktarılma süresi
+  * lifespan açılışı (MongoDB bağlantısı, index migration'ı, envanter yükleme)
+  * ilk Gemini çağrısında SDK'nın yüklenme süresi (google.generativeai kuruluysa)
+Ayrıca -X importtime çıktısından en pahalı modüller listelenir.
+
+--mongo ile gerçek bir MongoDB verilirse --workers kadar süreç aynı anda
+açılır (çoklu worker dağıtımı gibi) ve index migration'ının yalnızca birinde
+çalıştığı kontrol edilir. mongomock ile her süreç kendi bellek içi
+veritabanını kullanır.
+
+Kullanım:
+    python benchmarks/startup_bench.py --runs 5
+    python benchmarks/startup_bench.py --mongo mongodb://localhost:27017 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DATABASE = "startup_bench"
+
+async def child(mongo):
+    """Tek bir worker açılışı; sonuçları JSON satırı olarak yazar"""
+    started = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+
+    if mongo == "mongomock":
+        from mongomock_motor import AsyncMongoMockClient
+        main.bind_database(AsyncMongoMockClient()[DATABASE])
+    else:
+        main.MONGODB_URL, main.DATABASE_NAME = mongo, DATABASE
+    async with main.lifespan(main.app):
+        ready = time.perf_counter()
+        doc = await main.migrations_collection.find_one({"_id": "indexes"})
+
+    import gemini_analyzer
+    from migrations import process_id
+    sdk = None
+    try:
+        sdk_started = time.perf_counter()
+        gemini_analyzer.get_model()
+        sdk = time.perf_counter() - sdk_started
+    except ImportError:
+        pass
+
+    print(json.dumps({
+        "import": imported - started,
+        "startup": ready - imported,
+        "sdk": sdk,
+        "migrated": doc is not None and doc.get("locked_by") == process_id(),
+    }))
+
+def spawn(args, count):
+    """count süreci aynı anda başlatıp sonuçlarını toplar"""
+    env = {**os.environ, "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY", "benchmark")}
+    command = [sys.executable, "-W", "ignore", os.path.abspath(__file__), "--child", "--mongo", args.mongo]
+    processes = [subprocess.Popen(command, cwd=BACKEND, env=env, stdout=subprocess.PIPE, text=True)
+                 for _ in range(count)]
+    results = []
+    for process in processes:
+        out, _ = process.communicate()
+        if process.returncode != 0:
+            sys.exit(f"Alt süreç başarısız oldu (çıkış kodu {process.returncode})")
+        results.append(json.loads(out.strip().splitlines()[-1]))
+    return results
+
+def import_profile(top):
+    """-X importtime çıktısından toplam süresi en yüksek modüller (ms)"""
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND, capture_output=True, text=True
+    ).stderr
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative) / 1000, name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+async def drop(mongo):
+    from motor.motor_asyncio import AsyncIOMotorClient
+    client = AsyncIOMotorClient(mongo)
+    await client.drop_database(DATABASE)
+    client.close()
+
+def ms(values):
+    values = [v for v in values if v is not None]
+    return f"{statistics.median(values) * 1000:>8.0f}" if values else f"{'-':>8}"
+
+def main(args):
+    if args.mongo != "mongomock":
+        asyncio.run(drop(args.mongo))
+
+    runs = [spawn(args, 1)[0] for _ in range(args.runs)]
+    print(f"{args.runs} ayrı süreçte medyan (ms):")
+    print(f"  main içe aktarma      {ms([r['import'] for r in runs])}")
+    print(f"  lifespan açılışı      {ms([r['startup'] for r in runs])}")
+    print(f"  toplam                {ms([r['import'] + r['startup'] for r in runs])}")
+    print(f"  ilk çağrıda SDK       {ms([r['sdk'] for r in runs])}")
+
+    print("\nEn pahalı içe aktarmalar (ms, alt modüller dahil):")
+    for cumulative, name in import_profile(args.top):
+        print(f"  {cumulative:>8.0f}  {name}")
+
+    if args.mongo != "mongomock":
+        asyncio.run(drop(args.mongo))
+        workers = spawn(args, args.workers)
+        migrated = sum(1 for r in workers if r["migrated"])
+        print(f"\n{args.workers} worker aynı anda: en yavaş açılış "
+              f"{max(r['import'] + r['startup'] for r in workers) * 1000:.0f} ms, "
+              f"index migration'ını çalıştıran süreç sayısı {migrated}")
+        asyncio.run(drop(args.mongo))
+        if migrated != 1:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongo", default="mongomock", help="'mongomock' veya MongoDB bağlantı adresi")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        sys.path.insert(0, BACKEND)
+        asyncio.run(child(args.mongo))
+    else:
+        main(args)
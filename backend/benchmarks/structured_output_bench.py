@@ -0,0 +1,279 @@
+"""
+Şemalı (JSON modu + response_schema) Gemini çıktısı ile eski serbest metin
+prompt'larının karşılaştırması.
+
+FakeGeminiModel ile ağsız çalışır. Eski yol, şemalı katmandan önceki
+prompt'lar ve ayrıştırma (```json temizleme + json.loads, akıllı
+eşleştirme/risk analizinde ilk {...} eşleşmesi) ile birebir aynıdır. Sahte
+model serbest metin modunda --chatter-rate olasılıkla JSON'un çevresine
+açıklama ekler; JSON modunda çıplak JSON döndürür ve max_output_tokens'ta
+keser. Çağrı türü başına raporlananlar:
+  * Gemini çağrı sayısı (toplu analizde başarısız grupların tek tek tekrarı dahil)
+  * ayrıştırılamayan veya şemaya uymayan yanıt oranı
+  * çağrı başına ortalama prompt ve yanıt token'ı
+
+Kullanım:
+    python benchmarks/structured_output_bench.py --texts 400 --chatter-rate 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+from typing import List
+
+from pydantic import TypeAdapter, ValidationError
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import gemini_analyzer  # noqa: E402
+from fake_gemini import FakeGeminiModel  # noqa: E402
+from gemini_analyzer import (  # noqa: E402
+    GEMINI_BATCH_SIZE, StructuredOutputError, _analyze_chunk_async, _build_prompt,
+    build_match_prompt, build_risk_prompt, generate_structured_async
+)
+from schemas import BatchAnalysisItem, HelpAnalysis, RiskAnalysis, SmartMatch  # noqa: E402
+from traffic import QUAKE_REGION, TrafficGenerator  # noqa: E402
+
+# Eski prompt'lar ve ayrıştırma (karşılaştırma için)
+
+def legacy_prompt(user_text):
+    return f"""
+    Aşağıdaki metni analiz et ve SADECE JSON formatında cevap ver. Başka hiçbir açıklama veya metin yazma.
+
+    Metin: "{user_text}"
+
+    İstenilen JSON formatı:
+    {{
+        "ihtiyac_var": true/false,
+        "konum": "şehir/ilçe",
+        "urunler": [
+            {{
+                "urun_adi": "ürün adı",
+                "miktar": 0,
+                "birim": "adet/paket/şişe"
+            }}
+        ],
+        "öncelik": "düşük/orta/yüksek/acil"
+    }}
+
+    JSON:
+    """
+
+def legacy_batch_prompt(texts):
+    numbered = "\n".join(f"{i}. {json.dumps(text, ensure_ascii=False)}" for i, text in enumerate(texts))
+    return f"""
+    Aşağıdaki numaralı metinlerin HER BİRİNİ ayrı ayrı analiz et ve SADECE bir JSON dizisi döndür.
+    Dizide her metin için tam olarak bir nesne olmalı ve "index" alanı metnin numarası olmalı.
+    Başka hiçbir açıklama veya metin yazma.
+
+    Metinler:
+    {numbered}
+
+    Dizideki her nesnenin formatı:
+    {{
+        "index": 0,
+        "ihtiyac_var": true/false,
+        "konum": "şehir/ilçe",
+        "urunler": [
+            {{
+                "urun_adi": "ürün adı",
+                "miktar": 0,
+                "birim": "adet/paket/şişe"
+            }}
+        ],
+        "öncelik": "düşük/orta/yüksek/acil"
+    }}
+
+    JSON:
+    """
+
+def legacy_match_prompt(konum, urun_adi, candidate_lines, nearest):
+    return f"""
+        {konum} şehrinde {urun_adi} ihtiyacı var.
+        En yakın kaynaklardan birini seç:
+        {candidate_lines}
+
+        JSON formatında döndür:
+        {{
+            "recommended_city": "{nearest}",
+            "reason": "Yakın mesafede ve yeterli stok var",
+            "distance": "50",
+            "available_amount": "10"
+        }}
+        """
+
+def legacy_risk_prompt(city_lines):
+    return f"""
+        Aşağıda deprem yardım sistemine gelen kayıtların şehir bazlı özeti var
+        (kayıt sayısı, bildirilen tır sayısı, marketlerdeki toplam stok ve
+        kayıtlarda en çok geçen ürünler). Bu verilere göre riskli şehirleri ve
+        stok eksikliği olan şehirleri belirle.
+
+        {city_lines}
+
+        JSON formatında döndür:
+        {{
+            "high_risk": ["liste şehirler"],
+            "low_supply": ["stok eksikliği olan şehirler"],
+            "recommendation": "öneri metni"
+        }}
+        """
+
+def legacy_parse(raw_text):
+    cleaned_text = raw_text.strip()
+    if cleaned_text.startswith("```json"):
+        cleaned_text = cleaned_text[7:]
+    elif cleaned_text.startswith("```"):
+        cleaned_text = cleaned_text[3:]
+    if cleaned_text.endswith("```"):
+        cleaned_text = cleaned_text[:-3]
+    return json.loads(cleaned_text.strip())
+
+def legacy_regex(raw_text):
+    match = re.search(r'\{[^}]+\}', raw_text, re.DOTALL)
+    if not match:
+        raise ValueError("JSON bulunamadı")
+    return json.loads(match.group())
+
+# Ölçüm
+
+class Tally:
+    def __init__(self, model):
+        self.model = model
+        self.start = dict(model.stats)
+        self.requests = 0
+        self.failures = 0
+
+    def row(self, name):
+        calls = self.model.stats["calls"] - self.start["calls"]
+        prompt = self.model.stats["prompt_tokens"] - self.start["prompt_tokens"]
+        output = self.model.stats["output_tokens"] - self.start["output_tokens"]
+        return (f"{name:<28}{self.requests:>7}{calls:>8}{self.failures / max(self.requests, 1) * 100:>10.1f}%"
+                f"{prompt / max(calls, 1):>12.0f}{output / max(calls, 1):>10.0f}")
+
+def conforms(schema_type, value):
+    try:
+        TypeAdapter(schema_type).validate_python(value)
+        return True
+    except ValidationError:
+        return False
+
+async def legacy_call(model, prompt):
+    return (await model.generate_content_async(prompt)).text
+
+async def run_analyze(model, texts, structured):
+    tally = Tally(model)
+    for text in texts:
+        tally.requests += 1
+        try:
+            if structured:
+                await generate_structured_async(_build_prompt(text), HelpAnalysis, "analyze")
+            elif not conforms(HelpAnalysis, legacy_parse(await legacy_call(model, legacy_prompt(text)))):
+                tally.failures += 1
+        except (StructuredOutputError, ValueError):
+            tally.failures += 1
+    return tally
+
+async def run_batch(model, texts, structured):
+    tally = Tally(model)
+    for start in range(0, len(texts), GEMINI_BATCH_SIZE):
+        chunk = texts[start:start + GEMINI_BATCH_SIZE]
+        tally.requests += len(chunk)
+        if structured:
+            results = await _analyze_chunk_async(chunk)
+            tally.failures += sum(1 for result in results if "error" in result)
+            continue
+        # Eski yol: dizi ayrıştırılamazsa her metin tek tek analiz edilir
+        try:
+            parsed = legacy_parse(await legacy_call(model, legacy_batch_prompt(chunk)))
+            if not conforms(List[BatchAnalysisItem], parsed):
+                raise ValueError("şemaya uymuyor")
+        except ValueError:
+            for text in chunk:
+                try:
+                    legacy_parse(await legacy_call(model, legacy_prompt(text)))
+                except ValueError:
+                    tally.failures += 1
+    return tally
+
+def match_cases(traffic, count):
+    cases = []
+    for _ in range(count):
+        konum, urun = traffic.quake_city(), traffic.product()
+        cities = [traffic.donor_city() for _ in range(4)]
+        lines = "\n".join(
+            f"- {city}: {traffic.rng.randint(5, 500)} adet, {100 * (i + 1) + traffic.rng.randint(0, 99)} km (market)"
+            for i, city in enumerate(cities)
+        )
+        cases.append((konum, urun, lines, list(dict.fromkeys(cities))))
+    return cases
+
+async def run_match(model, cases, structured):
+    tally = Tally(model)
+    for konum, urun, lines, cities in cases:
+        tally.requests += 1
+        try:
+            if structured:
+                await generate_structured_async(build_match_prompt(konum, urun, lines), SmartMatch,
+                                                "smart_matching", choices={"recommended_city": cities})
+            else:
+                result = legacy_regex(await legacy_call(model, legacy_match_prompt(konum, urun, lines, cities[0])))
+                if not conforms(SmartMatch, result) or result["recommended_city"] not in cities:
+                    tally.failures += 1
+        except (StructuredOutputError, ValueError):
+            tally.failures += 1
+    return tally
+
+def risk_lines(traffic):
+    return "\n".join(
+        f"- {city}: {traffic.rng.randint(10, 5000)} kayıt, {traffic.rng.randint(0, 40)} tır, "
+        f"market stoğu {traffic.rng.randint(0, 20000)} adet; kayıtlardaki ürünler: "
+        + ", ".join(f"{traffic.product()} {traffic.rng.randint(1, 900)}" for _ in range(5))
+        for city in QUAKE_REGION
+    )
+
+async def run_risk(model, prompts, structured):
+    tally = Tally(model)
+    for lines in prompts:
+        tally.requests += 1
+        try:
+            if structured:
+                await generate_structured_async(build_risk_prompt(lines), RiskAnalysis, "risk_analysis")
+            elif not conforms(RiskAnalysis, legacy_regex(await legacy_call(model, legacy_risk_prompt(lines)))):
+                tally.failures += 1
+        except (StructuredOutputError, ValueError):
+            tally.failures += 1
+    return tally
+
+async def main(args):
+    model = FakeGeminiModel(latency=0, jitter=0, chatter_rate=args.chatter_rate, seed=args.seed)
+    gemini_analyzer.set_model(model)
+    traffic = TrafficGenerator(seed=args.seed)
+    texts = [traffic.entry()["text"] for _ in range(args.texts)]
+    cases = match_cases(traffic, args.calls)
+    risk_prompts = [risk_lines(traffic) for _ in range(args.calls)]
+
+    print(f"{'':<28}{'istek':>7}{'çağrı':>8}{'hata':>11}{'prompt tok':>12}{'yanıt tok':>10}")
+    for name, runner, workload in (
+        ("analiz", run_analyze, texts),
+        ("toplu analiz", run_batch, texts),
+        ("akıllı eşleştirme", run_match, cases),
+        ("risk analizi", run_risk, risk_prompts),
+    ):
+        for structured in (False, True):
+            tally = await runner(model, workload, structured)
+            print(tally.row(f"{name} ({'şemalı' if structured else 'eski'})"))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=400)
+    parser.add_argument("--calls", type=int, default=200, help="eşleştirme ve risk analizi çağrı sayısı")
+    parser.add_argument("--chatter-rate", type=float, default=0.1,
+                        help="serbest metin yanıtlarına açıklama eklenme oranı")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,85 @@
+"""
+Risk analizi önbelleğinin (SWRCache) yük altındaki davranışı.
+
+Gemini yerine gecikmeli FakeGeminiModel kullanılır. Ölçülenler:
+  * Soğuk önbellekte aynı anda gelen --concurrency istek için kaç Gemini
+    çağrısı yapıldığı (single-flight ile 1 olmalı) ve bekleme süreleri
+  * Sürekli trafikte (--duration sn, --rate istek/sn) önbelleksiz ve
+    önbellekli Gemini çağrı sayısı ile istek gecikmesi p50/p99; TTL
+    dolduğunda istekler bayat sonuçla hemen döner
+
+Kullanım:
+    python benchmarks/swr_cache_bench.py --concurrency 500 --duration 10 --rate 200 --ttl 2
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_gemini import FakeGeminiModel  # noqa: E402
+from swr_cache import SWRCache  # noqa: E402
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+async def cold_burst(model, concurrency):
+    cache = SWRCache(ttl_seconds=60, stale_seconds=60)
+
+    async def loader():
+        return (await model.generate_content_async("risk analizi")).text
+
+    async def request():
+        started = time.perf_counter()
+        await cache.get("risk", loader)
+        return time.perf_counter() - started
+
+    calls = model.stats["calls"]
+    waits = await asyncio.gather(*(request() for _ in range(concurrency)))
+    print(f"Soğuk önbellek, {concurrency} eşzamanlı istek: {model.stats['calls'] - calls} Gemini çağrısı, "
+          f"bekleme p50 {percentile(waits, 50) * 1000:.0f} ms, en fazla {max(waits) * 1000:.0f} ms")
+    print(f"  {cache.get_stats()}")
+
+async def steady(model, duration, rate, cache):
+    async def loader():
+        return (await model.generate_content_async("risk analizi")).text
+
+    async def request():
+        started = time.perf_counter()
+        if cache is None:
+            await loader()
+        else:
+            await cache.get("risk", loader)
+        return time.perf_counter() - started
+
+    calls = model.stats["calls"]
+    tasks = []
+    for _ in range(int(duration * rate)):
+        tasks.append(asyncio.create_task(request()))
+        await asyncio.sleep(1 / rate)
+    waits = await asyncio.gather(*tasks)
+    label = "önbelleksiz" if cache is None else f"SWR (ttl {cache.ttl_seconds} sn)"
+    print(f"{label:<20} {len(waits)} istek, {model.stats['calls'] - calls} Gemini çağrısı, "
+          f"p50 {percentile(waits, 50) * 1000:.1f} ms, p99 {percentile(waits, 99) * 1000:.1f} ms")
+    if cache is not None:
+        print(f"  {cache.get_stats()}")
+
+async def main(args):
+    model = FakeGeminiModel(latency=args.latency, jitter=args.jitter, seed=1)
+    await cold_burst(model, args.concurrency)
+    await steady(model, args.duration, args.rate, None)
+    await steady(model, args.duration, args.rate, SWRCache(ttl_seconds=args.ttl, stale_seconds=60))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--rate", type=float, default=200, help="istek/sn")
+    parser.add_argument("--ttl", type=float, default=2)
+    parser.add_argument("--latency", type=float, default=1.5, help="sahte Gemini gecikmesi (sn)")
+    parser.add_argument("--jitter", type=float, default=0.5)
+    asyncio.run(main(parser.parse_args()))
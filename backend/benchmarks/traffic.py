@@ -0,0 +1,107 @@
+"""
+Yük testleri için sentetik afet trafiği.
+
+Gerçekçi Türkçe yardım/bağış metinleri, deprem bölgesine yoğunlaşan
+şehir dağılımı ve depremden sonra ani yükselip sönümlenen bir istek
+hızı (burst profili) üretir. Aynı seed ile aynı trafik üretilir.
+"""
+import math
+import random
+
+from gazetteer import DISTRICTS, PROVINCES
+
+# Deprem bölgesi ve ihtiyaç kayıtlarının ağırlığı
+QUAKE_REGION = {
+    "Hatay": 10, "Kahramanmaraş": 9, "Adıyaman": 6, "Malatya": 5, "Gaziantep": 5,
+    "Osmaniye": 3, "Adana": 2, "Diyarbakır": 2, "Şanlıurfa": 2, "Elazığ": 1,
+}
+# Bağışların çoğu büyük şehirlerden gelir; kalan iller eşit ağırlıkta
+DONOR_CITIES = {"İstanbul": 20, "Ankara": 10, "İzmir": 8, "Bursa": 5, "Antalya": 4, "Konya": 3, "Kocaeli": 3}
+
+PRODUCTS = ["su", "battaniye", "çadır", "bebek maması", "bebek bezi", "ilaç", "konserve",
+            "mont", "uyku tulumu", "ısıtıcı", "jeneratör", "hijyen kiti", "ekmek"]
+
+NEED_TEMPLATES = [
+    "{yer}'da {n} {urun} acil lazım",
+    "Enkaz altından çıkan aileler için {yer} bölgesine {urun} gerekiyor, lütfen yardım edin",
+    "{yer} çadır kentte {n} kişilik {urun} ihtiyacı var",
+    "Acil! {yer}'da {urun} ve {urun2} bulunamıyor, {n} aile bekliyor",
+    "{yer} merkezde yaşlılar için {urun} lazım, çok soğuk",
+]
+DONATION_TEMPLATES = [
+    "{Urun}: {n} adet, {Urun2}: {n2} adet malzemelerini bağışlayabilirim. Konumum: {sehir}",
+    "Elimde {n} koli {urun} var, {sehir}'dan gönderebilirim",
+    "{sehir}'da deposunda {n} {urun} bekleyen bir market olarak bağış yapmak istiyoruz",
+    "{Urun}: {n} adet malzemelerini bağışlayabilirim. Konumum: {sehir}",
+]
+
+def _weighted(rng, weights):
+    cities, values = zip(*weights.items())
+    return rng.choices(cities, values)[0]
+
+class TrafficGenerator:
+    """
+    Args:
+        seed (int): Tekrarlanabilirlik için
+        need_ratio (float): Kayıtların ne kadarının ihtiyaç (geri kalanı bağış) olduğu
+    """
+
+    def __init__(self, seed=0, need_ratio=0.5):
+        self.rng = random.Random(seed)
+        self.need_ratio = need_ratio
+        self._districts = {}
+        for district, province in DISTRICTS.items():
+            self._districts.setdefault(province, []).append(district)
+        self._donor_weights = {**{city: 1 for city in PROVINCES}, **DONOR_CITIES}
+
+    def quake_city(self):
+        return _weighted(self.rng, QUAKE_REGION)
+
+    def donor_city(self):
+        return _weighted(self.rng, self._donor_weights)
+
+    def product(self):
+        return self.rng.choice(PRODUCTS)
+
+    def need_text(self):
+        city = self.quake_city()
+        place = self.rng.choice(self._districts.get(city, []) + [city])
+        urun, urun2 = self.rng.sample(PRODUCTS, 2)
+        return self.rng.choice(NEED_TEMPLATES).format(
+            yer=place, urun=urun, urun2=urun2, n=self.rng.randint(2, 300)
+        )
+
+    def donation_text(self):
+        urun, urun2 = self.rng.sample(PRODUCTS, 2)
+        return self.rng.choice(DONATION_TEMPLATES).format(
+            sehir=self.donor_city(), urun=urun, Urun=urun.capitalize(), Urun2=urun2.capitalize(),
+            n=self.rng.randint(1, 200), n2=self.rng.randint(1, 200)
+        )
+
+    def entry(self):
+        """/submit-entry gövdesi"""
+        text = self.need_text() if self.rng.random() < self.need_ratio else self.donation_text()
+        return {"text": text, "name": f"kullanici-{self.rng.randint(1, 10**6)}"}
+
+def rate_at(t, base_rate, peak_rate, burst_at, decay):
+    """t anındaki istek hızı (istek/sn): deprem anında peak_rate'e çıkar, decay sn'de e kat söner"""
+    if t < burst_at:
+        return base_rate
+    return base_rate + (peak_rate - base_rate) * math.exp(-(t - burst_at) / decay)
+
+def arrivals(duration, base_rate, peak_rate, burst_at, decay, rng):
+    """
+    Burst profiline uyan Poisson geliş zamanları (thinning yöntemi).
+
+    Returns:
+        list[float]: Testin başından itibaren saniye cinsinden istek zamanları
+    """
+    top = max(base_rate, peak_rate)
+    times = []
+    t = 0.0
+    while True:
+        t += rng.expovariate(top)
+        if t >= duration:
+            return times
+        if rng.random() * top <= rate_at(t, base_rate, peak_rate, burst_at, decay):
+            times.append(t)
@@ -0,0 +1,156 @@
+"""
+Trend sorgularının ham kayıtlardan hesaplanması ile saat/gün kovalarından
+(TrendRollups) okunmasının karşılaştırması.
+
+Sentetik trafikten --entries kadar kayıt son --days güne yayılarak yazılır
+ve kayıt sırasında olduğu gibi kovalara işlenir (saklama süresinden eskiler
+doğrudan gün kovalarına). Ardından farklı pencerelerde "şehirde ürün talebi
+önceki pencereye göre ne kadar değişti" sorusu iki yolla yanıtlanır:
+  * ham: pencerelerdeki tüm kayıtlar okunup Python'da toplanır
+  * kova: TrendRollups.trends (yalnızca kovalar okunur)
+Okunan doküman sayısı, süre ve iki yolun sonuçlarının aynı olduğu raporlanır.
+mongomock index kullanmadan tüm koleksiyonu taradığı için süreler yalnızca
+--mongo ile gerçek bir MongoDB'de anlamlıdır; okunan doküman sayısı her
+ikisinde de aynıdır.
+
+Kullanım:
+    python benchmarks/trends_bench.py --mongo mongomock --entries 50000 --days 14
+    python benchmarks/trends_bench.py --mongo mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from product_catalog import annotate_products, resolve  # noqa: E402
+from rule_extractor import extract  # noqa: E402
+from traffic import TrafficGenerator  # noqa: E402
+from trend_rollups import DAY, HOUR, TrendRollups, bucket_start, entry_amounts  # noqa: E402
+
+DATABASE = "trends_bench"
+
+async def open_database(mongo):
+    if mongo == "mongomock":
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(mongo)
+    await client.drop_database(DATABASE)
+    return client, client[DATABASE]
+
+async def seed(db, rollups, count, days, seed_value):
+    """Kayıtları son days güne yayar; sona doğru yoğunlaşan (deprem sonrası) bir dağılımla"""
+    traffic = TrafficGenerator(seed=seed_value)
+    rng = random.Random(seed_value)
+    now = datetime.now()
+    batch = []
+    record_time = 0.0
+    for _ in range(count):
+        item = traffic.entry()
+        analysis = annotate_products(extract(item["text"])[0])
+        age = timedelta(days=days) * rng.random() ** 3
+        batch.append({"name": item["name"], "original_text": item["text"], "analysis": analysis,
+                      "timestamp": now - age, "status": "aktif"})
+        if len(batch) == 1000:
+            record_time += await write(db, rollups, batch)
+            batch = []
+    if batch:
+        record_time += await write(db, rollups, batch)
+    return record_time
+
+async def write(db, rollups, batch):
+    await db.entries.insert_many(batch)
+    started = time.perf_counter()
+    await rollups.record(batch)
+    return time.perf_counter() - started
+
+async def raw_trend(db, city, product, window_hours, granularity, now):
+    """Aynı soruyu ham kayıtları okuyarak yanıtlar; (talep, önceki talep, okunan kayıt)"""
+    step = timedelta(hours=1) if granularity == HOUR else timedelta(days=1)
+    buckets = max(1, -(-timedelta(hours=window_hours) // step))
+    current_start = bucket_start(now, granularity) - (buckets - 1) * step
+    previous_start = current_start - buckets * step
+    key = resolve(product)
+    current = previous = read = 0
+    async for entry in db.entries.find(
+        {"analysis.konum": city, "timestamp": {"$gte": previous_start}},
+        projection={"analysis": 1, "timestamp": 1}
+    ):
+        read += 1
+        if not entry["analysis"].get("ihtiyac_var"):
+            continue
+        amount = entry_amounts(entry).get(key, 0)
+        if entry["timestamp"] >= current_start:
+            current += amount
+        else:
+            previous += amount
+    return current, previous, read
+
+async def timed(coroutine_factory, runs):
+    durations = []
+    result = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = await coroutine_factory()
+        durations.append(time.perf_counter() - started)
+    return result, statistics.median(durations)
+
+async def run(args):
+    client, db = await open_database(args.mongo)
+    rollups = TrendRollups(db.trend_rollups, hourly_retention=args.retention)
+    await rollups.ensure_indexes()
+    await db.entries.create_index([("analysis.konum", 1), ("timestamp", -1)])
+
+    record_time = await seed(db, rollups, args.entries, args.days, args.seed)
+    buckets = await db.trend_rollups.count_documents({})
+    print(f"{args.entries} kayıt, {args.days} gün; {buckets} kova "
+          f"(saatlik {await db.trend_rollups.count_documents({'granularity': HOUR})}, "
+          f"günlük {await db.trend_rollups.count_documents({'granularity': DAY})})")
+    print(f"Kayıt anında kovalara yazma: kayıt başına {record_time / args.entries * 1e6:.0f} µs, "
+          f"{rollups.stats['bucket_updates'] / args.entries:.2f} kova güncellemesi\n")
+
+    now = datetime.now()
+    print(f"{'soru':<34}{'ham kayıt':>10}{'ham ms':>9}{'kova':>6}{'kova ms':>9}  sonuç")
+    mismatches = 0
+    for window_hours in (1, 6, 24, 24 * 7):
+        granularity = HOUR if 2 * window_hours <= args.retention else DAY
+        (raw_current, raw_previous, raw_read), raw_time = await timed(
+            lambda: raw_trend(db, args.city, args.product, window_hours, granularity, now), args.runs
+        )
+        result, rollup_time = await timed(
+            lambda: rollups.trends(args.city, args.product, window_hours, granularity, now=now), args.runs
+        )
+        trend = result["trends"][0] if result["trends"] else {"current": {"demand": 0}, "previous": {"demand": 0}}
+        same = (trend["current"]["demand"], trend["previous"]["demand"]) == (raw_current, raw_previous)
+        mismatches += not same
+        label = f"{args.city}/{args.product}, son {window_hours} sa"
+        print(f"{label:<34}{raw_read:>10}{raw_time * 1000:>9.1f}{result['buckets_read']:>6}{rollup_time * 1000:>9.1f}"
+              f"  talep {raw_previous} → {raw_current} {'(aynı)' if same else '(FARKLI: ' + str(trend['current']['demand']) + ')'}")
+
+    result, rollup_time = await timed(lambda: rollups.trends(window_hours=1, now=now), args.runs)
+    top = ", ".join(f"{t['konum']}/{t['urun']} {t['demand_change']:+}" for t in result["trends"][:3])
+    print(f"\nTüm şehir/ürünler, son 1 sa: {result['buckets_read']} kova, {rollup_time * 1000:.1f} ms; en hızlı artan: {top}")
+
+    await client.drop_database(DATABASE)
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongo", default="mongomock", help="'mongomock' veya MongoDB bağlantı adresi")
+    parser.add_argument("--entries", type=int, default=50000)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--retention", type=int, default=48, help="saat kovalarının saklama süresi (saat)")
+    parser.add_argument("--city", default="Hatay")
+    parser.add_argument("--product", default="su")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
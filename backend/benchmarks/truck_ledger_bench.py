@@ -0,0 +1,88 @@
+"""
+Tır kapasite defterinin eşzamanlı sevkiyat altında stres testi.
+
+Yerel bir mongod üzerindeki geçici veritabanına MOCK_TRUCKS filolarını yazar
+ve --dispatches adet rezervasyonu aynı anda başlatır. Başarılı her
+rezervasyon rastgele onaylanır, bırakılır veya terk edilir; terk edilenler
+süpürücüyle geri alınır. Rezervasyon hızı ve sayaçlar raporlanır; aynı
+yük altında fazla ayırma olmadığı tests/test_truck_ledger.py'de kontrol edilir.
+
+Kullanım:
+    python benchmarks/truck_ledger_bench.py --url mongodb://localhost:27017 --dispatches 5000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mock_trucks import MOCK_TRUCKS  # noqa: E402
+from truck_ledger import TruckLedger  # noqa: E402
+
+async def dispatch(ledger, rng, held):
+    city = rng.choice(list(MOCK_TRUCKS))
+    reservation = await ledger.reserve_amount(city, rng.randint(1000, 40000))
+    if reservation is not None:
+        held.append(reservation)
+    return reservation
+
+async def settle(ledger, rng, reservation, trips):
+    action = rng.random()
+    if action < 0.5:
+        if await ledger.confirm(reservation["id"]):
+            trips.append(reservation)
+    elif action < 0.8:
+        await ledger.release(reservation["id"])
+    # Kalanlar terk edilir; süpürücü geri alır
+
+async def run(url, dispatches, rounds):
+    client = AsyncIOMotorClient(url, maxPoolSize=200)
+    db = client["truck_ledger_bench"]
+    await db.trucks.drop()
+    ledger = TruckLedger(db.trucks, hold_ttl=0.5)
+    await ledger.ensure_indexes()
+    await ledger.seed(MOCK_TRUCKS)
+
+    rng = random.Random(7)
+    total_elapsed = 0.0
+    total_attempts = 0
+    for round_number in range(rounds):
+        held = []
+        trips = []
+        started = time.perf_counter()
+        await asyncio.gather(*(dispatch(ledger, rng, held) for _ in range(dispatches)))
+        elapsed = time.perf_counter() - started
+        total_elapsed += elapsed
+        total_attempts += dispatches
+        print(f"Tur {round_number + 1}: {dispatches} eşzamanlı sevkiyat, {len(held)} rezervasyon, "
+              f"{dispatches / elapsed:.0f} deneme/sn")
+
+        await asyncio.gather(*(settle(ledger, rng, r, trips) for r in held))
+        await asyncio.sleep(ledger.hold_ttl)
+        expired = await ledger.expire_holds()
+        print(f"  süresi dolan rezervasyon: {expired}")
+
+        # Sevk edilen tırlar geri dönsün ki sonraki turda yine yarışılacak kapasite olsun
+        for reservation in trips:
+            await ledger.complete(reservation["id"])
+
+    metrics = await ledger.get_metrics()
+    print(f"Toplam: {total_attempts / total_elapsed:.0f} rezervasyon denemesi/sn, "
+          f"{metrics['reserved']} başarılı, {metrics['rejected']} reddedildi, "
+          f"{metrics['confirmed']} onay, {metrics['released']} bırakma, {metrics['expired']} süre dolması")
+
+    await db.trucks.drop()
+    client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--dispatches", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.dispatches, args.rounds))
@@ -0,0 +1,568 @@
+# dispatch_planner.py
+import heapq
+import math
+from collections import defaultdict, deque
+
+from inventory_index import get_inventory
+from mock_trucks import MOCK_TRUCKS, calculate_route
+from product_catalog import resolve
+
+# Öncelik ağırlıkları: birim başına gecikme maliyeti bu katsayıyla çarpılır
+PRIORITY_WEIGHTS = {"acil": 8, "yüksek": 4, "orta": 2, "düşük": 1}
+
+# Rota süreleri bu dakikalık dilimlere yuvarlanır; farklı maliyet sayısını ve
+# dolayısıyla min-cost flow tur sayısını azaltır
+TIME_SLOT_MINUTES = 30
+
+# Kapasite onarımında her ürün için kullanılan şehirlere ek olarak bakılan en yakın kaynak sayısı
+REPAIR_EXTRA_SOURCES = 10
+
+# Karşılanamayan bir birimin maliyeti (dakika cinsinden her rotadan büyük olmalı)
+UNMET_PENALTY = 10 ** 6
+
+_INF = float("inf")
+
+class _MinCostFlow:
+    """
+    Tamsayı maliyetli min-cost flow (primal-dual).
+
+    Her turda indirgenmiş maliyetlerle (t'den geriye) Dijkstra çalışır,
+    ardından sıfır indirgenmiş maliyetli kenarlardan oluşan alt grafikte
+    Dinic ile mümkün olan tüm akış itilir. Tur sayısı farklı yol maliyeti
+    sayısı kadardır; artırma yolu başına Dijkstra gerekmez. Hazır bir akıştan
+    (push) başlanabilir; potansiyeller bu durumda potentials() ile bulunur.
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.adj = [[] for _ in range(n)]
+        self.to = []
+        self.cap = []
+        self.cost = []
+
+    def add_edge(self, u, v, cap, cost):
+        """u→v kenarı ekler ve kenar numarasını döndürür (akış: self.flow_on(e))"""
+        e = len(self.to)
+        self.to += [v, u]
+        self.cap += [cap, 0]
+        self.cost += [cost, -cost]
+        self.adj[u].append(e)
+        self.adj[v].append(e + 1)
+        return e
+
+    def add_node(self):
+        """Yeni düğüm ekler ve numarasını döndürür"""
+        self.adj.append([])
+        self.n += 1
+        return self.n - 1
+
+    def flow_on(self, e):
+        return self.cap[e ^ 1]
+
+    def push(self, e, amount):
+        """e kenarına başlangıç akışı yazar"""
+        self.cap[e] -= amount
+        self.cap[e ^ 1] += amount
+
+    def potentials(self, s=None):
+        """
+        Artık grafikte (negatif kenarlar olabilir) SPFA ile en kısa mesafeler.
+
+        s verilmezse tüm düğümlere 0 maliyetli sanal bir kökten başlanır;
+        sonuç tüm artık kenarlar için geçerli bir potansiyeldir.
+        """
+        to, cap, cost, adj = self.to, self.cap, self.cost, self.adj
+        if s is None:
+            dist = [0] * self.n
+            queue = deque(range(self.n))
+        else:
+            dist = [_INF] * self.n
+            dist[s] = 0
+            queue = deque([s])
+        queued = [False] * self.n
+        for u in queue:
+            queued[u] = True
+        while queue:
+            u = queue.popleft()
+            queued[u] = False
+            du = dist[u]
+            for e in adj[u]:
+                if cap[e] > 0:
+                    v = to[e]
+                    if du + cost[e] < dist[v]:
+                        dist[v] = du + cost[e]
+                        if not queued[v]:
+                            queued[v] = True
+                            queue.append(v)
+        # s'den ulaşılamayan düğümler bundan sonra da ulaşılamaz; değerleri önemsiz
+        return [d if d < _INF else 0 for d in dist]
+
+    def _dijkstra(self, s, t, h, arcs):
+        """
+        Artık grafikte her düğümden t'ye indirgenmiş en kısa mesafeler.
+
+        Arama t'den ters yönde yürür ve s'ye ulaşınca durur: t yalnızca fazlası
+        olan birkaç şehre bağlı olduğundan bu taraf s'nin tarafından çok daha
+        küçüktür. arcs[v], v'ye giren kenarları (kenar, başlangıç, maliyet) olarak tutar.
+        """
+        cap = self.cap
+        dist = [_INF] * self.n
+        dist[t] = 0
+        heap = [(0, t)]
+        while heap:
+            d, v = heapq.heappop(heap)
+            if d > dist[v]:
+                continue
+            if v == s:
+                break
+            base = d - h[v]
+            for e, u, c in arcs[v]:
+                if cap[e] > 0:
+                    nd = base + c + h[u]
+                    if nd < dist[u]:
+                        dist[u] = nd
+                        heapq.heappush(heap, (nd, u))
+        return dist
+
+    def _push_admissible(self, s, t, h):
+        """Sıfır indirgenmiş maliyetli kenarlar üzerinde Dinic ile blocking flow"""
+        n, to, cap, cost, adj = self.n, self.to, self.cap, self.cost, self.adj
+        # Tur boyunca potansiyeller sabit: sıfır maliyetli kenarlar bir kez seçilir.
+        # e sıfırsa ters kenarı e ^ 1 de sıfırdır; alt grafik iki yönde de kullanılır.
+        # Listeler yalnızca aramanın ulaştığı düğümler için, ilk ihtiyaçta kurulur.
+        zero = [None] * n
+        total = 0
+        while True:
+            # Seviyeler t'ye olan uzaklıktır (ters yönde arama); yalnızca t'ye
+            # ulaşabilen düğümler seviye alır, s'nin seviyesinden sonrası gereksiz
+            level = [-1] * n
+            level[t] = 0
+            queue = [t]
+            for v in queue:
+                if level[s] >= 0:
+                    break
+                next_level = level[v] + 1
+                edges = zero[v]
+                if edges is None:
+                    hv = h[v]
+                    edges = zero[v] = [e for e in adj[v] if cost[e] + hv - h[to[e]] == 0]
+                for e in edges:
+                    u = to[e]
+                    if level[u] < 0 and cap[e ^ 1] > 0:
+                        level[u] = next_level
+                        queue.append(u)
+            if level[s] < 0:
+                return total
+
+            # Yinelemeli DFS: her adımda t'ye bir seviye yaklaşan kenarlardan ilerle
+            pointer = [0] * n
+            path = []
+            u = s
+            while True:
+                if u == t:
+                    pushed = min(cap[e] for e in path)
+                    for e in path:
+                        cap[e] -= pushed
+                        cap[e ^ 1] += pushed
+                    total += pushed
+                    # Doyan ilk kenara geri dön
+                    for i, e in enumerate(path):
+                        if cap[e] == 0:
+                            del path[i:]
+                            break
+                    u = to[path[-1]] if path else s
+                    continue
+                edges = zero[u]
+                if edges is None:
+                    hu = h[u]
+                    edges = zero[u] = [e for e in adj[u] if cost[e] + hu - h[to[e]] == 0]
+                i = pointer[u]
+                target = level[u] - 1
+                while i < len(edges) and (cap[edges[i]] == 0 or level[to[edges[i]]] != target):
+                    i += 1
+                pointer[u] = i
+                if i < len(edges):
+                    path.append(edges[i])
+                    u = to[edges[i]]
+                    continue
+                # Çıkmaz düğüm: bir daha ziyaret edilmesin
+                level[u] = -1
+                if not path:
+                    break
+                e = path.pop()
+                u = to[e ^ 1]
+                pointer[u] += 1
+
+    def solve(self, s, t, h=None):
+        """s'den t'ye en düşük maliyetli maksimum akışı bulur: (akış, maliyet)"""
+        h = [0] * self.n if h is None else h
+        to, cost = self.to, self.cost
+        # Düğüme giren kenarlar: v'deki e kenarının tersi e ^ 1, to[e]'den v'ye gider
+        arcs = [[(e ^ 1, to[e], -cost[e]) for e in edges] for edges in self.adj]
+        flow = 0
+        total_cost = 0
+        while True:
+            dist = self._dijkstra(s, t, h, arcs)
+            limit = dist[s]
+            if limit == _INF:
+                return flow, total_cost
+            # s'den uzaktaki düğümler için limit çıkarmak indirgenmiş maliyetleri negatif yapmaz
+            h[:] = [hv - (dv if dv < limit else limit) for hv, dv in zip(h, dist)]
+            pushed = self._push_admissible(s, t, h)
+            flow += pushed
+            total_cost += pushed * (h[t] - h[s])
+
+def market_stock(city):
+    """Şehirdeki marketlerin toplam stoğu: {urun_key: (ürün adı, miktar)}"""
+    return get_inventory().city_stock(city)
+
+def _solve_product(product, weights, groups, sources):
+    """
+    Tek ürünü kapasite kısıtı olmadan çözer: en yüksek öncelik en yakın kaynaktan.
+
+    Maliyet w × t biçiminde olduğundan (Monge) bu sıralı eşleştirme, şehir
+    kapasiteleri bağlamadığı sürece en iyi çözümdür.
+    """
+    shipments = []
+    offers = sorted(
+        (src for src in sources if product in src["stock"]), key=lambda src: src["minutes"]
+    )
+    index = 0
+    left_in_source = offers[0]["stock"][product][1] if offers else 0
+    for weight in sorted(weights, reverse=True):
+        demand = groups[(product, weight)]["demand"]
+        while demand > 0 and index < len(offers):
+            take = min(demand, left_in_source)
+            if take:
+                shipments.append((offers[index], (product, weight), take))
+                demand -= take
+                left_in_source -= take
+            if left_in_source == 0:
+                index += 1
+                left_in_source = offers[index]["stock"][product][1] if index < len(offers) else 0
+    return shipments
+
+class _RepairNetwork:
+    """
+    Kapasitesiz çözümü başlangıç akışı olarak yazan ağ.
+
+    Her şehrin fazlası (yük - kapasite) Z düğümüne giden bir talep olarak
+    modellenir; böylece yalnızca fazla yeniden yönlendirilir. Ürünler yalnızca
+    candidates içindeki şehirlerle bağlanır; çözülmüş ağa extend ile sonradan
+    şehir eklenebilir.
+    """
+
+    def __init__(self, weights_by_product, groups, sources, solutions, candidates):
+        self.weights_by_product = weights_by_product
+        self.sources = sources
+        self.candidates = candidates
+        self.group_node = {key: 3 + i for i, key in enumerate(groups)}
+        self.city_node = {src["city"]: 3 + len(groups) + i for i, src in enumerate(sources)}
+        self.mcf = mcf = _MinCostFlow(3 + len(groups) + len(sources))
+        self.ship_edge = {}
+        self.stock_edge = {}
+
+        unmet_edge = {}
+        for key, node in self.group_node.items():
+            demand = groups[key]["demand"]
+            mcf.push(mcf.add_edge(node, 1, demand, 0), demand)
+            # Karşılanamayan talep: çok yüksek maliyetli sanal kaynak
+            unmet_edge[key] = mcf.add_edge(0, node, demand, key[1] * UNMET_PENALTY)
+
+        city_edge = {}
+        for src in sources:
+            city = src["city"]
+            city_edge[city] = mcf.add_edge(0, self.city_node[city], src["capacity"], 0)
+            for product in src["stock"]:
+                if city in candidates[product]:
+                    self._connect(src, product)
+
+        loads = defaultdict(int)
+        served = defaultdict(int)
+        for shipments in solutions.values():
+            for src, (product, weight), amount in shipments:
+                city = src["city"]
+                loads[city] += amount
+                served[(product, weight)] += amount
+                mcf.push(self.ship_edge[(city, product, weight)], amount)
+                if (city, product) in self.stock_edge:
+                    mcf.push(self.stock_edge[(city, product)], amount)
+        for key, edge in unmet_edge.items():
+            mcf.push(edge, groups[key]["demand"] - served[key])
+        for src in sources:
+            city = src["city"]
+            mcf.push(city_edge[city], min(loads[city], src["capacity"]))
+            excess = loads[city] - src["capacity"]
+            if excess > 0:
+                # Şehre geri dönen her birim fazladan bir birimi kapatır
+                mcf.add_edge(self.city_node[city], 2, excess, 0)
+
+    def _connect(self, src, product):
+        """Şehrin ürün stoğunu ürünün öncelik gruplarına bağlar"""
+        mcf = self.mcf
+        city = src["city"]
+        stock = src["stock"][product][1]
+        weights = self.weights_by_product[product]
+        if len(weights) == 1:
+            # Tek öncelik grubu olan ürünlerde ara stok düğümüne gerek yok
+            self.ship_edge[(city, product, weights[0])] = mcf.add_edge(
+                self.city_node[city], self.group_node[(product, weights[0])], stock,
+                weights[0] * src["minutes"]
+            )
+            return
+        node = mcf.add_node()
+        self.stock_edge[(city, product)] = mcf.add_edge(self.city_node[city], node, stock, 0)
+        for weight in weights:
+            self.ship_edge[(city, product, weight)] = mcf.add_edge(
+                node, self.group_node[(product, weight)], _INF, weight * src["minutes"]
+            )
+
+    def missing(self, potential):
+        """Ağa bağlı olmayan ve indirgenmiş maliyeti negatif kalan (şehir, ürün) çiftleri"""
+        city_node, group_node = self.city_node, self.group_node
+        return [
+            (src, product)
+            for src in self.sources
+            for product in src["stock"]
+            if src["city"] not in self.candidates[product] and any(
+                weight * src["minutes"] + potential[city_node[src["city"]]]
+                < potential[group_node[(product, weight)]]
+                for weight in self.weights_by_product[product]
+            )
+        ]
+
+    def extend(self, pairs, potential):
+        """
+        Çözülmüş ağa yeni (şehir, ürün) bağlantıları ekler ve akışı yeniden en iyi yapar.
+
+        Yeni stok düğümlerinin potansiyeli çıkış kenarları negatif kalmayacak
+        biçimde seçilir, negatif indirgenmiş maliyetli yeni kenarlar doyurulur.
+        Doğan dengesizlikler sanal bir kaynak/hedef arasında en kısa yollarla
+        giderilir; mevcut akış baştan çözülmez.
+        """
+        mcf = self.mcf
+        first_edge = len(mcf.to)
+        first_node = mcf.n
+        for src, product in pairs:
+            self.candidates[product].add(src["city"])
+            self._connect(src, product)
+
+        to, cap, cost = mcf.to, mcf.cap, mcf.cost
+        potential.extend(
+            max(potential[to[e]] - cost[e] for e in mcf.adj[node] if e & 1 == 0)
+            for node in range(first_node, mcf.n)
+        )
+        excess = defaultdict(int)
+        for e in range(first_edge, len(to), 2):
+            u, v = to[e ^ 1], to[e]
+            if cost[e] + potential[u] - potential[v] < 0:
+                excess[u] -= cap[e]
+                excess[v] += cap[e]
+                mcf.push(e, cap[e])
+
+        source, sink = mcf.add_node(), mcf.add_node()
+        for node, amount in excess.items():
+            if amount > 0:
+                mcf.add_edge(source, node, amount, 0)
+            elif amount < 0:
+                mcf.add_edge(node, sink, -amount, 0)
+        potential.append(max((potential[v] for v, x in excess.items() if x > 0), default=0))
+        potential.append(min((potential[v] for v, x in excess.items() if x < 0), default=0))
+        mcf.solve(source, sink, potential)
+
+    def shipments(self):
+        """Çözümdeki sevkiyatlar: [(kaynak, (ürün, ağırlık), miktar)]"""
+        by_city = {src["city"]: src for src in self.sources}
+        flow_on = self.mcf.flow_on
+        return [
+            (by_city[city], (product, weight), flow_on(edge))
+            for (city, product, weight), edge in self.ship_edge.items()
+            if flow_on(edge) > 0
+        ]
+
+def _repair_capacity(weights_by_product, groups, sources, solutions):
+    """
+    Kapasitesi aşılan şehirlerin fazlasını en ucuz yollarla başka kaynaklara aktarır.
+
+    Ürün bazlı çözüm, şehir kapasitesi olmayan problemin en iyi çözümüdür;
+    min-cost flow bu çözümden başlar ve yalnızca fazlayı yeniden dağıtır.
+    Ağ küçük tutulmak için her ürün, kullandığı şehirler ve sonraki
+    REPAIR_EXTRA_SOURCES şehirle sınırlanır. Çözümden sonra dışarıda kalan
+    kenarların indirgenmiş maliyetleri kontrol edilir; negatif olan varsa
+    o şehirler çözülmüş ağa eklenip akış oradan düzeltilir, yani sonuç yine
+    en iyidir.
+    """
+    candidates = {}
+    for product, shipments in solutions.items():
+        offers = sorted(
+            (src for src in sources if product in src["stock"]), key=lambda src: src["minutes"]
+        )
+        used = len({src["city"] for src, _, _ in shipments})
+        candidates[product] = {src["city"] for src in offers[:used + REPAIR_EXTRA_SOURCES]}
+
+    network = _RepairNetwork(weights_by_product, groups, sources, solutions, candidates)
+    network.mcf.solve(0, 2, network.mcf.potentials(0))
+    while True:
+        potential = network.mcf.potentials()
+        missing = network.missing(potential)
+        if not missing:
+            return network.shipments()
+        network.extend(missing, potential)
+
+def plan_dispatch(konum, needs, fleets=None, stock_for=market_stock, route_for=calculate_route):
+    """
+    Deprem bölgesindeki tüm ihtiyaçlar için en uygun sevkiyat planını hesaplar.
+
+    Kaynaklar: MOCK_TRUCKS'taki her filonun kapasitesi (trucks × capacity_per_truck)
+    ve o şehrin market stoğu. Amaç, öncelik ağırlığıyla çarpılmış toplam teslim
+    süresini en aza indirmektir; yetersiz kapasitede önce yüksek öncelikli
+    ihtiyaçlar karşılanır.
+
+    Önce her ürün kapasiteden bağımsız olarak çözülür (çoğu durumda sonuç
+    budur). Bir şehrin filo kapasitesi aşılırsa fazla, min-cost flow ile
+    en düşük maliyetle başka şehirlere veya karşılanamayan talebe aktarılır.
+
+    Args:
+        konum (str): Deprem bölgesi
+        needs (list): [{"id", "urun", "miktar", "öncelik"}, ...]
+        fleets (dict): Şehir → filo listesi (varsayılan MOCK_TRUCKS)
+        stock_for (callable): Şehir → {urun_key: (ad, miktar)}
+        route_for (callable): (başlangıç, varış) → calculate_route sonucu; None dönen şehirler atlanır
+
+    Returns:
+        dict: allocations, fleet_usage, unmet ve özet alanları
+    """
+    fleets = MOCK_TRUCKS if fleets is None else fleets
+
+    # İhtiyaçları (ürün, ağırlık) gruplarında topla
+    groups = {}
+    for need in needs:
+        amount = need.get("miktar") or 0
+        if not isinstance(amount, (int, float)) or amount <= 0:
+            continue
+        weight = PRIORITY_WEIGHTS.get(need.get("öncelik"), PRIORITY_WEIGHTS["orta"])
+        key = (need.get("urun_key") or resolve(need["urun"]), weight)
+        group = groups.setdefault(key, {"urun": need["urun"], "demand": 0, "needs": []})
+        group["demand"] += int(amount)
+        group["needs"].append(need)
+
+    weights_by_product = defaultdict(list)
+    for product, weight in groups:
+        weights_by_product[product].append(weight)
+
+    # Kaynak şehirler: filosu ve ihtiyaç duyulan üründen stoğu olanlar
+    sources = []
+    for city, city_fleets in fleets.items():
+        if city == konum or not city_fleets:
+            continue
+        capacity = sum(f["trucks"] * f["capacity_per_truck"] for f in city_fleets)
+        stock = {k: v for k, v in stock_for(city).items() if k in weights_by_product and v[1] > 0}
+        if capacity > 0 and stock:
+            route = route_for(city, konum)
+            if route is None:
+                # Yol grafında konuma bağlanmayan şehirler aday olamaz
+                continue
+            # Süre TIME_SLOT_MINUTES'lık dilimlere yuvarlanır (daha az akış turu)
+            slots = max(1, round(route["travel_time"] * 60 / TIME_SLOT_MINUTES))
+            sources.append({
+                "city": city,
+                "capacity": capacity,
+                "stock": stock,
+                "route": route,
+                "minutes": slots * TIME_SLOT_MINUTES
+            })
+
+    solutions = {
+        product: _solve_product(product, weights, groups, sources)
+        for product, weights in weights_by_product.items()
+    }
+    loads = defaultdict(int)
+    for shipments in solutions.values():
+        for src, _, amount in shipments:
+            loads[src["city"]] += amount
+    if any(loads[src["city"]] > src["capacity"] for src in sources):
+        shipments = _repair_capacity(weights_by_product, groups, sources, solutions)
+        solutions = {None: shipments}
+
+    served_by_group = defaultdict(list)
+    for shipments in solutions.values():
+        for src, key, amount in shipments:
+            served_by_group[key].append((src, amount))
+
+    allocations = []
+    unmet = []
+    weighted_minutes = 0
+    for key in sorted(groups, key=lambda k: -k[1]):
+        group = groups[key]
+        shipments = sorted(served_by_group[key], key=lambda item: item[0]["minutes"])
+        # Grubun içindeki ihtiyaçları sırayla doldur
+        remaining = [[need, int(need["miktar"])] for need in group["needs"]]
+        for src, amount in shipments:
+            weighted_minutes += key[1] * src["minutes"] * amount
+            while amount > 0 and remaining:
+                need, left = remaining[0]
+                take = min(left, amount)
+                allocations.append({
+                    "need_id": need.get("id"),
+                    "urun": need["urun"],
+                    "öncelik": need.get("öncelik"),
+                    "from": src["city"],
+                    "to": konum,
+                    "amount": take,
+                    "route": src["route"]
+                })
+                amount -= take
+                remaining[0][1] -= take
+                if remaining[0][1] == 0:
+                    remaining.pop(0)
+        for need, left in remaining:
+            unmet.append({"need_id": need.get("id"), "urun": need["urun"],
+                          "öncelik": need.get("öncelik"), "amount": left})
+
+    fleet_usage = _assign_fleets(allocations, fleets)
+    requested = sum(group["demand"] for group in groups.values())
+    served = sum(a["amount"] for a in allocations)
+    return {
+        "konum": konum,
+        "allocations": allocations,
+        "fleet_usage": fleet_usage,
+        "unmet": unmet,
+        "requested": requested,
+        "served": served,
+        "weighted_delivery_minutes": weighted_minutes
+    }
+
+def _assign_fleets(allocations, fleets):
+    """Şehir bazındaki atamaları o şehrin filolarına büyükten küçüğe dağıtır"""
+    usage = []
+    by_city = defaultdict(list)
+    for allocation in allocations:
+        by_city[allocation["from"]].append(allocation)
+
+    for city, city_allocations in by_city.items():
+        city_fleets = sorted(
+            fleets[city], key=lambda f: f["trucks"] * f["capacity_per_truck"], reverse=True
+        )
+        loads = [0] * len(city_fleets)
+        index = 0
+        for allocation in city_allocations:
+            amount = allocation["amount"]
+            while amount > 0 and index < len(city_fleets):
+                fleet = city_fleets[index]
+                free = fleet["trucks"] * fleet["capacity_per_truck"] - loads[index]
+                if free <= 0:
+                    index += 1
+                    continue
+                take = min(free, amount)
+                loads[index] += take
+                amount -= take
+                allocation.setdefault("companies", []).append(fleet["company"])
+        for fleet, load in zip(city_fleets, loads):
+            if load:
+                usage.append({
+                    "city": city,
+                    "company": fleet["company"],
+                    "load": load,
+                    "trucks": math.ceil(load / fleet["capacity_per_truck"])
+                })
+    return usage
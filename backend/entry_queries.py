@@ -0,0 +1,223 @@
+# entry_queries.py
+import asyncio
+import os
+import re
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from geo_index import geo_point
+from product_catalog import CATALOG_VERSION, annotate_products, resolve
+
+# /match ve /simulate-earthquake sorgularının kullandığı bileşik index
+ENTRY_MATCH_INDEX = [
+    ("analysis.konum", 1),
+    ("status", 1),
+    ("analysis.urunler.urun_key", 1),
+    ("analysis.ihtiyac_var", 1),
+]
+
+# Ürün miktarı adet cinsinden; miktar_adet alanı olmayan eski kayıtlarda girilen miktar
+_QUANTITY = {"$ifNull": ["$analysis.urunler.miktar_adet", "$analysis.urunler.miktar"]}
+
+def entries_filter(konum=None, status=None, oncelik=None, after=None):
+    """/entries için Mongo filtresini oluşturur; after verilirse o kayıttan eskiler döner"""
+    query = {}
+    if konum:
+        query["analysis.konum"] = konum
+    if status:
+        query["status"] = status
+    if oncelik:
+        query["analysis.öncelik"] = oncelik
+    if after:
+        query["_id"] = {"$lt": ObjectId(after)}
+    return query
+
+# Noktayla ayrılmış alan adları; "$" ile başlayan veya boş parçalı yollar kabul edilmez
+_FIELD_PATH = re.compile(r"^\w+(?:\.\w+)*$")
+
+def parse_fields(fields):
+    """
+    'name,analysis.konum' biçimindeki alan listesini Mongo projection'ına çevirir.
+
+    Üst alanı da istenen alt yollar atılır ("analysis" varken "analysis.konum");
+    Mongo bu çakışmayı hata olarak döndürür.
+
+    Raises:
+        ValueError: Geçersiz alan yolu
+    """
+    if not fields:
+        return None
+    paths = []
+    for field in fields.split(","):
+        field = field.strip()
+        if not field:
+            continue
+        if not _FIELD_PATH.match(field):
+            raise ValueError(f"Geçersiz alan: {field}")
+        paths.append(field)
+    requested = set(paths)
+    return {
+        path: 1 for path in paths
+        if not any(".".join(path.split(".")[:i]) in requested for i in range(1, path.count(".") + 1))
+    }
+
+def _entry_projection():
+    return {
+        "_id": 0,
+        "id": {"$toString": "$_id"},
+        "name": "$name",
+        "miktar": _QUANTITY,
+        "öncelik": "$analysis.öncelik",
+        "timestamp": "$timestamp"
+    }
+
+def match_pipeline(konum, urun_adi):
+    """Bir şehirde belirli ürünün arz/talep kayıtlarını ve toplamlarını tek dokümanda döndürür"""
+    key = resolve(urun_adi)
+    return [
+        {"$match": {
+            "analysis.konum": konum,
+            "status": "aktif",
+            "analysis.urunler.urun_key": key
+        }},
+        {"$unwind": "$analysis.urunler"},
+        {"$match": {"analysis.urunler.urun_key": key}},
+        {"$facet": {
+            "arz": [
+                {"$match": {"analysis.ihtiyac_var": False}},
+                {"$project": _entry_projection()}
+            ],
+            "talep": [
+                {"$match": {"analysis.ihtiyac_var": {"$ne": False}}},
+                {"$project": _entry_projection()}
+            ]
+        }}
+    ]
+
+def earthquake_resources_pipeline(konum):
+    """Deprem bölgesindeki arz toplamlarını (ürün bazında) ve tüm talep satırlarını döndürür"""
+    return [
+        {"$match": {"analysis.konum": konum, "status": "aktif"}},
+        {"$unwind": "$analysis.urunler"},
+        {"$facet": {
+            "resources": [
+                {"$match": {"analysis.ihtiyac_var": {"$ne": True}}},
+                {"$group": {
+                    "_id": "$analysis.urunler.urun_key",
+                    "urun_adi": {"$first": "$analysis.urunler.urun_adi"},
+                    "miktar": {"$sum": _QUANTITY}
+                }}
+            ],
+            "needs": [
+                {"$match": {"analysis.ihtiyac_var": True}},
+                {"$project": {
+                    "_id": 0,
+                    "id": {"$toString": "$_id"},
+                    "name": "$name",
+                    "urun": "$analysis.urunler.urun_adi",
+                    "urun_key": "$analysis.urunler.urun_key",
+                    "miktar": _QUANTITY,
+                    "öncelik": "$analysis.öncelik"
+                }}
+            ]
+        }}
+    ]
+
+def donors_near_pipeline(point, urun_adi, radius_km=None, limit=20):
+    """
+    Ürünü verebilecek kayıtları GeoJSON noktasına yakından uzağa döndürür.
+
+    geo alanındaki 2dsphere index'ini kullanır; $geoNear ilk aşama olmak zorundadır.
+    """
+    key = resolve(urun_adi)
+    geo_near = {
+        "near": point,
+        "distanceField": "distance_m",
+        "spherical": True,
+        "query": {
+            "status": "aktif",
+            "analysis.ihtiyac_var": False,
+            "analysis.urunler.urun_key": key
+        }
+    }
+    if radius_km is not None:
+        geo_near["maxDistance"] = radius_km * 1000
+    return [
+        {"$geoNear": geo_near},
+        {"$limit": limit},
+        {"$unwind": "$analysis.urunler"},
+        {"$match": {"analysis.urunler.urun_key": key}},
+        {"$project": {
+            **_entry_projection(),
+            "city": "$analysis.konum",
+            "distance_km": {"$round": [{"$divide": ["$distance_m", 1000]}, 1]}
+        }}
+    ]
+
+async def backfill_product_keys(entries_collection, batch_size=1000):
+    """
+    Ürünleri katalogun eski bir sürümüyle (veya hiç) çözümlenmemiş kayıtları yeniden çözümler.
+    urun_key ve miktar_adet alanları güncellenir; güncellenen kayıt sayısını döndürür.
+    """
+    updated = 0
+    operations = []
+    async for entry in entries_collection.find(
+        {"analysis.urunler.0": {"$exists": True}, "analysis.catalog_version": {"$ne": CATALOG_VERSION}},
+        projection={"analysis.urunler": 1}
+    ):
+        analysis = annotate_products(entry["analysis"])
+        operations.append(UpdateOne(
+            {"_id": entry["_id"]},
+            {"$set": {"analysis.urunler": analysis["urunler"], "analysis.catalog_version": CATALOG_VERSION}}
+        ))
+        if len(operations) >= batch_size:
+            await entries_collection.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+    if operations:
+        await entries_collection.bulk_write(operations, ordered=False)
+        updated += len(operations)
+    return updated
+
+async def backfill_entry_geo(entries_collection, batch_size=1000):
+    """geo alanı eksik olan eski kayıtlara konumlarının koordinatını ekler"""
+    updated = 0
+    operations = []
+    async for entry in entries_collection.find(
+        {"geo": {"$exists": False}, "analysis.konum": {"$type": "string"}},
+        projection={"analysis.konum": 1}
+    ):
+        operations.append(UpdateOne(
+            {"_id": entry["_id"]}, {"$set": {"geo": geo_point(entry["analysis"]["konum"])}}
+        ))
+        if len(operations) >= batch_size:
+            await entries_collection.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+    if operations:
+        await entries_collection.bulk_write(operations, ordered=False)
+        updated += len(operations)
+    return updated
+
+async def _main():
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv()
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    db = client[os.getenv("DATABASE_NAME", "deprem_yardim")]
+    updated = await backfill_product_keys(db.entries)
+    print(f"{updated} kaydın ürünleri katalog sürüm {CATALOG_VERSION} ile çözümlendi")
+    if updated:
+        # Şehir stokları ürün anahtarına göre tutulduğu için yeniden hesaplanır
+        from stock_aggregates import rebuild_city_stock
+        await rebuild_city_stock(db.entries, db.city_stock)
+        print("city_stock yeniden hesaplandı")
+    updated = await backfill_entry_geo(db.entries)
+    print(f"{updated} kayda geo eklendi")
+    client.close()
+
+if __name__ == "__main__":
+    # Kullanım: python entry_queries.py
+    asyncio.run(_main())
@@ -0,0 +1,204 @@
+# event_hub.py
+import asyncio
+import itertools
+import json
+from collections import OrderedDict
+from datetime import datetime
+
+# Olay türleri
+ENTRY = "entry"
+STOCK = "stock"
+DISPATCH = "dispatch"
+EARTHQUAKE = "earthquake"
+# Abonenin tamponu taştığında gönderilir; istemci durumu baştan yüklemeli
+RESYNC = "resync"
+
+def merge_counts(old, new):
+    """Aynı şehrin art arda gelen stok değişimlerini tek değişimde toplar"""
+    merged = dict(old)
+    for key, value in new.items():
+        if isinstance(value, dict):
+            merged[key] = merge_counts(merged.get(key, {}), value)
+        elif isinstance(value, (int, float)) and isinstance(merged.get(key), (int, float)):
+            merged[key] = merged[key] + value
+        else:
+            merged[key] = value
+    return merged
+
+# Olay türü → birleştirme fonksiyonu; listede olmayan türler birleştirilmez
+COALESCE = {
+    STOCK: merge_counts,
+}
+
+class Subscription:
+    """
+    Tek bir abonenin bekleyen olayları.
+
+    Olaylar sınırlı bir tamponda tutulur. Aynı birleştirme anahtarına sahip
+    bekleyen bir olay varsa yeni olay onunla birleştirilir (örn. bir şehrin
+    stok değişimleri toplanır). Tampon dolarsa en eski olaylar atılır ve
+    istemciye resync olayı gönderilir; yavaş bir abone yayıncıyı bekletmez.
+    """
+
+    def __init__(self, hub, cities, max_pending):
+        self.hub = hub
+        self.cities = cities
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._pending = OrderedDict()
+        self._waiter = None
+        self._lagged = False
+
+    def push(self, event, key):
+        # Olay tüm abonelerde ortaktır; birleştirme yeni bir kopya üretir
+        if key is not None and key in self._pending:
+            old = self._pending[key]
+            self._pending[key] = {
+                **event, "data": COALESCE[event["event"]](old["data"], event["data"])
+            }
+            self.hub.stats["coalesced"] += 1
+        else:
+            if len(self._pending) >= self.max_pending:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+                self.hub.stats["dropped"] += 1
+                self._lagged = True
+            self._pending[key if key is not None else event["id"]] = event
+        self._wake()
+
+    def _wake(self):
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def get(self, timeout=None, window=0.0):
+        """
+        Bekleyen olayları döndürür; olay yoksa en fazla timeout saniye bekler.
+
+        window > 0 ise ilk olaydan sonra bu kadar beklenir; bu sürede gelen
+        olaylar aynı partide birleştirilir.
+        """
+        if not self._pending:
+            # wait_for her beklemede yeni bir görev açıyor; binlerce abonede
+            # tek bir future ve zamanlayıcı çok daha ucuz
+            loop = asyncio.get_running_loop()
+            self._waiter = loop.create_future()
+            timer = loop.call_later(timeout, self._wake) if timeout is not None else None
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+                if timer is not None:
+                    timer.cancel()
+            if not self._pending:
+                return []
+        if window:
+            await asyncio.sleep(window)
+        events = list(self._pending.values())
+        self._pending.clear()
+        if self._lagged:
+            self._lagged = False
+            events.insert(0, {"id": events[0]["id"], "event": RESYNC, "topic": None,
+                              "data": {"dropped": self.dropped}})
+        return events
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+class EventHub:
+    """
+    Süreç içi yayın/abone merkezi; konular şehir adlarıdır.
+
+    publish senkron ve bloklamayan bir çağrıdır: olay yalnızca ilgili
+    şehre (ve tüm şehirleri dinleyenlere) abone olanların tamponuna eklenir.
+    """
+
+    def __init__(self, max_pending=256):
+        self.max_pending = max_pending
+        self._by_city = {}
+        self._all = set()
+        self._ids = itertools.count(1)
+        self.stats = {"published": 0, "delivered": 0, "coalesced": 0, "dropped": 0}
+
+    def subscribe(self, cities=None):
+        """cities verilmezse tüm şehirlerin olaylarını alan bir abonelik açar"""
+        subscription = Subscription(self, frozenset(cities) if cities else None, self.max_pending)
+        if subscription.cities is None:
+            self._all.add(subscription)
+        else:
+            for city in subscription.cities:
+                self._by_city.setdefault(city, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        if subscription.cities is None:
+            self._all.discard(subscription)
+            return
+        for city in subscription.cities:
+            subscribers = self._by_city.get(city)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._by_city[city]
+
+    @property
+    def subscriber_count(self):
+        return len(self._all) + len(set().union(*self._by_city.values()) if self._by_city else ())
+
+    def publish(self, event_type, city, data):
+        """
+        Olayı şehre abone olanlara dağıtır.
+
+        Args:
+            event_type (str): ENTRY, STOCK, DISPATCH veya EARTHQUAKE
+            city (str veya tuple): Konu (şehir adı); birden fazla şehri ilgilendiren
+                olaylarda (örn. sevkiyat) şehirler listesi, her abone olayı bir kez alır
+            data (dict): JSON'a çevrilebilir olay içeriği
+        """
+        topics = (city,) if isinstance(city, str) else tuple(city)
+        event = {
+            "id": next(self._ids),
+            "event": event_type,
+            "topic": topics[0] if len(topics) == 1 else list(topics),
+            "data": data,
+            "timestamp": datetime.now().isoformat()
+        }
+        key = (event_type, topics) if event_type in COALESCE else None
+        if len(topics) == 1:
+            subscribers = self._by_city.get(topics[0], ())
+        else:
+            subscribers = set().union(*(self._by_city.get(t, ()) for t in topics))
+        for subscription in itertools.chain(self._all, subscribers):
+            subscription.push(event, key)
+        self.stats["published"] += 1
+        self.stats["delivered"] += len(self._all) + len(subscribers)
+        return event["id"]
+
+    def get_metrics(self):
+        return {**self.stats, "subscribers": self.subscriber_count, "topics": len(self._by_city)}
+
+def format_sse(event):
+    """Olayı text/event-stream biçimine çevirir; olay abonelerde ortak olduğundan bir kez serileştirilir"""
+    text = event.get("sse")
+    if text is None:
+        payload = json.dumps(
+            {"topic": event["topic"], "timestamp": event.get("timestamp"), **event["data"]},
+            ensure_ascii=False, default=str
+        )
+        text = event["sse"] = f"id: {event['id']}\nevent: {event['event']}\ndata: {payload}\n\n"
+    return text
+
+async def sse_stream(subscription, heartbeat=15.0, window=0.05):
+    """
+    Aboneliği SSE akışına çevirir; olay yokken heartbeat saniyede bir yorum satırı
+    gönderilir (proxy'lerin bağlantıyı kapatmaması için). İstemci ayrılınca abonelik kapanır.
+    """
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            events = await subscription.get(timeout=heartbeat, window=window)
+            if not events:
+                yield ": ping\n\n"
+                continue
+            yield "".join(format_sse(event) for event in events)
+    finally:
+        subscription.close()
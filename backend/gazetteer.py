@@ -0,0 +1,129 @@
+# gazetteer.py
+
+# Türkiye'nin 81 ili (plaka sırasıyla; index + 1 = plaka kodu)
+PROVINCES = [
+    "Adana", "Adıyaman", "Afyonkarahisar", "Ağrı", "Amasya", "Ankara", "Antalya",
+    "Artvin", "Aydın", "Balıkesir", "Bilecik", "Bingöl", "Bitlis", "Bolu", "Burdur",
+    "Bursa", "Çanakkale", "Çankırı", "Çorum", "Denizli", "Diyarbakır", "Edirne",
+    "Elazığ", "Erzincan", "Erzurum", "Eskişehir", "Gaziantep", "Giresun", "Gümüşhane",
+    "Hakkari", "Hatay", "Isparta", "Mersin", "İstanbul", "İzmir", "Kars", "Kastamonu",
+    "Kayseri", "Kırklareli", "Kırşehir", "Kocaeli", "Konya", "Kütahya", "Malatya",
+    "Manisa", "Kahramanmaraş", "Mardin", "Muğla", "Muş", "Nevşehir", "Niğde", "Ordu",
+    "Rize", "Sakarya", "Samsun", "Siirt", "Sinop", "Sivas", "Tekirdağ", "Tokat",
+    "Trabzon", "Tunceli", "Şanlıurfa", "Uşak", "Van", "Yozgat", "Zonguldak", "Aksaray",
+    "Bayburt", "Karaman", "Kırıkkale", "Batman", "Şırnak", "Bartın", "Ardahan", "Iğdır",
+    "Yalova", "Karabük", "Kilis", "Osmaniye", "Düzce"
+]
+
+# Yaygın kullanılan alternatif il adları
+PROVINCE_ALIASES = {
+    "Maraş": "Kahramanmaraş",
+    "Antep": "Gaziantep",
+    "Urfa": "Şanlıurfa",
+    "Afyon": "Afyonkarahisar",
+    "İçel": "Mersin",
+    "İzmit": "Kocaeli",
+    "Adapazarı": "Sakarya",
+    "Antakya": "Hatay",
+}
+
+# İlçe → il eşlemesi (birden fazla ilde bulunan veya günlük kelime olan ilçe adları bilinçli olarak dışarıda)
+DISTRICTS = {
+    # Hatay
+    "İskenderun": "Hatay", "Kırıkhan": "Hatay", "Samandağ": "Hatay",
+    "Reyhanlı": "Hatay", "Dörtyol": "Hatay", "Arsuz": "Hatay", "Altınözü": "Hatay",
+    "Hassa": "Hatay", "Payas": "Hatay",
+    # Kahramanmaraş
+    "Pazarcık": "Kahramanmaraş", "Elbistan": "Kahramanmaraş", "Türkoğlu": "Kahramanmaraş",
+    "Göksun": "Kahramanmaraş", "Afşin": "Kahramanmaraş", "Dulkadiroğlu": "Kahramanmaraş",
+    "Onikişubat": "Kahramanmaraş",
+    # Gaziantep
+    "İslahiye": "Gaziantep", "Nurdağı": "Gaziantep", "Şahinbey": "Gaziantep",
+    "Şehitkamil": "Gaziantep", "Nizip": "Gaziantep",
+    # Adıyaman
+    "Kahta": "Adıyaman", "Besni": "Adıyaman",
+    # Malatya
+    "Battalgazi": "Malatya", "Doğanşehir": "Malatya", "Akçadağ": "Malatya", "Darende": "Malatya",
+    # Osmaniye
+    "Kadirli": "Osmaniye", "Düziçi": "Osmaniye",
+    # Şanlıurfa
+    "Eyyübiye": "Şanlıurfa", "Haliliye": "Şanlıurfa", "Siverek": "Şanlıurfa",
+    "Viranşehir": "Şanlıurfa", "Birecik": "Şanlıurfa",
+    # Diyarbakır
+    "Kayapınar": "Diyarbakır", "Ergani": "Diyarbakır",
+    # Mardin
+    "Kızıltepe": "Mardin", "Artuklu": "Mardin", "Midyat": "Mardin", "Nusaybin": "Mardin",
+    # Van
+    "İpekyolu": "Van", "Tuşba": "Van", "Erciş": "Van",
+    # İstanbul
+    "Beşiktaş": "İstanbul", "Kadıköy": "İstanbul", "Üsküdar": "İstanbul",
+    "Şişli": "İstanbul", "Bakırköy": "İstanbul", "Esenyurt": "İstanbul", "Pendik": "İstanbul",
+    "Maltepe": "İstanbul", "Ümraniye": "İstanbul", "Beylikdüzü": "İstanbul",
+    "Avcılar": "İstanbul", "Çekmeköy": "İstanbul", "Sarıyer": "İstanbul", "Ataşehir": "İstanbul",
+    "Bağcılar": "İstanbul", "Küçükçekmece": "İstanbul", "Hadımköy": "İstanbul",
+    # Ankara
+    "Çankaya": "Ankara", "Keçiören": "Ankara", "Yenimahalle": "Ankara", "Mamak": "Ankara",
+    "Etimesgut": "Ankara", "Sincan": "Ankara", "Altındağ": "Ankara", "Pursaklar": "Ankara",
+    "Ostim": "Ankara",
+    # İzmir
+    "Karşıyaka": "İzmir", "Bornova": "İzmir", "Buca": "İzmir",
+    "Bayraklı": "İzmir", "Çiğli": "İzmir", "Torbalı": "İzmir", "Aliağa": "İzmir",
+    "Menemen": "İzmir",
+    # Bursa
+    "Osmangazi": "Bursa", "Nilüfer": "Bursa", "İnegöl": "Bursa", "Gemlik": "Bursa",
+    "Mudanya": "Bursa",
+    # Antalya
+    "Muratpaşa": "Antalya", "Konyaaltı": "Antalya", "Alanya": "Antalya",
+    "Manavgat": "Antalya",
+    # Adana
+    "Seyhan": "Adana", "Çukurova": "Adana", "Yüreğir": "Adana", "Ceyhan": "Adana", "Kozan": "Adana",
+    # Mersin
+    "Tarsus": "Mersin", "Mezitli": "Mersin", "Toroslar": "Mersin", "Erdemli": "Mersin",
+    # Kocaeli
+    "Gebze": "Kocaeli", "Gölcük": "Kocaeli", "Darıca": "Kocaeli",
+    # Sakarya
+    "Serdivan": "Sakarya", "Akyazı": "Sakarya",
+    # Konya
+    "Selçuklu": "Konya", "Karatay": "Konya",
+    # Kayseri
+    "Melikgazi": "Kayseri", "Kocasinan": "Kayseri",
+    # Samsun
+    "Atakum": "Samsun", "İlkadım": "Samsun", "Bafra": "Samsun",
+    # Trabzon
+    "Ortahisar": "Trabzon", "Akçaabat": "Trabzon",
+    # Denizli
+    "Pamukkale": "Denizli", "Merkezefendi": "Denizli",
+    # Eskişehir
+    "Odunpazarı": "Eskişehir", "Tepebaşı": "Eskişehir",
+}
+
+# İl merkezlerinin koordinatları (enlem, boylam)
+PROVINCE_COORDINATES = {
+    "Adana": (37.00, 35.32), "Adıyaman": (37.76, 38.28), "Afyonkarahisar": (38.76, 30.54),
+    "Ağrı": (39.72, 43.05), "Amasya": (40.65, 35.83), "Ankara": (39.93, 32.86),
+    "Antalya": (36.90, 30.70), "Artvin": (41.18, 41.82), "Aydın": (37.85, 27.85),
+    "Balıkesir": (39.65, 27.88), "Bilecik": (40.14, 29.98), "Bingöl": (38.88, 40.50),
+    "Bitlis": (38.40, 42.11), "Bolu": (40.74, 31.61), "Burdur": (37.72, 30.29),
+    "Bursa": (40.19, 29.06), "Çanakkale": (40.15, 26.41), "Çankırı": (40.60, 33.62),
+    "Çorum": (40.55, 34.95), "Denizli": (37.78, 29.09), "Diyarbakır": (37.91, 40.24),
+    "Edirne": (41.68, 26.56), "Elazığ": (38.68, 39.22), "Erzincan": (39.75, 39.49),
+    "Erzurum": (39.90, 41.27), "Eskişehir": (39.78, 30.52), "Gaziantep": (37.07, 37.38),
+    "Giresun": (40.91, 38.39), "Gümüşhane": (40.46, 39.48), "Hakkari": (37.58, 43.74),
+    "Hatay": (36.20, 36.16), "Isparta": (37.76, 30.55), "Mersin": (36.80, 34.64),
+    "İstanbul": (41.01, 28.98), "İzmir": (38.42, 27.14), "Kars": (40.60, 43.10),
+    "Kastamonu": (41.38, 33.78), "Kayseri": (38.73, 35.48), "Kırklareli": (41.73, 27.22),
+    "Kırşehir": (39.15, 34.16), "Kocaeli": (40.77, 29.92), "Konya": (37.87, 32.48),
+    "Kütahya": (39.42, 29.98), "Malatya": (38.36, 38.31), "Manisa": (38.61, 27.43),
+    "Kahramanmaraş": (37.58, 36.94), "Mardin": (37.31, 40.74), "Muğla": (37.22, 28.36),
+    "Muş": (38.74, 41.49), "Nevşehir": (38.62, 34.71), "Niğde": (37.97, 34.68),
+    "Ordu": (40.98, 37.88), "Rize": (41.02, 40.52), "Sakarya": (40.69, 30.44),
+    "Samsun": (41.29, 36.33), "Siirt": (37.93, 41.94), "Sinop": (42.03, 35.15),
+    "Sivas": (39.75, 37.02), "Tekirdağ": (40.98, 27.51), "Tokat": (40.31, 36.55),
+    "Trabzon": (41.00, 39.72), "Tunceli": (39.11, 39.55), "Şanlıurfa": (37.16, 38.80),
+    "Uşak": (38.68, 29.41), "Van": (38.49, 43.38), "Yozgat": (39.82, 34.81),
+    "Zonguldak": (41.45, 31.79), "Aksaray": (38.37, 34.03), "Bayburt": (40.26, 40.23),
+    "Karaman": (37.18, 33.22), "Kırıkkale": (39.85, 33.52), "Batman": (37.88, 41.13),
+    "Şırnak": (37.52, 42.46), "Bartın": (41.63, 32.34), "Ardahan": (41.11, 42.70),
+    "Iğdır": (39.92, 44.05), "Yalova": (40.65, 29.27), "Karabük": (41.20, 32.62),
+    "Kilis": (36.72, 37.12), "Osmaniye": (37.07, 36.25), "Düzce": (40.84, 31.16),
+}
@@ -1,7 +1,18 @@
 import os
 import json
-import google.generativeai as genai
+import asyncio
+import time
+from functools import lru_cache
+from typing import List
 from dotenv import load_dotenv
+from pydantic import ValidationError
+from rule_extractor import extract_if_confident
+from gemini_client import CLOSED, HALF_OPEN, GeminiClient, GeminiUnavailable, is_transient
+from schemas import BatchAnalysisItem, HelpAnalysis, gemini_schema
+from metrics import (
+    GEMINI_CIRCUIT_STATE, GEMINI_DURATION, GEMINI_FALLBACKS, GEMINI_IN_FLIGHT, GEMINI_PARSE_FAILURES,
+    GEMINI_PROMPT_SIZE, GEMINI_REJECTED, GEMINI_REQUESTS, GEMINI_RESPONSE_SIZE, GEMINI_TOKENS
+)
 
 # .env dosyasından API anahtarını yükle
 load_dotenv()
@@ -9,10 +20,225 @@ load_dotenv()
 # API anahtarını al
 api_key = os.getenv("GEMINI_API_KEY")
 
-# Gemini'yi konfigüre et
-genai.configure(api_key=api_key)
+# Aynı anda en fazla kaç Gemini çağrısı yapılabilir ve her çağrı kaç saniye bekler
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "20"))
+# Toplu analizde tek prompt'a konulacak en fazla metin sayısı
+GEMINI_BATCH_SIZE = int(os.getenv("GEMINI_BATCH_SIZE", "20"))
 
-model = genai.GenerativeModel('gemini-1.5-flash')
+# Yanıt uzunluğu sınırları (token): tek nesneli yanıtlar ve toplu analizde metin başına
+GEMINI_MAX_OUTPUT_TOKENS = int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS", "1024"))
+GEMINI_ITEM_OUTPUT_TOKENS = int(os.getenv("GEMINI_ITEM_OUTPUT_TOKENS", "256"))
+# Modelin tek yanıtta üretebileceği en fazla token
+GEMINI_OUTPUT_TOKEN_LIMIT = 8192
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+
+# Model ilk Gemini çağrısında oluşturulur: google.generativeai'nin içe
+# aktarılması (~1 sn) süreç açılışını ve Gemini'ye gitmeyen worker'ları yavaşlatmasın
+model = None
+
+def get_model():
+    """Kullanılan modeli döndürür; ilk çağrıda SDK'yı yükleyip yapılandırır"""
+    global model
+    if model is None:
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        model = genai.GenerativeModel(GEMINI_MODEL)
+    return model
+
+def set_model(new_model):
+    """
+    Kullanılan modeli değiştirir (yük testlerinde ağsız sahte model için).
+    new_model, generate_content ve generate_content_async metodları olan ve
+    .text alanlı yanıt döndüren herhangi bir nesne olabilir.
+    """
+    global model
+    model = new_model
+
+# Asenkron çağrıların kabul katmanı: kota (GEMINI_RPM), eşzamanlılık, sınırlı
+# bekleme kuyruğu ve art arda hatalarda çağrıları durduran devre kesici
+gemini_client = GeminiClient(
+    rate_per_minute=float(os.getenv("GEMINI_RPM", "1000")),
+    burst=int(os.getenv("GEMINI_BURST", "20")),
+    max_concurrency=GEMINI_MAX_CONCURRENCY,
+    max_queue=int(os.getenv("GEMINI_MAX_QUEUE", "100")),
+    queue_timeout=float(os.getenv("GEMINI_QUEUE_TIMEOUT", "10")),
+    failure_threshold=int(os.getenv("GEMINI_BREAKER_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("GEMINI_BREAKER_RESET", "30")),
+    on_reject=GEMINI_REJECTED.inc
+)
+_CIRCUIT_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1}
+GEMINI_CIRCUIT_STATE.set_function(lambda: _CIRCUIT_STATE_VALUES.get(gemini_client.breaker.state, 2))
+
+class StructuredOutputError(ValueError):
+    """Gemini yanıtı JSON değil veya beklenen şemaya uymuyor"""
+
+def _build_prompt(user_text):
+    """Analiz için Gemini'ya gönderilecek prompt'u oluşturur (yanıt biçimi şemayla verilir)"""
+    return f"""
+    Aşağıdaki yardım veya bağış metnini analiz et.
+    ihtiyac_var: metin bir ihtiyaç bildiriyorsa true, bağış teklifiyse false.
+    konum: metindeki il veya ilçe.
+    urunler: metinde geçen her ürün, miktarı ve birimi (adet/paket/şişe); miktar yoksa 0.
+    öncelik: düşük, orta, yüksek veya acil.
+
+    Metin: "{user_text}"
+    """
+
+def _build_batch_prompt(texts):
+    """Birden fazla metni tek seferde analiz ettiren prompt'u oluşturur"""
+    numbered = "\n".join(
+        f"{i}. {json.dumps(text, ensure_ascii=False)}" for i, text in enumerate(texts)
+    )
+    return f"""
+    Aşağıdaki numaralı metinlerin HER BİRİNİ ayrı ayrı analiz et; her metin için
+    tam olarak bir nesne döndür ve "index" alanına metnin numarasını yaz.
+    ihtiyac_var: metin bir ihtiyaç bildiriyorsa true, bağış teklifiyse false.
+    konum: metindeki il veya ilçe.
+    urunler: metinde geçen her ürün, miktarı ve birimi (adet/paket/şişe); miktar yoksa 0.
+    öncelik: düşük, orta, yüksek veya acil.
+
+    Metinler:
+    {numbered}
+    """
+
+def build_match_prompt(konum, urun_adi, candidate_lines):
+    """Akıllı eşleştirme prompt'u; candidate_lines "- şehir: miktar adet, mesafe km (kaynak)" satırlarıdır"""
+    return f"""
+    {konum} şehrinde {urun_adi} ihtiyacı var.
+    En yakın kaynaklardan birini seç:
+    {candidate_lines}
+
+    recommended_city: seçilen şehir, reason: kısa gerekçe,
+    distance: km cinsinden mesafe, available_amount: adet cinsinden mevcut miktar.
+    """
+
+def build_risk_prompt(city_lines):
+    """Risk analizi prompt'u; city_lines şehir başına bir özet satırıdır"""
+    return f"""
+    Aşağıda deprem yardım sistemine gelen kayıtların şehir bazlı özeti var
+    (kayıt sayısı, bildirilen tır sayısı, marketlerdeki toplam stok ve
+    kayıtlarda en çok geçen ürünler). Bu verilere göre riskli şehirleri
+    (high_risk), stok eksikliği olan şehirleri (low_supply) ve kısa bir
+    öneriyi (recommendation) belirle.
+
+    {city_lines or "- Henüz kayıt yok"}
+    """
+
+@lru_cache(maxsize=None)
+def _cached_schema(schema_type):
+    return gemini_schema(schema_type)
+
+def _generation_config(schema_type, max_output_tokens, choices=None):
+    """
+    JSON modu ayarları: yanıt schema_type'ın şemasına uymak zorundadır.
+    choices ({alan: [değerler]}) verilirse o alanlar bu değerlerle sınırlanır.
+    """
+    schema = _cached_schema(schema_type)
+    if choices:
+        schema = {**schema, "properties": dict(schema["properties"])}
+        for field, values in choices.items():
+            schema["properties"][field] = {**schema["properties"][field], "enum": list(values)}
+    return {
+        "response_mime_type": "application/json",
+        "response_schema": schema,
+        "max_output_tokens": max_output_tokens,
+    }
+
+def _response_text(response, kind):
+    # Güvenlik filtresine takılan yanıtlarda .text hata verir
+    try:
+        return response.text
+    except ValueError as e:
+        GEMINI_PARSE_FAILURES.inc(kind)
+        raise StructuredOutputError(f"Gemini yanıtı boş: {e}") from e
+
+def _validate(schema_type, raw_text, kind, choices=None):
+    """JSON yanıtını şemaya göre doğrular; choices dışındaki değerler de hata sayılır"""
+    try:
+        result = schema_type.model_validate_json(raw_text)
+    except ValidationError as e:
+        GEMINI_PARSE_FAILURES.inc(kind)
+        raise StructuredOutputError(f"Gemini yanıtı şemaya uymuyor: {e.errors()[0]['msg']}") from e
+    for field, values in (choices or {}).items():
+        if getattr(result, field) not in values:
+            GEMINI_PARSE_FAILURES.inc(kind)
+            raise StructuredOutputError(f"Gemini yanıtında geçersiz {field}: {getattr(result, field)}")
+    return result
+
+def _iter_array_items(raw_text):
+    """
+    JSON dizisinin tamamlanmış elemanlarını sırayla üretir. Yanıt
+    max_output_tokens sınırında kesildiyse o ana kadar tamamlanan elemanlar
+    döner; dizi hiç başlamıyorsa StructuredOutputError verir.
+    """
+    decoder = json.JSONDecoder()
+    whitespace = " \t\n\r"
+    i = len(raw_text) - len(raw_text.lstrip(whitespace))
+    if not raw_text.startswith("[", i):
+        raise StructuredOutputError("Gemini yanıtı bir JSON dizisi değil")
+    i += 1
+    while True:
+        while i < len(raw_text) and raw_text[i] in whitespace:
+            i += 1
+        if i >= len(raw_text) or raw_text[i] == "]":
+            return
+        try:
+            item, i = decoder.raw_decode(raw_text, i)
+        except json.JSONDecodeError:
+            return
+        yield item
+        while i < len(raw_text) and raw_text[i] in whitespace:
+            i += 1
+        if i < len(raw_text) and raw_text[i] == ",":
+            i += 1
+
+async def generate_structured_async(prompt, schema_type, kind, max_output_tokens=None, choices=None):
+    """
+    Gemini'yi JSON modunda, schema_type'tan üretilen yanıt şemasıyla çağırır.
+
+    Args:
+        prompt (str): Modele gönderilecek metin
+        schema_type: Yanıtın uyması gereken pydantic modeli
+        kind (str): Ölçümlerdeki çağrı türü (analyze, smart_matching, ...)
+        max_output_tokens (int): Yanıt uzunluğu sınırı
+        choices (dict): {alan: [izin verilen değerler]}
+
+    Returns:
+        schema_type örneği
+
+    Raises:
+        StructuredOutputError: Yanıt JSON değilse veya şemaya uymuyorsa
+    """
+    config = _generation_config(schema_type, max_output_tokens or GEMINI_MAX_OUTPUT_TOKENS, choices)
+    response = await generate_content_async(prompt, generation_config=config)
+    return _validate(schema_type, _response_text(response, kind), kind, choices)
+
+async def generate_structured_list_async(prompt, item_type, kind, max_output_tokens):
+    """
+    Gemini'den item_type nesnelerinden oluşan bir dizi ister. Elemanlar tek
+    tek doğrulanır: şemaya uymayanlar ve kesilen yanıtın tamamlanmamış kuyruğu
+    atlanır, geçerli olanlar döner.
+
+    Returns:
+        list: item_type örnekleri
+    """
+    config = _generation_config(List[item_type], max_output_tokens)
+    response = await generate_content_async(prompt, generation_config=config)
+    raw_text = _response_text(response, kind)
+    try:
+        items = list(_iter_array_items(raw_text))
+    except StructuredOutputError:
+        GEMINI_PARSE_FAILURES.inc(kind)
+        raise
+    results = []
+    for item in items:
+        try:
+            results.append(item_type.model_validate(item))
+        except ValidationError:
+            GEMINI_PARSE_FAILURES.inc(kind + "_item")
+    return results
 
 def analyze_help_text(user_text):
     """
@@ -24,50 +250,180 @@ def analyze_help_text(user_text):
     Returns:
         dict: Analiz sonucu JSON formatında
     """
+    # Form metinleri gibi yapılandırılmış girdiler LLM'siz çözülür
+    fast_result = extract_if_confident(user_text)
+    if fast_result is not None:
+        return fast_result
     
-    # Gemini'ya gönderilecek prompt
-    prompt = f"""
-    Aşağıdaki metni analiz et ve SADECE JSON formatında cevap ver. Başka hiçbir açıklama veya metin yazma.
+    try:
+        response = get_model().generate_content(
+            _build_prompt(user_text),
+            generation_config=_generation_config(HelpAnalysis, GEMINI_MAX_OUTPUT_TOKENS)
+        )
+        return _validate(HelpAnalysis, _response_text(response, "analyze"), "analyze").model_dump()
+    except Exception as e:
+        return {"error": str(e)}
 
-    Metin: "{user_text}"
+async def generate_content_async(prompt, generation_config=None):
+    """
+    Gemini'yi event loop'u bloklamadan çağırır.
+    
+    Çağrılar gemini_client üzerinden kabul edilir: kota ve eşzamanlılık
+    sınırında sıraya girer, kuyruk doluysa veya devre açıksa hemen
+    GeminiUnavailable verir. Her çağrı GEMINI_TIMEOUT saniye sonra
+    asyncio.TimeoutError ile kesilir.
+    
+    Args:
+        prompt (str): Modele gönderilecek metin
+        generation_config (dict): JSON modu, yanıt şeması, token sınırı vb.
+    
+    Returns:
+        Gemini yanıt nesnesi
+    """
+    if model is None:
+        # SDK ilk çağrıda event loop'u bloklamadan yüklenir
+        await asyncio.to_thread(get_model)
+    async with gemini_client.slot():
+        GEMINI_IN_FLIGHT.inc()
+        GEMINI_PROMPT_SIZE.observe(len(prompt))
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await asyncio.wait_for(
+                get_model().generate_content_async(prompt, generation_config=generation_config),
+                timeout=GEMINI_TIMEOUT
+            )
+            outcome = "ok"
+            GEMINI_RESPONSE_SIZE.observe(_response_chars(response))
+            _count_tokens(response)
+            return response
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise
+        finally:
+            GEMINI_IN_FLIGHT.dec()
+            GEMINI_REQUESTS.inc(outcome)
+            GEMINI_DURATION.observe(time.perf_counter() - started, outcome)
+
+def _count_tokens(response):
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        GEMINI_TOKENS.inc("prompt", amount=getattr(usage, "prompt_token_count", 0) or 0)
+        GEMINI_TOKENS.inc("output", amount=getattr(usage, "candidates_token_count", 0) or 0)
+
+def _response_chars(response):
+    # Güvenlik filtresine takılan yanıtlarda .text hata verir
+    try:
+        return len(response.text)
+    except ValueError:
+        return 0
 
-    İstenilen JSON formatı:
-    {{
-        "ihtiyac_var": true/false,
-        "konum": "şehir/ilçe",
-        "urunler": [
-            {{
-                "urun_adi": "ürün adı",
-                "miktar": 0,
-                "birim": "adet/paket/şişe"
-            }}
-        ],
-        "öncelik": "düşük/orta/yüksek/acil"
-    }}
-
-    JSON:
+def unavailable_error(message, retry_after=None):
+    """
+    Gemini'ye ulaşılamadığında dönen hata sonucu. unavailable işaretli
+    hatalar metnin değil bağımlılığın sorunudur; kayıt yerel analizle
+    saklanıp retry_after saniye sonra yeniden analiz edilebilir.
+    """
+    return {
+        "error": message,
+        "unavailable": True,
+        "retry_after": retry_after if retry_after is not None else gemini_client.retry_after()
+    }
+
+async def analyze_help_text_async(user_text):
+    """
+    analyze_help_text'in asenkron sürümü; FastAPI handler'larında kullanılır.
+    
+    Args:
+        user_text (str): Kullanıcının girdiği metin
+    
+    Returns:
+        dict: Analiz sonucu JSON formatında
     """
+    fast_result = extract_if_confident(user_text)
+    if fast_result is not None:
+        return fast_result
     
     try:
-        response = model.generate_content(prompt)
-        
-        # Ham yanıtı kontrol et
-        cleaned_text = response.text.strip()
-        
-        # Eğer yanıt ```json ile başlıyorsa temizle
-        if cleaned_text.startswith("```json"):
-            cleaned_text = cleaned_text[7:]
-        elif cleaned_text.startswith("```"):
-            cleaned_text = cleaned_text[3:]
-        
-        # Eğer ``` ile bitiyorsa temizle
-        if cleaned_text.endswith("```"):
-            cleaned_text = cleaned_text[:-3]
-        
-        cleaned_text = cleaned_text.strip()
-        
-        # JSON'ı parse et
-        response_json = json.loads(cleaned_text)
-        return response_json
+        analysis = await generate_structured_async(_build_prompt(user_text), HelpAnalysis, "analyze")
+        return analysis.model_dump()
+    except StructuredOutputError as e:
+        return {"error": str(e)}
+    except asyncio.TimeoutError:
+        return unavailable_error(f"Gemini {GEMINI_TIMEOUT} saniye içinde yanıt vermedi")
+    except GeminiUnavailable as e:
+        return unavailable_error(str(e), e.retry_after)
+    except Exception as e:
+        # Kota aşımı (429), ağ ve sunucu hataları ertelenir; 400, güvenlik engeli gibi
+        # metne özgü hatalar normal hatadır (denemeyi harcar, sonunda dead-letter'a düşer)
+        if is_transient(e):
+            return unavailable_error(str(e))
+        return {"error": str(e)}
+
+async def _analyze_chunk_async(texts):
+    """
+    Tek prompt ile bir grup metni analiz eder. Yanıt gelip bazı metinlerin
+    karşılığı eksik veya geçersizse yalnızca onlar tek tek analiz edilir;
+    çağrı geçici bir hatayla başarısızsa (zaman aşımı, 429/5xx, devre açık)
+    tüm grup ertelenir, metne özgü bir hatayla başarısızsa metinler tek tek
+    denenir.
+    """
+    results = [None] * len(texts)
+    max_output_tokens = min(GEMINI_ITEM_OUTPUT_TOKENS * len(texts), GEMINI_OUTPUT_TOKEN_LIMIT)
+    try:
+        items = await generate_structured_list_async(
+            _build_batch_prompt(texts), BatchAnalysisItem, "batch", max_output_tokens
+        )
+        for item in items:
+            if item.index < len(texts) and results[item.index] is None:
+                results[item.index] = item.model_dump(exclude={"index"})
+    except StructuredOutputError:
+        # Yanıt geldi ama dizi okunamadı; metinler aşağıda tek tek denenir
+        pass
+    except GeminiUnavailable as e:
+        # Tek tek denemek yükü artırır; hepsi ertelenir
+        return [unavailable_error(str(e), e.retry_after) for _ in texts]
+    except asyncio.TimeoutError:
+        return [unavailable_error(f"Gemini {GEMINI_TIMEOUT} saniye içinde yanıt vermedi") for _ in texts]
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        # Kota aşımı (429), ağ ve sunucu hataları: Gemini zaten zorlanıyor, hepsi ertelenir.
+        # Metne özgü hatalarda (400, güvenlik engeli) sorunlu metni ayırmak için tek tek denenir
+        if is_transient(e):
+            return [unavailable_error(str(e)) for _ in texts]
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        GEMINI_FALLBACKS.inc("batch_item", amount=len(missing))
+    fallbacks = await asyncio.gather(*(analyze_help_text_async(texts[i]) for i in missing))
+    for i, result in zip(missing, fallbacks):
+        results[i] = result
+    return results
+
+async def analyze_help_texts_batch_async(texts, batch_size=None):
+    """
+    Birden fazla metni GEMINI_BATCH_SIZE'lık gruplar halinde analiz eder.
+    
+    Kural tabanlı çıkarıcının güvenle çözdüğü metinler LLM'e gönderilmez. Her
+    grup tek bir Gemini çağrısıdır; yanıtta karşılığı bulunamayan, şemaya
+    uymayan veya token sınırında kesilen metinler tek tek analiz edilir.
+    Çağrısı başarısız olan grubun metinleri unavailable hatasıyla döner.
+    
+    Args:
+        texts (list[str]): Analiz edilecek metinler
+        batch_size (int): Bir prompt'a konulacak en fazla metin sayısı
+    
+    Returns:
+        list[dict]: Girdi sırasıyla analiz sonuçları (hatalılar {"error": ...})
+    """
+    batch_size = batch_size or GEMINI_BATCH_SIZE
+    results = [extract_if_confident(text) for text in texts]
+    pending = [i for i, result in enumerate(results) if result is None]
+    
+    chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    chunk_results = await asyncio.gather(
+        *(_analyze_chunk_async([texts[i] for i in chunk]) for chunk in chunks)
+    )
+    for chunk, analyses in zip(chunks, chunk_results):
+        for i, analysis in zip(chunk, analyses):
+            results[i] = analysis
+    return results
@@ -0,0 +1,240 @@
+# gemini_client.py
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+# Devre kesici durumları
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class GeminiUnavailable(Exception):
+    """
+    Gemini çağrısı yapılmadan reddedildi (devre açık, kuyruk dolu veya
+    kota beklemesi çok uzun). retry_after: tekrar denemeden önce beklenecek
+    süre (saniye).
+    """
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Gemini şu anda kullanılamıyor ({reason}), {retry_after:.0f} sn sonra tekrar deneyin")
+        self.reason = reason
+        self.retry_after = retry_after
+
+def is_transient(error):
+    """
+    Hata Gemini'nin (veya ağın) geçici sorunu mu: GeminiUnavailable, zaman
+    aşımı, bağlantı hataları ve 429/5xx yanıtları. Diğer hatalar (400
+    InvalidArgument, güvenlik engeli, bozuk yanıt) metnin kendisinden
+    kaynaklanır; tekrar denemek sonucu değiştirmez.
+    """
+    if isinstance(error, (GeminiUnavailable, asyncio.TimeoutError, OSError)):
+        return True
+    # google.api_core hataları HTTP durum kodunu code'da taşır
+    code = getattr(error, "code", None)
+    if not isinstance(code, int):
+        code = getattr(error, "status_code", None)
+    return isinstance(code, int) and (code == 429 or code >= 500)
+
+class TokenBucket:
+    """
+    Saniyede rate jeton dolan, en fazla burst jeton tutan kova. Jetonlar
+    sırayla ayrılır (kova eksiye düşebilir); her çağıran kendi jetonunun
+    dolacağı ana kadar bekler, böylece bekleyenler geliş sırasıyla geçer.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self):
+        """Kovadaki jeton sayısı (ayrılmış jetonlar yüzünden eksi olabilir)"""
+        self._refill()
+        return self._tokens
+
+    def wait_time(self):
+        """Yeni bir jeton için beklenecek süre"""
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    async def acquire(self, timeout):
+        """Jeton ayırır ve dolmasını bekler; bekleme timeout'u aşacaksa ayırmadan False döner"""
+        self._refill()
+        wait = max(0.0, (1 - self._tokens) / self.rate)
+        if wait > timeout:
+            return False
+        self._tokens -= 1
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+class CircuitBreaker:
+    """
+    Art arda failure_threshold hatada devre açılır ve reset_timeout saniye
+    boyunca çağrılar hemen reddedilir. Süre dolunca yarı açık duruma geçer:
+    en fazla half_open_max deneme çağrısına izin verilir; deneme başarılıysa
+    devre kapanır, başarısızsa yeniden açılır.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, half_open_max=1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max = half_open_max
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.stats = {"opened": 0, "closed": 0, "probes": 0}
+
+    @property
+    def state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def retry_after(self):
+        """Devre açıksa yarı açık duruma geçmesine kalan süre"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self):
+        """Çağrıya izin verilip verilmediği; yarı açık durumda deneme hakkı kullanır"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._probes < self.half_open_max:
+            self._probes += 1
+            self.stats["probes"] += 1
+            return True
+        return False
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self.stats["opened"] += 1
+
+    def record_success(self):
+        if self._state == HALF_OPEN:
+            self._state = CLOSED
+            self.stats["closed"] += 1
+        self._failures = 0
+
+    def record_failure(self):
+        if self._state == HALF_OPEN:
+            self._open()
+            return
+        self._failures += 1
+        if self._state == CLOSED and self._failures >= self.failure_threshold:
+            self._open()
+
+    def release(self):
+        """Sonucu bilinmeyen (iptal edilen) deneme çağrısının hakkını geri verir"""
+        if self._state == HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+class GeminiClient:
+    """
+    Gemini çağrılarının kabul katmanı: devre kesici, kota kovası ve sınırlı
+    bekleme kuyruğu. Çağrı slot() bloğunun içinde yapılır; bloktan geçici bir
+    hata (is_transient) ile çıkılırsa devre kesiciye hata, normal veya metne
+    özgü bir hatayla çıkılırsa başarı yazılır (Gemini yanıt vermiştir).
+
+    Args:
+        rate_per_minute (float): Kota (dakikada istek)
+        burst (int): Kovada birikebilecek en fazla istek
+        max_concurrency (int): Aynı anda yapılabilecek en fazla çağrı
+        max_queue (int): Sırada bekleyebilecek en fazla çağrı; fazlası hemen reddedilir
+        queue_timeout (float): Sırada (kota + eşzamanlılık) en fazla bekleme (saniye)
+        failure_threshold, reset_timeout: CircuitBreaker ayarları
+    """
+
+    def __init__(self, rate_per_minute=1000, burst=20, max_concurrency=8, max_queue=100,
+                 queue_timeout=10.0, failure_threshold=5, reset_timeout=30.0, on_reject=None):
+        self.bucket = TokenBucket(rate_per_minute / 60.0, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.on_reject = on_reject
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self._in_flight = 0
+        self.stats = {"admitted": 0, "succeeded": 0, "failed": 0, "rejected_input": 0,
+                      "circuit_open": 0, "queue_full": 0, "queue_timeout": 0, "rate_limited": 0}
+
+    def _reject(self, reason, retry_after):
+        self.stats[reason] += 1
+        if self.on_reject is not None:
+            self.on_reject(reason)
+        return GeminiUnavailable(reason, retry_after)
+
+    def retry_after(self):
+        """İstemcilere önerilecek bekleme süresi (Retry-After)"""
+        return max(self.breaker.retry_after(), self.bucket.wait_time(), 1.0)
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.breaker.state == OPEN:
+            raise self._reject("circuit_open", self.breaker.retry_after())
+        if self._waiting >= self.max_queue:
+            raise self._reject("queue_full", self.retry_after())
+
+        self._waiting += 1
+        try:
+            deadline = time.monotonic() + self.queue_timeout
+            if not await self.bucket.acquire(self.queue_timeout):
+                raise self._reject("rate_limited", self.bucket.wait_time())
+            if self._semaphore.locked():
+                try:
+                    await asyncio.wait_for(self._semaphore.acquire(), max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    raise self._reject("queue_timeout", self.retry_after()) from None
+            else:
+                await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        try:
+            # Sırada beklerken devre açılmış olabilir
+            if not self.breaker.allow():
+                raise self._reject("circuit_open", self.breaker.retry_after())
+            self.stats["admitted"] += 1
+            self._in_flight += 1
+            try:
+                yield
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if is_transient(e):
+                    self.stats["failed"] += 1
+                    self.breaker.record_failure()
+                else:
+                    self.stats["rejected_input"] += 1
+                    self.breaker.record_success()
+                raise
+            else:
+                self.stats["succeeded"] += 1
+                self.breaker.record_success()
+            finally:
+                self._in_flight -= 1
+        finally:
+            self._semaphore.release()
+
+    def get_stats(self):
+        return {
+            "state": self.breaker.state,
+            "retry_after_seconds": round(self.breaker.retry_after(), 1),
+            "waiting": self._waiting,
+            "in_flight": self._in_flight,
+            "tokens": round(self.bucket.available(), 1),
+            **self.stats,
+            **{f"breaker_{k}": v for k, v in self.breaker.stats.items()},
+        }
@@ -0,0 +1,182 @@
+# geo_index.py
+import heapq
+import math
+from functools import lru_cache
+
+from gazetteer import DISTRICTS, PROVINCE_ALIASES, PROVINCE_COORDINATES
+from mock_trucks import MOCK_TRUCKS
+
+EARTH_RADIUS_KM = 6371.0
+
+# Yaprak düğümlerdeki en fazla nokta; küçük aralıkları taramak Python'da bölmekten ucuz
+_LEAF_SIZE = 8
+
+def locate(place):
+    """İl, alternatif il adı veya ilçe adının koordinatı (enlem, boylam); bilinmiyorsa None"""
+    place = PROVINCE_ALIASES.get(place, place)
+    place = DISTRICTS.get(place, place)
+    return PROVINCE_COORDINATES.get(place)
+
+def geo_point(place):
+    """Yerin MongoDB 2dsphere index'i için GeoJSON noktası; bilinmiyorsa None"""
+    coordinates = locate(place) if place else None
+    if coordinates is None:
+        return None
+    lat, lon = coordinates
+    return {"type": "Point", "coordinates": [lon, lat]}
+
+def _to_xyz(lat, lon):
+    lat, lon = math.radians(lat), math.radians(lon)
+    cos_lat = math.cos(lat)
+    return cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat)
+
+def _chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+def _km_to_chord(km):
+    return 2 * math.sin(min(math.pi, km / EARTH_RADIUS_KM) / 2)
+
+class GeoIndex:
+    """
+    Koordinatlı noktalar üzerinde KD-tree.
+
+    Noktalar birim küre üzerindeki (x, y, z) konumlarına çevrilir; bu uzayda
+    düz çizgi (kiriş) mesafesi büyük daire mesafesiyle aynı sırayı verdiğinden
+    en yakın komşu sonuçları kesindir. Ağaç ayrı düğüm nesneleri yerine
+    yeniden sıralanmış dizilerde tutulur: [lo, hi) aralığının ortası bölen
+    noktadır, solu ve sağı alt ağaçlardır.
+    """
+
+    def __init__(self, points):
+        """
+        Args:
+            points (iterable): ((enlem, boylam), payload) ikilileri
+        """
+        items = [(_to_xyz(*coordinates), payload) for coordinates, payload in points]
+        self._xyz = [xyz for xyz, _ in items]
+        self._payloads = [payload for _, payload in items]
+        self._axes = [0] * len(items)
+        order = list(range(len(items)))
+        self._build(order, 0, len(order))
+        self._xyz = [self._xyz[i] for i in order]
+        self._payloads = [self._payloads[i] for i in order]
+
+    def __len__(self):
+        return len(self._payloads)
+
+    def _build(self, order, lo, hi):
+        stack = [(lo, hi)]
+        xyz = self._xyz
+        while stack:
+            lo, hi = stack.pop()
+            if hi - lo <= _LEAF_SIZE:
+                continue
+            # En geniş yayılan eksende böl
+            spreads = [max(c) - min(c) for c in zip(*(xyz[i] for i in order[lo:hi]))]
+            axis = spreads.index(max(spreads))
+            order[lo:hi] = sorted(order[lo:hi], key=lambda i: xyz[i][axis])
+            mid = (lo + hi) // 2
+            self._axes[mid] = axis
+            stack.append((lo, mid))
+            stack.append((mid + 1, hi))
+
+    def _search(self, query, limit, where, k=None):
+        """
+        Kiriş uzunluğunun karesi limit'ten küçük noktaları gezer.
+
+        k verilirse en yakın k nokta tutulur ve sınır bulundukça daralır.
+        """
+        qx, qy, qz = query
+        xyz, payloads, axes = self._xyz, self._payloads, self._axes
+        found = []  # k varsa (-d2, i) max-heap
+        stack = [(0, len(xyz), 0.0)]
+        while stack:
+            lo, hi, bound = stack.pop()
+            if bound >= limit:
+                continue
+            if hi - lo <= _LEAF_SIZE:
+                for i in range(lo, hi):
+                    x, y, z = xyz[i]
+                    d2 = (x - qx) ** 2 + (y - qy) ** 2 + (z - qz) ** 2
+                    if d2 < limit and (where is None or where(payloads[i])):
+                        if k is None:
+                            found.append((d2, i))
+                        elif len(found) < k:
+                            heapq.heappush(found, (-d2, i))
+                            if len(found) == k:
+                                limit = -found[0][0]
+                        else:
+                            heapq.heapreplace(found, (-d2, i))
+                            limit = -found[0][0]
+                continue
+            mid = (lo + hi) // 2
+            point = xyz[mid]
+            diff = query[axes[mid]] - point[axes[mid]]
+            x, y, z = point
+            d2 = (x - qx) ** 2 + (y - qy) ** 2 + (z - qz) ** 2
+            if d2 < limit and (where is None or where(payloads[mid])):
+                if k is None:
+                    found.append((d2, mid))
+                elif len(found) < k:
+                    heapq.heappush(found, (-d2, mid))
+                    if len(found) == k:
+                        limit = -found[0][0]
+                else:
+                    heapq.heapreplace(found, (-d2, mid))
+                    limit = -found[0][0]
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            # Uzak taraf, bölen düzleme olan mesafe kadar geride; önce yakın taraf gezilir
+            stack.append((far[0], far[1], max(bound, diff * diff)))
+            stack.append((near[0], near[1], bound))
+
+        if k is not None:
+            found = [(-d2, i) for d2, i in found]
+        found.sort()
+        return [(_chord_to_km(math.sqrt(d2)), payloads[i]) for d2, i in found]
+
+    def nearest(self, lat, lon, k=1, where=None, max_km=None):
+        """
+        En yakın k nokta.
+
+        Args:
+            lat (float), lon (float): Sorgu noktası
+            k (int): Nokta sayısı
+            where (callable): Verilirse yalnızca where(payload) doğru olan noktalar
+            max_km (float): Verilirse bu mesafeden uzak noktalar atlanır
+
+        Returns:
+            list: [(km, payload), ...] yakından uzağa
+        """
+        if k <= 0 or not self._xyz:
+            return []
+        limit = _km_to_chord(max_km) ** 2 if max_km is not None else math.inf
+        return self._search(_to_xyz(lat, lon), limit, where, k)
+
+    def within(self, lat, lon, radius_km, where=None):
+        """radius_km içindeki tüm noktalar: [(km, payload), ...] yakından uzağa"""
+        if not self._xyz:
+            return []
+        return self._search(_to_xyz(lat, lon), _km_to_chord(radius_km) ** 2, where)
+
+    def query(self, lat, lon, k=None, radius_km=None, where=None):
+        """k verilirse en yakın k nokta, radius_km verilirse yarıçap içindekiler; ikisi birlikte de verilebilir"""
+        if k is not None:
+            return self.nearest(lat, lon, k, where, radius_km)
+        if radius_km is not None:
+            return self.within(lat, lon, radius_km, where)
+        return self._search(_to_xyz(lat, lon), math.inf, where) if self._xyz else []
+
+@lru_cache(maxsize=1)
+def province_index():
+    """81 il merkezinin KD-tree'si (payload: il adı)"""
+    return GeoIndex((coordinates, city) for city, coordinates in PROVINCE_COORDINATES.items())
+
+@lru_cache(maxsize=1)
+def fleet_index():
+    """Tır depolarının KD-tree'si (payload: (şehir, filo)); koordinatı olmayan depo il merkezinden sayılır"""
+    return GeoIndex(
+        (fleet.get("coordinates") or locate(city), (city, fleet))
+        for city, fleets in MOCK_TRUCKS.items()
+        for fleet in fleets
+        if fleet.get("coordinates") or locate(city)
+    )
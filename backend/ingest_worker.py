@@ -0,0 +1,205 @@
+# ingest_worker.py
+import asyncio
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+
+from geo_index import geo_point
+
+# Kayıt durumları
+PENDING_STATUS = "analiz_bekliyor"
+PROCESSING_STATUS = "analiz_ediliyor"
+DEAD_LETTER_STATUS = "analiz_basarisiz"
+ACTIVE_STATUS = "aktif"
+
+class IngestWorkerPool:
+    """
+    Analiz bekleyen kayıtları arka planda işleyen asyncio işçi havuzu.
+
+    Her işçi bekleyen bir kaydı atomik find_one_and_update ile sahiplenir,
+    metni analiz eder ve sonucu kayda yazar. Başarısız denemeler üstel
+    geri çekilme ile tekrar kuyruğa alınır; max_attempts aşılınca kayıt
+    DEAD_LETTER_STATUS durumuna düşer. Analiz servisine ulaşılamadığı için
+    ("unavailable" işaretli) başarısız olan denemeler sayılmaz; kayıt
+    servisin önerdiği retry_after süresi sonra yeniden denenir. claim_timeout
+    süresince bitirilemeyen (örn. süreç çöktüğü için) sahiplenmeler yeniden
+    kuyruğa döner.
+
+    Sonuç yazımları sahiplenmenin claimed_at değeriyle koşulludur: süresi
+    dolan bir sahiplenmeyi başka işçi devraldıysa geç kalan işçinin yazımı
+    eşleşmez ve on_analyzed (stok/trend artışları) yalnızca bir kez çalışır.
+    """
+
+    def __init__(self, collection, analyze, on_analyzed=None, workers=4,
+                 max_attempts=5, base_backoff=2.0, max_backoff=300.0,
+                 poll_interval=1.0, claim_timeout=120.0):
+        self.collection = collection
+        self.analyze = analyze
+        self.on_analyzed = on_analyzed
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self.claim_timeout = claim_timeout
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+        self.stats = {
+            "processed": 0,
+            "retried": 0,
+            "deferred": 0,
+            "dead_lettered": 0,
+            "lost_claims": 0,
+            "last_lag_seconds": 0.0,
+        }
+
+    async def ensure_indexes(self):
+        """Sahiplenme sorgusu için index oluşturur"""
+        await self.collection.create_index([("status", 1), ("next_attempt_at", 1)])
+
+    def start(self):
+        """İşçileri başlatır"""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """İşçileri durdurur; yarım kalan kayıtlar claim_timeout sonra tekrar işlenir"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Yeni kayıt geldiğini bekleyen işçilere haber verir"""
+        self._wakeup.set()
+
+    def pending_document(self, name, text, delay=0):
+        """Analizi sonra (delay saniye sonra) yapılacak kaydın dokümanını oluşturur"""
+        now = datetime.now()
+        return {
+            "name": name,
+            "original_text": text,
+            "timestamp": now,
+            "status": PENDING_STATUS,
+            "attempts": 0,
+            "next_attempt_at": now + timedelta(seconds=delay)
+        }
+
+    async def claim(self):
+        """Sıradaki uygun kaydı atomik olarak sahiplenir; yoksa None"""
+        now = datetime.now()
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": PENDING_STATUS, "next_attempt_at": {"$lte": now}},
+                {"status": PROCESSING_STATUS,
+                 "claimed_at": {"$lt": now - timedelta(seconds=self.claim_timeout)}}
+            ]},
+            {"$set": {"status": PROCESSING_STATUS, "claimed_at": now}, "$inc": {"attempts": 1}},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _owned(self, entry):
+        """Kaydı hâlâ bu sahiplenmenin tuttuğu durumda eşleyen filtre"""
+        return {"_id": entry["_id"], "status": PROCESSING_STATUS, "claimed_at": entry["claimed_at"]}
+
+    def _backoff(self, attempts):
+        return min(self.base_backoff * (2 ** (attempts - 1)), self.max_backoff)
+
+    async def process(self, entry):
+        """Sahiplenilmiş tek bir kaydı analiz eder ve sonucunu yazar"""
+        try:
+            analysis = await self.analyze(entry["original_text"])
+        except Exception as e:
+            analysis = {"error": str(e)}
+
+        now = datetime.now()
+        if "error" not in analysis:
+            geo = geo_point(analysis.get("konum"))
+            result = await self.collection.update_one(
+                self._owned(entry),
+                {"$set": {"analysis": analysis, "status": ACTIVE_STATUS, "analyzed_at": now, "geo": geo},
+                 "$unset": {"next_attempt_at": "", "claimed_at": "", "last_error": "",
+                            "heuristic_analysis": ""}}
+            )
+            if result.modified_count != 1:
+                # Sahiplenme süresi dolup kayıt başka işçiye geçti; sonucu o yazar
+                self.stats["lost_claims"] += 1
+                return
+            entry["analysis"] = analysis
+            entry["status"] = ACTIVE_STATUS
+            entry["geo"] = geo
+            self.stats["processed"] += 1
+            self.stats["last_lag_seconds"] = (now - entry["timestamp"]).total_seconds()
+            if self.on_analyzed is not None:
+                await self.on_analyzed(entry)
+        elif analysis.get("unavailable"):
+            result = await self.collection.update_one(
+                self._owned(entry),
+                {"$set": {
+                    "status": PENDING_STATUS,
+                    "last_error": analysis["error"],
+                    "next_attempt_at": now + timedelta(seconds=analysis.get("retry_after") or self.base_backoff)
+                }, "$inc": {"attempts": -1}, "$unset": {"claimed_at": ""}}
+            )
+            self._count(result, "deferred")
+        elif entry["attempts"] >= self.max_attempts:
+            result = await self.collection.update_one(
+                self._owned(entry),
+                {"$set": {"status": DEAD_LETTER_STATUS, "last_error": analysis["error"], "failed_at": now},
+                 "$unset": {"next_attempt_at": "", "claimed_at": ""}}
+            )
+            self._count(result, "dead_lettered")
+        else:
+            result = await self.collection.update_one(
+                self._owned(entry),
+                {"$set": {
+                    "status": PENDING_STATUS,
+                    "last_error": analysis["error"],
+                    "next_attempt_at": now + timedelta(seconds=self._backoff(entry["attempts"]))
+                }, "$unset": {"claimed_at": ""}}
+            )
+            self._count(result, "retried")
+
+    def _count(self, result, counter):
+        self.stats[counter if result.modified_count == 1 else "lost_claims"] += 1
+
+    async def _run(self):
+        while True:
+            try:
+                entry = await self.claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                entry = None
+
+            if entry is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self.process(entry)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Yazma başarısızsa kayıt claim_timeout sonra tekrar sahiplenilir
+                pass
+
+    async def get_metrics(self):
+        """Kuyruk derinliği, işçi gecikmesi ve sayaçları döndürür"""
+        now = datetime.now()
+        oldest = await self.collection.find_one(
+            {"status": PENDING_STATUS}, sort=[("timestamp", 1)], projection={"timestamp": 1}
+        )
+        return {
+            "queue_depth": await self.collection.count_documents({"status": PENDING_STATUS}),
+            "in_progress": await self.collection.count_documents({"status": PROCESSING_STATUS}),
+            "dead_letter": await self.collection.count_documents({"status": DEAD_LETTER_STATUS}),
+            "oldest_pending_age_seconds": (now - oldest["timestamp"]).total_seconds() if oldest else 0.0,
+            "workers": len(self._tasks),
+            **self.stats
+        }
@@ -0,0 +1,277 @@
+# inventory_index.py
+import asyncio
+
+from pymongo import ReturnDocument, UpdateOne
+
+from geo_index import GeoIndex, locate
+from mock_market import MARKET_STOCK_VARIATIONS, MOCK_MARKETS
+from product_catalog import resolve
+from road_graph import get_road_graph
+
+_MARKET_FIELDS = ("name", "location", "coordinates", "distance", "capacity")
+
+def mock_market_stock(markets=MOCK_MARKETS, variations=MARKET_STOCK_VARIATIONS):
+    """MOCK_MARKETS'i stok çarpanları uygulanmış olarak {şehir: [market, ...]} biçiminde döndürür"""
+    result = {}
+    for city, city_markets in markets.items():
+        city_variations = variations.get(city, {})
+        result[city] = []
+        for market in city_markets:
+            multiplier = city_variations.get(market["name"], 1.0)
+            available = {field: market.get(field) for field in _MARKET_FIELDS}
+            available["products"] = {k: int(v * multiplier) for k, v in market["products"].items()}
+            result[city].append(available)
+    return result
+
+def stock_id(city, key):
+    """inventory koleksiyonundaki (şehir, ürün) stok dokümanının _id'si"""
+    return f"{city}|{key}"
+
+class InventoryIndex:
+    """
+    (ürün, şehir) anahtarlı envanter dizini.
+
+    Stokların doğru kaynağı inventory koleksiyonudur: her (şehir, ürün) için
+    tek bir {stock} dokümanı vardır ve sevkiyatlar stoğu stock >= miktar
+    koşullu atomik $inc ile düşer; böylece birden fazla worker aynı stoğu
+    iki kez harcayamaz. Bellekteki dizin bunun okuma önbelleğidir: şehir
+    toplamları _totals'ta {urun_key: {şehir: miktar}} olarak tutulur (stok
+    sorguları O(1)), worker'ın kendi yazdıkları hemen, diğer worker'larınki
+    refresh_interval saniyede bir yansır. Market dağılımı, eksilen miktarın
+    en yakın marketten başlayarak düşüldüğü varsayılarak toplamdan türetilir.
+    """
+
+    def __init__(self, markets_by_city=None, collection=None, refresh_interval=5.0):
+        self.collection = collection
+        self.refresh_interval = refresh_interval
+        self._task = None
+        self.load(markets_by_city or {})
+
+    def load(self, markets_by_city):
+        """Tüm dizini {şehir: [market, ...]} verisinden yeniden kurar"""
+        self._markets = {}
+        self._totals = {}
+        self._names = {}
+        self._holders = {}
+        for city, city_markets in markets_by_city.items():
+            own = []
+            for market in sorted(city_markets, key=lambda m: m.get("distance") or 0):
+                market = {field: market.get(field) for field in _MARKET_FIELDS} | {
+                    "products": dict(market["products"])
+                }
+                own.append(market)
+                for name, amount in market["products"].items():
+                    key = resolve(name)
+                    self._names.setdefault(key, name)
+                    by_city = self._totals.setdefault(key, {})
+                    by_city[city] = by_city.get(city, 0) + amount
+                    self._holders.setdefault((key, city), []).append((market, name, amount))
+            self._markets[city] = own
+        # Koordinatı olmayan marketler il merkezinde sayılır
+        self._geo = GeoIndex(
+            (market.get("coordinates") or locate(city), (city, market))
+            for city, own in self._markets.items()
+            for market in own
+            if market.get("coordinates") or locate(city)
+        )
+
+    def _apply(self, key, city, stock):
+        """Önbellekteki şehir toplamını stock'a eşitler ve market dağılımını yeniden hesaplar"""
+        holders = self._holders.get((key, city))
+        if not holders:
+            return
+        self._totals[key][city] = stock
+        # Eksilen miktar en yakın marketten başlayarak düşülür; fazlası en yakın markete yazılır
+        used = sum(initial for _, _, initial in holders) - stock
+        for market, name, initial in holders:
+            take = min(max(used, 0), initial)
+            market["products"][name] = initial - take
+            used -= take
+        if used < 0:
+            market, name, _ = holders[0]
+            market["products"][name] -= used
+
+    async def seed(self):
+        """
+        Yüklenen market stoklarının şehir toplamlarını inventory koleksiyonuna ekler
+        ve önbelleği yeniler.
+
+        Var olan stoklara dokunulmaz ($setOnInsert), böylece yeniden başlatma
+        (veya sonradan açılan bir worker) yapılmış sevkiyatları geri almaz.
+        """
+        operations = [
+            UpdateOne(
+                {"_id": stock_id(city, key)},
+                {"$setOnInsert": {
+                    "city": city, "urun_key": key, "stock": sum(initial for _, _, initial in holders)
+                }},
+                upsert=True
+            )
+            for (key, city), holders in self._holders.items()
+        ]
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+        await self.refresh()
+
+    async def refresh(self):
+        """Önbelleği inventory koleksiyonundaki güncel stoklarla yeniler"""
+        async for doc in self.collection.find({}, projection={"city": 1, "urun_key": 1, "stock": 1}):
+            self._apply(doc["urun_key"], doc["city"], doc["stock"])
+
+    def start(self):
+        """Önbelleği diğer worker'ların yazdıklarıyla düzenli olarak yenileyen görevi başlatır"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._sweep())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Bir sonraki turda tekrar denenir
+                pass
+
+    @classmethod
+    def from_mock(cls):
+        return cls(mock_market_stock())
+
+    @staticmethod
+    async def read_collection(markets_collection):
+        """markets koleksiyonundaki ({city, name, products, ...}) dokümanları şehre göre gruplar"""
+        markets_by_city = {}
+        async for doc in markets_collection.find({}, projection={"_id": 0}):
+            markets_by_city.setdefault(doc["city"], []).append(doc)
+        return markets_by_city
+
+    def available(self, product, city):
+        """Şehirdeki toplam stok"""
+        return self._totals.get(resolve(product), {}).get(city, 0)
+
+    def breakdown(self, product, city):
+        """Şehirdeki marketlere göre stok: [{"market", "amount"}, ...] (en yakın market önce)"""
+        return [
+            {"market": market["name"], "amount": market["products"][name]}
+            for market, name, _ in self._holders.get((resolve(product), city), [])
+        ]
+
+    def markets(self, city):
+        """Şehirdeki marketler (get_available_markets biçiminde, güncel stokla)"""
+        return [dict(market, products=dict(market["products"])) for market in self._markets.get(city, [])]
+
+    def city_stock(self, city):
+        """Şehirdeki tüm ürünler: {urun_key: (ürün adı, miktar)} (planlayıcı için)"""
+        return {
+            key: (self._names[key], amount)
+            for key, by_city in self._totals.items()
+            if (amount := by_city.get(city, 0)) > 0
+        }
+
+    def cities_with(self, product, minimum=1, origin=None):
+        """
+        En az minimum adet ürünü olan şehirler.
+
+        Args:
+            product (str): Ürün adı
+            minimum (int): Gereken en az stok
+            origin (str): Verilirse şehirler buraya yol mesafesine göre sıralanır
+
+        Returns:
+            list: [(şehir, miktar, km), ...]; origin yoksa stoğa göre azalan
+        """
+        found = [
+            (city, amount) for city, amount in self._totals.get(resolve(product), {}).items()
+            if amount >= minimum
+        ]
+        if origin is None:
+            found.sort(key=lambda item: -item[1])
+            return [(city, amount, None) for city, amount in found]
+
+        graph = get_road_graph()
+        result = [(city, amount, graph.distance(origin, city)) for city, amount in found]
+        # Grafikte olmayan şehirler sona
+        result.sort(key=lambda item: (item[2] is None, item[2] or 0))
+        return result
+
+    def markets_near(self, lat, lon, product=None, minimum=1, k=5, radius_km=None):
+        """
+        Koordinata en yakın marketler; product verilirse en az minimum adet stoğu olanlar.
+        k=None ise radius_km içindeki tüm marketler döner.
+
+        Returns:
+            list: [{"city", "market", "location", "distance_km", "amount"}, ...] yakından uzağa
+        """
+        key = resolve(product) if product else None
+
+        def amount_of(market):
+            if key is None:
+                return None
+            return sum(v for name, v in market["products"].items() if resolve(name) == key)
+
+        where = None
+        if key is not None:
+            where = lambda payload: amount_of(payload[1]) >= minimum  # noqa: E731
+        return [
+            {"city": city, "market": market["name"], "location": market.get("location"),
+             "distance_km": round(km, 1), "amount": amount_of(market)}
+            for km, (city, market) in self._geo.query(lat, lon, k, radius_km, where)
+        ]
+
+    async def decrement(self, product, city, amount):
+        """
+        Stoğu inventory koleksiyonunda stock >= amount koşullu atomik $inc ile
+        düşer; şehirde yeterli stok yoksa hiçbir şey değişmez.
+
+        Returns:
+            bool: Stok düşüldüyse True
+        """
+        key = resolve(product)
+        if amount <= 0 or (key, city) not in self._holders:
+            return False
+        doc = await self.collection.find_one_and_update(
+            {"_id": stock_id(city, key), "stock": {"$gte": amount}},
+            {"$inc": {"stock": -amount}},
+            projection={"stock": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            # Önbellek başka bir worker'ın düşüşlerini henüz görmemiş olabilir
+            doc = await self.collection.find_one({"_id": stock_id(city, key)}, projection={"stock": 1})
+            if doc is not None:
+                self._apply(key, city, doc["stock"])
+            return False
+        self._apply(key, city, doc["stock"])
+        return True
+
+    async def restock(self, product, city, amount):
+        """Düşülen stoğu geri ekler (iptal edilen sevkiyatlar için)"""
+        key = resolve(product)
+        if amount <= 0 or (key, city) not in self._holders:
+            return False
+        doc = await self.collection.find_one_and_update(
+            {"_id": stock_id(city, key)},
+            {"$inc": {"stock": amount}},
+            projection={"stock": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            return False
+        self._apply(key, city, doc["stock"])
+        return True
+
+_inventory = None
+
+def get_inventory():
+    """Paylaşılan InventoryIndex örneğini ilk kullanımda MOCK_MARKETS'ten oluşturup döndürür"""
+    global _inventory
+    if _inventory is None:
+        _inventory = InventoryIndex.from_mock()
+    return _inventory
@@ -0,0 +1,240 @@
+# jobs.py
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+# İş durumları
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (DONE, FAILED, CANCELLED)
+
+def idempotency_key(kind, konum, window_seconds, now=None):
+    """Aynı konum için aynı zaman penceresindeki tetiklemeleri tek işe bağlayan anahtar"""
+    window = int((now if now is not None else time.time()) // window_seconds)
+    return f"{kind}:{konum}:{window}"
+
+def to_job(doc):
+    """jobs dokümanını API yanıtına çevirir"""
+    job = {key: value for key, value in doc.items() if key not in ("_id", "idempotency_key")}
+    job["id"] = doc["_id"]
+    return job
+
+class JobContext:
+    """Çalışan işin ilerlemesini ve ara sonuçlarını jobs dokümanına yazar"""
+
+    def __init__(self, runner, job_id, phases):
+        self.runner = runner
+        self.job_id = job_id
+        self.phases = phases
+        self._done = 0
+
+    async def _set(self, fields):
+        await self.runner.collection.update_one(
+            {"_id": self.job_id}, {"$set": {**fields, "updated_at": datetime.now()}}
+        )
+
+    @asynccontextmanager
+    async def phase(self, name):
+        """Aşamanın başlangıç/bitiş zamanlarını ve süresini kaydeder; aynı anda birden fazla aşama açık olabilir"""
+        started = time.perf_counter()
+        await self._set({f"phases.{name}": {"status": RUNNING, "started_at": datetime.now()}})
+        try:
+            yield
+        except asyncio.CancelledError:
+            await asyncio.shield(self._set({f"phases.{name}.status": CANCELLED}))
+            raise
+        except Exception:
+            await self._set({f"phases.{name}.status": FAILED})
+            raise
+        self._done += 1
+        await self._set({
+            f"phases.{name}.status": DONE,
+            f"phases.{name}.duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "progress": round(self._done / len(self.phases), 2)
+        })
+
+    async def publish(self, **results):
+        """Ara sonuçları işin result alanına ekler; GET /jobs/{id} bunları iş bitmeden gösterir"""
+        await self._set({f"result.{key}": value for key, value in results.items()})
+
+class JobRunner:
+    """
+    Uzun süren işleri (örn. deprem simülasyonu) arka planda çalıştırır.
+
+    İşin durumu, aşamaları ve ara sonuçları jobs koleksiyonunda tutulur,
+    böylece istemci iş bitmeden ilerlemeyi okuyabilir. İdempotency anahtarı
+    unique index ile korunur: aynı anahtarla gelen ikinci tetikleme yeni iş
+    başlatmaz, var olan işi döndürür. İptal edilen veya başarısız olan işlerin
+    anahtarı bırakılır ki aynı pencerede yeniden denenebilsin.
+
+    Birden fazla worker aynı koleksiyonu paylaşabilir: her süreç kendi
+    çalışan işlerinin updated_at alanını düzenli yeniler, stale_seconds
+    boyunca yenilenmeyen (süreci ölmüş) işler başarısız sayılır.
+    """
+
+    def __init__(self, collection, ttl_seconds=7 * 86400, stale_seconds=120.0):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._tasks = {}
+        self._heartbeat = None
+        self.stats = {"submitted": 0, "deduplicated": 0, "done": 0, "failed": 0, "cancelled": 0}
+
+    async def ensure_indexes(self):
+        """İdempotency anahtarı için unique index ve biten işlerin silinmesi için TTL index'i"""
+        await self.collection.create_index(
+            "idempotency_key", unique=True,
+            partialFilterExpression={"idempotency_key": {"$exists": True}}
+        )
+        await self.collection.create_index("finished_at", expireAfterSeconds=self.ttl_seconds)
+
+    async def recover(self):
+        """Süreci ölmüş (stale_seconds boyunca yenilenmemiş) işleri başarısız olarak işaretler; anahtarları bırakılır"""
+        result = await self.collection.update_many(
+            {
+                "status": {"$in": [QUEUED, RUNNING]},
+                "updated_at": {"$lt": datetime.now() - timedelta(seconds=self.stale_seconds)}
+            },
+            {
+                "$set": {"status": FAILED, "error": "Sunucu yeniden başlatıldı", "finished_at": datetime.now()},
+                "$unset": {"idempotency_key": ""}
+            }
+        )
+        return result.modified_count
+
+    async def submit(self, kind, params, phases, work, key=None):
+        """
+        İşi kaydeder ve arka planda başlatır.
+
+        Args:
+            kind (str): İş türü ("simulate-earthquake")
+            params (dict): İşin parametreleri (yanıtta döner)
+            phases (list): Aşama adları (ilerleme oranı için)
+            work (callable): async work(context) — işi yapan fonksiyon
+            key (str): İdempotency anahtarı; aynı anahtarlı iş varsa yenisi başlatılmaz
+
+        Returns:
+            tuple: (iş, yeni_mi)
+        """
+        now = datetime.now()
+        doc = {
+            "_id": str(ObjectId()),
+            "kind": kind,
+            "params": params,
+            "status": QUEUED,
+            "progress": 0.0,
+            "phases": {},
+            "result": {},
+            "created_at": now,
+            "updated_at": now
+        }
+        if key is not None:
+            doc["idempotency_key"] = key
+        try:
+            await self.collection.insert_one(doc)
+        except DuplicateKeyError:
+            existing = await self.collection.find_one({"idempotency_key": key})
+            if existing is not None:
+                self.stats["deduplicated"] += 1
+                return to_job(existing), False
+            # Var olan iş bu arada bitip anahtarını bıraktı
+            return await self.submit(kind, params, phases, work, key)
+
+        self.stats["submitted"] += 1
+        context = JobContext(self, doc["_id"], phases)
+        task = asyncio.create_task(self._run(context, work))
+        self._tasks[doc["_id"]] = task
+        task.add_done_callback(lambda _: self._tasks.pop(doc["_id"], None))
+        return to_job(doc), True
+
+    async def _run(self, context, work):
+        job_id = context.job_id
+        started = time.perf_counter()
+        update = {}
+        try:
+            await self.collection.update_one(
+                {"_id": job_id}, {"$set": {"status": RUNNING, "started_at": datetime.now()}}
+            )
+            await work(context)
+            update = {"$set": {"status": DONE, "progress": 1.0}}
+            self.stats["done"] += 1
+        except asyncio.CancelledError:
+            update = {"$set": {"status": CANCELLED}, "$unset": {"idempotency_key": ""}}
+            self.stats["cancelled"] += 1
+        except Exception as e:
+            update = {"$set": {"status": FAILED, "error": str(e)}, "$unset": {"idempotency_key": ""}}
+            self.stats["failed"] += 1
+        finally:
+            update.setdefault("$set", {}).update({
+                "finished_at": datetime.now(),
+                "updated_at": datetime.now(),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+            })
+            await asyncio.shield(self.collection.update_one({"_id": job_id}, update))
+
+    async def get(self, job_id):
+        doc = await self.collection.find_one({"_id": job_id})
+        return to_job(doc) if doc is not None else None
+
+    async def cancel(self, job_id):
+        """
+        Bu süreçte çalışan işi iptal eder ve bitmesini bekler.
+
+        Returns:
+            bool: İş çalışıyordu ve iptal edildiyse True
+        """
+        task = self._tasks.get(job_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        await asyncio.wait([task])
+        # Görev hiç başlamadan iptal edildiyse _run durumu yazamamıştır
+        await self.collection.update_one(
+            {"_id": job_id, "status": {"$nin": list(FINISHED)}},
+            {"$set": {"status": CANCELLED, "finished_at": datetime.now()}, "$unset": {"idempotency_key": ""}}
+        )
+        return True
+
+    def start(self):
+        """Çalışan işlerin canlılık yenilemesini ve ölü işlerin temizliğini başlatır"""
+        if self._heartbeat is None:
+            self._heartbeat = asyncio.create_task(self._beat())
+
+    async def _beat(self):
+        while True:
+            await asyncio.sleep(self.stale_seconds / 4)
+            try:
+                if self._tasks:
+                    await self.collection.update_many(
+                        {"_id": {"$in": list(self._tasks)}, "status": {"$nin": list(FINISHED)}},
+                        {"$set": {"updated_at": datetime.now()}}
+                    )
+                await self.recover()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Bir sonraki turda tekrar denenir
+                pass
+
+    async def stop(self):
+        """Kapanışta süren işleri iptal eder"""
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks)
+
+    def get_metrics(self):
+        return {**self.stats, "running": len(self._tasks)}
@@ -1,42 +1,190 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from bson import ObjectId
 from fastapi.middleware.cors import CORSMiddleware  # Ekle
-from pydantic import BaseModel
-from gemini_analyzer import analyze_help_text
-import uvicorn
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from gemini_analyzer import (
+    StructuredOutputError, analyze_help_text_async, analyze_help_texts_batch_async, build_match_prompt,
+    build_risk_prompt, gemini_client, generate_structured_async
+)
+from rule_extractor import extract
+from schemas import HelpAnalysis, RiskAnalysis, SmartMatch
+from typing import Dict, List, Optional, Union
+from contextlib import asynccontextmanager
 import os
+import asyncio
+import math
+import time
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
-from mock_market import get_available_markets, get_product_availability
-from mock_trucks import get_available_trucks, dispatch_truck
-from gemini_analyzer import model
+from inventory_index import InventoryIndex, get_inventory
+from mock_trucks import MOCK_TRUCKS, calculate_route
+from geo_index import fleet_index, geo_point, locate, province_index
+from dispatch_planner import plan_dispatch
+from analysis_cache import AnalysisCache
+from swr_cache import SWRCache
+from ingest_worker import IngestWorkerPool
+from truck_ledger import TruckLedger
+from notifications import NotificationFanout
+from jobs import FINISHED, JobRunner, idempotency_key as job_idempotency_key
+from metrics import GEMINI_FALLBACKS, REGISTRY, MetricsMiddleware, MongoCommandMetrics
+from migrations import run_once
+from serialization import FastJSONResponse, dumps
+from event_hub import DISPATCH, EARTHQUAKE, ENTRY, STOCK, EventHub, sse_stream
+from entry_queries import (
+    ENTRY_MATCH_INDEX, donors_near_pipeline, earthquake_resources_pipeline,
+    entries_filter, match_pipeline, parse_fields
+)
+from product_catalog import annotate_products, canonical_name
+from stock_aggregates import UNKNOWN_CITY, apply_entries, entry_delta, extract_truck_count, to_summary
+from trend_rollups import DAY, HOUR, TrendRollups
 # .env dosyasını yükle
 load_dotenv()
 
-app = FastAPI(title="Deprem Yardım Asistanı API")
-
-# CORS middleware ekle
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
 # MongoDB bağlantısı
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "deprem_yardim")
 
-# MongoDB client
-mongodb_client = AsyncIOMotorClient(MONGODB_URL)
-db = mongodb_client[DATABASE_NAME]
+# Worker başına bağlantı havuzu; sunucudaki toplam bağlantı en fazla
+# worker sayısı × MONGODB_MAX_POOL_SIZE olur
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "5"))
+MONGODB_MAX_IDLE_MS = int(os.getenv("MONGODB_MAX_IDLE_MS", "60000"))
+MONGODB_TIMEOUT_MS = int(os.getenv("MONGODB_TIMEOUT_MS", "5000"))
+
+# Index tanımları değiştiğinde artırılır; yeni sürüm ilk açılan worker
+# tarafından bir kez uygulanır
+INDEX_VERSION = 3
+MIGRATION_LOCK_TTL = float(os.getenv("MIGRATION_LOCK_TTL", "600"))
+
+# MongoDB client ve koleksiyonlar süreç açılışında (lifespan) bağlanır;
+# import sırasında bağlantı açılmaz, böylece gunicorn --preload ile fork
+# edilen worker'lar ebeveynin bağlantı havuzunu paylaşmaz
+mongodb_client = None
+db = None
+entries_collection = None
+markets_collection = None
+inventory_collection = None
+trucks_collection = None
+analysis_cache_collection = None
+city_stock_collection = None
+notifications_collection = None
+jobs_collection = None
+migrations_collection = None
+trend_rollups_collection = None
+
+# Analiz önbelleği (aynı/benzer metinler için tekrar Gemini'ya gidilmez)
+analysis_cache = AnalysisCache(
+    collection=analysis_cache_collection,
+    max_size=int(os.getenv("ANALYSIS_CACHE_SIZE", "10000")),
+    ttl_seconds=int(os.getenv("ANALYSIS_CACHE_TTL", "86400"))
+)
+
+# AI risk analizi önbelleği: eşzamanlı istekler tek Gemini çağrısını bekler,
+# süresi dolan sonuç arka planda yenilenirken bekletmeden döner
+risk_cache = SWRCache(
+    ttl_seconds=int(os.getenv("RISK_ANALYSIS_TTL", "600")),
+    stale_seconds=int(os.getenv("RISK_ANALYSIS_STALE", "3600"))
+)
+RISK_ANALYSIS_MAX_CITIES = int(os.getenv("RISK_ANALYSIS_MAX_CITIES", "30"))
+RISK_ANALYSIS_TOP_SUPPLIES = 5
+
+# Tır kapasite defteri (eşzamanlı sevkiyatlarda aynı tırın iki kez ayrılmasını önler)
+truck_ledger = TruckLedger(
+    trucks_collection,
+    hold_ttl=float(os.getenv("TRUCK_HOLD_TTL", "300")),
+    trip_ttl=float(os.getenv("TRUCK_TRIP_TTL", "86400"))
+)
 
-# Database collections
-entries_collection = db.entries
-markets_collection = db.markets
-trucks_collection = db.trucks
+# Market stokları: inventory koleksiyonu doğru kaynaktır, sevkiyatlar koşullu
+# atomik $inc ile düşer; bellekteki dizin INVENTORY_REFRESH_INTERVAL saniyede
+# bir yenilenen okuma önbelleğidir
+inventory = get_inventory()
+inventory.refresh_interval = float(os.getenv("INVENTORY_REFRESH_INTERVAL", "5"))
+
+def round_trip_seconds(from_city, to_city):
+    """Tırların varış şehrine gidip dönmesi için geçen süre (saniye); rota yoksa None (TRUCK_TRIP_TTL)"""
+    route = calculate_route(from_city, to_city)
+    if route is None:
+        return None
+    return 2 * route["travel_time"] * 3600
+
+# Deprem modunda bölge dışındaki bağışçılara bildirim dağıtımı
+notification_fanout = NotificationFanout(
+    notifications_collection,
+    entries_collection,
+    batch_size=int(os.getenv("NOTIFICATION_BATCH_SIZE", "1000"))
+)
+
+# Deprem simülasyonu gibi uzun işler arka planda çalışır; aynı konum için
+# SIMULATION_WINDOW saniye içindeki tekrar tetiklemeler aynı işe bağlanır
+job_runner = JobRunner(
+    jobs_collection,
+    ttl_seconds=int(os.getenv("JOB_TTL", "604800")),
+    stale_seconds=float(os.getenv("JOB_STALE_AFTER", "120"))
+)
+SIMULATION_WINDOW = int(os.getenv("SIMULATION_WINDOW", "300"))
+
+# Şehir × ürün × saat arz/talep kovaları (GET /trends); TREND_HOURLY_RETENTION
+# saatten eski saat kovaları gün kovalarına katlanır
+trend_rollups = TrendRollups(
+    trend_rollups_collection,
+    hourly_retention=int(os.getenv("TREND_HOURLY_RETENTION", "48")),
+    compact_interval=float(os.getenv("TREND_COMPACT_INTERVAL", "600"))
+)
+TRENDS_MAX_WINDOW_HOURS = 90 * 24
+
+def bind_database(database):
+    """
+    Uygulamayı başka bir veritabanına bağlar (yük testlerinde yerel mongod veya
+    mongomock). Koleksiyon tutan bileşenler de yeni veritabanına yönlendirilir.
+    """
+    global db, entries_collection, markets_collection, inventory_collection, trucks_collection
+    global analysis_cache_collection, city_stock_collection, notifications_collection, jobs_collection
+    global migrations_collection, trend_rollups_collection
+    db = database
+    entries_collection = db.entries
+    markets_collection = db.markets
+    inventory_collection = db.inventory
+    trucks_collection = db.trucks
+    analysis_cache_collection = db.analysis_cache
+    city_stock_collection = db.city_stock
+    notifications_collection = db.notifications
+    jobs_collection = db.jobs
+    migrations_collection = db.migrations
+    trend_rollups_collection = db.trend_rollups
+    analysis_cache.collection = analysis_cache_collection
+    truck_ledger.collection = trucks_collection
+    inventory.collection = inventory_collection
+    notification_fanout.collection = notifications_collection
+    notification_fanout.entries_collection = entries_collection
+    job_runner.collection = jobs_collection
+    ingest_pool.collection = entries_collection
+    trend_rollups.collection = trend_rollups_collection
+
+def connect_database():
+    """Bu süreç için MongoDB client'ını ayarlı bağlantı havuzuyla oluşturur ve uygulamayı ona bağlar"""
+    global mongodb_client
+    mongodb_client = AsyncIOMotorClient(
+        MONGODB_URL,
+        maxPoolSize=MONGODB_MAX_POOL_SIZE,
+        minPoolSize=MONGODB_MIN_POOL_SIZE,
+        maxIdleTimeMS=MONGODB_MAX_IDLE_MS,
+        serverSelectionTimeoutMS=MONGODB_TIMEOUT_MS,
+        waitQueueTimeoutMS=MONGODB_TIMEOUT_MS,
+        event_listeners=[MongoCommandMetrics()]
+    )
+    bind_database(mongodb_client[DATABASE_NAME])
+    return mongodb_client
+
+# Okuma anında hesaplanan göstergeler
+REGISTRY.gauge("sse_subscribers", "Açık canlı güncelleme bağlantıları", function=lambda: event_hub.subscriber_count)
+REGISTRY.gauge("jobs_running", "Bu süreçte çalışan arka plan işleri", function=lambda: job_runner.get_metrics()["running"])
+
+# Canlı güncellemeler (SSE); yavaş istemcilerin tamponu EVENTS_MAX_PENDING olayda sınırlanır
+event_hub = EventHub(max_pending=int(os.getenv("EVENTS_MAX_PENDING", "256")))
+EVENTS_COALESCE_SECONDS = float(os.getenv("EVENTS_COALESCE_MS", "50")) / 1000
 
 # Request modelleri
 class AnalyzeRequest(BaseModel):
@@ -46,120 +194,414 @@ class EntryRequest(BaseModel):
     text: str
     name: Optional[str] = None
 
+class BatchEntryRequest(BaseModel):
+    entries: List[EntryRequest]
+
 class MatchRequest(BaseModel):
     konum: str
     urun_adi: str
     miktar: int
 
-# Response modelleri
-class AnalyzeResponse(BaseModel):
-    ihtiyac_var: bool
-    konum: str
-    urunler: list
-    öncelik: str
+# Yanıt modelleri
+class EntryPreview(BaseModel):
+    """Listelerde kaydın kısa görünümü; tam metin GET /entries/{id} ile alınır"""
+    id: str
+    name: str
+    text: str
+    ihtiyac_var: Optional[bool] = None
+    timestamp: Optional[datetime] = None
 
-@app.on_event("startup")
-async def startup_event():
-    # MongoDB'de index'leri oluştur
-    await entries_collection.create_index("konum")
+class CityStock(BaseModel):
+    supplies: Dict[str, Union[int, float]]
+    trucks: int
+    entry_count: int
+    entries: Optional[List[EntryPreview]] = None
+
+class StockSummaryResponse(BaseModel):
+    stock_summary: Dict[str, CityStock]
+
+class CityEntriesResponse(BaseModel):
+    city: str
+    skip: int
+    limit: int
+    entries: List[EntryPreview]
+
+class EntryAnalysisSummary(BaseModel):
+    konum: Optional[str] = None
+    öncelik: Optional[str] = None
+    ihtiyac_var: Optional[bool] = None
+    urunler: List[Dict[str, Union[str, int, float, None]]] = []
+
+class EntrySummary(BaseModel):
+    id: str = Field(alias="_id")
+    name: Optional[str] = None
+    status: Optional[str] = None
+    timestamp: Optional[datetime] = None
+    analysis: Optional[EntryAnalysisSummary] = None
+
+class EntryPage(BaseModel):
+    entries: List[EntrySummary]
+    next_after: Optional[str] = None
+
+async def create_indexes():
+    """MongoDB index'lerini oluşturur (INDEX_VERSION başına bir kez, migration kilidi altında)"""
+    await entries_collection.create_index(ENTRY_MATCH_INDEX)
     await entries_collection.create_index("status")
+    await entries_collection.create_index([("analysis.konum", 1), ("timestamp", -1)])
+    await entries_collection.create_index([("geo", "2dsphere")])
+    await analysis_cache.ensure_indexes()
+    await ingest_pool.ensure_indexes()
+    await truck_ledger.ensure_indexes()
+    await notification_fanout.ensure_indexes()
+    await job_runner.ensure_indexes()
+    await trend_rollups.ensure_indexes()
+
+async def startup_event():
+    # Index'ler tüm worker'lar arasında bir kez oluşturulur; diğerleri bitmesini bekler
+    await run_once(migrations_collection, "indexes", INDEX_VERSION, create_indexes, lock_ttl=MIGRATION_LOCK_TTL)
+    await job_runner.recover()
+    await truck_ledger.seed(MOCK_TRUCKS)
+    # markets koleksiyonu doluysa envanter oradan, değilse MOCK_MARKETS'ten yüklenir;
+    # stoklar inventory koleksiyonunda yoksa eklenir, varsa önbelleğe oradan okunur
+    markets_by_city = await InventoryIndex.read_collection(markets_collection)
+    if markets_by_city:
+        inventory.load(markets_by_city)
+    await inventory.seed()
+    ingest_pool.start()
+    truck_ledger.start()
+    inventory.start()
+    job_runner.start()
+    trend_rollups.start()
 
-@app.on_event("shutdown")
 async def shutdown_event():
-    mongodb_client.close()
+    await job_runner.stop()
+    await ingest_pool.stop()
+    await truck_ledger.stop()
+    await inventory.stop()
+    await trend_rollups.stop()
+    if mongodb_client is not None:
+        mongodb_client.close()
+
+@asynccontextmanager
+async def lifespan(app):
+    # Testlerde bind_database ile başka bir veritabanı bağlanmış olabilir
+    if db is None:
+        connect_database()
+    await startup_event()
+    try:
+        yield
+    finally:
+        await shutdown_event()
+
+app = FastAPI(title="Deprem Yardım Asistanı API", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# CORS middleware ekle
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+# Route başına süre/boyut ve işlenmekte olan istek ölçümü (GET /metrics)
+app.add_middleware(MetricsMiddleware)
+
+async def analyze_text(text):
+    """Önce analiz önbelleğine bakar, yoksa Gemini ile analiz edip sonucu önbelleğe yazar"""
+    cached = await analysis_cache.get(text)
+    if cached is not None:
+        return cached
+    result = await analyze_help_text_async(text)
+    if "error" not in result:
+        annotate_products(result)
+    await analysis_cache.set(text, result)
+    return result
+
+async def analyze_texts(texts):
+    """Birden fazla metni önbellek + toplu Gemini çağrısı ile analiz eder"""
+    results = [await analysis_cache.get(text) for text in texts]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        analyses = await analyze_help_texts_batch_async([texts[i] for i in missing])
+        for i, analysis in zip(missing, analyses):
+            if "error" not in analysis:
+                annotate_products(analysis)
+            results[i] = analysis
+            await analysis_cache.set(texts[i], analysis)
+    return results
+
+def build_entry(name, text, analysis):
+    """Veritabanına yazılacak kayıt dokümanını oluşturur"""
+    return {
+        "name": name,
+        "original_text": text,
+        "analysis": annotate_products(analysis),
+        "geo": geo_point(analysis.get("konum")),
+        "truck_count": extract_truck_count(text),
+        "timestamp": datetime.now(),
+        "status": "aktif"
+    }
+
+async def on_entries_analyzed(entries):
+    """Analizi tamamlanıp veritabanına yazılan kayıtları türetilmiş verilere işler"""
+    await apply_entries(city_stock_collection, entries)
+    await trend_rollups.record(entries)
+    for entry in entries:
+        city, delta = entry_delta(entry)
+        analysis = entry.get("analysis") or {}
+        event_hub.publish(ENTRY, city, {
+            "id": str(entry.get("_id")),
+            "name": entry.get("name"),
+            "text": entry.get("original_text", ""),
+            "ihtiyac_var": analysis.get("ihtiyac_var"),
+            "urunler": [
+                {"urun_key": u.get("urun_key"), "urun_adi": u.get("urun_adi"), "miktar": u.get("miktar_adet")}
+                for u in analysis.get("urunler", []) if isinstance(u, dict)
+            ]
+        })
+        event_hub.publish(STOCK, city, delta)
+
+async def on_entry_analyzed(entry):
+    await on_entries_analyzed([entry])
+
+# Arka planda analiz yapan işçi havuzu (asenkron kayıt modu için)
+ingest_pool = IngestWorkerPool(
+    entries_collection,
+    analyze_text,
+    on_analyzed=on_entry_analyzed,
+    workers=int(os.getenv("INGEST_WORKERS", "4")),
+    max_attempts=int(os.getenv("INGEST_MAX_ATTEMPTS", "5"))
+)
 
-@app.post("/analyze", response_model=AnalyzeResponse)
+@app.post("/analyze", response_model=HelpAnalysis)
 async def analyze_endpoint(request: AnalyzeRequest):
     """
     Kullanıcının girdiği metni analiz eder
     """
     try:
-        result = analyze_help_text(request.text)
-        if "error" in result:
-            raise HTTPException(status_code=500, detail=result["error"])
-        return result
+        result = await analyze_text(request.text)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if result.get("unavailable"):
+        # İstemciler hemen tekrar denemesin
+        raise HTTPException(status_code=503, detail=result["error"],
+                            headers={"Retry-After": str(math.ceil(result["retry_after"]))})
+    if "error" in result:
+        raise HTTPException(status_code=500, detail=result["error"])
+    return result
+
+def deferred_document(name, text, analysis):
+    """
+    Analizi yapılamayan kaydın dokümanı (düşük kapasite modu). Kayıt yerel
+    kural tabanlı analiz önizlemesiyle analiz bekleyen olarak yazılır ve
+    işçi havuzunca Gemini'nin önerdiği retry_after süresi sonra analiz edilir.
+    """
+    entry = ingest_pool.pending_document(name, text, delay=analysis.get("retry_after") or 0)
+    entry["truck_count"] = extract_truck_count(text)
+    entry["heuristic_analysis"], _ = extract(text)
+    entry["last_error"] = analysis["error"]
+    return entry
 
 @app.post("/submit-entry")
-async def submit_entry(request: EntryRequest):
+async def submit_entry(request: EntryRequest, async_ingest: bool = False):
     """
-    Kullanıcının yardım kaydını veritabanına ekler
+    Kullanıcının yardım kaydını veritabanına ekler.
+    async_ingest=true ise kayıt hemen yazılır ve analiz arka planda yapılır.
     """
     try:
+        if async_ingest:
+            cached = await analysis_cache.get(request.text)
+            if cached is not None:
+                entry = build_entry(request.name, request.text, cached)
+            else:
+                entry = ingest_pool.pending_document(request.name, request.text)
+                entry["truck_count"] = extract_truck_count(request.text)
+            result = await entries_collection.insert_one(entry)
+            if entry["status"] == "aktif":
+                await on_entry_analyzed(entry)
+            else:
+                ingest_pool.notify()
+            return {
+                "message": "Kayıt alındı",
+                "id": str(result.inserted_id),
+                "status": entry["status"]
+            }
+        
         # Metni analiz et
-        analysis = analyze_help_text(request.text)
+        analysis = await analyze_text(request.text)
         if "error" in analysis:
-            raise HTTPException(status_code=500, detail=analysis["error"])
+            # Gemini yavaş/kapalıyken kayıt reddedilmez, analizi ertelenir
+            entry = deferred_document(request.name, request.text, analysis)
+            result = await entries_collection.insert_one(entry)
+            ingest_pool.notify()
+            return {
+                "message": "Kayıt alındı, AI analizi ertelendi",
+                "id": str(result.inserted_id),
+                "status": entry["status"],
+                "degraded": True,
+                "retry_after": analysis.get("retry_after"),
+                "preview": entry["heuristic_analysis"]
+            }
         
         # Veritabanına ekle
-        entry = {
-            "name": request.name,
-            "original_text": request.text,
-            "analysis": analysis,
-            "timestamp": datetime.now(),
-            "status": "aktif"
-        }
+        entry = build_entry(request.name, request.text, analysis)
         
         result = await entries_collection.insert_one(entry)
         entry_id = str(result.inserted_id)
+        await on_entry_analyzed(entry)
         
         return {"message": "Kayıt başarıyla eklendi", "id": entry_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/entries")
-async def get_entries():
+@app.post("/submit-entries/batch")
+async def submit_entries_batch(request: BatchEntryRequest):
     """
-    Tüm kayıtları listeler
+    Toplu yardım kayıtlarını tek Gemini çağrısı grupları ve tek insert_many ile ekler
     """
     try:
+        started = time.perf_counter()
+        texts = [item.text for item in request.entries]
+        analyses = await analyze_texts(texts)
+        
         entries = []
-        async for entry in entries_collection.find():
-            entry["_id"] = str(entry["_id"])  # ObjectId'yi string'e çevir
-            entries.append(entry)
-        return {"entries": entries}
+        deferred = []
+        deferred_indexes = []
+        for index, (item, analysis) in enumerate(zip(request.entries, analyses)):
+            if "error" in analysis:
+                deferred.append(deferred_document(item.name, item.text, analysis))
+                deferred_indexes.append(index)
+            else:
+                entries.append(build_entry(item.name, item.text, analysis))
+        
+        ids = []
+        if entries:
+            result = await entries_collection.insert_many(entries)
+            ids = [str(inserted_id) for inserted_id in result.inserted_ids]
+            await on_entries_analyzed(entries)
+        deferred_ids = []
+        if deferred:
+            result = await entries_collection.insert_many(deferred)
+            deferred_ids = [
+                {"index": index, "id": str(inserted_id)}
+                for index, inserted_id in zip(deferred_indexes, result.inserted_ids)
+            ]
+            ingest_pool.notify()
+        
+        elapsed = time.perf_counter() - started
+        return {
+            "message": f"{len(ids)} kayıt başarıyla eklendi",
+            "ids": ids,
+            "deferred": deferred_ids,
+            "elapsed_seconds": round(elapsed, 3),
+            "entries_per_second": round(len(ids) / elapsed, 2) if elapsed > 0 else None
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
+
+# /entries sayfa boyutu sınırları ve NDJSON akışında Mongo'dan tek seferde çekilen kayıt sayısı
+ENTRIES_DEFAULT_LIMIT = 100
+ENTRIES_MAX_LIMIT = 1000
+ENTRIES_STREAM_BATCH_SIZE = 500
+# fields verilmezse listelerde dönen alanlar (metin, konum noktası ve ham analiz hariç)
+ENTRY_LIST_FIELDS = ",".join([
+    "name", "status", "timestamp", "analysis.konum", "analysis.öncelik", "analysis.ihtiyac_var",
+    "analysis.urunler.urun_key", "analysis.urunler.urun_adi", "analysis.urunler.miktar_adet"
+])
+# Stok özetindeki kayıtlarda gösterilen en fazla metin uzunluğu (karakter)
+ENTRY_PREVIEW_CHARS = int(os.getenv("ENTRY_PREVIEW_CHARS", "160"))
+
+# Yanıt FastJSONResponse ile doğrudan orjson'a verilir (fields ile modelde olmayan
+# alanlar da istenebilir); EntryPage yalnızca varsayılan alanlar için belgelenir
+@app.get("/entries", responses={200: {"model": EntryPage}})
+async def get_entries(
+    limit: int = ENTRIES_DEFAULT_LIMIT,
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    konum: Optional[str] = None,
+    status: Optional[str] = None,
+    oncelik: Optional[str] = None,
+    format: str = "json"
+):
+    """
+    Kayıtları en yeniden eskiye listeler.
+    Varsayılan olarak ENTRY_LIST_FIELDS alanları döner; fields ile başka alanlar
+    (örn. original_text) istenebilir. Sayfalama _id üzerinden yapılır: bir
+    sonraki sayfa için yanıttaki next_after değeri after parametresine verilir.
+    format=ndjson ise filtreye uyan tüm kayıtlar satır satır akıtılır (limit
+    uygulanmaz, bellek kullanımı sabittir).
+    """
+    if after is not None and not ObjectId.is_valid(after):
+        raise HTTPException(status_code=400, detail="Geçersiz after değeri")
+    try:
+        projection = parse_fields(fields or ENTRY_LIST_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        query = entries_filter(konum, status, oncelik, after)
+        
+        if format == "ndjson":
+            cursor = entries_collection.find(query, projection=projection).sort(
+                "_id", -1
+            ).batch_size(ENTRIES_STREAM_BATCH_SIZE)
+            
+            async def stream():
+                async for entry in cursor:
+                    yield dumps(entry) + b"\n"
+            
+            return StreamingResponse(stream(), media_type="application/x-ndjson")
+        
+        limit = min(max(limit, 1), ENTRIES_MAX_LIMIT)
+        entries = await entries_collection.find(query, projection=projection).sort("_id", -1).limit(
+            limit
+        ).to_list(limit)
+        
+        next_after = str(entries[-1]["_id"]) if len(entries) == limit else None
+        # Dokümanlar (ObjectId, datetime) doğrudan orjson'a verilir
+        return FastJSONResponse({"entries": entries, "next_after": next_after})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/entries/{entry_id}")
+async def get_entry(entry_id: str):
+    """
+    Tek bir kaydı ve analiz durumunu döndürür (asenkron kayıtlar için sorgulama)
+    """
+    if not ObjectId.is_valid(entry_id):
+        raise HTTPException(status_code=400, detail="Geçersiz kayıt ID")
+    try:
+        entry = await entries_collection.find_one({"_id": ObjectId(entry_id)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Kayıt bulunamadı")
+    return FastJSONResponse(entry)
+
+@app.get("/gemini/status")
+async def get_gemini_status():
+    """Gemini devre kesicisinin durumu, kuyruk ve kota sayaçları"""
+    return gemini_client.get_stats()
+
+@app.get("/ingest/metrics")
+async def get_ingest_metrics():
+    """Analiz kuyruğunun derinliği ve işçi gecikmesi"""
+    try:
+        return await ingest_pool.get_metrics()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/match")
 async def match_entries(request: MatchRequest):
     """
     Belirli konumda belirli ürünü arayan veya verebilecek kayıtları bulur
     """
     try:
-        # Aynı şehirde arama yap
-        query = {
-            "analysis.konum": request.konum,
-            "status": "aktif"
-        }
-        
-        # İhtiyacını verebilecek (arz) kayıtları bul
-        supply_entries = []
-        demand_entries = []
-        
-        async for entry in entries_collection.find(query):
-            entry["_id"] = str(entry["_id"])
-            
-            # Ürün kontrolü
-            for urun in entry["analysis"]["urunler"]:
-                if urun["urun_adi"].lower() == request.urun_adi.lower():
-                    if entry["analysis"]["ihtiyac_var"] == False:  # Arz
-                        supply_entries.append({
-                            "id": entry["_id"],
-                            "name": entry["name"],
-                            "miktar": urun["miktar"],
-                            "öncelik": entry["analysis"]["öncelik"],
-                            "timestamp": entry["timestamp"]
-                        })
-                    else:  # Talep
-                        demand_entries.append({
-                            "id": entry["_id"],
-                            "name": entry["name"],
-                            "miktar": urun["miktar"],
-                            "öncelik": entry["analysis"]["öncelik"],
-                            "timestamp": entry["timestamp"]
-                        })
+        # Aynı şehirde, aynı ürün anahtarına sahip arz/talep kayıtlarını bul
+        result = None
+        async for doc in entries_collection.aggregate(match_pipeline(request.konum, request.urun_adi)):
+            result = doc
+        supply_entries = result["arz"] if result else []
+        demand_entries = result["talep"] if result else []
         
         return {
             "konum": request.konum,
@@ -175,144 +617,280 @@ async def match_entries(request: MatchRequest):
         raise HTTPException(status_code=500, detail=str(e))
     
 
-@app.post("/simulate-earthquake")
-async def simulate_earthquake(konum: str):
-    """Deprem simülasyonu - tüm yardım kaynakları harekete geçirilir"""
-    try:
-        # 1. Etkilenen bölgedeki tüm kayıtları bul
-        query = {
-            "analysis.konum": konum,
-            "status": "aktif"
-        }
-        
-        # Mevcut kaynakları topla
-        total_resources = {}
-        urgent_needs = []
-        
-        async for entry in entries_collection.find(query):
-            entry["_id"] = str(entry["_id"])
-            
-            # Kaynakları topla
-            for urun in entry["analysis"]["urunler"]:
-                if not entry["analysis"]["ihtiyac_var"]:  # Arz
-                    if urun["urun_adi"] not in total_resources:
-                        total_resources[urun["urun_adi"]] = 0
-                    total_resources[urun["urun_adi"]] += urun["miktar"]
-                else:  # Acil ihtiyaçları tespit et
-                    if entry["analysis"]["öncelik"] in ["acil", "yüksek"]:
-                        urgent_needs.append({
-                            "id": entry["_id"],
-                            "name": entry["name"],
-                            "urun": urun["urun_adi"],
-                            "miktar": urun["miktar"],
-                            "öncelik": entry["analysis"]["öncelik"]
-                        })
+SIMULATION_PHASES = ["scan", "fleets", "activate", "plan", "dispatch", "notify", "markets"]
+
+async def run_simulation(job, konum):
+    """
+    Deprem simülasyonu işi. Birbirine bağlı olmayan aşamalar aynı anda çalışır:
+    kaynak taraması ile filo anlık görüntüsü, kayıtların deprem moduna alınması ile
+    sevkiyat planı, bildirim dağıtımı ile market durumu. Her aşamanın sonucu
+    bitince işe yazılır.
+    """
+    # 1. Etkilenen bölgedeki kaynaklar ve tüm ihtiyaçlar + filo durumu
+    async def scan():
+        async with job.phase("scan"):
+            total_resources, needs = {}, []
+            async for doc in entries_collection.aggregate(earthquake_resources_pipeline(konum)):
+                total_resources = {canonical_name(r["_id"] or r["urun_adi"]): r["miktar"] for r in doc["resources"]}
+                needs = doc["needs"]
+            urgent_needs = [n for n in needs if n["öncelik"] in ("acil", "yüksek")]
+            await job.publish(available_resources=total_resources, urgent_needs=urgent_needs)
+            return total_resources, needs, urgent_needs
+    
+    async def fleets():
+        async with job.phase("fleets"):
+            return await truck_ledger.snapshot()
+    
+    (total_resources, needs, urgent_needs), fleet_snapshot = await asyncio.gather(scan(), fleets())
+    
+    # 2. Kayıtlar "deprem modu"na alınırken sevkiyat planı hesaplanır
+    # (tarama aktif kayıtları okuduğundan deprem moduna alma taramadan sonra yapılır)
+    async def activate():
+        async with job.phase("activate"):
+            result = await entries_collection.update_many(
+                {"analysis.konum": konum},
+                {"$set": {"status": "deprem_modu", "earthquake_activated": datetime.now()}}
+            )
+            await job.publish(activated_entries=result.modified_count)
+    
+    async def planning():
+        async with job.phase("plan"):
+            # CPU yoğun; event loop'u bloklamamak için ayrı thread'de
+            return await asyncio.to_thread(plan_dispatch, konum, needs, fleet_snapshot)
+    
+    _, plan = await asyncio.gather(activate(), planning())
+    missing_items = sorted({u["urun"] for u in plan["unmet"]})
+    await job.publish(dispatch_plan={
+        "requested": plan["requested"],
+        "served": plan["served"],
+        "unmet": plan["unmet"],
+        "fleet_usage": plan["fleet_usage"],
+        "weighted_delivery_minutes": plan["weighted_delivery_minutes"]
+    })
+    
+    # 3. Plandaki tırları defterden ayır; eşzamanlı bir sevkiyat önce davrandıysa o filo gönderilmez.
+    # Tırlar stok düşüldükten sonra sevk edilir; stoğu tükenen filoların ayırması bırakılır
+    async with job.phase("dispatch"):
+        async def reserve(usage):
+            reservation = await truck_ledger.reserve(
+                usage["city"], usage["company"], usage["trucks"], reference=f"deprem:{konum}"
+            )
+            if reservation is None:
+                usage["status"] = "no_truck_available"
+            return reservation
         
-        # 2. Tüm kayıtları "deprem modu"na al
-        await entries_collection.update_many(
-            {"analysis.konum": konum},
-            {"$set": {"status": "deprem_modu", "earthquake_activated": datetime.now()}}
-        )
+        # Filolar birbirinden bağımsız; ayırmalar aynı anda yapılır
+        reservations = await asyncio.gather(*(reserve(u) for u in plan["fleet_usage"]))
+        unavailable = {
+            (usage["city"], usage["company"])
+            for usage, reservation in zip(plan["fleet_usage"], reservations) if reservation is None
+        }
         
-        # 3. Market ihtiyaçlarını analiz et (mock)
-        missing_items = []
-        if len(urgent_needs) > 0:
-            missing_items = ["ilaç", "bebek maması", "su"]  # Mock veri
-            
-        # Market ve tır durumunu ekleyin
-        nearby_cities = ["İstanbul", "Ankara", "İzmir", "Bursa", "Samsun", "Adana", "Konya", "Antalya", "Kocaeli", "Mersin"]
         logistics_support = []
-        market_support = []
+        loaded = set()
+        for allocation in plan["allocations"]:
+            companies = allocation.get("companies", [])
+            allocation_fleets = {(allocation["from"], company) for company in companies}
+            if unavailable & allocation_fleets:
+                continue
+            # Stok planlamadan sonra başka bir sevkiyatla tükendiyse gönderilmez
+            if not await inventory.decrement(allocation["urun"], allocation["from"], allocation["amount"]):
+                continue
+            loaded |= allocation_fleets
+            company = ", ".join(companies)
+            logistics_support.append({
+                "status": "dispatched",
+                "company": company,
+                "from": allocation["from"],
+                "to": allocation["to"],
+                "product": allocation["urun"],
+                "amount": allocation["amount"],
+                "priority": allocation["öncelik"],
+                "need_id": allocation["need_id"],
+                "route": allocation["route"],
+                "message": f"{company} firması {allocation['from']}'dan {allocation['to']}'a "
+                           f"{allocation['amount']} adet {allocation['urun']} gönderiyor"
+            })
+        
+        async def settle(usage, reservation):
+            if reservation is None:
+                return
+            if (usage["city"], usage["company"]) not in loaded:
+                await truck_ledger.release(reservation["id"])
+                usage["status"] = "no_stock_available"
+                return
+            await truck_ledger.confirm(reservation["id"], trip_seconds=round_trip_seconds(usage["city"], konum))
+            usage["status"] = "dispatched"
+            usage["reservation_id"] = reservation["id"]
         
-        # En yakın 3 şehirden yardım talep et
-        for city in nearby_cities[:3]:
-            if city != konum:
-                trucks = get_available_trucks(city)
-                if trucks:
-                    # Eksik stoklar için tır gönder
-                    if len(urgent_needs) > 0:
-                        first_need = urgent_needs[0]
-                        dispatch = dispatch_truck(city, konum, first_need["urun"], first_need["miktar"])
-                        logistics_support.append(dispatch)
-                        
-                # Market durumunu kontrol et
-                markets = get_available_markets(city)
-                if markets:
+        await asyncio.gather(*(settle(u, r) for u, r in zip(plan["fleet_usage"], reservations)))
+        await job.publish(logistics_support=logistics_support, fleet_usage=plan["fleet_usage"])
+    
+    event_hub.publish(EARTHQUAKE, konum, {
+        "konum": konum,
+        "urgent_needs": len(urgent_needs),
+        "dispatches": len(logistics_support),
+        "served": plan["served"],
+        "requested": plan["requested"]
+    })
+    for dispatch in logistics_support:
+        event_hub.publish(DISPATCH, (dispatch["to"], dispatch["from"]), dispatch)
+    
+    # 4. Bölge dışındaki bağışçılara bildirim ve sevkiyat yapan şehirlerin market durumu
+    async def notify():
+        async with job.phase("notify"):
+            point = geo_point(konum)
+            notifications = {"status": "skipped", "recipients": 0}
+            if point is not None:
+                needed_keys = {n["urun_key"] for n in needs if n.get("urun_key")}
+                notifications = await notification_fanout.start(konum, point, needed_keys)
+            await job.publish(notifications=notifications)
+    
+    source_cities = list(dict.fromkeys(a["from"] for a in plan["allocations"]))
+    
+    async def markets():
+        async with job.phase("markets"):
+            market_support = []
+            for city in source_cities:
+                city_markets = inventory.markets(city)
+                if city_markets:
                     market_support.append({
                         "city": city,
-                        "markets": len(markets),
-                        "capacity": sum(m["capacity"] for m in markets)
+                        "markets": len(city_markets),
+                        "capacity": sum(m["capacity"] for m in city_markets)
                     })
-        
-        return {
-            "message": "Deprem simülasyonu başlatıldı",
-            "konum": konum,
-            "timestamp": datetime.now().isoformat(),
-            "available_resources": total_resources,
-            "urgent_needs": urgent_needs,
-            "logistics_support": logistics_support,
-            "market_support": market_support,
-            "status_updates": [
-                f"{konum} bölgesinde tüm yardım kaynakları harekete geçirildi",
-                f"{len(urgent_needs)} acil yardım talebi tespit edildi",
-                f"Toplam {sum(total_resources.values()) if total_resources else 0} adet yardım malzemesi mevcut",
-                "Gerekli malzemeler için yakın marketlerle iletişime geçiliyor..." if missing_items else "Tüm ihtiyaçlar mevcut kaynaklar ile karşılanabilir",
-                f"{len(logistics_support)} şehirden tır desteği yola çıktı" if logistics_support else "Lojistik desteğe ihtiyaç duyulmadı"
-            ]
-        }
+            await job.publish(market_support=market_support)
+    
+    await asyncio.gather(notify(), markets())
+    
+    await job.publish(
+        message="Deprem simülasyonu tamamlandı",
+        konum=konum,
+        timestamp=datetime.now().isoformat(),
+        status_updates=[
+            f"{konum} bölgesinde tüm yardım kaynakları harekete geçirildi",
+            f"{len(urgent_needs)} acil yardım talebi tespit edildi",
+            f"Toplam {sum(total_resources.values()) if total_resources else 0} adet yardım malzemesi mevcut",
+            f"Karşılanamayan ihtiyaçlar: {', '.join(missing_items)}" if missing_items else "Tüm ihtiyaçlar mevcut kaynaklar ile karşılanabilir",
+            f"{len(source_cities)} şehirden {len(logistics_support)} sevkiyat yola çıktı ({plan['served']}/{plan['requested']} birim)" if logistics_support else "Lojistik desteğe ihtiyaç duyulmadı"
+        ]
+    )
+
+@app.post("/simulate-earthquake", status_code=202)
+async def simulate_earthquake(konum: str, idempotency_key: Optional[str] = Header(None)):
+    """
+    Deprem simülasyonunu arka planda başlatır ve iş kimliğini döndürür.
+    İlerleme ve ara sonuçlar GET /jobs/{id} ile izlenir.
+    Aynı konum için SIMULATION_WINDOW saniye içindeki tekrar tetiklemeler (veya aynı
+    Idempotency-Key başlığı) yeni simülasyon başlatmaz, süren/biten işi döndürür.
+    """
+    try:
+        key = idempotency_key or job_idempotency_key("simulate-earthquake", konum, SIMULATION_WINDOW)
+        job, created = await job_runner.submit(
+            "simulate-earthquake",
+            {"konum": konum},
+            SIMULATION_PHASES,
+            lambda job: run_simulation(job, konum),
+            key=key
+        )
+        return {"job_id": job["id"], "status": job["status"], "created": created}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/stock-summary")
-async def get_stock_summary():
-    """Şehir bazlı stok özeti"""
+@app.get("/jobs/metrics")
+async def get_job_metrics():
+    """İş sayaçları"""
+    return job_runner.get_metrics()
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """İşin durumu, aşamaları (süreleriyle), ilerleme oranı ve o ana kadarki sonuçları"""
+    try:
+        job = await job_runner.get(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail="İş bulunamadı")
+    return job
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """
+    Süren işi iptal eder. Yola çıkmış sevkiyatlar geri alınmaz; ayrılıp
+    onaylanmamış tırlar TRUCK_HOLD_TTL sonunda deftere geri döner.
+    """
+    try:
+        cancelled = await job_runner.cancel(job_id)
+        job = await job_runner.get(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail="İş bulunamadı")
+    if not cancelled and job["status"] in FINISHED:
+        raise HTTPException(status_code=409, detail=f"İş zaten bitmiş: {job['status']}")
+    return job
+
+@app.get("/stock-summary", response_model=StockSummaryResponse, response_model_exclude_unset=True)
+async def get_stock_summary(include_entries: bool = True, entries_limit: int = 20):
+    """
+    Şehir bazlı stok özeti.
+    Toplamlar kayıt anında güncellenen city_stock koleksiyonundan okunur;
+    include_entries=true ise her şehrin en yeni entries_limit kaydı eklenir.
+    """
     try:
         stock_data = {}
         
-        async for entry in entries_collection.find():
-            city = entry.get("analysis", {}).get("konum", "Bilinmiyor")
-            
-            if city not in stock_data:
-                stock_data[city] = {
-                    "supplies": {},
-                    "trucks": 0,
-                    "entries": []
-                }
-            
-            # Malzemeleri topla
-            products = entry.get("analysis", {}).get("urunler", [])
-            for product in products:
-                product_name = product.get("urun_adi")
-                product_quantity = product.get("miktar", 0)
-                
-                if product_name in stock_data[city]["supplies"]:
-                    stock_data[city]["supplies"][product_name] += product_quantity
-                else:
-                    stock_data[city]["supplies"][product_name] = product_quantity
-            
-            # Tır sayısını kontrol et
-            original_text = entry.get("original_text", "")
-            if "tır" in original_text:
-                import re
-                match = re.search(r'(\d+)\s*tır', original_text)
-                if match:
-                    stock_data[city]["trucks"] += int(match.group(1))
-            
-            stock_data[city]["entries"].append({
-                "name": entry.get("name", "Anonim"),
-                "text": original_text,
-                "timestamp": entry.get("timestamp", "")
-            })
+        async for doc in city_stock_collection.find():
+            stock_data[doc["_id"]] = to_summary(doc)
+        
+        if include_entries:
+            for city, city_data in stock_data.items():
+                city_data["entries"] = await get_city_entries(city, 0, entries_limit)
         
         return {"stock_summary": stock_data}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def get_city_entries(city, skip, limit):
+    """
+    Şehrin kayıtlarını en yeniden eskiye sayfalı olarak döndürür (EntryPreview);
+    metin ENTRY_PREVIEW_CHARS karaktere kısaltılır.
+    """
+    limit = min(max(limit, 1), 200)
+    entries = []
+    cursor = entries_collection.find(
+        {"analysis.konum": city},
+        projection={"name": 1, "original_text": 1, "timestamp": 1, "analysis.ihtiyac_var": 1}
+    ).sort("timestamp", -1).skip(skip).limit(limit)
+    async for entry in cursor:
+        analysis = entry.get("analysis") or {}
+        entries.append({
+            "id": str(entry["_id"]),
+            "name": entry.get("name") or "Anonim",
+            "text": entry.get("original_text", "")[:ENTRY_PREVIEW_CHARS],
+            "ihtiyac_var": analysis.get("ihtiyac_var"),
+            "timestamp": entry.get("timestamp")
+        })
+    return entries
+
+@app.get("/stock-summary/{city}/entries", response_model=CityEntriesResponse)
+async def get_stock_summary_entries(city: str, skip: int = 0, limit: int = 20):
+    """Bir şehrin stok özetindeki kayıtları sayfalı olarak listeler"""
+    try:
+        return {
+            "city": city,
+            "skip": skip,
+            "limit": limit,
+            "entries": await get_city_entries(city, skip, limit)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/market-status/{city}")
 async def get_market_status(city: str):
     """Şehirdeki marketlerin durumunu gösterir"""
     try:
-        markets = get_available_markets(city)
+        markets = inventory.markets(city)
         return {
             "city": city,
             "markets": markets,
@@ -321,15 +899,33 @@ async def get_market_status(city: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/inventory/{product}")
+async def get_inventory_sources(product: str, minimum: int = 1, origin: Optional[str] = None):
+    """En az minimum adet ürünü olan şehirler; origin verilirse en yakın önce"""
+    try:
+        return {
+            "product": product,
+            "minimum": minimum,
+            "origin": origin,
+            "cities": [
+                {"city": city, "amount": amount, "distance_km": km,
+                 "markets": inventory.breakdown(product, city)}
+                for city, amount, km in inventory.cities_with(product, minimum, origin)
+            ]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/truck-status/{city}")
 async def get_truck_status(city: str):
-    """Şehirdeki tırların durumunu gösterir"""
+    """Şehirdeki tırların durumunu gösterir (boştaki/ayrılmış/yoldaki tır sayılarıyla)"""
     try:
-        trucks = get_available_trucks(city)
+        trucks = await truck_ledger.city_fleets(city)
         return {
             "city": city,
             "trucks": trucks,
-            "total_capacity": sum(t["trucks"] * t["capacity_per_truck"] for t in trucks)
+            "total_capacity": sum(t["trucks"] * t["capacity_per_truck"] for t in trucks),
+            "available_capacity": sum(t["available_trucks"] * t["capacity_per_truck"] for t in trucks)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -337,89 +933,210 @@ async def get_truck_status(city: str):
 @app.post("/dispatch-help")
 async def dispatch_help(from_city: str, to_city: str, product: str, amount: int):
     """Yardım malzemesi gönderimini simüle eder"""
+    route = calculate_route(from_city, to_city)
+    if route is None:
+        raise HTTPException(status_code=400, detail=f"{from_city} ile {to_city} arasında rota bulunamadı")
     try:
-        # Önce marketten var mı kontrol et
-        market_stock = get_product_availability(from_city, product)
-        
-        if market_stock < amount:
+        # Önce market stoğundan düş; yetmiyorsa hiçbir şey değişmez
+        if not await inventory.decrement(product, from_city, amount):
+            market_stock = inventory.available(product, from_city)
             return {
                 "status": "insufficient_stock",
                 "message": f"{from_city}'da yeterli {product} yok. Mevcut: {market_stock}, Gerekli: {amount}"
             }
         
-        # Tır gönderimi
-        dispatch_result = dispatch_truck(from_city, to_city, product, amount)
+        # Tır ayır ve hemen sevk et
+        reservation = await truck_ledger.reserve_amount(from_city, amount, reference=f"{to_city}:{product}")
+        if reservation is None:
+            await inventory.restock(product, from_city, amount)
+            return {
+                "status": "no_truck_available",
+                "message": f"{from_city}'da uygun tır bulunamadı"
+            }
+        await truck_ledger.confirm(reservation["id"], trip_seconds=round_trip_seconds(from_city, to_city))
         
-        return dispatch_result
+        dispatch = {
+            "status": "dispatched",
+            "company": reservation["company"],
+            "trucks": reservation["trucks"],
+            "reservation_id": reservation["id"],
+            "from": from_city,
+            "to": to_city,
+            "product": product,
+            "amount": amount,
+            "route": route,
+            "message": f"{reservation['company']} firması {from_city}'dan {to_city}'a {amount} adet {product} gönderiyor"
+        }
+        event_hub.publish(DISPATCH, (to_city, from_city), dispatch)
+        return dispatch
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/trucks/reservations")
+async def create_truck_reservation(city: str, amount: int):
+    """
+    amount birimi taşıyabilecek tırları TRUCK_HOLD_TTL saniyeliğine ayırır.
+    confirm ile sevk edilmeyen veya release ile bırakılmayan ayırmalar süre dolunca geri alınır.
+    """
+    try:
+        reservation = await truck_ledger.reserve_amount(city, amount)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if reservation is None:
+        raise HTTPException(status_code=409, detail=f"{city}'da {amount} birim için boş tır yok")
+    return reservation
 
+@app.post("/trucks/reservations/{reservation_id}/confirm")
+async def confirm_truck_reservation(reservation_id: str, to_city: Optional[str] = None):
+    """
+    Ayrılan tırları sevk eder. to_city verilirse tırlar gidiş-dönüş süresi
+    sonunda, verilmezse TRUCK_TRIP_TTL sonunda (veya complete ile) boşa çıkar.
+    """
+    try:
+        trip_seconds = None
+        if to_city is not None:
+            reservation = await truck_ledger.reservation(reservation_id)
+            if reservation is not None:
+                trip_seconds = round_trip_seconds(reservation["city"], to_city)
+        result = await truck_ledger.confirm(reservation_id, trip_seconds=trip_seconds)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Rezervasyon bulunamadı veya süresi doldu")
+    return result
+
+@app.post("/trucks/reservations/{reservation_id}/complete")
+async def complete_truck_reservation(reservation_id: str):
+    """Sevk edilen tırların döndüğünü işler; tırlar yeniden boşa çıkar"""
+    try:
+        result = await truck_ledger.complete(reservation_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Sevk edilmiş rezervasyon bulunamadı veya zaten döndü")
+    return result
+
+@app.post("/trucks/reservations/{reservation_id}/release")
+async def release_truck_reservation(reservation_id: str):
+    """Ayrılan tırları serbest bırakır"""
+    try:
+        result = await truck_ledger.release(reservation_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Rezervasyon bulunamadı veya süresi doldu")
+    return result
+
+@app.get("/trucks/metrics")
+async def get_truck_metrics():
+    """Toplam boş/ayrılmış/yoldaki tır sayıları ve rezervasyon sayaçları"""
+    try:
+        return await truck_ledger.get_metrics()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/events")
+async def stream_events(city: Optional[List[str]] = Query(None)):
+    """
+    Canlı güncellemeler (Server-Sent Events): entry, stock, dispatch, earthquake olayları.
+    city verilirse yalnızca o şehirlerin olayları gelir (?city=Hatay&city=Adana).
+    stock olayları şehir stoğundaki değişimi taşır; kısa sürede gelen değişimler birleştirilir.
+    Tampon taşarsa resync olayı gelir ve istemci /stock-summary'yi yeniden yüklemelidir.
+    """
+    subscription = event_hub.subscribe(city)
+    return StreamingResponse(
+        sse_stream(subscription, window=EVENTS_COALESCE_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/events/metrics")
+async def get_event_metrics():
+    """Yayınlanan/iletilen/birleştirilen/atılan olay sayaçları ve abone sayısı"""
+    return event_hub.get_metrics()
+
+async def nearby_resources(konum, urun_adi, k=5, radius_km=None):
+    """
+    Konuma en yakın, ürünü olan marketler (KD-tree), tır filoları (KD-tree) ve
+    bağışçı kayıtları (geo alanındaki 2dsphere index'i).
+    """
+    lat, lon = locate(konum)
+    markets = inventory.markets_near(lat, lon, urun_adi, k=k, radius_km=radius_km)
+    fleets = [
+        {"city": city, "company": fleet["company"], "location": fleet.get("location"),
+         "distance_km": round(km, 1)}
+        for km, (city, fleet) in fleet_index().query(lat, lon, k, radius_km)
+    ]
+    donors = [
+        doc async for doc in entries_collection.aggregate(
+            donors_near_pipeline(geo_point(konum), urun_adi, radius_km, limit=k or 100)
+        )
+    ]
+    return {"markets": markets, "fleets": fleets, "donors": donors}
+
+@app.get("/nearby")
+async def get_nearby(konum: str, urun_adi: str, k: Optional[int] = 5, radius_km: Optional[float] = None):
+    """
+    Konuma en yakın k market/filo/bağışçı; radius_km verilirse bu yarıçap içindekiler.
+    k=0 ve radius_km birlikte verilirse yarıçap içindeki tüm kaynaklar döner.
+    """
+    if locate(konum) is None:
+        raise HTTPException(status_code=404, detail=f"Konum bulunamadı: {konum}")
+    try:
+        resources = await nearby_resources(konum, urun_adi, k or None, radius_km)
+        return {"konum": konum, "urun": urun_adi, **resources}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/ai-smart-matching")
 @app.post("/ai-smart-matching")
 async def ai_smart_matching(konum: str, urun_adi: str):
     """AI ile akıllı eşleştirme sistemi"""
+    if locate(konum) is None:
+        raise HTTPException(status_code=404, detail=f"Konum bulunamadı: {konum}")
     try:
-        # Yakındaki şehirleri bulun
-        nearby_cities = get_nearby_cities(konum)
-        
-        # AI prompt oluştur
-        prompt = f"""
-        {konum} şehrinde {urun_adi} ihtiyacı var. 
-        En yakın şehirlerden birini seç: {', '.join(nearby_cities)}
-        
-        JSON formatında döndür:
-        {{
-            "recommended_city": "{nearby_cities[0]}",
-            "reason": "Yakın mesafede ve yeterli stok var",
-            "distance": "50",
-            "available_amount": "10"
-        }}
-        """
-        
-        # AI'dan öneri al
-        response = model.generate_content(prompt)
-        
-        # JSON'ı daha güvenilir bir şekilde çıkar
-        import json
-        import re
-        
-        # AI yanıtından JSON'u çıkar
-        text = response.text
-        json_pattern = r'\{[^}]+\}'
-        json_match = re.search(json_pattern, text)
+        # Adaylar: ürünü olan en yakın marketler ve bağışçılar
+        resources = await nearby_resources(konum, urun_adi)
+        candidates = sorted(
+            [{"city": m["city"], "distance_km": m["distance_km"], "amount": m["amount"], "source": "market"}
+             for m in resources["markets"]] +
+            [{"city": d["city"], "distance_km": d["distance_km"], "amount": d["miktar"], "source": "bağışçı"}
+             for d in resources["donors"]],
+            key=lambda c: c["distance_km"]
+        )
+        nearby_cities = list(dict.fromkeys(c["city"] for c in candidates))
+        if not candidates:
+            nearby_cities = [city for _, city in province_index().nearest(*locate(konum), k=4) if city != konum][:3]
+        candidate_lines = "\n".join(
+            f"- {c['city']}: {c['amount']} adet, {c['distance_km']} km ({c['source']})" for c in candidates
+        ) or "- " + ", ".join(nearby_cities)
         
-        if json_match:
-            ai_result = json.loads(json_match.group())
-        else:
-            # Fallback: AI JSON döndüremediyse sabit veri
+        # AI'dan öneri al; şehir adaylarla sınırlıdır
+        try:
+            match = await generate_structured_async(
+                build_match_prompt(konum, urun_adi, candidate_lines), SmartMatch, "smart_matching",
+                choices={"recommended_city": nearby_cities}
+            )
+            ai_result = match.model_dump()
+        except StructuredOutputError:
+            GEMINI_FALLBACKS.inc("smart_matching_nearest")
+            # Fallback: AI geçerli bir öneri döndüremediyse en yakın aday
+            best = candidates[0] if candidates else {}
             ai_result = {
                 "recommended_city": nearby_cities[0],
                 "reason": "En yakın şehir",
-                "distance": "100",
-                "available_amount": "5"
+                "distance": str(best.get("distance_km", "")),
+                "available_amount": str(best.get("amount", 0))
             }
         
         return {
             "ai_recommendation": ai_result,
-            "nearby_options": nearby_cities
+            "nearby_options": nearby_cities,
+            "candidates": candidates
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-def get_nearby_cities(city):
-    """Yakındaki şehirleri döndürür"""
-    distance_matrix = {
-        "İstanbul": ["Kocaeli", "Bursa", "Sakarya"],
-        "Ankara": ["Konya", "Eskişehir", "Kayseri"],
-        "İzmir": ["Denizli", "Manisa", "Aydın"],
-        "Trabzon": ["Samsun", "Giresun", "Ordu"],
-        "Bursa": ["İstanbul", "Kocaeli", "Eskişehir"],
-        "Adana": ["Mersin", "Gaziantep", "Osmaniye"]
-    }
-    
-    return distance_matrix.get(city, ["İstanbul", "Ankara", "İzmir"])
 @app.get("/active-routes")
 async def get_active_routes():
     """Aktif tır rotalarını döndürür"""
@@ -447,70 +1164,134 @@ async def get_active_routes():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/notifications")
 @app.post("/get-notifications")
-async def get_notifications(konum: str):
-    """Deprem bölgesindeki bildirimleri döndürür"""
+async def get_notifications(konum: str, after: Optional[int] = None, limit: int = Query(50, ge=1, le=500)):
+    """
+    Deprem bölgesi için dağıtılan bildirimleri öncelik sırasıyla sayfalı döndürür.
+    Sonraki sayfa için yanıttaki next_after, after parametresi olarak gönderilir.
+    """
     try:
-        # Gerçek bildirimleri simüle et
-        notifications = []
-        async for entry in entries_collection.find({"status": "deprem_modu"}):
-            if entry.get("analysis", {}).get("konum") != konum:
-                notifications.append({
-                    "to": entry.get("name", "Anonim"),
-                    "city": entry.get("analysis", {}).get("konum", "Bilinmiyor"),
-                    "message": f"ACİL! {konum} deprem bölgesine yardım için malzemelerinizi en yakın toplama merkezine ulaştırın."
-                })
-        
-        return {"notifications": notifications[:10]}  # İlk 10 bildirimi göster
+        return await notification_fanout.page(konum, after=after, limit=limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/notifications/metrics")
+async def get_notification_metrics():
+    """Dağıtım sayaçları ve süren dağıtımlar"""
+    return notification_fanout.get_metrics()
+
+def risk_analysis_prompt(cities):
+    """Şehir bazlı kayıt, stok ve market verisinden risk analizi prompt'u üretir"""
+    lines = []
+    for city, data in cities:
+        supplies = sorted(data["supplies"].items(), key=lambda item: item[1], reverse=True)
+        top = ", ".join(f"{name} {amount:g}" for name, amount in supplies[:RISK_ANALYSIS_TOP_SUPPLIES])
+        market_units = sum(amount for _, amount in inventory.city_stock(city).values())
+        lines.append(
+            f"- {city}: {data['entry_count']} kayıt, {data['trucks']} tır, "
+            f"market stoğu {market_units:g} adet; kayıtlardaki ürünler: {top or 'yok'}"
+        )
+    return build_risk_prompt("\n".join(lines))
+
+async def load_risk_analysis():
+    """Gemini risk analizi; yanıt şemaya uymazsa StructuredOutputError (sonuç önbelleğe alınmaz)"""
+    stock_data = {}
+    async for doc in city_stock_collection.find({"_id": {"$ne": UNKNOWN_CITY}}):
+        stock_data[doc["_id"]] = to_summary(doc)
+    # Prompt kısa kalsın diye en çok kayıt alan şehirler gönderilir
+    cities = sorted(stock_data.items(), key=lambda item: item[1]["entry_count"], reverse=True)
+    cities = cities[:RISK_ANALYSIS_MAX_CITIES]
+
+    analysis = await generate_structured_async(risk_analysis_prompt(cities), RiskAnalysis, "risk_analysis")
+    return {
+        "ai_result": analysis.model_dump(),
+        "data_cities": len(cities),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.post("/ai-risk-analysis")
 async def ai_risk_analysis():
-    """AI ile bölgesel risk analizi"""
+    """
+    AI ile bölgesel risk analizi.
+    Sonuç RISK_ANALYSIS_TTL saniye önbellekte tutulur; süresi dolan sonuç
+    RISK_ANALYSIS_STALE saniye daha hemen döner ve arka planda yenilenir.
+    """
     try:
-        # AI ile tüm şehirlerin durumunu analiz et
-        prompt = """
-        Türkiye'deki şehirlerin deprem riski ve yardım kaynaklarını analiz et.
-        
-        JSON formatında döndür:
-        {{
-            "high_risk": ["liste şehirler"],
-            "low_supply": ["stok eksikliği olan şehirler"],
-            "recommendation": "öneri metni"
-        }}
-        """
-        
-        response = model.generate_content(prompt)
-        
-        import json
-        import re
-        
-        # AI yanıtından JSON'u çıkar
-        text = response.text
-        json_pattern = r'\{[^}]+\}'
-        json_match = re.search(json_pattern, text, re.DOTALL)
-        
-        if json_match:
-            ai_result = json.loads(json_match.group())
-        else:
+        try:
+            result, age, state = await risk_cache.get("risk", load_risk_analysis)
+        except StructuredOutputError:
+            GEMINI_FALLBACKS.inc("risk_analysis_static")
             # Fallback
-            ai_result = {
-                "high_risk": ["İstanbul", "İzmir", "Bursa"],
-                "low_supply": ["Trabzon", "Samsun"],
-                "recommendation": "Bu şehirlerde stok artırımı öneriliyor"
+            result = {
+                "ai_result": {
+                    "high_risk": ["İstanbul", "İzmir", "Bursa"],
+                    "low_supply": ["Trabzon", "Samsun"],
+                    "recommendation": "Bu şehirlerde stok artırımı öneriliyor"
+                },
+                "data_cities": 0,
+                "timestamp": datetime.now().isoformat()
             }
-        
+            age, state = 0.0, "fallback"
+
         return {
-            "ai_analysis": ai_result,
-            "timestamp": datetime.now().isoformat()
+            "ai_analysis": result["ai_result"],
+            "timestamp": result["timestamp"],
+            "data_cities": result["data_cities"],
+            "cache": {"state": state, "age_seconds": round(age, 1)}
         }
-        
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/ai-risk-analysis/cache")
+async def get_risk_cache_stats():
+    """Risk analizi önbelleğinin isabet/bayat/birleştirme istatistikleri"""
+    return risk_cache.get_stats()
     
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metin biçiminde route, Gemini ve MongoDB ölçümleri"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/trends")
+async def get_trends(
+    konum: Optional[str] = None,
+    urun: Optional[str] = None,
+    window_hours: int = 1,
+    granularity: Optional[str] = None,
+    limit: int = 20
+):
+    """
+    Son window_hours saatteki arz/talebi bir önceki eşit pencereyle karşılaştırır
+    (örn. konum=Hatay&urun=su&window_hours=1: son bir saatte su talebi ne kadar arttı).
+    Ham kayıtlar taranmaz; yalnızca pencerelerdeki saat/gün kovaları okunur.
+    konum veya urun verilmezse tüm şehirler/ürünler talep artışına göre sıralanır.
+    """
+    if not 1 <= window_hours <= TRENDS_MAX_WINDOW_HOURS:
+        raise HTTPException(status_code=400, detail=f"window_hours 1-{TRENDS_MAX_WINDOW_HOURS} arasında olmalı")
+    if granularity not in (None, HOUR, DAY):
+        raise HTTPException(status_code=400, detail="granularity 'hour' veya 'day' olmalı")
+    try:
+        return await trend_rollups.trends(konum, urun, window_hours, granularity, min(max(limit, 1), 200))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/trends/metrics")
+async def get_trends_metrics():
+    """Trend kovalarına yazma, sıkıştırma ve sorgu sayaçları"""
+    return trend_rollups.get_stats()
+
+@app.get("/analysis-cache/stats")
+async def get_analysis_cache_stats():
+    """Analiz önbelleğinin isabet/ıskalama istatistikleri"""
+    return analysis_cache.get_stats()
+
 @app.get("/")
 async def root():
     return {"message": "Deprem Yardım Asistanı API v1.0"}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    import uvicorn
+    # Çoklu worker için uygulama içe aktarma yoluyla verilir (WEB_CONCURRENCY=4)
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=int(os.getenv("WEB_CONCURRENCY", "1")))
\ No newline at end of file
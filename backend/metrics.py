@@ -0,0 +1,268 @@
+# metrics.py
+import threading
+import time
+from bisect import bisect_left
+
+from pymongo import monitoring
+
+# Gecikme histogramları için varsayılan sınırlar (saniye)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Boyut histogramları için sınırlar (bayt / karakter)
+SIZE_BUCKETS = (100, 500, 1000, 5000, 10000, 50000, 100000, 500000, 1000000, 5000000)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels_text(names, values, extra=""):
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class _Metric:
+    """
+    Ölçümler iş parçacığı başına ayrı parçalarda (shard) tutulur: yazma
+    kilitsizdir, motor'un thread havuzundan gelen Mongo ölçümleri event
+    loop'taki yazmalarla çakışmaz. Kilit yalnızca bir iş parçacığı ilk kez
+    yazdığında ve /metrics okunurken parçalar toplanırken alınır.
+    """
+
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labels)
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        # Hızlı yol (self._local.data) yazma metodlarında; burası iş parçacığının ilk yazması
+        data = self._local.data = {}
+        with self._lock:
+            self._shards.append(data)
+        return data
+
+    def _merged(self, size):
+        merged = {}
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for labels, cell in list(shard.items()):
+                total = merged.setdefault(labels, [0] * size)
+                for i, value in enumerate(cell):
+                    total[i] += value
+        return merged
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        try:
+            data = self._local.data
+        except AttributeError:
+            data = self._shard()
+        cell = data.get(labels)
+        if cell is None:
+            cell = data[labels] = [0]
+        cell[0] += amount
+
+    def collect(self):
+        for labels, (value,) in sorted(self._merged(1).items()):
+            yield f"{self.name}{_labels_text(self.labelnames, labels)} {value}"
+
+class Gauge(_Metric):
+    """Artırılıp azaltılan değer; set_function verilirse değer okuma anında hesaplanır"""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=(), function=None):
+        super().__init__(name, help_text, labels)
+        self.function = function
+
+    def inc(self, *labels, amount=1):
+        try:
+            data = self._local.data
+        except AttributeError:
+            data = self._shard()
+        cell = data.get(labels)
+        if cell is None:
+            cell = data[labels] = [0]
+        cell[0] += amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set_function(self, function):
+        """function() sayı ya da {etiket_değerleri: sayı} sözlüğü döndürür"""
+        self.function = function
+
+    def collect(self):
+        if self.function is not None:
+            value = self.function()
+            values = value.items() if isinstance(value, dict) else [((), value)]
+        else:
+            values = [(labels, cell[0]) for labels, cell in self._merged(1).items()]
+        for labels, value in sorted(values):
+            yield f"{self.name}{_labels_text(self.labelnames, labels)} {value}"
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        # Hücre: kova sayaçları (+Inf dahil) ve toplam
+        self._size = len(self.buckets) + 2
+
+    def observe(self, value, *labels):
+        try:
+            data = self._local.data
+        except AttributeError:
+            data = self._shard()
+        cell = data.get(labels)
+        if cell is None:
+            cell = data[labels] = [0] * self._size
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def collect(self):
+        for labels, cell in sorted(self._merged(self._size).items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), cell[:-1]):
+                cumulative += count
+                extra = f'le="{bound}"'
+                yield f"{self.name}_bucket{_labels_text(self.labelnames, labels, extra)} {cumulative}"
+            yield f"{self.name}_sum{_labels_text(self.labelnames, labels)} {cell[-1]}"
+            yield f"{self.name}_count{_labels_text(self.labelnames, labels)} {cumulative}"
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metrik zaten tanımlı: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=(), function=None):
+        return self._add(Gauge(name, help_text, labels, function))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def render(self):
+        """Prometheus metin biçimi (text/plain; version=0.0.4)"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+# HTTP
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "İşlenmekte olan HTTP istekleri", ["method"])
+HTTP_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP istek süresi", ["method", "route", "status"]
+)
+HTTP_RESPONSE_SIZE = REGISTRY.histogram(
+    "http_response_size_bytes", "HTTP yanıt gövdesi boyutu", ["method", "route"], SIZE_BUCKETS
+)
+
+# Gemini
+GEMINI_IN_FLIGHT = REGISTRY.gauge("gemini_requests_in_flight", "Yanıt beklenen Gemini çağrıları")
+GEMINI_REQUESTS = REGISTRY.counter("gemini_requests_total", "Gemini çağrıları", ["outcome"])
+GEMINI_DURATION = REGISTRY.histogram("gemini_request_duration_seconds", "Gemini çağrı süresi", ["outcome"])
+GEMINI_PROMPT_SIZE = REGISTRY.histogram("gemini_prompt_chars", "Gemini prompt uzunluğu", (), SIZE_BUCKETS)
+GEMINI_RESPONSE_SIZE = REGISTRY.histogram("gemini_response_chars", "Gemini yanıt uzunluğu", (), SIZE_BUCKETS)
+GEMINI_TOKENS = REGISTRY.counter(
+    "gemini_tokens_total", "Gemini'nin bildirdiği token kullanımı (usage_metadata)", ["direction"]
+)
+GEMINI_PARSE_FAILURES = REGISTRY.counter(
+    "gemini_parse_failures_total", "Yanıttan JSON çıkarılamayan Gemini çağrıları", ["kind"]
+)
+GEMINI_REJECTED = REGISTRY.counter(
+    "gemini_rejected_total", "Çağrılmadan reddedilen Gemini istekleri (devre açık, kuyruk dolu, kota)", ["reason"]
+)
+GEMINI_CIRCUIT_STATE = REGISTRY.gauge("gemini_circuit_state", "Gemini devre kesicisi: 0 kapalı, 1 yarı açık, 2 açık")
+GEMINI_FALLBACKS = REGISTRY.counter(
+    "gemini_fallbacks_total", "Gemini sonucu yerine kullanılan yedek yollar", ["reason"]
+)
+
+# MongoDB
+MONGO_DURATION = REGISTRY.histogram(
+    "mongodb_command_duration_seconds", "MongoDB komut süresi (sunucu yanıtına kadar)", ["command"]
+)
+MONGO_FAILURES = REGISTRY.counter("mongodb_command_failures_total", "Başarısız MongoDB komutları", ["command"])
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    pymongo komut dinleyicisi; AsyncIOMotorClient(event_listeners=[...]) ile
+    verilir. Süre sürücünün ölçtüğü duration_micros'tan alınır; getMore
+    komutları imleçlerin sonraki partilerinde geçen süreyi gösterir.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_DURATION.observe(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event):
+        MONGO_DURATION.observe(event.duration_micros / 1e6, event.command_name)
+        MONGO_FAILURES.inc(event.command_name)
+
+class MetricsMiddleware:
+    """
+    Route başına süre, yanıt boyutu ve işlenmekte olan istek sayısını ölçen
+    ASGI middleware'i. Route etiketi ham yol yerine şablondur
+    (/jobs/{job_id}); eşleşmeyen yollar "unmatched" sayılır, böylece etiket
+    sayısı sınırlı kalır.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._paths = None
+
+    def _route(self, scope):
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._paths is None:
+            app = scope.get("app")
+            self._paths = {getattr(r, "endpoint", None): r.path for r in getattr(app, "routes", [])}
+        return self._paths.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        started = time.perf_counter()
+        state = {"status": 500, "size": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["size"] += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec(method)
+            route = self._route(scope)
+            HTTP_DURATION.observe(time.perf_counter() - started, method, route, state["status"])
+            HTTP_RESPONSE_SIZE.observe(state["size"], method, route)
@@ -0,0 +1,64 @@
+# migrations.py
+import asyncio
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+# Kilit bırakıldığında locked_until bu değere çekilir (her zaman geçmişte)
+UNLOCKED = datetime(1970, 1, 1)
+
+def process_id():
+    """Kilidi tutan süreci tanımlayan etiket (host:pid)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+async def run_once(collection, name, version, apply, lock_ttl=600.0, poll_interval=0.5):
+    """
+    apply()'ı aynı veritabanını kullanan tüm süreçler (uvicorn/gunicorn
+    worker'ları, birden fazla sunucu) arasında sürüm başına bir kez çalıştırır.
+
+    Kilit, collection'daki {_id: name} dokümanıdır. Kilidi alan süreç apply'ı
+    çalıştırıp version'ı yazar; diğerleri kilit bırakılana kadar bekler ve
+    sürüm zaten uygulanmışsa hiçbir şey yapmaz. Kilidi tutan süreç ölürse
+    kilit lock_ttl saniye sonra başka bir sürece geçer. Tanımlar değiştiğinde
+    version artırılır.
+
+    Returns:
+        bool: apply bu süreçte çalıştıysa True
+    """
+    while True:
+        now = datetime.now()
+        try:
+            await collection.find_one_and_update(
+                {"_id": name, "version": {"$lt": version}, "locked_until": {"$lt": now}},
+                {
+                    "$set": {"locked_by": process_id(), "locked_until": now + timedelta(seconds=lock_ttl)},
+                    "$setOnInsert": {"version": 0}
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            break
+        except DuplicateKeyError:
+            # Doküman var ama sürüm uygulanmış veya kilit başka süreçte
+            doc = await collection.find_one({"_id": name})
+            if doc is not None and doc.get("version", 0) >= version:
+                return False
+            await asyncio.sleep(poll_interval)
+
+    started = time.perf_counter()
+    try:
+        await apply()
+    except BaseException:
+        await asyncio.shield(collection.update_one({"_id": name}, {"$set": {"locked_until": UNLOCKED}}))
+        raise
+    await collection.update_one({"_id": name}, {"$set": {
+        "version": version,
+        "locked_until": UNLOCKED,
+        "applied_at": datetime.now(),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+    }})
+    return True
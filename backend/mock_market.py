@@ -5,6 +5,7 @@ MOCK_MARKETS = {
         {
             "name": "Mega Market İstanbul",
             "location": "Beşiktaş",
+            "coordinates": (41.04, 29.01),  # (enlem, boylam)
             "distance": 5,  # km
             "capacity": 1000,  # kişi başına yeterli malzeme
             "products": {
@@ -18,6 +19,7 @@ MOCK_MARKETS = {
         {
             "name": "Süper Market Anadolu",
             "location": "Kadıköy",
+            "coordinates": (40.99, 29.03),
             "distance": 8,
             "capacity": 800,
             "products": {
@@ -33,6 +35,7 @@ MOCK_MARKETS = {
         {
             "name": "Capital Market",
             "location": "Çankaya",
+            "coordinates": (39.92, 32.86),
             "distance": 3,
             "capacity": 600,
             "products": {
@@ -48,6 +51,7 @@ MOCK_MARKETS = {
         {
             "name": "Ege Market",
             "location": "Karşıyaka",
+            "coordinates": (38.46, 27.11),
             "distance": 4,
             "capacity": 700,
             "products": {
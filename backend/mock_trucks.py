@@ -1,4 +1,5 @@
 # mock_trucks.py
+from road_graph import AVERAGE_SPEED_KMH, get_road_graph
 
 MOCK_TRUCKS = {
     "İstanbul": [
@@ -7,14 +8,16 @@ MOCK_TRUCKS = {
             "trucks": 15,
             "capacity_per_truck": 5000,
             "status": "available",
-            "location": "Çekmeköy Depo"
+            "location": "Çekmeköy Depo",
+            "coordinates": (41.04, 29.18)  # (enlem, boylam)
         },
         {
             "company": "Anadolu Transport",
             "trucks": 20,
             "capacity_per_truck": 7000,
             "status": "available",
-            "location": "Hadımköy Liman"
+            "location": "Hadımköy Liman",
+            "coordinates": (41.10, 28.62)
         }
     ],
     "Ankara": [
@@ -23,14 +26,16 @@ MOCK_TRUCKS = {
             "trucks": 12,
             "capacity_per_truck": 5000,
             "status": "available",
-            "location": "Ostim Depo"
+            "location": "Ostim Depo",
+            "coordinates": (39.97, 32.74)
         },
         {
             "company": "Ankara Lojistik",
             "trucks": 10,
             "capacity_per_truck": 6000,
             "status": "available",
-            "location": "Sincan Depo"
+            "location": "Sincan Depo",
+            "coordinates": (39.97, 32.58)
         }
     ],
     "İzmir": [
@@ -39,14 +44,16 @@ MOCK_TRUCKS = {
             "trucks": 10,
             "capacity_per_truck": 6000,
             "status": "available",
-            "location": "Aliağa Liman"
+            "location": "Aliağa Liman",
+            "coordinates": (38.80, 26.97)
         },
         {
             "company": "Aegean Transport",
             "trucks": 8,
             "capacity_per_truck": 5500,
             "status": "available",
-            "location": "Torbalı Depo"
+            "location": "Torbalı Depo",
+            "coordinates": (38.16, 27.36)
         }
     ],
     "Bursa": [
@@ -55,7 +62,8 @@ MOCK_TRUCKS = {
             "trucks": 8,
             "capacity_per_truck": 5000,
             "status": "available",
-            "location": "Organize Sanayi"
+            "location": "Organize Sanayi",
+            "coordinates": (40.23, 28.98)
         }
     ],
     "Antalya": [
@@ -64,7 +72,8 @@ MOCK_TRUCKS = {
             "trucks": 7,
             "capacity_per_truck": 5500,
             "status": "available",
-            "location": "Alanya Depo"
+            "location": "Alanya Depo",
+            "coordinates": (36.54, 32.00)
         }
     ],
     "Adana": [
@@ -73,7 +82,8 @@ MOCK_TRUCKS = {
             "trucks": 9,
             "capacity_per_truck": 6000,
             "status": "available",
-            "location": "Seyhan Depo"
+            "location": "Seyhan Depo",
+            "coordinates": (36.99, 35.30)
         }
     ],
     "Konya": [
@@ -82,7 +92,8 @@ MOCK_TRUCKS = {
             "trucks": 6,
             "capacity_per_truck": 5000,
             "status": "available",
-            "location": "Organize Sanayi"
+            "location": "Organize Sanayi",
+            "coordinates": (37.96, 32.56)
         }
     ],
     "Şanlıurfa": [
@@ -91,7 +102,8 @@ MOCK_TRUCKS = {
             "trucks": 5,
             "capacity_per_truck": 4500,
             "status": "available",
-            "location": "Eyyübiye Depo"
+            "location": "Eyyübiye Depo",
+            "coordinates": (37.13, 38.79)
         }
     ],
     "Gaziantep": [
@@ -100,7 +112,8 @@ MOCK_TRUCKS = {
             "trucks": 8,
             "capacity_per_truck": 5500,
             "status": "available",
-            "location": "Organize Sanayi"
+            "location": "Organize Sanayi",
+            "coordinates": (37.13, 37.44)
         }
     ],
     "Diyarbakır": [
@@ -109,7 +122,8 @@ MOCK_TRUCKS = {
             "trucks": 7,
             "capacity_per_truck": 5000,
             "status": "available",
-            "location": "Sur Depo"
+            "location": "Sur Depo",
+            "coordinates": (37.91, 40.24)
         }
     ],
     "Kocaeli": [
@@ -118,7 +132,8 @@ MOCK_TRUCKS = {
             "trucks": 9,
             "capacity_per_truck": 6000,
             "status": "available",
-            "location": "Gebze Liman"
+            "location": "Gebze Liman",
+            "coordinates": (40.80, 29.43)
         }
     ],
     "Mersin": [
@@ -127,7 +142,8 @@ MOCK_TRUCKS = {
             "trucks": 11,
             "capacity_per_truck": 7000,
             "status": "available",
-            "location": "Liman Depo"
+            "location": "Liman Depo",
+            "coordinates": (36.79, 34.64)
         }
     ],
     "Eskişehir": [
@@ -136,7 +152,8 @@ MOCK_TRUCKS = {
             "trucks": 5,
             "capacity_per_truck": 5000,
             "status": "available",
-            "location": "Organize Sanayi"
+            "location": "Organize Sanayi",
+            "coordinates": (39.81, 30.42)
         }
     ],
     "Samsun": [
@@ -145,7 +162,8 @@ MOCK_TRUCKS = {
             "trucks": 6,
             "capacity_per_truck": 5500,
             "status": "available",
-            "location": "Liman Depo"
+            "location": "Liman Depo",
+            "coordinates": (41.30, 36.35)
         }
     ],
     "Denizli": [
@@ -154,7 +172,8 @@ MOCK_TRUCKS = {
             "trucks": 5,
             "capacity_per_truck": 5000,
             "status": "available",
-            "location": "Organize Sanayi"
+            "location": "Organize Sanayi",
+            "coordinates": (37.82, 29.14)
         }
     ],
     "Sakarya": [
@@ -163,7 +182,8 @@ MOCK_TRUCKS = {
             "trucks": 7,
             "capacity_per_truck": 5500,
             "status": "available",
-            "location": "Adapazarı Depo"
+            "location": "Adapazarı Depo",
+            "coordinates": (40.78, 30.40)
         }
     ],
     "Kayseri": [
@@ -172,7 +192,8 @@ MOCK_TRUCKS = {
             "trucks": 6,
             "capacity_per_truck": 5000,
             "status": "available",
-            "location": "Organize Sanayi"
+            "location": "Organize Sanayi",
+            "coordinates": (38.76, 35.40)
         }
     ],
     "Van": [
@@ -181,7 +202,8 @@ MOCK_TRUCKS = {
             "trucks": 5,
             "capacity_per_truck": 4500,
             "status": "available",
-            "location": "İpekyolu Depo"
+            "location": "İpekyolu Depo",
+            "coordinates": (38.50, 43.38)
         }
     ],
     "Malatya": [
@@ -190,7 +212,8 @@ MOCK_TRUCKS = {
             "trucks": 5,
             "capacity_per_truck": 5000,
             "status": "available",
-            "location": "Battalgazi Depo"
+            "location": "Battalgazi Depo",
+            "coordinates": (38.40, 38.36)
         }
     ],
     "Mardin": [
@@ -199,110 +222,31 @@ MOCK_TRUCKS = {
             "trucks": 4,
             "capacity_per_truck": 4500,
             "status": "available",
-            "location": "Kızıltepe Depo"
+            "location": "Kızıltepe Depo",
+            "coordinates": (37.19, 40.59)
         }
     ]
 }
 
-def get_available_trucks(city):
-    """Şehirdeki mevcut tırları getirir"""
-    return MOCK_TRUCKS.get(city, [])
-
 def calculate_route(from_city, to_city):
-    """Basit rota hesaplaması"""
-    # Şehirler arası mesafeler (km)
-    DISTANCES = {
-        ('İstanbul', 'Ankara'): 450,
-        ('İstanbul', 'İzmir'): 550,
-        ('İstanbul', 'Bursa'): 230,
-        ('İstanbul', 'Antalya'): 730,
-        ('İstanbul', 'Adana'): 940,
-        ('İstanbul', 'Konya'): 660,
-        ('İstanbul', 'Kocaeli'): 100,
-        ('İstanbul', 'Mersin'): 1000,
-        ('İstanbul', 'Eskişehir'): 310,
-        ('İstanbul', 'Samsun'): 700,
-        ('İstanbul', 'Denizli'): 670,
-        ('İstanbul', 'Sakarya'): 160,
-        ('İstanbul', 'Kayseri'): 770,
-        ('Ankara', 'İzmir'): 600,
-        ('Ankara', 'Bursa'): 400,
-        ('Ankara', 'Antalya'): 480,
-        ('Ankara', 'Adana'): 500,
-        ('Ankara', 'Konya'): 260,
-        ('Ankara', 'Şanlıurfa'): 850,
-        ('Ankara', 'Gaziantep'): 770,
-        ('Ankara', 'Diyarbakır'): 970,
-        ('Ankara', 'Mersin'): 560,
-        ('Ankara', 'Eskişehir'): 235,
-        ('Ankara', 'Samsun'): 500,
-        ('Ankara', 'Denizli'): 480,
-        ('Ankara', 'Kayseri'): 320,
-        ('Ankara', 'Van'): 1350,
-        ('Ankara', 'Malatya'): 680,
-        ('İzmir', 'Bursa'): 380,
-        ('İzmir', 'Antalya'): 480,
-        ('İzmir', 'Adana'): 900,
-        ('İzmir', 'Denizli'): 240,
-        ('Adana', 'Gaziantep'): 220,
-        ('Adana', 'Mersin'): 70,
-        ('Adana', 'Diyarbakır'): 520,
-        ('Gaziantep', 'Şanlıurfa'): 220,
-        ('Gaziantep', 'Diyarbakır'): 390,
-        ('Gaziantep', 'Malatya'): 350,
-        ('Diyarbakır', 'Malatya'): 240,
-        ('Diyarbakır', 'Van'): 450,
-        ('Diyarbakır', 'Mardin'): 100,
-        ('Şanlıurfa', 'Malatya'): 430,
-        ('Şanlıurfa', 'Mardin'): 190,
-        ('Samsun', 'Trabzon'): 150,
-        ('Bursa', 'Kocaeli'): 175,
-        ('Bursa', 'Eskişehir'): 220,
-        ('Bursa', 'Sakarya'): 280,
-        ('Kocaeli', 'Sakarya'): 60,
-        ('Eskişehir', 'Konya'): 380,
-        ('Eskişehir', 'Denizli'): 450
-    }
-    
-    key = (from_city, to_city)
-    reverse_key = (to_city, from_city)
-    
-    if key in DISTANCES:
-        distance = DISTANCES[key]
-    elif reverse_key in DISTANCES:
-        distance = DISTANCES[reverse_key]
-    else:
-        distance = 500  # Default mesafe
+    """
+    Önceden hesaplanmış karayolu grafiğinden en kısa rota.
+
+    Returns:
+        dict | None: Şehirlerden biri grafikte yoksa veya aralarında yol yoksa None
+    """
+    graph = get_road_graph()
+    distance = graph.distance(from_city, to_city)
+    if distance is None:
+        return None
+    distance = int(distance)
+    path = graph.path(from_city, to_city)
     
-    # Hız: 80 km/saat ortalama
-    travel_time = distance / 80  # saat
+    travel_time = distance / AVERAGE_SPEED_KMH  # saat
     
     return {
         "distance": distance,
         "travel_time": travel_time,
+        "path": path,
         "estimated_arrival": f"{int(travel_time)} saat {int((travel_time % 1) * 60)} dakika"
     }
-
-def dispatch_truck(from_city, to_city, product, amount):
-    """Tır gönderimi simülasyonu"""
-    route = calculate_route(from_city, to_city)
-    trucks = get_available_trucks(from_city)
-    
-    if trucks:
-        selected_truck = trucks[0]  # En uygun tırı seç
-        
-        return {
-            "status": "dispatched",
-            "company": selected_truck["company"],
-            "from": from_city,
-            "to": to_city,
-            "product": product,
-            "amount": amount,
-            "route": route,
-            "message": f"{selected_truck['company']} firması {from_city}'dan {to_city}'a {amount} adet {product} gönderiyor"
-        }
-    else:
-        return {
-            "status": "no_truck_available",
-            "message": f"{from_city}'da uygun tır bulunamadı"
-        }
\ No newline at end of file
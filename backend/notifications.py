@@ -0,0 +1,212 @@
+# notifications.py
+import asyncio
+import time
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+
+from product_catalog import canonical_name
+
+def recipients_pipeline(point, konum, needed_keys):
+    """
+    Deprem bölgesi dışındaki bağışçıları bildirim sırasına göre döndürür.
+
+    Aynı kişinin (aynı isim; isimsiz kayıtlarda kaydın kendisi) birden fazla
+    kaydı tek alıcıda birleşir. Sıra: bölgede ihtiyaç duyulan ürünlerden en
+    çoğuna sahip olan önce, eşitlikte merkeze en yakın olan önce.
+    """
+    return [
+        {"$geoNear": {
+            "near": point,
+            "key": "geo",
+            "distanceField": "distance_m",
+            "spherical": True,
+            "query": {
+                "status": {"$in": ["aktif", "deprem_modu"]},
+                "analysis.ihtiyac_var": False,
+                "analysis.konum": {"$ne": konum}
+            }
+        }},
+        {"$group": {
+            "_id": {"$ifNull": ["$name", {"$toString": "$_id"}]},
+            "city": {"$first": "$analysis.konum"},
+            "distance_m": {"$min": "$distance_m"},
+            "products": {"$push": {"$ifNull": ["$analysis.urunler.urun_key", []]}}
+        }},
+        {"$project": {
+            "city": 1,
+            "distance_m": 1,
+            "matched": {"$setIntersection": [
+                {"$reduce": {
+                    "input": "$products",
+                    "initialValue": [],
+                    "in": {"$concatArrays": ["$$value", "$$this"]}
+                }},
+                list(needed_keys)
+            ]}
+        }},
+        {"$addFields": {"match_count": {"$size": "$matched"}}},
+        {"$sort": {"match_count": -1, "distance_m": 1, "_id": 1}}
+    ]
+
+def notification_message(konum, matched):
+    if matched:
+        products = ", ".join(canonical_name(key) for key in matched)
+        return (f"ACİL! {konum} deprem bölgesinde {products} ihtiyacı var. "
+                f"Bağışlarınızı en yakın toplama merkezine ulaştırın.")
+    return f"ACİL! {konum} deprem bölgesine yardım için malzemelerinizi en yakın toplama merkezine ulaştırın."
+
+class NotificationFanout:
+    """
+    Deprem modunda bağışçılara bildirim dağıtımı.
+
+    Bildirimler notifications koleksiyonunda (konum, alıcı) başına tek
+    dokümandır; dağıtım upsert ile yazıldığından aynı deprem tekrar
+    tetiklendiğinde alıcıya ikinci bildirim oluşmaz, yalnızca sırası ve
+    içeriği güncellenir. Alıcılar sıralı geldiğinden her dokümana bir rank
+    verilir; okuma rank üzerinden imleçle sayfalanır. Yazma bulk_write
+    partileriyle yapılır ve ilk parti yazıldığında en öncelikli alıcılar
+    okunabilir hale gelir.
+    """
+
+    def __init__(self, collection, entries_collection, batch_size=1000):
+        self.collection = collection
+        self.entries_collection = entries_collection
+        self.batch_size = batch_size
+        self._running = {}
+        self.stats = {
+            "fanouts": 0,
+            "recipients": 0,
+            "inserted": 0,
+            "updated": 0,
+            "removed": 0,
+            "failed": 0,
+            "last_duration_seconds": None,
+        }
+
+    async def ensure_indexes(self):
+        """Alıcı başına tekillik ve sayfalama için index oluşturur"""
+        await self.collection.create_index(
+            [("konum", ASCENDING), ("recipient", ASCENDING)], unique=True
+        )
+        await self.collection.create_index([("konum", ASCENDING), ("rank", ASCENDING)])
+
+    async def start(self, konum, point, needed_keys):
+        """
+        Dağıtımı arka planda başlatır ve ilk parti yazılana kadar bekler.
+
+        Aynı konum için süren bir dağıtım varsa yenisi başlatılmaz.
+
+        Returns:
+            dict: Durum ("running" veya "done") ve o ana kadar yazılan alıcı sayısı
+        """
+        progress = self._running.get(konum)
+        if progress is None:
+            progress = {"written": 0, "first_batch": asyncio.Event()}
+            progress["task"] = asyncio.create_task(self.fan_out(konum, point, needed_keys, progress))
+            self._running[konum] = progress
+            progress["task"].add_done_callback(lambda task: self._finished(konum, task))
+        task = progress["task"]
+        waiter = asyncio.create_task(progress["first_batch"].wait())
+        await asyncio.wait([task, waiter], return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+        if not task.done():
+            return {"status": "running", "recipients": progress["written"]}
+        if task.cancelled() or task.exception() is not None:
+            return {"status": "failed", "error": str(None if task.cancelled() else task.exception())}
+        return {"status": "done", **task.result()}
+
+    def _finished(self, konum, task):
+        self._running.pop(konum, None)
+        if not task.cancelled() and task.exception() is not None:
+            self.stats["failed"] += 1
+
+    async def fan_out(self, konum, point, needed_keys, progress=None):
+        """
+        Bölge dışındaki tüm uygun bağışçılar için bildirimleri yazar.
+
+        Args:
+            konum (str): Deprem bölgesi
+            point (dict): Bölgenin GeoJSON noktası
+            needed_keys (iterable): Bölgede ihtiyaç duyulan ürün anahtarları
+            progress (dict): start'ın ilerleme kaydı; yazılan alıcı sayısı ve ilk parti olayı
+
+        Returns:
+            dict: Alıcı, yeni, güncellenen ve artık uygun olmadığı için silinen bildirim sayıları
+        """
+        started = time.perf_counter()
+        fanout_at = datetime.now()
+        fanout_id = ObjectId()
+        progress = progress if progress is not None else {}
+        result = {"recipients": 0, "inserted": 0, "updated": 0, "removed": 0}
+        operations = []
+
+        async def flush():
+            write = await self.collection.bulk_write(operations, ordered=False)
+            result["inserted"] += write.upserted_count
+            result["updated"] += write.modified_count
+            progress["written"] = result["recipients"]
+            operations.clear()
+            if "first_batch" in progress:
+                progress["first_batch"].set()
+
+        cursor = self.entries_collection.aggregate(
+            recipients_pipeline(point, konum, needed_keys), allowDiskUse=True
+        )
+        async for recipient in cursor:
+            operations.append(UpdateOne(
+                {"konum": konum, "recipient": recipient["_id"]},
+                {
+                    "$set": {
+                        "city": recipient.get("city"),
+                        "distance_km": round(recipient["distance_m"] / 1000, 1),
+                        "matched": recipient["matched"],
+                        "rank": result["recipients"],
+                        "message": notification_message(konum, recipient["matched"]),
+                        "fanout_id": fanout_id,
+                        "updated_at": fanout_at
+                    },
+                    "$setOnInsert": {"created_at": fanout_at}
+                },
+                upsert=True
+            ))
+            result["recipients"] += 1
+            if len(operations) >= self.batch_size:
+                await flush()
+        if operations:
+            await flush()
+
+        # Önceki dağıtımdan kalan, artık uygun olmayan alıcılar (sıraları geçersiz)
+        removed = await self.collection.delete_many({"konum": konum, "fanout_id": {"$ne": fanout_id}})
+        result["removed"] = removed.deleted_count
+
+        self.stats["fanouts"] += 1
+        for key in ("recipients", "inserted", "updated", "removed"):
+            self.stats[key] += result[key]
+        self.stats["last_duration_seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    async def page(self, konum, after=None, limit=50):
+        """
+        Bildirimleri sıralarına göre sayfalı döndürür.
+
+        Args:
+            after (int): Önceki sayfanın next_after değeri; verilmezse ilk sayfa
+            limit (int): Sayfa boyutu
+
+        Returns:
+            dict: notifications listesi ve sonraki sayfa için next_after (son sayfada None)
+        """
+        query = {"konum": konum}
+        if after is not None:
+            query["rank"] = {"$gt": after}
+        cursor = self.collection.find(query, {"_id": 0, "fanout_id": 0}).sort("rank", ASCENDING).limit(limit)
+        notifications = [
+            {**doc, "to": doc["recipient"]} async for doc in cursor
+        ]
+        next_after = notifications[-1]["rank"] if len(notifications) == limit else None
+        return {"notifications": notifications, "next_after": next_after}
+
+    def get_metrics(self):
+        return {**self.stats, "running": sorted(self._running)}
@@ -0,0 +1,141 @@
+# product_catalog.py
+import difflib
+import re
+from functools import lru_cache
+
+from text_utils import product_key
+
+# Katalog değiştiğinde artırılır; eski sürümle çözümlenmiş kayıtlar backfill ile yeniden çözümlenir
+CATALOG_VERSION = 1
+
+# Birim yazımları → birim
+UNITS = {
+    "adet": "adet", "tane": "adet", "paket": "paket", "şişe": "şişe", "koli": "koli",
+    "kutu": "kutu", "kg": "kg", "kilo": "kg", "litre": "litre", "lt": "litre",
+    "çuval": "çuval", "torba": "torba", "takım": "takım", "çift": "çift",
+}
+
+# Ürün özel çarpanı olmayan birimlerin adet karşılığı
+DEFAULT_UNIT_FACTORS = {"adet": 1, "paket": 1, "şişe": 1, "kutu": 1, "takım": 1, "çift": 1, "koli": 12}
+
+# Kanonik ürün adı → eş anlamlılar ve birim çarpanları (1 birim = kaç adet)
+PRODUCTS = {
+    "Su": {
+        "synonyms": ["içme suyu", "şişe su", "pet şişe su", "pet su", "damacana su", "damacana", "sular", "suyu"],
+        "units": {"koli": 12, "paket": 6, "litre": 0.67, "damacana": 13},
+    },
+    "Bebek maması": {"synonyms": ["mama", "bebek mamaları", "mama kutusu"], "units": {"koli": 12}},
+    "Bebek bezi": {"synonyms": ["bez", "çocuk bezi", "bebek bezleri"], "units": {"paket": 30, "koli": 120}},
+    "İlk yardım": {
+        "synonyms": ["ilk yardım kiti", "ilkyardım", "ilk yardım çantası"],
+        "units": {"koli": 10},
+    },
+    "İlaç": {"synonyms": ["ilac", "ilaçlar", "medikal malzeme"], "units": {"koli": 50}},
+    "Gıda": {
+        "synonyms": ["yiyecek", "erzak", "kumanya", "gıda kolisi", "gıda paketi", "yemek"],
+        "units": {"koli": 1, "kg": 0.2},
+    },
+    "Ekmek": {"synonyms": ["ekmekler"], "units": {"koli": 20, "çuval": 50}},
+    "Giysi": {"synonyms": ["kıyafet", "elbise", "giyecek", "kıyafetler"], "units": {"koli": 20, "çuval": 30}},
+    "Uyku tulumu": {"synonyms": ["tulum", "uyku tulumları"], "units": {}},
+    "Isıtıcı": {"synonyms": ["soba", "elektrikli ısıtıcı", "ısıtıcılar"], "units": {}},
+    "Jeneratör": {"synonyms": ["jenaratör", "jeneratörler"], "units": {}},
+    "Hijyen": {"synonyms": ["hijyen kiti", "hijyen paketi", "hijyen malzemesi"], "units": {"koli": 10}},
+    "Islak mendil": {"synonyms": ["mendil", "ıslak mendiller"], "units": {"koli": 24}},
+    "Tuvalet kağıdı": {"synonyms": ["tuvalet kağıtları", "tuvalet kagidi"], "units": {"paket": 8, "koli": 48}},
+    "Dezenfektan": {"synonyms": ["el dezenfektanı", "kolonya"], "units": {"koli": 12}},
+    "Sabun": {"synonyms": ["sabunlar", "sıvı sabun"], "units": {"koli": 48}},
+    "Mont": {"synonyms": ["kaban", "montlar"], "units": {"koli": 10}},
+    "Battaniye": {"synonyms": ["battaniyeler", "yorgan"], "units": {"koli": 10, "çuval": 10}},
+    "Çadır": {"synonyms": ["çadırlar", "afet çadırı", "konteyner çadır"], "units": {}},
+    "Konserve": {"synonyms": ["konserveler", "hazır yemek", "konserve yiyecek"], "units": {"koli": 24}},
+}
+
+# Fuzzy eşleşme için en düşük benzerlik (difflib oranı)
+FUZZY_CUTOFF = 0.84
+
+# Büyük harfle veya Türkçe karaktersiz yazılmış adlar için ("ILAC" → "ılac", "ilk yardim")
+_ASCII_FOLD = str.maketrans("ıiçğöşüâîû", "iicgosuaiu")
+_PLURAL = re.compile(r"(?<=\w\w)l[ae]r[ıi]?$")
+_DIGITS = re.compile(r"^\d+([.,]\d+)?$")
+
+def _build_tables():
+    names = {}
+    lookup = {}
+    for name, spec in PRODUCTS.items():
+        key = product_key(name)
+        names[key] = name
+        lookup[key] = key
+        for synonym in spec["synonyms"]:
+            lookup.setdefault(product_key(synonym), key)
+    folded = {}
+    for text, key in lookup.items():
+        folded.setdefault(text.translate(_ASCII_FOLD), key)
+    return names, lookup, folded
+
+_NAMES, _LOOKUP, _FOLDED_LOOKUP = _build_tables()
+_FOLDED_KEYS = list(_FOLDED_LOOKUP)
+
+@lru_cache(maxsize=8192)
+def resolve(name):
+    """
+    Serbest yazılmış ürün adını kanonik ürün anahtarına çözümler.
+
+    Sırasıyla: Türkçe küçük harf + boşluk normalizasyonu, eş anlamlı tablosu,
+    sayı/birim kelimeleri atılmış ve Türkçe karakterleri sadeleştirilmiş hali,
+    çoğul eki atılmış hali, fuzzy eşleşme.
+    Hiçbiri tutmazsa normalize edilmiş adın tamamı anahtar olarak kullanılır. Sonuç
+    önbelleğe alınır; aynı yazım için sonraki çağrılar sözlük araması kadar hızlıdır.
+
+    Args:
+        name (str): Ürün adı ("Şişe Su", "içme suyu", "battaniyeler"...)
+
+    Returns:
+        str: Kanonik ürün anahtarı ("su", "battaniye"...)
+    """
+    key = product_key(name)
+    if key in _LOOKUP:
+        return _LOOKUP[key]
+
+    words = [w for w in key.split(" ") if w not in UNITS and not _DIGITS.match(w)]
+    stripped = " ".join(words).translate(_ASCII_FOLD)
+    for candidate in (stripped, _PLURAL.sub("", stripped)):
+        if candidate in _FOLDED_LOOKUP:
+            return _FOLDED_LOOKUP[candidate]
+
+    # Çok kısa adlarda fuzzy eşleşme yanlış ürünlere kayıyor
+    if len(stripped) > 3:
+        close = difflib.get_close_matches(stripped, _FOLDED_KEYS, n=1, cutoff=FUZZY_CUTOFF)
+        if close:
+            return _FOLDED_LOOKUP[close[0]]
+    return key
+
+def canonical_name(key):
+    """Ürün anahtarının görünen adı; katalogda yoksa anahtarın kendisi"""
+    return _NAMES.get(key, key)
+
+def unit_factor(key, unit):
+    """Ürünün 1 biriminin adet karşılığı; birim bilinmiyorsa 1"""
+    unit = UNITS.get(product_key(unit), product_key(unit)) if unit else "adet"
+    spec = PRODUCTS.get(_NAMES.get(key), {})
+    return spec.get("units", {}).get(unit, DEFAULT_UNIT_FACTORS.get(unit, 1))
+
+def to_base_units(key, amount, unit):
+    """Miktarı ürünün adet cinsine çevirir (örn. 2 koli su → 24)"""
+    try:
+        amount = float(amount or 0)
+    except (TypeError, ValueError):
+        return 0
+    return round(amount * unit_factor(key, unit))
+
+def annotate_products(analysis):
+    """
+    Analizdeki her ürüne kanonik urun_key ve adet cinsinden miktar_adet alanlarını ekler.
+    Kayıt sırasında bir kez çalışır; sorgular ve toplamlar bu alanları kullanır.
+    """
+    for urun in analysis.get("urunler", []):
+        if isinstance(urun, dict) and urun.get("urun_adi") is not None:
+            urun["urun_key"] = resolve(str(urun["urun_adi"]))
+            urun["miktar_adet"] = to_base_units(urun["urun_key"], urun.get("miktar") or 0, urun.get("birim"))
+    analysis["catalog_version"] = CATALOG_VERSION
+    return analysis
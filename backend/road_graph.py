@@ -0,0 +1,167 @@
+# road_graph.py
+from array import array
+
+# Doğrudan karayolu bağlantısı olan şehirler arası mesafeler (km)
+ROAD_EDGES = {
+    ('İstanbul', 'Ankara'): 450,
+    ('İstanbul', 'İzmir'): 550,
+    ('İstanbul', 'Bursa'): 230,
+    ('İstanbul', 'Antalya'): 730,
+    ('İstanbul', 'Adana'): 940,
+    ('İstanbul', 'Konya'): 660,
+    ('İstanbul', 'Kocaeli'): 100,
+    ('İstanbul', 'Mersin'): 1000,
+    ('İstanbul', 'Eskişehir'): 310,
+    ('İstanbul', 'Samsun'): 700,
+    ('İstanbul', 'Denizli'): 670,
+    ('İstanbul', 'Sakarya'): 160,
+    ('İstanbul', 'Kayseri'): 770,
+    ('Ankara', 'İzmir'): 600,
+    ('Ankara', 'Bursa'): 400,
+    ('Ankara', 'Antalya'): 480,
+    ('Ankara', 'Adana'): 500,
+    ('Ankara', 'Konya'): 260,
+    ('Ankara', 'Şanlıurfa'): 850,
+    ('Ankara', 'Gaziantep'): 770,
+    ('Ankara', 'Diyarbakır'): 970,
+    ('Ankara', 'Mersin'): 560,
+    ('Ankara', 'Eskişehir'): 235,
+    ('Ankara', 'Samsun'): 500,
+    ('Ankara', 'Denizli'): 480,
+    ('Ankara', 'Kayseri'): 320,
+    ('Ankara', 'Van'): 1350,
+    ('Ankara', 'Malatya'): 680,
+    ('İzmir', 'Bursa'): 380,
+    ('İzmir', 'Antalya'): 480,
+    ('İzmir', 'Adana'): 900,
+    ('İzmir', 'Denizli'): 240,
+    ('Adana', 'Gaziantep'): 220,
+    ('Adana', 'Mersin'): 70,
+    ('Adana', 'Diyarbakır'): 520,
+    ('Gaziantep', 'Şanlıurfa'): 220,
+    ('Gaziantep', 'Diyarbakır'): 390,
+    ('Gaziantep', 'Malatya'): 350,
+    ('Diyarbakır', 'Malatya'): 240,
+    ('Diyarbakır', 'Van'): 450,
+    ('Diyarbakır', 'Mardin'): 100,
+    ('Şanlıurfa', 'Malatya'): 430,
+    ('Şanlıurfa', 'Mardin'): 190,
+    ('Samsun', 'Trabzon'): 150,
+    ('Bursa', 'Kocaeli'): 175,
+    ('Bursa', 'Eskişehir'): 220,
+    ('Bursa', 'Sakarya'): 280,
+    ('Kocaeli', 'Sakarya'): 60,
+    ('Eskişehir', 'Konya'): 380,
+    ('Eskişehir', 'Denizli'): 450,
+    # Deprem bölgesi ve frontend'de seçilebilen diğer şehirler
+    ('Adana', 'Osmaniye'): 90,
+    ('Osmaniye', 'Hatay'): 130,
+    ('Osmaniye', 'Kahramanmaraş'): 100,
+    ('Hatay', 'Gaziantep'): 200,
+    ('Gaziantep', 'Kahramanmaraş'): 80,
+    ('Gaziantep', 'Kilis'): 65,
+    ('Gaziantep', 'Adıyaman'): 150,
+    ('Kahramanmaraş', 'Malatya'): 220,
+    ('Adıyaman', 'Malatya'): 180,
+    ('Adıyaman', 'Şanlıurfa'): 110,
+    ('Kayseri', 'Kahramanmaraş'): 290,
+    ('Samsun', 'Ordu'): 150,
+    ('Ordu', 'Giresun'): 45,
+    ('Giresun', 'Trabzon'): 130,
+    ('İzmir', 'Manisa'): 40,
+    ('İzmir', 'Aydın'): 130,
+    ('Aydın', 'Denizli'): 125,
+}
+
+# Hız: 80 km/saat ortalama
+AVERAGE_SPEED_KMH = 80
+
+_INF = float("inf")
+
+class RoadGraph:
+    """
+    Tüm şehir çiftleri için önceden hesaplanmış en kısa yollar.
+
+    Mesafeler n×n düz bir float dizisinde, yol üzerindeki bir sonraki şehir
+    n×n düz bir short dizisinde tutulur; şehirler CITY_IDS ile indekslenir.
+    Floyd-Warshall bir kez çalışır, sonraki her sorgu O(1) (yol için O(yol uzunluğu)).
+    """
+
+    def __init__(self, edges):
+        self.cities = sorted({city for pair in edges for city in pair})
+        self.city_ids = {city: i for i, city in enumerate(self.cities)}
+        n = len(self.cities)
+        self.size = n
+
+        dist = [_INF] * (n * n)
+        nxt = [-1] * (n * n)
+        for i in range(n):
+            dist[i * n + i] = 0.0
+            nxt[i * n + i] = i
+        for (a, b), km in edges.items():
+            i, j = self.city_ids[a], self.city_ids[b]
+            if km < dist[i * n + j]:
+                dist[i * n + j] = dist[j * n + i] = float(km)
+                nxt[i * n + j] = j
+                nxt[j * n + i] = i
+
+        for k in range(n):
+            kn = k * n
+            for i in range(n):
+                d_ik = dist[i * n + k]
+                if d_ik == _INF:
+                    continue
+                row = i * n
+                via = nxt[row + k]
+                for j in range(n):
+                    candidate = d_ik + dist[kn + j]
+                    if candidate < dist[row + j]:
+                        dist[row + j] = candidate
+                        nxt[row + j] = via
+
+        self.distances = array("d", dist)
+        self.next_hop = array("h", nxt)
+
+    def distance(self, from_city, to_city):
+        """En kısa yol mesafesi (km); şehir bilinmiyorsa veya bağlantı yoksa None"""
+        i = self.city_ids.get(from_city)
+        j = self.city_ids.get(to_city)
+        if i is None or j is None:
+            return None
+        d = self.distances[i * self.size + j]
+        return None if d == _INF else d
+
+    def path(self, from_city, to_city):
+        """En kısa yol üzerindeki şehirler (başlangıç ve varış dahil); yol yoksa []"""
+        i = self.city_ids.get(from_city)
+        j = self.city_ids.get(to_city)
+        if i is None or j is None or self.next_hop[i * self.size + j] == -1:
+            return []
+        path = [self.cities[i]]
+        while i != j:
+            i = self.next_hop[i * self.size + j]
+            path.append(self.cities[i])
+        return path
+
+    def nearest(self, city, k=None, include_self=False):
+        """Şehre yol mesafesi en kısa olan şehirler: [(şehir, km), ...]"""
+        i = self.city_ids.get(city)
+        if i is None:
+            return []
+        row = i * self.size
+        result = [
+            (self.cities[j], self.distances[row + j])
+            for j in range(self.size)
+            if self.distances[row + j] != _INF and (include_self or j != i)
+        ]
+        result.sort(key=lambda item: item[1])
+        return result[:k] if k is not None else result
+
+_graph = None
+
+def get_road_graph():
+    """Paylaşılan RoadGraph örneğini ilk kullanımda oluşturup döndürür"""
+    global _graph
+    if _graph is None:
+        _graph = RoadGraph(ROAD_EDGES)
+    return _graph
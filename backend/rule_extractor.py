@@ -0,0 +1,234 @@
+# rule_extractor.py
+import os
+import re
+
+from gazetteer import PROVINCES, PROVINCE_ALIASES, DISTRICTS
+from mock_market import MOCK_MARKETS
+from product_catalog import UNITS
+from text_utils import turkish_casefold
+
+# Bu güvenin altındaki sonuçlar için Gemini'ya gidilir
+RULE_CONFIDENCE_THRESHOLD = float(os.getenv("RULE_CONFIDENCE_THRESHOLD", "0.9"))
+
+_LETTER = "a-zçğıöşüâîû"
+
+# Ürün sözlüğü: kanonik ad → metinde aranacak kalıplar (küçük harf, Türkçe)
+PRODUCT_LEXICON = {
+    "Su": [r"(?:içme )?su(?:yu|lar|ları|ya|yun)?"],
+    "Bebek maması": [r"bebek mama\w*", r"mama\w*"],
+    "Bebek bezi": [r"bebek bez\w*", r"bez\b"],
+    "İlk yardım": [r"ilk ?yardım\w*"],
+    "İlaç": [r"ilaç\w*", r"ilac\w*"],
+    "Gıda": [r"gıda\w*", r"yiyecek\w*", r"erzak\w*", r"kumanya\w*"],
+    "Ekmek": [r"ekmek\w*"],
+    "Giysi": [r"giysi\w*", r"kıyafet\w*", r"elbise\w*"],
+    "Uyku tulumu": [r"uyku tulum\w*"],
+    "Isıtıcı": [r"ısıtıcı\w*", r"soba\w*"],
+    "Jeneratör": [r"jeneratör\w*"],
+    "Hijyen": [r"hijyen\w*"],
+    "Islak mendil": [r"ıslak mendil\w*"],
+    "Tuvalet kağıdı": [r"tuvalet kağıd\w*"],
+    "Dezenfektan": [r"dezenfektan\w*"],
+    "Sabun": [r"sabun\w*"],
+    "Mont": [r"mont(?:lar\w*|u|a)?\b"],
+    "Battaniye": [r"battaniye\w*"],
+    "Çadır": [r"çadır\w*"],
+    "Konserve": [r"konserve\w*"],
+}
+
+# Market kataloğundaki ürünler sözlükte yoksa ekle
+for _city_markets in MOCK_MARKETS.values():
+    for _market in _city_markets:
+        for _product in _market["products"]:
+            if _product not in PRODUCT_LEXICON:
+                PRODUCT_LEXICON[_product] = [re.escape(turkish_casefold(_product)) + r"\w*"]
+
+_UNIT_PATTERN = "|".join(sorted(map(re.escape, UNITS), key=len, reverse=True))
+
+# Frontend bağış formunun ürettiği "Ürün: 10 adet" parçaları
+_FORM_ITEM = re.compile(
+    rf"(?:^|,\s*)([^,:.]+?):\s*(\d+)\s*({_UNIT_PATTERN})?(?=\s*,|\s+malzeme|\s*$|\.)"
+)
+# "200 şişe", "10 koli" (ürünün hemen önünde; arada başka kelime olamaz)
+_QUANTITY_BEFORE = re.compile(rf"(\d+)\s*({_UNIT_PATTERN})?\s*$")
+# "su 200 şişe", "su: 200" (ürünün arkasında)
+_QUANTITY_AFTER = re.compile(rf"^\s*[:\-]?\s*(\d+)\s*({_UNIT_PATTERN})?\b")
+_TRUCKS = re.compile(r"(\d+)\s*tır\b")
+_NUMBER = re.compile(r"\d+")
+_LOCATION_FIELD = re.compile(rf"konum(?:um)?\s*:\s*([{_LETTER}' ]+)")
+_URGENCY_FIELD = re.compile(r"aciliyet\s*:\s*(düşük|orta|yüksek|acil)")
+
+_DEMAND_WORDS = re.compile(
+    r"\b(?:lazım|ihtiyac\w*|ihtiyaç\w*|gerek\w*|eksik\w*|istiyoruz|bekliyoruz|yardım edin|kalmadı)"
+)
+_SUPPLY_WORDS = re.compile(
+    r"\b(?:bağış\w*|bağışla\w*|sağlayabil\w*|sunabil\w*|verebil\w*|gönderebil\w*|getirebil\w*|elimde)"
+)
+_URGENT_WORDS = re.compile(r"\b(?:acil\w*|hemen|ivedi\w*|enkaz\w*)")
+
+def _build_place_index():
+    places = {}
+    for province in PROVINCES:
+        places[turkish_casefold(province)] = (province, True)
+    for alias, province in PROVINCE_ALIASES.items():
+        places[turkish_casefold(alias)] = (province, True)
+    for district, province in DISTRICTS.items():
+        places.setdefault(turkish_casefold(district), (province, False))
+    return places
+
+_PLACES = _build_place_index()
+_PLACE_PATTERN = re.compile(
+    r"\b(" + "|".join(sorted(map(re.escape, _PLACES), key=len, reverse=True)) + rf")(?![{_LETTER}])"
+)
+_PRODUCT_PATTERNS = [
+    # Ürün adı başka bir kelimenin başı olamaz ("su" → "sunabilirim")
+    (name, re.compile(r"\b(?:" + "|".join(patterns) + rf")(?![{_LETTER}])"))
+    for name, patterns in PRODUCT_LEXICON.items()
+]
+
+def _find_location(text):
+    """(il, güven) döndürür; Konum alanı varsa ona öncelik verir"""
+    field = _LOCATION_FIELD.search(text)
+    if field:
+        match = _PLACE_PATTERN.search(field.group(1))
+        if match:
+            province, is_province = _PLACES[match.group(1)]
+            return province, 0.4 if is_province else 0.3
+
+    provinces = {}
+    for match in _PLACE_PATTERN.finditer(text):
+        province, is_province = _PLACES[match.group(1)]
+        provinces[province] = max(provinces.get(province, 0), 0.4 if is_province else 0.3)
+    if len(provinces) == 1:
+        return provinces.popitem()
+    if provinces:
+        # Birden fazla il geçiyorsa hangisinin kastedildiği belirsiz
+        return next(iter(provinces)), 0.1
+    return "Bilinmiyor", 0.0
+
+def _find_products(text):
+    """
+    Ürünleri ve miktarlarını bulur.
+
+    Her ürünün tüm geçişlerine bakılır; miktar yalnızca ürünün hemen önündeki
+    veya arkasındaki sayıdır.
+
+    Returns:
+        tuple: (ürün listesi, her ürünün tam olarak bir miktarı var mı,
+        miktar olarak kullanılan sayıların metindeki konumları)
+    """
+    mentions = {}  # ürün → [(metindeki konum, miktar eşleşmesi, eşleşmenin metindeki başlangıcı)]
+    taken = []
+
+    for name, pattern in _PRODUCT_PATTERNS:
+        for match in pattern.finditer(text):
+            start, end = match.span()
+            if any(s < end and start < e for s, e in taken):
+                continue
+            taken.append((start, end))
+
+            offset = max(0, start - 25)
+            quantity = _QUANTITY_BEFORE.search(text[offset:start])
+            if not quantity:
+                offset = end
+                quantity = _QUANTITY_AFTER.search(text[end:end + 25])
+            mentions.setdefault(name, []).append((start, quantity, offset))
+
+    found = []  # (metindeki konum, ürün)
+    unambiguous = True
+    numbers = []
+    for name, items in mentions.items():
+        quantified = [item for item in items if item[1]]
+        # Miktarsız veya birden fazla miktarlı ürünlerde hangi sayının kastedildiği belirsiz
+        if len(quantified) != 1:
+            unambiguous = False
+        if not quantified:
+            found.append((items[0][0], {"urun_adi": name, "miktar": 0, "birim": "adet"}))
+            continue
+        start, quantity, offset = quantified[0]
+        for _, other, other_offset in quantified:
+            numbers.append((other_offset + other.start(1), other_offset + other.end(1)))
+        found.append((start, {
+            "urun_adi": name,
+            "miktar": int(quantity.group(1)),
+            "birim": UNITS.get(quantity.group(2), "adet")
+        }))
+
+    # Aynı sayı iki ürünün miktarı olamaz ("su 200 battaniye")
+    if len(set(numbers)) != len(numbers):
+        unambiguous = False
+    found.sort(key=lambda item: item[0])
+    return [product for _, product in found], unambiguous, set(numbers)
+
+def extract(user_text):
+    """
+    Metinden kural tabanlı olarak analiz çıkarır.
+
+    Args:
+        user_text (str): Kullanıcının girdiği metin
+
+    Returns:
+        tuple: (HelpAnalysis biçiminde dict, 0-1 arası güven skoru)
+    """
+    text = turkish_casefold(user_text)
+    confidence = 0.0
+
+    konum, location_confidence = _find_location(text)
+    confidence += location_confidence
+
+    demand = bool(_DEMAND_WORDS.search(text))
+    supply = bool(_SUPPLY_WORDS.search(text))
+    if demand != supply:
+        confidence += 0.25
+    ihtiyac_var = demand and not supply
+
+    # Yapılandırılmış form ("Ürün: 10 adet, ...") ürün adlarını olduğu gibi kullan
+    form_part = text.split(" malzeme")[0] if supply else ""
+    form_items = list(_FORM_ITEM.finditer(form_part))
+    trucks = _TRUCKS.search(text)
+    if form_items:
+        urunler = []
+        for match in form_items:
+            # Ürün adının orijinal yazımını koru
+            start, end = match.span(1)
+            urunler.append({
+                "urun_adi": user_text[start:end].strip(),
+                "miktar": int(match.group(2)),
+                "birim": UNITS.get(match.group(3), "adet")
+            })
+        confidence += 0.25
+    else:
+        urunler, unambiguous, numbers = _find_products(text)
+        if trucks:
+            numbers.add(trucks.span(1))
+            urunler.append({"urun_adi": "Tır", "miktar": int(trucks.group(1)), "birim": "adet"})
+        # Miktar olarak kullanılmayan sayılar ("2 saattir", "3 gündür") serbest metinde
+        # yanlış eşleşme işaretidir; bu metinler Gemini'ya bırakılır
+        if any(match.span() not in numbers for match in _NUMBER.finditer(text)):
+            unambiguous = False
+        if urunler:
+            confidence += 0.25 if unambiguous else 0.1
+
+    urgency_field = _URGENCY_FIELD.search(text)
+    if urgency_field:
+        oncelik = urgency_field.group(1)
+        confidence += 0.1
+    elif _URGENT_WORDS.search(text) and ihtiyac_var:
+        oncelik = "acil"
+        confidence += 0.1
+    else:
+        oncelik = "orta" if ihtiyac_var else "düşük"
+        confidence += 0.05
+
+    return {
+        "ihtiyac_var": ihtiyac_var,
+        "konum": konum,
+        "urunler": urunler,
+        "öncelik": oncelik
+    }, round(min(confidence, 1.0), 2)
+
+def extract_if_confident(user_text, threshold=None):
+    """Güven eşiği aşılıyorsa kural tabanlı analizi, aşılmıyorsa None döndürür"""
+    threshold = RULE_CONFIDENCE_THRESHOLD if threshold is None else threshold
+    analysis, confidence = extract(user_text)
+    return analysis if confidence >= threshold else None
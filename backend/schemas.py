@@ -0,0 +1,79 @@
+# schemas.py
+from typing import Annotated, List, Literal, Optional
+
+from pydantic import AfterValidator, BaseModel, BeforeValidator, Field, TypeAdapter
+
+# Gemini yanıt şemasının desteklediği OpenAPI alt kümesi; diğer anahtarlar
+# (title, default, minimum, ...) şemadan atılır, pydantic doğrulamasında kalır
+_GEMINI_SCHEMA_KEYS = ("type", "format", "description", "nullable", "enum", "items", "properties", "required")
+
+def _integral(value):
+    # "10" adet 10.0 değil 10 olarak saklansın
+    return int(value) if value.is_integer() else value
+
+def _lower(value):
+    return value.strip().lower() if isinstance(value, str) else value
+
+Miktar = Annotated[float, Field(ge=0), AfterValidator(_integral)]
+Oncelik = Annotated[Literal["düşük", "orta", "yüksek", "acil"], BeforeValidator(_lower)]
+
+class Urun(BaseModel):
+    urun_adi: str = Field(min_length=1)
+    miktar: Miktar
+    birim: str = "adet"
+
+class HelpAnalysis(BaseModel):
+    """Yardım veya bağış metninin analizi"""
+    ihtiyac_var: bool
+    konum: Optional[str] = Field(description="Türkiye'de il veya ilçe adı; metinde yoksa null")
+    urunler: List[Urun]
+    öncelik: Oncelik
+
+class BatchAnalysisItem(HelpAnalysis):
+    """Toplu analizde numaralı metinlerden birinin analizi"""
+
+    index: int = Field(ge=0, description="Metnin prompt'taki numarası")
+
+class SmartMatch(BaseModel):
+    recommended_city: str
+    reason: str
+    distance: str
+    available_amount: str
+
+class RiskAnalysis(BaseModel):
+    high_risk: List[str]
+    low_supply: List[str]
+    recommendation: str
+
+def _convert(node, defs):
+    if "$ref" in node:
+        return _convert(defs[node["$ref"].split("/")[-1]], defs)
+    if "anyOf" in node:
+        # Optional[X] → X + nullable (Gemini şeması anyOf desteklemez)
+        variants = [v for v in node["anyOf"] if v.get("type") != "null"]
+        if len(variants) != 1:
+            raise ValueError(f"Gemini şemasına çevrilemeyen birleşim tipi: {node['anyOf']}")
+        converted = _convert(variants[0], defs)
+        if len(variants) != len(node["anyOf"]):
+            converted["nullable"] = True
+        if "description" in node:
+            converted["description"] = node["description"]
+        return converted
+    if "const" in node:
+        node = {**node, "enum": [node["const"]]}
+    schema = {key: node[key] for key in _GEMINI_SCHEMA_KEYS if key in node}
+    if "properties" in schema:
+        schema["properties"] = {name: _convert(value, defs) for name, value in schema["properties"].items()}
+        # Varsayılanı olan alanlar da yanıtta hep bulunsun
+        schema["required"] = list(schema["properties"])
+    if "items" in schema:
+        schema["items"] = _convert(schema["items"], defs)
+    return schema
+
+def gemini_schema(model_type):
+    """
+    Pydantic modelinden (veya List[Model] gibi bir tipten) Gemini'nin
+    response_schema parametresine verilecek şemayı üretir.
+    """
+    json_schema = TypeAdapter(model_type).json_schema()
+    return _convert(json_schema, json_schema.get("$defs", {}))
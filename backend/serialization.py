@@ -0,0 +1,26 @@
+# serialization.py
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+def _default(value):
+    """orjson'un tanımadığı Mongo tiplerini çevirir (datetime orjson'da yerleşik)"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} JSON'a çevrilemez")
+
+def dumps(content):
+    """İçeriği UTF-8 JSON baytlarına çevirir; ObjectId string'e, datetime ISO 8601'e"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(JSONResponse):
+    """
+    orjson ile üretilen JSON yanıtı (uygulamanın varsayılan yanıt sınıfı).
+
+    Mongo dokümanları (ObjectId, datetime) doğrudan verilebilir. Endpoint
+    bu sınıfın örneğini döndürürse FastAPI'nin jsonable_encoder taraması da
+    atlanır; büyük listelerde (/entries) böyle kullanılır.
+    """
+
+    def render(self, content):
+        return dumps(content)
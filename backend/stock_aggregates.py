@@ -0,0 +1,139 @@
+# stock_aggregates.py
+import asyncio
+import os
+import re
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from product_catalog import canonical_name, resolve, to_base_units
+
+TRUCK_PATTERN = re.compile(r'(\d+)\s*tır')
+UNKNOWN_CITY = "Bilinmiyor"
+
+def extract_truck_count(text):
+    """Metinde geçen tır sayısını döndürür (örn. '5 tır sunabilirim' → 5)"""
+    if not text or "tır" not in text:
+        return 0
+    match = TRUCK_PATTERN.search(text)
+    return int(match.group(1)) if match else 0
+
+def _encode_key(name):
+    """Ürün adını Mongo alan adı olarak kullanılabilir hale getirir ('.' ve '$' yasak)"""
+    return str(name).replace(".", "．").replace("$", "＄")
+
+def _decode_key(key):
+    return key.replace("．", ".").replace("＄", "$")
+
+def entry_increments(entry):
+    """Bir kaydın şehir stoğuna katkısını (şehir, $inc dokümanı) olarak döndürür"""
+    analysis = entry.get("analysis") or {}
+    city = analysis.get("konum") or UNKNOWN_CITY
+    inc = {"entry_count": 1}
+
+    for product in analysis.get("urunler", []):
+        product_name = product.get("urun_adi")
+        if product_name is None:
+            continue
+        # Aynı ürünün farklı yazımları ("su", "şişe su", "İçme Suyu") tek kanonik ad altında toplanır
+        key = product.get("urun_key") or resolve(str(product_name))
+        field = "supplies." + _encode_key(canonical_name(key))
+        amount = product.get("miktar_adet")
+        if amount is None:
+            amount = to_base_units(key, product.get("miktar") or 0, product.get("birim"))
+        inc[field] = inc.get(field, 0) + amount
+
+    trucks = entry.get("truck_count")
+    if trucks is None:
+        trucks = extract_truck_count(entry.get("original_text", ""))
+    if trucks:
+        inc["trucks"] = trucks
+    return city, inc
+
+async def apply_entries(city_stock_collection, entries):
+    """Yeni analiz edilmiş kayıtları şehir stoklarına $inc ile tek bulk_write'ta işler"""
+    now = datetime.now()
+    operations = []
+    for entry in entries:
+        city, inc = entry_increments(entry)
+        operations.append(UpdateOne(
+            {"_id": city},
+            {"$inc": inc, "$set": {"updated_at": now}},
+            upsert=True
+        ))
+    if operations:
+        await city_stock_collection.bulk_write(operations, ordered=False)
+
+def to_summary(doc):
+    """city_stock dokümanını /stock-summary'deki şehir biçimine çevirir"""
+    return {
+        "supplies": {_decode_key(k): v for k, v in doc.get("supplies", {}).items()},
+        "trucks": doc.get("trucks", 0),
+        "entry_count": doc.get("entry_count", 0)
+    }
+
+def entry_delta(entry):
+    """Kaydın şehir stoğuna katkısını /stock-summary biçiminde döndürür: (şehir, değişim)"""
+    city, inc = entry_increments(entry)
+    doc = {"supplies": {}}
+    for field, value in inc.items():
+        if field.startswith("supplies."):
+            doc["supplies"][field[len("supplies."):]] = value
+        else:
+            doc[field] = value
+    return city, to_summary(doc)
+
+async def rebuild_city_stock(entries_collection, city_stock_collection):
+    """
+    city_stock koleksiyonunu tüm kayıtlardan baştan hesaplar (tutarlılık onarımı).
+
+    Eksik truck_count alanları da bu sırada doldurulur. Yeniden hesaplama
+    sırasında gelen kayıtların artışları kaybolabileceği için yoğun olmayan
+    bir zamanda çalıştırılmalıdır.
+    """
+    totals = {}
+    truck_updates = []
+
+    async for entry in entries_collection.find(
+        {"analysis": {"$exists": True}},
+        projection={"analysis.konum": 1, "analysis.urunler": 1, "original_text": 1, "truck_count": 1}
+    ):
+        if "truck_count" not in entry:
+            entry["truck_count"] = extract_truck_count(entry.get("original_text", ""))
+            truck_updates.append(UpdateOne(
+                {"_id": entry["_id"]}, {"$set": {"truck_count": entry["truck_count"]}}
+            ))
+
+        city, inc = entry_increments(entry)
+        doc = totals.setdefault(city, {"_id": city, "supplies": {}, "trucks": 0, "entry_count": 0})
+        for field, value in inc.items():
+            if field.startswith("supplies."):
+                key = field[len("supplies."):]
+                doc["supplies"][key] = doc["supplies"].get(key, 0) + value
+            else:
+                doc[field] += value
+
+    if truck_updates:
+        await entries_collection.bulk_write(truck_updates, ordered=False)
+
+    now = datetime.now()
+    for doc in totals.values():
+        doc["updated_at"] = now
+        await city_stock_collection.replace_one({"_id": doc["_id"]}, doc, upsert=True)
+    await city_stock_collection.delete_many({"_id": {"$nin": list(totals)}})
+    return len(totals)
+
+async def _main():
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv()
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    db = client[os.getenv("DATABASE_NAME", "deprem_yardim")]
+    cities = await rebuild_city_stock(db.entries, db.city_stock)
+    print(f"{cities} şehrin stok özeti yeniden hesaplandı")
+    client.close()
+
+if __name__ == "__main__":
+    # Kullanım: python stock_aggregates.py
+    asyncio.run(_main())
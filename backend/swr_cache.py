@@ -0,0 +1,93 @@
+# swr_cache.py
+import asyncio
+import time
+
+# get() yanıtındaki önbellek durumları
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+class SWRCache:
+    """
+    Stale-while-revalidate ve single-flight önbelleği.
+
+    Değer ttl_seconds boyunca tazedir ve doğrudan döner. Süresi dolduktan
+    sonra stale_seconds daha bekletmeden (bayat olarak) döndürülür ve arka
+    planda yenilenir. Bu da geçtiyse veya değer hiç yoksa yükleme beklenir.
+    Aynı anahtar için aynı anda yalnızca bir yükleme yapılır; eşzamanlı
+    istekler aynı sonucu bekler. Arka plan yenilemesi başarısız olursa
+    bayat değer korunur.
+    """
+
+    def __init__(self, ttl_seconds=600, stale_seconds=3600):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._values = {}    # key -> (yüklenme zamanı, değer)
+        self._inflight = {}  # key -> yükleme görevi
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "loads": 0,
+            "load_errors": 0,
+        }
+
+    def _load(self, key, loader):
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return task
+        task = asyncio.create_task(self._run(key, loader))
+        self._inflight[key] = task
+        return task
+
+    async def _run(self, key, loader):
+        try:
+            value = await loader()
+        except Exception:
+            self.stats["load_errors"] += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        self.stats["loads"] += 1
+        self._values[key] = (time.time(), value)
+        return value
+
+    def _refresh_done(self, task):
+        # Arka plan yenilemesinin hatası loglanmadan yutulmasın diye okunur
+        if not task.cancelled():
+            task.exception()
+
+    async def get(self, key, loader):
+        """
+        Args:
+            key: Önbellek anahtarı
+            loader: Değeri üreten async fonksiyon (argümansız)
+
+        Returns:
+            tuple: (değer, saniye cinsinden yaş, FRESH/STALE/MISS)
+        """
+        cached = self._values.get(key)
+        now = time.time()
+        if cached is not None:
+            loaded_at, value = cached
+            age = now - loaded_at
+            if age < self.ttl_seconds:
+                self.stats["hits"] += 1
+                return value, age, FRESH
+            if age < self.ttl_seconds + self.stale_seconds:
+                self.stats["stale_hits"] += 1
+                self._load(key, loader).add_done_callback(self._refresh_done)
+                return value, age, STALE
+
+        self.stats["misses"] += 1
+        # İstek iptal edilse de ortak yükleme diğer bekleyenler için sürer
+        value = await asyncio.shield(self._load(key, loader))
+        return value, 0.0, MISS
+
+    def invalidate(self, key):
+        self._values.pop(key, None)
+
+    def get_stats(self):
+        return {**self.stats, "keys": len(self._values), "loading": len(self._inflight)}
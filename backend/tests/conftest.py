@@ -0,0 +1,65 @@
+import asyncio
+import os
+import sys
+import uuid
+from contextlib import asynccontextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+# Sahte Gemini modeli ve sentetik trafik benchmark'larla ortak
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+os.environ.setdefault("GEMINI_API_KEY", "test")
+
+@pytest.fixture
+def run():
+    """Testteki coroutine'i yeni bir event loop'ta çalıştırır"""
+    return asyncio.run
+
+@pytest.fixture
+def mongo():
+    """Bellek içi (mongomock) veritabanı; her test için boş"""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    return mongomock_motor.AsyncMongoMockClient()["test"]
+
+@pytest.fixture
+def real_mongo():
+    """
+    Gerçek MongoDB'de geçici veritabanı açan fabrika (index/explain davranışı için).
+
+    MONGODB_TEST_URL verilmezse test atlanır. İstemci testin event loop'unda
+    açılır ve veritabanı çıkışta silinir.
+    """
+    url = os.getenv("MONGODB_TEST_URL")
+    if not url:
+        pytest.skip("MONGODB_TEST_URL verilmedi")
+    motor_asyncio = pytest.importorskip("motor.motor_asyncio")
+
+    @asynccontextmanager
+    async def database():
+        client = motor_asyncio.AsyncIOMotorClient(url, maxPoolSize=200)
+        db = client[f"deprem_yardim_test_{uuid.uuid4().hex[:8]}"]
+        try:
+            yield db
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+
+    return database
+
+@pytest.fixture
+def api(mongo):
+    """Uygulamayı mongomock'a bağlayıp lifespan içinde bir HTTP istemcisi açan fabrika"""
+    httpx = pytest.importorskip("httpx")
+    import main
+
+    @asynccontextmanager
+    async def client():
+        main.bind_database(mongo)
+        async with main.lifespan(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                yield http
+
+    return client
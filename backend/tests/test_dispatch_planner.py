@@ -0,0 +1,60 @@
+from collections import defaultdict
+
+import dispatch_planner
+from dispatch_planner import plan_dispatch
+from dispatch_planner_bench import synthetic_scenario
+
+def _plan(product_count, seed, **overrides):
+    needs, fleets, stock_for, route_for = synthetic_scenario(product_count, tight=True, seed=seed)
+    for city_fleets in fleets.values():
+        for fleet in city_fleets:
+            fleet.update(overrides)
+    plan = plan_dispatch("Hatay", needs, fleets=fleets, stock_for=stock_for, route_for=route_for)
+    return plan, fleets
+
+def _assert_within_capacity(plan, fleets):
+    loads = defaultdict(int)
+    for allocation in plan["allocations"]:
+        loads[allocation["from"]] += allocation["amount"]
+    for city, load in loads.items():
+        assert load <= sum(f["trucks"] * f["capacity_per_truck"] for f in fleets[city])
+
+def test_late_candidates_reach_same_optimum(monkeypatch):
+    # Aday şehir verilmezse eksikler çözülmüş ağa sonradan eklenir; sonuç aynı olmalı
+    extended = []
+    extend = dispatch_planner._RepairNetwork.extend
+    monkeypatch.setattr(dispatch_planner._RepairNetwork, "extend",
+                        lambda self, *args: extended.append(args) or extend(self, *args))
+    for seed in range(4):
+        monkeypatch.setattr(dispatch_planner, "REPAIR_EXTRA_SOURCES", 0)
+        late, fleets = _plan(100, seed)
+        monkeypatch.setattr(dispatch_planner, "REPAIR_EXTRA_SOURCES", 81)
+        full, _ = _plan(100, seed)
+
+        assert late["served"] == full["served"] == full["requested"]
+        assert late["weighted_delivery_minutes"] == full["weighted_delivery_minutes"]
+        _assert_within_capacity(late, fleets)
+    assert extended
+
+def test_short_capacity_serves_high_priority_first():
+    plan, fleets = _plan(30, seed=1, trucks=1, capacity_per_truck=1500)
+    _assert_within_capacity(plan, fleets)
+    # Hatay'ın kendi filosu dışındaki tüm kapasite kullanılır
+    assert plan["served"] == 1500 * (len(fleets) - 1) < plan["requested"]
+    assert {item["öncelik"] for item in plan["unmet"]} == {"düşük"}
+
+def test_sources_without_route_are_skipped():
+    needs, fleets, stock_for, route_for = synthetic_scenario(30, tight=False, seed=2)
+    plan = plan_dispatch("Hatay", needs, fleets=fleets, stock_for=stock_for, route_for=route_for)
+    loads = defaultdict(int)
+    for allocation in plan["allocations"]:
+        loads[allocation["from"]] += allocation["amount"]
+    # En çok kullanılan şehrin konuma yolu yoksa başka şehirlerden karşılanır
+    unreachable = max(loads, key=loads.get)
+    plan = plan_dispatch(
+        "Hatay", needs, fleets=fleets, stock_for=stock_for,
+        route_for=lambda city, konum: None if city == unreachable else route_for(city, konum)
+    )
+    assert plan["allocations"]
+    assert unreachable not in {allocation["from"] for allocation in plan["allocations"]}
+    assert unreachable not in {usage["city"] for usage in plan["fleet_usage"]}
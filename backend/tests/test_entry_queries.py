@@ -0,0 +1,84 @@
+import random
+from datetime import datetime
+
+from entry_queries import ENTRY_MATCH_INDEX, earthquake_resources_pipeline, match_pipeline
+from entry_queries_bench import (
+    legacy_match, legacy_resources, pipeline_match, pipeline_resources, synthetic_entry
+)
+
+async def _seed(collection, count):
+    rng = random.Random(42)
+    now = datetime.now()
+    await collection.insert_many([synthetic_entry(rng, now) for _ in range(count)])
+    await collection.create_index(ENTRY_MATCH_INDEX)
+
+def _stages(plan):
+    """explain çıktısındaki tüm aşama adlarını toplar"""
+    found = set()
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            found.add(plan["stage"])
+        for value in plan.values():
+            found |= _stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            found |= _stages(value)
+    return found
+
+def test_pipelines_match_python_filtering(run, mongo):
+    async def scenario():
+        await _seed(mongo.entries, 3000)
+        for city in ("Hatay", "Adana", "İstanbul"):
+            for product in ("su", "Battaniye", "çadır"):
+                assert await pipeline_match(mongo.entries, city, product) == \
+                    await legacy_match(mongo.entries, city, product)
+            assert await pipeline_resources(mongo.entries, city) == await legacy_resources(mongo.entries, city)
+
+    run(scenario())
+
+def test_pipelines_use_match_index(run, real_mongo):
+    async def scenario():
+        async with real_mongo() as db:
+            await _seed(db.entries, 2000)
+            for pipeline in (match_pipeline("Hatay", "su"), earthquake_resources_pipeline("Hatay")):
+                explain = await db.command(
+                    "explain", {"aggregate": "entries", "pipeline": pipeline, "cursor": {}},
+                    verbosity="queryPlanner"
+                )
+                stages = _stages(explain)
+                assert "IXSCAN" in stages and "COLLSCAN" not in stages, stages
+
+    run(scenario())
+
+def test_entries_page_matches_documented_model(run, mongo, api):
+    import main
+
+    async def scenario():
+        await _seed(mongo.entries, 30)
+        async with api() as http:
+            schema = (await http.get("/openapi.json")).json()
+            documented = schema["paths"]["/entries"]["get"]["responses"]["200"]["content"]["application/json"]
+            assert documented["schema"]["$ref"].endswith("/EntryPage")
+
+            page = (await http.get("/entries", params={"limit": 10})).json()
+            main.EntryPage.model_validate(page)
+            assert len(page["entries"]) == 10 and page["next_after"] == page["entries"][-1]["_id"]
+            # fields ile modelde olmayan alanlar da döner
+            page = (await http.get("/entries", params={"limit": 10, "fields": "original_text"})).json()
+            assert all(entry["original_text"] == "sentetik kayıt" for entry in page["entries"])
+
+    run(scenario())
+
+def test_entries_fields_overlap_and_invalid_paths(run, mongo, api):
+    async def scenario():
+        await _seed(mongo.entries, 5)
+        async with api() as http:
+            response = await http.get("/entries", params={"fields": "analysis,analysis.konum,name"})
+            assert response.status_code == 200
+            entry = response.json()["entries"][0]
+            assert set(entry) == {"_id", "analysis", "name"} and "urunler" in entry["analysis"]
+
+            for fields in ("$where", "analysis..konum", "name,analysis."):
+                assert (await http.get("/entries", params={"fields": fields})).status_code == 400
+
+    run(scenario())
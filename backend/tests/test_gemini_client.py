@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+
+import gemini_analyzer
+from fake_gemini import FakeGeminiError, FakeGeminiModel
+from gemini_client import CLOSED, OPEN, GeminiClient
+from ingest_worker import DEAD_LETTER_STATUS, IngestWorkerPool
+from rule_extractor import extract_if_confident
+from traffic import TrafficGenerator
+
+def llm_texts(count, seed=1):
+    """Kural tabanlı çıkarıcının çözemediği (Gemini'ye gidecek) metinler"""
+    traffic = TrafficGenerator(seed=seed)
+    texts = []
+    while len(texts) < count:
+        text = traffic.entry()["text"]
+        if extract_if_confident(text) is None and text not in texts:
+            texts.append(text)
+    return texts
+
+class PartialBatchModel(FakeGeminiModel):
+    """Toplu yanıtlarda son metnin karşılığını döndürmeyen sahte model"""
+
+    def _payload(self, prompt, schema):
+        payload = super()._payload(prompt, schema)
+        return payload[:-1] if isinstance(payload, list) else payload
+
+class RejectingModel(FakeGeminiModel):
+    """Prompt'unda rejected metni geçen çağrıları 400 ile reddeden sahte model"""
+
+    def __init__(self, rejected, **kwargs):
+        super().__init__(latency=0, jitter=0, **kwargs)
+        self.rejected = rejected
+
+    def _answer(self, prompt, generation_config=None):
+        if self.rejected in prompt:
+            self.stats["calls"] += 1
+            raise FakeGeminiError("400 Request contains an invalid argument (sahte)", code=400)
+        return super()._answer(prompt, generation_config)
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """Sahte modeli ve ayarlanabilir bir GeminiClient'ı analizciye bağlayan fabrika"""
+    def install(model=None, **client_options):
+        model = model or FakeGeminiModel(latency=0, jitter=0)
+        client = GeminiClient(**{"reset_timeout": 0.05, **client_options})
+        monkeypatch.setattr(gemini_analyzer, "model", model)
+        monkeypatch.setattr(gemini_analyzer, "gemini_client", client)
+        return model, client
+    return install
+
+def test_failed_batch_call_defers_chunk_without_per_item_calls(run, gemini):
+    model, client = gemini(FakeGeminiModel(latency=0, jitter=0, error_rate=1.0), failure_threshold=100)
+    texts = llm_texts(5)
+
+    results = run(gemini_analyzer.analyze_help_texts_batch_async(texts, batch_size=5))
+
+    assert all(r.get("unavailable") for r in results)
+    assert model.stats["calls"] == 1 and client.stats["admitted"] == 1
+
+def test_timed_out_batch_call_defers_chunk(run, gemini, monkeypatch):
+    model, client = gemini(FakeGeminiModel(latency=0.5, jitter=0), failure_threshold=100)
+    monkeypatch.setattr(gemini_analyzer, "GEMINI_TIMEOUT", 0.05)
+    texts = llm_texts(4)
+
+    results = run(gemini_analyzer.analyze_help_texts_batch_async(texts, batch_size=4))
+
+    assert all(r.get("unavailable") for r in results)
+    assert client.stats["admitted"] == 1
+
+def test_missing_batch_items_are_analyzed_one_by_one(run, gemini):
+    model, client = gemini(PartialBatchModel(latency=0, jitter=0))
+    texts = llm_texts(4)
+
+    results = run(gemini_analyzer.analyze_help_texts_batch_async(texts, batch_size=4))
+
+    assert all("error" not in r for r in results)
+    # Bir toplu çağrı ve eksik kalan tek metin için bir çağrı
+    assert model.stats["batch_calls"] == 1 and model.stats["calls"] == 2
+
+def test_breaker_opens_sheds_calls_and_recovers(run, gemini):
+    model, client = gemini(FakeGeminiModel(latency=0, jitter=0, error_rate=1.0), failure_threshold=3)
+    texts = llm_texts(5)
+
+    async def scenario():
+        for text in texts[:3]:
+            assert (await gemini_analyzer.analyze_help_text_async(text)).get("unavailable")
+        assert client.breaker.state == OPEN
+
+        # Devre açıkken çağrı Gemini'ye gitmeden ertelenir
+        rejected = await gemini_analyzer.analyze_help_text_async(texts[3])
+        assert rejected.get("unavailable") and rejected["retry_after"] > 0
+        assert model.stats["calls"] == 3 and client.stats["circuit_open"] == 1
+
+        # Bekleme süresi dolunca yarı açık deneme başarılıysa devre kapanır
+        model.error_rate = 0.0
+        await asyncio.sleep(0.06)
+        assert "error" not in await gemini_analyzer.analyze_help_text_async(texts[4])
+        assert client.breaker.state == CLOSED
+
+    run(scenario())
+
+def test_full_queue_rejects_immediately(run, gemini):
+    model, client = gemini(FakeGeminiModel(latency=0.1, jitter=0), max_concurrency=1, max_queue=1)
+    texts = llm_texts(4)
+
+    async def scenario():
+        return await asyncio.gather(*(gemini_analyzer.analyze_help_text_async(t) for t in texts))
+
+    results = run(scenario())
+
+    assert sum("error" not in r for r in results) == 2
+    assert sum(bool(r.get("unavailable")) for r in results) == 2
+    assert client.stats["queue_full"] == 2
+
+def test_submit_entry_is_deferred_when_gemini_is_down(run, api, gemini):
+    _, client = gemini(FakeGeminiModel(latency=0, jitter=0, error_rate=1.0), failure_threshold=1, reset_timeout=60)
+    text = llm_texts(1)[0]
+
+    async def scenario():
+        async with api() as http:
+            response = (await http.post("/submit-entry", json={"text": text, "name": "Ali"})).json()
+            assert response["degraded"] is True and response["retry_after"] > 0
+            batch = (await http.post("/submit-entries/batch", json={"entries": [{"text": text}]})).json()
+            assert batch["ids"] == [] and len(batch["deferred"]) == 1
+            # İkinci istek devre açıkken Gemini'ye gitmeden ertelendi
+            assert client.breaker.state == OPEN and client.stats["circuit_open"] == 1
+
+    run(scenario())
+
+def test_invalid_request_is_a_failure_not_an_outage(run, gemini):
+    text = llm_texts(1)[0]
+    model, client = gemini(RejectingModel(text), failure_threshold=2)
+
+    async def scenario():
+        for _ in range(3):
+            result = await gemini_analyzer.analyze_help_text_async(text)
+            assert "error" in result and not result.get("unavailable")
+        # Metne özgü hatalar devre kesiciyi açmaz
+        assert client.breaker.state == CLOSED
+        assert client.stats["rejected_input"] == 3 and client.stats["failed"] == 0
+
+    run(scenario())
+
+def test_invalid_text_in_batch_fails_alone(run, gemini):
+    texts = llm_texts(4)
+    model, client = gemini(RejectingModel(texts[2]))
+
+    results = run(gemini_analyzer.analyze_help_texts_batch_async(texts, batch_size=4))
+
+    assert "error" in results[2] and not results[2].get("unavailable")
+    assert all("error" not in r for i, r in enumerate(results) if i != 2)
+
+def test_invalid_text_is_dead_lettered(run, mongo, gemini):
+    text = llm_texts(1)[0]
+    gemini(RejectingModel(text))
+
+    async def scenario():
+        pool = IngestWorkerPool(mongo.entries, gemini_analyzer.analyze_help_text_async,
+                                max_attempts=3, base_backoff=0)
+        await mongo.entries.insert_one(pool.pending_document("Ayşe", text))
+        while (entry := await pool.claim()) is not None:
+            await pool.process(entry)
+        doc = await mongo.entries.find_one({})
+        assert doc["status"] == DEAD_LETTER_STATUS and doc["attempts"] == 3
+        assert pool.stats["retried"] == 2 and pool.stats["deferred"] == 0
+
+    run(scenario())
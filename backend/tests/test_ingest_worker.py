@@ -0,0 +1,72 @@
+import asyncio
+
+from ingest_worker import ACTIVE_STATUS, PENDING_STATUS, IngestWorkerPool
+
+ANALYSIS = {"konum": "Hatay", "ihtiyac_var": True, "urunler": []}
+
+def _pool(mongo, analyze, analyzed):
+    async def on_analyzed(entry):
+        analyzed.append(entry["_id"])
+    return IngestWorkerPool(mongo.entries, analyze, on_analyzed=on_analyzed, claim_timeout=0)
+
+async def _two_claims(pool):
+    """Aynı kaydın süresi dolan sahiplenmesi ve onu devralan ikinci sahiplenme"""
+    await pool.collection.insert_one(pool.pending_document("Ayşe", "Hatay'da su lazım"))
+    stale = await pool.claim()
+    await asyncio.sleep(0.01)
+    current = await pool.claim()
+    assert stale["_id"] == current["_id"] and stale["claimed_at"] != current["claimed_at"]
+    return stale, current
+
+def test_reclaimed_entry_is_applied_once(run, mongo):
+    async def analyze(text):
+        return dict(ANALYSIS)
+
+    async def scenario():
+        analyzed = []
+        pool = _pool(mongo, analyze, analyzed)
+        stale, current = await _two_claims(pool)
+
+        await pool.process(current)
+        await pool.process(stale)
+
+        assert len(analyzed) == 1
+        assert pool.stats["processed"] == 1 and pool.stats["lost_claims"] == 1
+        doc = await mongo.entries.find_one({"_id": current["_id"]})
+        assert doc["status"] == ACTIVE_STATUS and "claimed_at" not in doc
+
+    run(scenario())
+
+def test_stale_worker_cannot_finish_reclaimed_entry(run, mongo):
+    async def analyze(text):
+        return dict(ANALYSIS)
+
+    async def scenario():
+        analyzed = []
+        pool = _pool(mongo, analyze, analyzed)
+        stale, current = await _two_claims(pool)
+
+        # Geç kalan işçi önce bitirse de kayıt devralan işçinindir
+        await pool.process(stale)
+        assert analyzed == []
+        await pool.process(current)
+        assert analyzed == [current["_id"]]
+
+    run(scenario())
+
+def test_stale_worker_failure_does_not_requeue_reclaimed_entry(run, mongo):
+    async def analyze(text):
+        raise RuntimeError("zaman aşımı")
+
+    async def scenario():
+        pool = _pool(mongo, analyze, [])
+        stale, current = await _two_claims(pool)
+
+        await pool.process(stale)
+        assert pool.stats["retried"] == 0 and pool.stats["lost_claims"] == 1
+        await pool.process(current)
+        doc = await mongo.entries.find_one({"_id": current["_id"]})
+        assert doc["status"] == PENDING_STATUS and doc["attempts"] == 2
+        assert pool.stats["retried"] == 1
+
+    run(scenario())
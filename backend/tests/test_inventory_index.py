@@ -0,0 +1,56 @@
+import asyncio
+
+from inventory_index import InventoryIndex, stock_id
+
+MARKETS = {
+    "Adana": [
+        {"name": "Uzak Market", "distance": 12, "capacity": 500, "products": {"Su": 300}},
+        {"name": "Yakın Market", "distance": 2, "capacity": 500, "products": {"Su": 200, "Battaniye": 50}},
+    ],
+}
+
+async def _worker(mongo):
+    """Aynı inventory koleksiyonunu paylaşan bir worker'ın dizini"""
+    index = InventoryIndex(MARKETS, collection=mongo.inventory)
+    await index.seed()
+    return index
+
+def test_decrement_takes_nearest_market_first(run, mongo):
+    async def scenario():
+        index = await _worker(mongo)
+        assert await index.decrement("su", "Adana", 250)
+        assert index.available("Su", "Adana") == 250
+        assert index.breakdown("Su", "Adana") == [
+            {"market": "Yakın Market", "amount": 0}, {"market": "Uzak Market", "amount": 250}
+        ]
+        # Yetersiz stokta hiçbir şey değişmez
+        assert not await index.decrement("Su", "Adana", 251)
+        assert (await mongo.inventory.find_one({"_id": stock_id("Adana", "su")}))["stock"] == 250
+
+        assert await index.restock("Su", "Adana", 250)
+        assert index.breakdown("Su", "Adana")[0] == {"market": "Yakın Market", "amount": 200}
+        assert not await index.decrement("Su", "Ankara", 1)
+
+    run(scenario())
+
+def test_workers_share_stock(run, mongo):
+    async def scenario():
+        first, second = await _worker(mongo), await _worker(mongo)
+        # İki worker'ın önbelleği de 500 görür; toplamda yalnızca 500 düşülebilir
+        results = await asyncio.gather(*(
+            worker.decrement("Su", "Adana", 30) for _ in range(20) for worker in (first, second)
+        ))
+        assert sum(results) == 500 // 30
+        stock = (await mongo.inventory.find_one({"_id": stock_id("Adana", "su")}))["stock"]
+        assert stock == 500 - 30 * (500 // 30)
+
+        await first.refresh()
+        await second.refresh()
+        assert first.available("Su", "Adana") == second.available("Su", "Adana") == stock
+
+        # Sonradan açılan worker stoğu sıfırlamaz
+        third = await _worker(mongo)
+        assert third.available("Su", "Adana") == stock
+        assert third.available("Battaniye", "Adana") == 50
+
+    run(scenario())
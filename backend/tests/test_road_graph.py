@@ -0,0 +1,25 @@
+from mock_trucks import calculate_route
+from road_graph import ROAD_EDGES, get_road_graph
+
+# Doğrudan kenarı olmayan çiftler: (başlangıç, varış, beklenen km, beklenen yol)
+INDIRECT_PAIRS = [
+    ("Trabzon", "Ankara", 650, ["Trabzon", "Samsun", "Ankara"]),
+    ("Mardin", "Van", 550, ["Mardin", "Diyarbakır", "Van"]),
+    ("Hatay", "Adana", 220, ["Hatay", "Osmaniye", "Adana"]),
+    ("Kocaeli", "Eskişehir", 395, ["Kocaeli", "Bursa", "Eskişehir"]),
+]
+
+def test_pairs_without_direct_edge_use_shortest_path():
+    graph = get_road_graph()
+    for from_city, to_city, km, path in INDIRECT_PAIRS:
+        assert (from_city, to_city) not in ROAD_EDGES and (to_city, from_city) not in ROAD_EDGES
+        route = calculate_route(from_city, to_city)
+        assert route["distance"] == km
+        assert route["path"] == path
+        # Simetri
+        assert graph.distance(to_city, from_city) == km
+        assert graph.path(to_city, from_city) == path[::-1]
+
+def test_unknown_city_has_no_route():
+    assert calculate_route("Hatay", "Atlantis") is None
+    assert calculate_route("Atlantis", "Hatay") is None
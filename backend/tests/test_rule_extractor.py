@@ -0,0 +1,40 @@
+import pytest
+
+from rule_extractor import extract, extract_if_confident
+
+def _products(analysis):
+    return {(u["urun_adi"], u["miktar"]) for u in analysis["urunler"]}
+
+# Serbest metin: ya doğru çözülmeli ya da Gemini'ya bırakılmalı (None)
+@pytest.mark.parametrize("text, expected", [
+    # Tır sayısı ürünü silmemeli; suyun miktarı belirsiz
+    ("Hatay'da 10 tır su lazım", None),
+    # "2 saattir" suyun miktarı değil
+    ("Malatya 2 saattir su bekliyoruz", None),
+    # "3 gündür" suyun miktarı değil; ilk eşleşmede durulmamalı
+    ("Hatay'da 3 gündür su yok 50 su lazım", None),
+    ("Hatay'da 10 tır ve 200 şişe su lazım", {("Tır", 10), ("Su", 200)}),
+    ("Hatay 200 şişe su ve 50 battaniye lazım", {("Su", 200), ("Battaniye", 50)}),
+    ("Lojistik firması olarak 5 tır sunabilirim. Konum: Ankara", {("Tır", 5)}),
+])
+def test_free_text_is_correct_or_falls_back(text, expected):
+    analysis = extract_if_confident(text)
+    if expected is None:
+        assert analysis is None
+    else:
+        assert analysis is not None and _products(analysis) == expected
+
+def test_products_kept_when_trucks_mentioned():
+    analysis, _ = extract("Hatay'da 10 tır su lazım")
+    assert {u["urun_adi"] for u in analysis["urunler"]} == {"Tır", "Su"}
+
+def test_only_adjacent_quantity_is_used():
+    analysis, _ = extract("Hatay'da 3 gündür su yok 50 su lazım")
+    assert _products(analysis) == {("Su", 50)}
+    analysis, _ = extract("Malatya 2 saattir su bekliyoruz")
+    assert _products(analysis) == {("Su", 0)}
+
+def test_form_layout_is_confident():
+    analysis = extract_if_confident("İçme suyu: 10 adet, Battaniye: 5 adet malzemelerini bağışlayabilirim. Konumum: İstanbul")
+    assert analysis is not None
+    assert _products(analysis) == {("İçme suyu", 10), ("Battaniye", 5)}
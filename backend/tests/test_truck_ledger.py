@@ -0,0 +1,201 @@
+import asyncio
+import random
+
+from jobs import DONE, FINISHED
+from mock_trucks import MOCK_TRUCKS
+from truck_ledger import TruckLedger, fleet_id
+
+FLEETS = {
+    "Adana": [{"company": "Çukurova Transport", "trucks": 4, "capacity_per_truck": 1000}],
+}
+
+async def _ledger(mongo, **kwargs):
+    ledger = TruckLedger(mongo.trucks, **kwargs)
+    await ledger.ensure_indexes()
+    await ledger.seed(FLEETS)
+    return ledger
+
+async def _counters(mongo):
+    doc = await mongo.trucks.find_one({"_id": fleet_id("Adana", "Çukurova Transport")})
+    return doc["available_trucks"], doc["reserved_trucks"], doc["dispatched_trucks"]
+
+def test_reserve_confirm_complete_cycle(run, mongo):
+    async def scenario():
+        ledger = await _ledger(mongo)
+        reservation = await ledger.reserve_amount("Adana", 2500)
+        assert reservation["trucks"] == 3
+        assert await _counters(mongo) == (1, 3, 0)
+
+        confirmed = await ledger.confirm(reservation["id"])
+        assert confirmed["status"] == "confirmed"
+        assert await _counters(mongo) == (1, 0, 3)
+        # Filonun kalan kapasitesi yetmez
+        assert await ledger.reserve_amount("Adana", 2500) is None
+
+        completed = await ledger.complete(reservation["id"])
+        assert completed["status"] == "completed"
+        assert completed["trucks"] == 3
+        assert await _counters(mongo) == (4, 0, 0)
+        # Aynı sefer ikinci kez tamamlanamaz
+        assert await ledger.complete(reservation["id"]) is None
+        assert await ledger.reserve_amount("Adana", 2500) is not None
+
+    run(scenario())
+
+def test_trips_return_after_travel_time(run, mongo):
+    async def scenario():
+        ledger = await _ledger(mongo)
+        late = await ledger.reserve("Adana", "Çukurova Transport", 1)
+        due = await ledger.reserve("Adana", "Çukurova Transport", 2)
+        await ledger.confirm(late["id"], trip_seconds=3600)
+        await ledger.confirm(due["id"], trip_seconds=0)
+        await asyncio.sleep(0.01)
+
+        assert await ledger.return_trips() == 1
+        assert await _counters(mongo) == (3, 0, 1)
+        assert (await ledger.get_metrics())["open_trips"] == 1
+
+    run(scenario())
+
+def test_released_and_expired_holds_are_not_dispatched(run, mongo):
+    async def scenario():
+        ledger = await _ledger(mongo, hold_ttl=0)
+        released = await ledger.reserve("Adana", "Çukurova Transport", 1)
+        expired = await ledger.reserve("Adana", "Çukurova Transport", 2)
+        assert (await ledger.release(released["id"]))["status"] == "released"
+        await asyncio.sleep(0.01)
+        assert await ledger.expire_holds() == 1
+
+        assert await ledger.confirm(expired["id"]) is None
+        assert await ledger.complete(expired["id"]) is None
+        assert await _counters(mongo) == (4, 0, 0)
+
+    run(scenario())
+
+def test_seed_returns_trucks_dispatched_without_trips(run, mongo):
+    async def scenario():
+        await _ledger(mongo)
+        # Sefer kaydı tutulmadan sevk edilmiş (eski sürümden kalan) tırlar
+        await mongo.trucks.update_one(
+            {"_id": fleet_id("Adana", "Çukurova Transport")},
+            {"$inc": {"available_trucks": -3, "dispatched_trucks": 3}}
+        )
+        await _ledger(mongo)
+        assert await _counters(mongo) == (4, 0, 0)
+
+    run(scenario())
+
+def test_concurrent_reservations_never_overallocate(run, mongo):
+    async def scenario():
+        ledger = await _ledger(mongo)
+        reservations = await asyncio.gather(
+            *(ledger.reserve("Adana", "Çukurova Transport", 1) for _ in range(20))
+        )
+        granted = [r for r in reservations if r is not None]
+        assert len(granted) == 4
+        assert await _counters(mongo) == (0, 4, 0)
+
+    run(scenario())
+
+async def _stress(db, dispatches=2000, rounds=2):
+    """
+    MOCK_TRUCKS filolarına aynı anda dispatches rezervasyon; her biri rastgele
+    onaylanır, bırakılır veya terk edilir. Her turdan sonra sayaçlar tutarlı olmalı.
+    """
+    ledger = TruckLedger(db.trucks, hold_ttl=0.2)
+    await ledger.ensure_indexes()
+    await ledger.seed(MOCK_TRUCKS)
+    rng = random.Random(7)
+    cities = list(MOCK_TRUCKS)
+
+    for _ in range(rounds):
+        reservations = await asyncio.gather(
+            *(ledger.reserve_amount(rng.choice(cities), rng.randint(1000, 40000)) for _ in range(dispatches))
+        )
+        held = [r for r in reservations if r is not None]
+        assert held
+
+        async def settle(reservation, action):
+            if action < 0.5:
+                return await ledger.confirm(reservation["id"])
+            if action < 0.8:
+                await ledger.release(reservation["id"])
+            # Kalanlar terk edilir; süpürücü geri alır
+
+        confirmed = await asyncio.gather(*(settle(r, rng.random()) for r in held))
+        await asyncio.sleep(ledger.hold_ttl)
+        await ledger.expire_holds()
+
+        dispatched = {}
+        for trip in filter(None, confirmed):
+            key = fleet_id(trip["city"], trip["company"])
+            dispatched[key] = dispatched.get(key, 0) + trip["trucks"]
+        async for doc in db.trucks.find():
+            assert doc["available_trucks"] + doc["reserved_trucks"] + doc["dispatched_trucks"] == doc["trucks"]
+            assert min(doc["available_trucks"], doc["reserved_trucks"], doc["dispatched_trucks"]) >= 0
+            assert doc["reserved_trucks"] == sum(h["trucks"] for h in doc["holds"]) == 0
+            assert doc["dispatched_trucks"] == sum(t["trucks"] for t in doc["trips"])
+            assert doc["dispatched_trucks"] == dispatched.get(doc["_id"], 0)
+
+        # Seferler dönsün ki sonraki turda yine yarışılacak kapasite olsun
+        for trip in filter(None, confirmed):
+            assert await ledger.complete(trip["id"]) is not None
+
+def test_concurrent_dispatch_stress(run, mongo):
+    run(_stress(mongo, dispatches=500))
+
+def test_concurrent_dispatch_stress_real_mongo(run, real_mongo):
+    async def scenario():
+        async with real_mongo() as db:
+            await _stress(db)
+
+    run(scenario())
+
+def test_complete_endpoint(run, api):
+    async def scenario():
+        async with api() as http:
+            reservation = (await http.post("/trucks/reservations", params={"city": "Adana", "amount": 5000})).json()
+            confirmed = await http.post(f"/trucks/reservations/{reservation['id']}/confirm",
+                                        params={"to_city": "Hatay"})
+            assert confirmed.status_code == 200
+            assert "returns_at" in confirmed.json()
+            assert (await http.get("/trucks/metrics")).json()["open_trips"] == 1
+
+            completed = await http.post(f"/trucks/reservations/{reservation['id']}/complete")
+            assert completed.status_code == 200
+            assert completed.json()["trucks"] == reservation["trucks"]
+            assert (await http.post(f"/trucks/reservations/{reservation['id']}/complete")).status_code == 404
+            metrics = (await http.get("/trucks/metrics")).json()
+            assert metrics["open_trips"] == 0 and metrics["dispatched_trucks"] == 0
+
+    run(scenario())
+
+def test_simulation_releases_trucks_when_stock_is_gone(run, api, monkeypatch):
+    import main
+
+    async def spent_elsewhere(product, city, amount):
+        # Planlamadan sonra stoğu başka bir worker harcadı
+        return False
+
+    async def scenario():
+        async with api() as http:
+            for text in ("Hatay'da 200 şişe su lazım acil", "Hatay'da 50 battaniye lazım acil"):
+                assert (await http.post("/submit-entry", json={"text": text, "name": "Ayşe"})).status_code == 200
+            monkeypatch.setattr(main.inventory, "decrement", spent_elsewhere)
+
+            job = (await http.post("/simulate-earthquake", params={"konum": "Hatay"})).json()
+            for _ in range(200):
+                result = (await http.get(f"/jobs/{job['job_id']}")).json()
+                if result["status"] in FINISHED:
+                    break
+                await asyncio.sleep(0.01)
+            assert result["status"] == DONE
+            usage = result["result"]["fleet_usage"]
+            assert usage and {u["status"] for u in usage} == {"no_stock_available"}
+            assert result["result"]["logistics_support"] == []
+
+            metrics = (await http.get("/trucks/metrics")).json()
+            assert metrics["reserved_trucks"] == metrics["dispatched_trucks"] == 0
+            assert metrics["open_holds"] == metrics["open_trips"] == 0
+
+    run(scenario())
@@ -0,0 +1,44 @@
+# text_utils.py
+import re
+import unicodedata
+
+# Türkçe'ye özgü büyük/küçük harf eşlemeleri (str.lower() İ/I için yanlış sonuç verir)
+_TURKISH_LOWER = str.maketrans({"İ": "i", "I": "ı"})
+
+_WHITESPACE = re.compile(r"\s+")
+# 1.000 / 1 000 gibi binlik ayraçları (Türkçe'de virgül ondalık ayracıdır)
+_THOUSANDS_SEPARATOR = re.compile(r"(?<=\d)[. ](?=\d{3}(?!\d))")
+_LEADING_ZEROS = re.compile(r"\b0+(?=\d)")
+
+def turkish_casefold(text):
+    """Metni Türkçe kurallarına göre küçük harfe çevirir (İ→i, I→ı)"""
+    return text.translate(_TURKISH_LOWER).lower()
+
+def normalize_text(text):
+    """
+    Aynı anlama gelen metinleri aynı biçime getirir.
+    
+    Unicode biçimini (NFKC) ve rakamları ASCII'ye indirger, binlik ayraçları ve
+    baştaki sıfırları atar, Türkçe küçük harfe çevirir, boşlukları tek boşluğa
+    indirir. Miktarlar korunur; "200 su" ile "300 su" farklı kalır.
+    
+    Args:
+        text (str): Ham metin
+    
+    Returns:
+        str: Normalize edilmiş metin
+    """
+    text = unicodedata.normalize("NFKC", text)
+    # NFKC tüm rakam sistemlerini çevirmez (örn. Arapça-Hint rakamları)
+    text = "".join(
+        str(unicodedata.digit(ch)) if ch.isdigit() and not ch.isascii() else ch
+        for ch in text
+    )
+    text = _THOUSANDS_SEPARATOR.sub("", text)
+    text = _LEADING_ZEROS.sub("", text)
+    text = turkish_casefold(text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+def product_key(name):
+    """Ürün adından karşılaştırma/index için kullanılan anahtarı üretir ("İçme  Suyu" → "içme suyu")"""
+    return _WHITESPACE.sub(" ", turkish_casefold(str(name))).strip()
@@ -0,0 +1,281 @@
+# trend_rollups.py
+import asyncio
+import math
+import os
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+from product_catalog import canonical_name, resolve, to_base_units
+from stock_aggregates import UNKNOWN_CITY
+
+# Kova boyları
+HOUR = "hour"
+DAY = "day"
+
+_STEP = {HOUR: timedelta(hours=1), DAY: timedelta(days=1)}
+_COUNTERS = ("demand", "supply", "demand_entries", "supply_entries")
+
+def bucket_start(timestamp, granularity):
+    """Zamanın içinde bulunduğu saat/gün kovasının başlangıcı"""
+    if granularity == DAY:
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+def bucket_id(granularity, city, product, start):
+    return f"{granularity}|{city}|{product}|{start:%Y-%m-%dT%H}"
+
+def entry_amounts(entry):
+    """
+    Kaydın ürün bazında katkısı: {ürün anahtarı: adet}. Kayıt ihtiyaçsa talebe,
+    bağışsa arza yazılır; miktarlar stock_aggregates ile aynı biçimde adede çevrilir.
+    """
+    amounts = {}
+    for product in (entry.get("analysis") or {}).get("urunler", []):
+        if not isinstance(product, dict) or product.get("urun_adi") is None:
+            continue
+        key = product.get("urun_key") or resolve(str(product["urun_adi"]))
+        amount = product.get("miktar_adet")
+        if amount is None:
+            amount = to_base_units(key, product.get("miktar") or 0, product.get("birim"))
+        amounts[key] = amounts.get(key, 0) + amount
+    return amounts
+
+class TrendRollups:
+    """
+    Şehir × ürün × saat kovalarında arz/talep toplamları (trend panoları için).
+
+    Kayıtlar analiz edildiği anda (on_entries_analyzed) kayıt zamanının saat
+    kovasına $inc ile işlenir; böylece "son bir saatte Hatay'da su talebi ne
+    kadar arttı" sorusu ham kayıtları taramadan, pencere başına birkaç kova
+    okunarak yanıtlanır. hourly_retention saatten eski saat kovaları arka
+    planda gün kovalarına katlanır (compact); bu sınırdan eski zamanlı
+    gecikmiş kayıtlar doğrudan gün kovasına yazılır.
+    """
+
+    def __init__(self, collection, hourly_retention=48, compact_interval=600.0, compact_batch=1000):
+        self.collection = collection
+        self.hourly_retention = hourly_retention
+        self.compact_interval = compact_interval
+        self.compact_batch = compact_batch
+        self._task = None
+        self.stats = {"recorded_entries": 0, "bucket_updates": 0, "compacted": 0, "queries": 0, "buckets_read": 0}
+
+    async def ensure_indexes(self):
+        """Şehir/ürün bazlı pencere sorguları ve sıkıştırma taraması için index'ler"""
+        await self.collection.create_index([("city", 1), ("product", 1), ("granularity", 1), ("bucket", 1)])
+        await self.collection.create_index([("product", 1), ("granularity", 1), ("bucket", 1)])
+        await self.collection.create_index([("granularity", 1), ("bucket", 1)])
+
+    def hourly_cutoff(self, now=None):
+        """Bu andan eski saat kovaları gün kovalarına katlanır (gün başına hizalı)"""
+        now = now or datetime.now()
+        return bucket_start(now - timedelta(hours=self.hourly_retention), DAY)
+
+    def _increment(self, granularity, city, product, start, inc, now):
+        return UpdateOne(
+            {"_id": bucket_id(granularity, city, product, start)},
+            {
+                "$inc": inc,
+                "$set": {"updated_at": now},
+                "$setOnInsert": {"granularity": granularity, "city": city, "product": product, "bucket": start}
+            },
+            upsert=True
+        )
+
+    async def record(self, entries):
+        """Analiz edilmiş kayıtları kovalarına tek bulk_write'ta işler"""
+        now = datetime.now()
+        cutoff = self.hourly_cutoff(now)
+        increments = {}
+        for entry in entries:
+            amounts = entry_amounts(entry)
+            if not amounts:
+                continue
+            city = (entry.get("analysis") or {}).get("konum") or UNKNOWN_CITY
+            side = "demand" if (entry.get("analysis") or {}).get("ihtiyac_var") else "supply"
+            timestamp = entry.get("timestamp") or now
+            granularity = HOUR if bucket_start(timestamp, HOUR) >= cutoff else DAY
+            start = bucket_start(timestamp, granularity)
+            for product, amount in amounts.items():
+                inc = increments.setdefault((granularity, city, product, start), {})
+                inc[side] = inc.get(side, 0) + amount
+                inc[side + "_entries"] = inc.get(side + "_entries", 0) + 1
+            self.stats["recorded_entries"] += 1
+
+        operations = [self._increment(*key, inc, now) for key, inc in increments.items()]
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+            self.stats["bucket_updates"] += len(operations)
+
+    async def compact(self, now=None):
+        """
+        Saklama süresini aşan saat kovalarını gün kovalarına katlar.
+
+        Her saat kovası find_one_and_delete ile alınır, böylece aynı anda
+        çalışan worker'lar bir kovayı iki kez sayamaz; silindikten sonra gelen
+        bir artış kovayı yeniden oluşturursa bir sonraki turda katlanır.
+
+        Returns:
+            int: Katlanan saat kovası sayısı
+        """
+        cutoff = self.hourly_cutoff(now)
+        compacted = 0
+        while compacted < self.compact_batch:
+            doc = await self.collection.find_one_and_delete(
+                {"granularity": HOUR, "bucket": {"$lt": cutoff}}, sort=[("bucket", 1)]
+            )
+            if doc is None:
+                break
+            inc = {field: doc[field] for field in _COUNTERS if doc.get(field)}
+            if inc:
+                await self.collection.bulk_write([self._increment(
+                    DAY, doc["city"], doc["product"], bucket_start(doc["bucket"], DAY), inc, datetime.now()
+                )])
+            compacted += 1
+        self.stats["compacted"] += compacted
+        return compacted
+
+    def start(self):
+        """Saat kovalarını düzenli olarak katlayan süpürücüyü başlatır"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._sweep())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _sweep(self):
+        while True:
+            try:
+                # Parti dolduysa kalanlar hemen katlanır
+                if await self.compact() >= self.compact_batch:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Bir sonraki turda tekrar denenir
+                pass
+            await asyncio.sleep(self.compact_interval)
+
+    async def trends(self, city=None, product=None, window_hours=1, granularity=None, limit=20, now=None):
+        """
+        Son window_hours saatin arz/talebini bir önceki eşit uzunluktaki
+        pencereyle karşılaştırır.
+
+        Pencereler kova başına hizalıdır ve içinde bulunulan (yarım) kovayı
+        içerir. granularity verilmezse iki pencere birlikte saat kovalarının
+        saklama süresine sığıyorsa saatlik, sığmıyorsa günlük seri döner;
+        günlük seride henüz katlanmamış saat kovaları da güne eklenir.
+
+        Returns:
+            dict: Şehir × ürün başına güncel ve önceki pencere toplamları,
+            değişim, saatlik hız ve kova serisi; talep artışı en yüksek önce
+        """
+        now = now or datetime.now()
+        if granularity is None:
+            granularity = HOUR if 2 * window_hours <= self.hourly_retention else DAY
+        step = _STEP[granularity]
+        buckets = max(1, math.ceil(timedelta(hours=window_hours) / step))
+        current_start = bucket_start(now, granularity) - (buckets - 1) * step
+        previous_start = current_start - buckets * step
+
+        query = {"bucket": {"$gte": previous_start}}
+        if granularity == HOUR:
+            query["granularity"] = HOUR
+        if city:
+            query["city"] = city
+        if product:
+            query["product"] = resolve(product)
+
+        series = {}
+        read = 0
+        async for doc in self.collection.find(query, projection={"updated_at": 0}):
+            read += 1
+            start = bucket_start(doc["bucket"], granularity)
+            counters = series.setdefault((doc["city"], doc["product"]), {}).setdefault(
+                start, dict.fromkeys(_COUNTERS, 0)
+            )
+            for field in _COUNTERS:
+                counters[field] += doc.get(field, 0)
+        self.stats["queries"] += 1
+        self.stats["buckets_read"] += read
+
+        hours = buckets * step / timedelta(hours=1)
+        trends = []
+        for (doc_city, doc_product), points in series.items():
+            current = dict.fromkeys(_COUNTERS, 0)
+            previous = dict.fromkeys(_COUNTERS, 0)
+            for start, counters in points.items():
+                window = current if start >= current_start else previous
+                for field in _COUNTERS:
+                    window[field] += counters[field]
+            trends.append({
+                "konum": doc_city,
+                "urun_key": doc_product,
+                "urun": canonical_name(doc_product),
+                "current": current,
+                "previous": previous,
+                "demand_change": current["demand"] - previous["demand"],
+                "supply_change": current["supply"] - previous["supply"],
+                "demand_per_hour": round(current["demand"] / hours, 2),
+                "supply_per_hour": round(current["supply"] / hours, 2),
+                "series": [
+                    {"bucket": start, **points[start]}
+                    for start in sorted(points) if start >= current_start
+                ]
+            })
+        trends.sort(key=lambda item: (item["demand_change"], item["current"]["demand"]), reverse=True)
+        return {
+            "window_hours": window_hours,
+            "granularity": granularity,
+            "from": current_start,
+            "previous_from": previous_start,
+            "to": now,
+            "buckets_read": read,
+            "trends": trends[:limit]
+        }
+
+    def get_stats(self):
+        return {**self.stats, "hourly_retention_hours": self.hourly_retention}
+
+async def rebuild_rollups(entries_collection, rollups_collection, hourly_retention=48, batch_size=1000):
+    """
+    Kovaları tüm analiz edilmiş kayıtlardan baştan hesaplar (ilk kurulum veya
+    tutarlılık onarımı). Hesaplama sırasında gelen kayıtların artışları
+    kaybolabileceği için yoğun olmayan bir zamanda çalıştırılmalıdır.
+    """
+    rollups = TrendRollups(rollups_collection, hourly_retention=hourly_retention)
+    await rollups_collection.delete_many({})
+    batch = []
+    async for entry in entries_collection.find(
+        {"analysis": {"$exists": True}},
+        projection={"analysis.konum": 1, "analysis.ihtiyac_var": 1, "analysis.urunler": 1, "timestamp": 1}
+    ):
+        batch.append(entry)
+        if len(batch) == batch_size:
+            await rollups.record(batch)
+            batch = []
+    if batch:
+        await rollups.record(batch)
+    return rollups.stats["recorded_entries"]
+
+async def _main():
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv()
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    db = client[os.getenv("DATABASE_NAME", "deprem_yardim")]
+    await TrendRollups(db.trend_rollups).ensure_indexes()
+    count = await rebuild_rollups(
+        db.entries, db.trend_rollups, hourly_retention=int(os.getenv("TREND_HOURLY_RETENTION", "48"))
+    )
+    print(f"{count} kayıt trend kovalarına işlendi")
+    client.close()
+
+if __name__ == "__main__":
+    # Kullanım: python trend_rollups.py
+    asyncio.run(_main())
@@ -0,0 +1,349 @@
+# truck_ledger.py
+import asyncio
+import math
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+
+# Rezervasyon durumları (yanıtlarda döner)
+HELD = "held"
+CONFIRMED = "confirmed"
+RELEASED = "released"
+COMPLETED = "completed"
+
+def fleet_id(city, company):
+    """trucks koleksiyonundaki filo dokümanının _id'si"""
+    return f"{city}|{company}"
+
+def trucks_needed(amount, capacity_per_truck):
+    """amount birimi taşımak için gereken tır sayısı"""
+    return max(1, math.ceil(amount / capacity_per_truck))
+
+def to_fleet(doc):
+    """Filo dokümanını MOCK_TRUCKS biçimine (ve defter alanlarına) çevirir"""
+    return {
+        "company": doc["company"],
+        "trucks": doc["trucks"],
+        "capacity_per_truck": doc["capacity_per_truck"],
+        "status": "available" if doc["available_trucks"] > 0 else "busy",
+        "location": doc.get("location"),
+        "available_trucks": doc["available_trucks"],
+        "reserved_trucks": doc["reserved_trucks"],
+        "dispatched_trucks": doc["dispatched_trucks"]
+    }
+
+class TruckLedger:
+    """
+    trucks koleksiyonunda firma bazlı tır kapasite defteri.
+
+    Her filo tek bir dokümandır; ayırma, available_trucks >= n koşullu
+    find_one_and_update ile yapılır ($inc ve rezervasyonun holds dizisine
+    eklenmesi aynı atomik güncellemededir). Kilit yoktur: aynı filoyu
+    isteyen eşzamanlı çağrılardan yalnızca kapasitesi yetenler başarılı
+    olur. Rezervasyon confirm ile sevk edilir veya release ile geri verilir;
+    hold_ttl içinde onaylanmayan rezervasyonlar süpürücü tarafından geri alınır.
+
+    Sevk edilen rezervasyon filonun trips dizisinde sefer olarak kalır ve
+    complete ile veya dönüş zamanı (returns_at) geçince süpürücü tarafından
+    tamamlanır; tırlar yeniden boşa çıkar. Dönüş süresi verilmeyen seferler
+    trip_ttl saniye sonra döner.
+    """
+
+    def __init__(self, collection, hold_ttl=300.0, sweep_interval=30.0, trip_ttl=86400.0):
+        self.collection = collection
+        self.hold_ttl = hold_ttl
+        self.sweep_interval = sweep_interval
+        self.trip_ttl = trip_ttl
+        self._task = None
+        self.stats = {
+            "reserved": 0,
+            "rejected": 0,
+            "confirmed": 0,
+            "released": 0,
+            "expired": 0,
+            "completed": 0,
+            "returned": 0,
+        }
+
+    async def ensure_indexes(self):
+        """Şehir sorguları, rezervasyon/sefer araması ve süpürücü için index oluşturur"""
+        await self.collection.create_index("city")
+        await self.collection.create_index("holds.id")
+        await self.collection.create_index("holds.expires_at")
+        await self.collection.create_index("trips.id")
+        await self.collection.create_index("trips.returns_at")
+
+    async def seed(self, fleets):
+        """
+        MOCK_TRUCKS biçimindeki filoları deftere ekler.
+
+        Var olan filoların sayaçlarına dokunulmaz ($setOnInsert), böylece
+        yeniden başlatma rezervasyonları sıfırlamaz. Sefer kaydı tutulmadan
+        sevk edilmiş (eski sürümden kalan) tırlar boşa çıkarılır.
+        """
+        operations = []
+        for city, city_fleets in fleets.items():
+            for fleet in city_fleets:
+                operations.append(UpdateOne(
+                    {"_id": fleet_id(city, fleet["company"])},
+                    {"$setOnInsert": {
+                        "city": city,
+                        "company": fleet["company"],
+                        "trucks": fleet["trucks"],
+                        "capacity_per_truck": fleet["capacity_per_truck"],
+                        "location": fleet.get("location"),
+                        "available_trucks": fleet["trucks"],
+                        "reserved_trucks": 0,
+                        "dispatched_trucks": 0,
+                        "holds": [],
+                        "trips": []
+                    }},
+                    upsert=True
+                ))
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+
+        async for doc in self.collection.find(
+            {"dispatched_trucks": {"$gt": 0}}, projection={"dispatched_trucks": 1, "trips": 1}
+        ):
+            orphaned = doc["dispatched_trucks"] - sum(trip["trucks"] for trip in doc.get("trips", []))
+            if orphaned > 0:
+                # dispatched_trucks koşulu: arada yapılan bir sevk/dönüş varsa dokunulmaz
+                await self.collection.update_one(
+                    {"_id": doc["_id"], "dispatched_trucks": doc["dispatched_trucks"]},
+                    {"$inc": {"dispatched_trucks": -orphaned, "available_trucks": orphaned},
+                     "$set": {"updated_at": datetime.now()}}
+                )
+
+    def start(self):
+        """Süresi dolan rezervasyonları geri alan süpürücüyü başlatır"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._sweep())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def city_fleets(self, city):
+        """Şehirdeki filoların güncel durumu"""
+        return [
+            to_fleet(doc)
+            async for doc in self.collection.find({"city": city}, projection={"holds": 0, "trips": 0})
+        ]
+
+    async def snapshot(self):
+        """Tüm şehirlerin boştaki tırları: {şehir: [filo, ...]} (planlayıcı için)"""
+        fleets = {}
+        async for doc in self.collection.find({"available_trucks": {"$gt": 0}}, projection={"holds": 0, "trips": 0}):
+            fleet = to_fleet(doc)
+            fleet["trucks"] = doc["available_trucks"]
+            fleets.setdefault(doc["city"], []).append(fleet)
+        return fleets
+
+    async def reserve(self, city, company, trucks, reference=None):
+        """
+        Belirli filodan trucks adet tırı atomik olarak ayırır.
+
+        Returns:
+            dict: Rezervasyon (id, fleet, trucks, expires_at) veya kapasite yoksa None
+        """
+        now = datetime.now()
+        hold = {
+            "id": str(ObjectId()),
+            "trucks": trucks,
+            "reference": reference,
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=self.hold_ttl)
+        }
+        doc = await self.collection.find_one_and_update(
+            {"_id": fleet_id(city, company), "available_trucks": {"$gte": trucks}},
+            {"$inc": {"available_trucks": -trucks, "reserved_trucks": trucks},
+             "$push": {"holds": hold},
+             "$set": {"updated_at": now}},
+            projection={"holds": 0, "trips": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            self.stats["rejected"] += 1
+            return None
+        self.stats["reserved"] += 1
+        return {
+            "id": hold["id"],
+            "status": HELD,
+            "city": city,
+            "company": company,
+            "trucks": trucks,
+            "capacity": trucks * doc["capacity_per_truck"],
+            "expires_at": hold["expires_at"].isoformat()
+        }
+
+    async def reserve_amount(self, city, amount, reference=None):
+        """
+        amount birimi taşıyabilecek bir filodan rezervasyon yapar.
+
+        Yükü tek seferde taşıyabilen en küçük filo önce denenir; yarışta
+        kaybedilen filolar atlanıp sıradakine geçilir.
+        """
+        candidates = []
+        async for doc in self.collection.find(
+            {"city": city, "available_trucks": {"$gt": 0}}, projection={"holds": 0, "trips": 0}
+        ):
+            needed = trucks_needed(amount, doc["capacity_per_truck"])
+            if doc["available_trucks"] >= needed:
+                candidates.append((needed * doc["capacity_per_truck"], doc["company"], needed))
+        for _, company, needed in sorted(candidates):
+            reservation = await self.reserve(city, company, needed, reference)
+            if reservation is not None:
+                return reservation
+        return None
+
+    async def _hold(self, reservation_id):
+        """Rezervasyonun bulunduğu filo ve rezervasyonun kendisi; yoksa (None, None)"""
+        doc = await self.collection.find_one(
+            {"holds.id": reservation_id},
+            projection={"city": 1, "company": 1, "holds": {"$elemMatch": {"id": reservation_id}}}
+        )
+        if doc is None:
+            return None, None
+        return doc, doc["holds"][0]
+
+    async def reservation(self, reservation_id):
+        """Bekleyen rezervasyonun şehri, filosu ve tır sayısı; yoksa None"""
+        doc, hold = await self._hold(reservation_id)
+        if hold is None:
+            return None
+        return {"id": reservation_id, "city": doc["city"], "company": doc["company"], "trucks": hold["trucks"]}
+
+    async def _settle(self, reservation_id, inc, counter, trip_seconds=None):
+        doc, hold = await self._hold(reservation_id)
+        if hold is None:
+            return None
+        now = datetime.now()
+        update = {
+            "$pull": {"holds": {"id": reservation_id}},
+            "$inc": {field: sign * hold["trucks"] for field, sign in inc.items()},
+            "$set": {"updated_at": now}
+        }
+        trip = None
+        if trip_seconds is not None:
+            trip = {
+                "id": reservation_id,
+                "trucks": hold["trucks"],
+                "reference": hold.get("reference"),
+                "dispatched_at": now,
+                "returns_at": now + timedelta(seconds=trip_seconds)
+            }
+            update["$push"] = {"trips": trip}
+        # holds.id koşulu: aynı rezervasyonu onaylama/bırakma/süre dolması yarışında tek kazanan olur
+        result = await self.collection.update_one({"_id": doc["_id"], "holds.id": reservation_id}, update)
+        if result.modified_count == 0:
+            return None
+        self.stats[counter] += 1
+        settled = {"id": reservation_id, "city": doc["city"], "company": doc["company"], "trucks": hold["trucks"]}
+        if trip is not None:
+            settled["returns_at"] = trip["returns_at"].isoformat()
+        return settled
+
+    async def confirm(self, reservation_id, trip_seconds=None):
+        """
+        Rezervasyonu sevk edilmiş olarak işaretler; rezervasyon yoksa None.
+
+        Tırlar trip_seconds (verilmezse trip_ttl) saniye sonra süpürücü
+        tarafından boşa çıkarılır; daha önce dönerlerse complete çağrılır.
+        """
+        result = await self._settle(
+            reservation_id, {"reserved_trucks": -1, "dispatched_trucks": 1}, "confirmed",
+            trip_seconds=self.trip_ttl if trip_seconds is None else trip_seconds
+        )
+        if result is not None:
+            result["status"] = CONFIRMED
+        return result
+
+    async def release(self, reservation_id):
+        """Rezervasyonu iptal edip tırları boşa çıkarır; rezervasyon yoksa None"""
+        result = await self._settle(
+            reservation_id, {"reserved_trucks": -1, "available_trucks": 1}, "released"
+        )
+        if result is not None:
+            result["status"] = RELEASED
+        return result
+
+    async def complete(self, reservation_id, counter="completed"):
+        """Sevk edilen rezervasyonun tırlarının dönüşünü işler; sefer yoksa None"""
+        doc = await self.collection.find_one(
+            {"trips.id": reservation_id},
+            projection={"city": 1, "company": 1, "trips": {"$elemMatch": {"id": reservation_id}}}
+        )
+        if doc is None:
+            return None
+        trip = doc["trips"][0]
+        # trips.id koşulu: elle tamamlama ile süpürücü yarışında tırlar bir kez geri verilir
+        result = await self.collection.update_one(
+            {"_id": doc["_id"], "trips.id": reservation_id},
+            {"$pull": {"trips": {"id": reservation_id}},
+             "$inc": {"dispatched_trucks": -trip["trucks"], "available_trucks": trip["trucks"]},
+             "$set": {"updated_at": datetime.now()}}
+        )
+        if result.modified_count == 0:
+            return None
+        self.stats[counter] += 1
+        return {"id": reservation_id, "status": COMPLETED, "city": doc["city"],
+                "company": doc["company"], "trucks": trip["trucks"]}
+
+    async def return_trips(self):
+        """Dönüş zamanı geçmiş seferlerin tırlarını boşa çıkarır; dönen sefer sayısını döndürür"""
+        now = datetime.now()
+        returned = 0
+        async for doc in self.collection.find(
+            {"trips.returns_at": {"$lt": now}}, projection={"trips": 1}
+        ):
+            for trip in doc["trips"]:
+                if trip["returns_at"] < now and await self.complete(trip["id"], counter="returned"):
+                    returned += 1
+        return returned
+
+    async def expire_holds(self):
+        """Süresi dolmuş rezervasyonları geri alır; geri alınan sayıyı döndürür"""
+        now = datetime.now()
+        expired = 0
+        async for doc in self.collection.find(
+            {"holds.expires_at": {"$lt": now}}, projection={"holds": 1}
+        ):
+            for hold in doc["holds"]:
+                if hold["expires_at"] < now and await self._settle(
+                    hold["id"], {"reserved_trucks": -1, "available_trucks": 1}, "expired"
+                ):
+                    expired += 1
+        return expired
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.expire_holds()
+                await self.return_trips()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Bir sonraki turda tekrar denenir
+                pass
+
+    async def get_metrics(self):
+        """Toplam tır durumları ve rezervasyon sayaçları"""
+        totals = {"available_trucks": 0, "reserved_trucks": 0, "dispatched_trucks": 0,
+                  "open_holds": 0, "open_trips": 0}
+        async for doc in self.collection.aggregate([
+            {"$group": {
+                "_id": None,
+                "available_trucks": {"$sum": "$available_trucks"},
+                "reserved_trucks": {"$sum": "$reserved_trucks"},
+                "dispatched_trucks": {"$sum": "$dispatched_trucks"},
+                "open_holds": {"$sum": {"$size": {"$ifNull": ["$holds", []]}}},
+                "open_trips": {"$sum": {"$size": {"$ifNull": ["$trips", []]}}}
+            }}
+        ]):
+            totals = {k: v for k, v in doc.items() if k != "_id"}
+        return {**totals, **self.stats}